@@ -0,0 +1,9 @@
+# Settings for `manage.py run_benchmarks`: the project settings on a throwaway SQLite database
+from .settings import *  # noqa
+
+DATABASES = {
+    'default': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': BASE_DIR / 'benchmark.sqlite3',
+    }
+}
@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/4.2/ref/settings/
 """
 import os
+import sys
 from datetime import timedelta
 from pathlib import Path
 
@@ -54,10 +55,11 @@ SIMPLE_JWT = {
     'REFRESH_TOKEN_LIFETIME': timedelta(days=1),
     'AUTH_HEADER_TYPES': ('Bearer',),
     'AUTH_TOKEN_CLASSES': ('rest_framework_simplejwt.tokens.AccessToken',),
+    'TOKEN_OBTAIN_SERIALIZER': 'users_pzc.authentication.VersionedTokenObtainPairSerializer',
 }
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'users_pzc.authentication.CachedJWTAuthentication',
     ),
     'DEFAULT_FILTER_BACKENDS': ['django_filters.rest_framework.DjangoFilterBackend'],
     'DEFAULT_PERMISSION_CLASSES': [
@@ -73,6 +75,7 @@ CORS_ALLOWED_ORIGINS = [
 
 
 MIDDLEWARE = [
+    'users_pzc.instrumentation.QueryInstrumentationMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -81,6 +84,7 @@ MIDDLEWARE = [
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     'corsheaders.middleware.CorsMiddleware',
+    'users_pzc.profiling.ProfilingMiddleware',
 ]
 
 ROOT_URLCONF = 'PZC_MVP.urls'
@@ -119,6 +123,23 @@ DATABASES = {
 }
 
 
+# Shared by the worker processes through Redis when PZC_REDIS_URL is set: the data versions
+# keying cached responses and ETags (users_pzc.response_cache) must be the same in every worker.
+# The local memory fallback is for development with a single process
+if os.environ.get('PZC_REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.environ['PZC_REDIS_URL'],
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
 
@@ -158,54 +179,68 @@ MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 MEDIA_URL = 'users_pzc/media/'
 
 
+# Bearer token of the Prometheus scraper for /metrics; without one only staff users can read it
+METRICS_TOKEN = os.environ.get('PZC_METRICS_TOKEN')
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/4.2/ref/settings/#default-auto-field
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+# JSON log lines written by a listener thread; request threads only enqueue.
+# Debug records (SQL included when DEBUG is on) are sampled at LOG_DEBUG_SAMPLE_RATE.
+# `manage.py test` logs nowhere, so test runs leave the log files alone.
+LOG_LEVEL = os.environ.get('PZC_LOG_LEVEL', 'INFO')
+LOG_DEBUG_SAMPLE_RATE = float(os.environ.get('PZC_LOG_DEBUG_SAMPLE_RATE', '0.01'))
+LOG_DIR = os.environ.get('PZC_LOG_DIR', os.path.join(BASE_DIR, 'logs'))
+LOG_TO_FILES = sys.argv[1:2] != ['test']
+
 LOGGING = {
     'version': 1,
     'disable_existing_loggers': False,
-    'formatters': {
-        'verbose': {
-            'format': '{levelname} {asctime} {module} {message}',
-            'style': '{',
-        },
-        'simple': {
-            'format': '{levelname} {message}',
-            'style': '{',
+    'filters': {
+        'sample_debug': {
+            '()': 'users_pzc.structured_logging.SamplingFilter',
+            'rate': LOG_DEBUG_SAMPLE_RATE,
+            'below': 'INFO',
         },
     },
     'handlers': {
-        'console': {
-            'level': 'DEBUG',
-            'class': 'logging.StreamHandler',
-            'formatter': 'verbose',
+        'queue': {
+            '()': 'users_pzc.structured_logging.queued_json_handler',
+            'filename': os.path.join(LOG_DIR, 'pzc.jsonl') if LOG_TO_FILES else None,
+            'console': DEBUG and LOG_TO_FILES,
+            'filters': ['sample_debug'],
         },
-        'file': {
-            'level': 'DEBUG',
-            'class': 'logging.FileHandler',
-            'filename': 'debug.log',
-            'formatter': 'verbose',
+        'slow_queries': {
+            '()': 'users_pzc.structured_logging.queued_json_handler',
+            'filename': os.path.join(LOG_DIR, 'slow_queries.jsonl') if LOG_TO_FILES else None,
         },
     },
     'loggers': {
         'django': {
-            'handlers': ['console', 'file'],
-            'level': 'DEBUG',
-            'propagate': True,
+            'handlers': ['queue'],
+            'level': LOG_LEVEL,
+            'propagate': False,
         },
-        'users_pzc': {  # Replace with your app's name
-            'handlers': ['console', 'file'],
+        'django.db.backends': {
+            'handlers': ['queue'],
+            'level': 'DEBUG' if DEBUG else LOG_LEVEL,
+            'propagate': False,
+        },
+        'django.utils.autoreload': {
+            'handlers': ['queue'],
+            'level': 'INFO',
+            'propagate': False,
+        },
+        'users_pzc': {
+            'handlers': ['queue'],
             'level': 'DEBUG',
             'propagate': False,
         },
+        'users_pzc.slow_queries': {
+            'handlers': ['slow_queries'],
+            'level': 'WARNING',
+            'propagate': False,
+        },
     },
-    'loggers': {
-    'django.utils.autoreload': {
-        'handlers': ['console'],
-        'level': 'INFO',  # Change DEBUG to INFO or WARNING to suppress debug logs
-        'propagate': False,
-    },
-}
-
 }
@@ -16,8 +16,10 @@ Including another URLconf
 """
 from django.contrib import admin
 from django.urls import path,include
+from users_pzc.views import MetricsView
 
 urlpatterns = [
     path('admin/', admin.site.urls),
-    path('api/',include('users_pzc.urls'))
+    path('api/',include('users_pzc.urls')),
+    path('metrics',MetricsView.as_view(),name='metrics'),
 ]
@@ -0,0 +1,39 @@
+from django.db.models import Sum
+
+from .models import Waste, Energy, Water, Biodiversity, Logistices
+
+# Overview card -> (model, total summed over the selected rows)
+OVERALL_USAGE_TOTALS = {
+    'waste_usage': (Waste, Sum('food_waste') + Sum('solid_Waste') + Sum('E_Waste') + Sum('Biomedical_waste') + Sum('other_waste')),
+    'energy_usage': (Energy, Sum('hvac') + Sum('production') + Sum('stp') + Sum('admin_block') + Sum('utilities') + Sum('others')),
+    'water_usage': (Water, Sum('overall_usage')),
+    'biodiversity_usage': (Biodiversity, Sum('overall_Trees')),
+    'logistices_usage': (Logistices, Sum('total_fuelconsumption')),
+}
+
+
+def facility_field_totals(queryset, fields):
+    """
+    Sums every field per facility in one GROUP BY query.
+
+    Returns the per-facility rows (keyed 'facility__facility_name' and
+    'total_<field>') and the overall total of each field derived from them.
+    """
+    rows = list(
+        queryset
+        .values('facility__facility_name')
+        .annotate(**{f"total_{field}": Sum(field) for field in fields})
+        .order_by()
+    )
+    overall = {field: sum(row[f"total_{field}"] or 0 for row in rows) for field in fields}
+    return rows, overall
+
+
+def ranked_by(rows, key):
+    # Largest first, facilities without values last (matches ORDER BY ... DESC on MySQL)
+    return sorted(rows, key=lambda row: float('-inf') if row[key] is None else row[key], reverse=True)
+
+
+def usage_total(model, total, filters):
+    """One aggregate query of an overview card; 0 when no row matches."""
+    return model.objects.filter(**filters).aggregate(total=total)['total'] or 0
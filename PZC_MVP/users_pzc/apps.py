@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class UsersPzcConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'users_pzc'
+
+    def ready(self):
+        from . import checks  # noqa: F401
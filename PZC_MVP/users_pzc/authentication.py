@@ -0,0 +1,71 @@
+import copy
+
+from rest_framework import exceptions
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from .user_cache import cache_user, cached_user, user_stamp
+
+TOKEN_VERSION_CLAIM = 'token_version'
+
+
+class VersionedRefreshToken(RefreshToken):
+    """A refresh token carrying the user's token_version; access tokens made from it copy the claim."""
+
+    @classmethod
+    def for_user(cls, user):
+        token = super().for_user(user)
+        token[TOKEN_VERSION_CLAIM] = user.token_version
+        return token
+
+
+class VersionedTokenObtainPairSerializer(TokenObtainPairSerializer):
+    token_class = VersionedRefreshToken
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    JWTAuthentication that resolves the token's user from the in-process user
+    cache (see user_cache) instead of loading it on every request; a lookup
+    costs one read of the user's revocation stamp from the shared cache. Tokens
+    whose token_version no longer matches the user's are rejected, which is
+    how LogoutView revokes access tokens that have not expired yet.
+    """
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken('Token contained no recognizable user identification')
+        # Tokens issued before the claim existed count as version 0
+        version = validated_token.get(TOKEN_VERSION_CLAIM, 0)
+
+        # Read before loading the user, so a change committed meanwhile invalidates the new entry
+        stamp = user_stamp(user_id)
+        user = cached_user(user_id, version, stamp)
+        if user is None:
+            user = super().get_user(validated_token)
+            if user.token_version != version:
+                raise AuthenticationFailed('Token has been revoked', code='token_revoked')
+            cache_user(user_id, version, stamp, user)
+        # Views may set attributes on request.user; keep them off the shared instance
+        return copy.copy(user)
+
+
+def staff_user(request):
+    """
+    The staff user making a plain Django request, from the session or the
+    API's JWT; None otherwise. For endpoints outside DRF, like the profiler
+    and /metrics.
+    """
+    user = getattr(request, 'user', None)
+    if user is None or not user.is_authenticated:
+        try:
+            result = CachedJWTAuthentication().authenticate(request)
+        except exceptions.AuthenticationFailed:
+            return None
+        user = result[0] if result else None
+    return user if user is not None and user.is_staff else None
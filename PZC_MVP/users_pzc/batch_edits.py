@@ -0,0 +1,118 @@
+from datetime import date
+
+from django.conf import settings
+from django.db import models, transaction
+
+from .models import Waste, Energy, Water, Biodiversity, Logistices
+
+BATCH_MAX_IDS = getattr(settings, 'BATCH_MAX_IDS', 5000)
+
+# Batch name -> (model, the id field clients address rows by)
+BATCH_MODELS = {
+    'waste': (Waste, 'waste_id'),
+    'energy': (Energy, 'energy_id'),
+    'water': (Water, 'water_id'),
+    'biodiversity': (Biodiversity, 'biodiversity_id'),
+    'logistices': (Logistices, 'logistices_id'),
+}
+
+BATCH_FILTER_KEYS = ('facility_id', 'start_date', 'end_date')
+
+
+class BatchRequestError(Exception):
+    """The selection or the changes of a batch request are invalid."""
+
+
+def editable_fields(model):
+    """
+    Fields a batch update may set. Ids, owner, facility and dates stay out, as
+    do the fields of the per-month unique constraint and the derived sums.
+    """
+    fixed = {'user', 'facility', 'DatePicker', 'entry_month', *model.entry_key_fields, *model.derived_fields}
+    return {
+        field.name: field for field in model._meta.concrete_fields
+        if not (field.primary_key or field.unique or field.name in fixed)
+    }
+
+
+def _parse_day(filters, key):
+    try:
+        return date.fromisoformat(str(filters[key]))
+    except ValueError:
+        raise BatchRequestError(f'{key} must be a date in YYYY-MM-DD format.')
+
+
+def batch_queryset(user, model_name, payload):
+    """
+    The user's rows selected by a batch request: either {"ids": [...]} or
+    {"filter": {"facility_id", "start_date", "end_date"}} with at least one key.
+    """
+    model, id_field = BATCH_MODELS[model_name]
+    if not isinstance(payload, dict):
+        raise BatchRequestError('Send a JSON object.')
+    ids = payload.get('ids')
+    filters = payload.get('filter')
+    if (ids is None) == (filters is None):
+        raise BatchRequestError('Pass either "ids" or "filter".')
+
+    queryset = model.objects.filter(user=user)
+    if ids is not None:
+        if not isinstance(ids, list) or not ids:
+            raise BatchRequestError('"ids" must be a non-empty list.')
+        if len(ids) > BATCH_MAX_IDS:
+            raise BatchRequestError(f'At most {BATCH_MAX_IDS} ids can be sent at once.')
+        return queryset.filter(**{f'{id_field}__in': [str(value) for value in ids]})
+
+    if not isinstance(filters, dict) or not filters:
+        raise BatchRequestError(f'"filter" must be an object with any of: {", ".join(BATCH_FILTER_KEYS)}.')
+    unknown = set(filters) - set(BATCH_FILTER_KEYS)
+    if unknown:
+        raise BatchRequestError(f'Unknown filter keys: {", ".join(sorted(unknown))}.')
+
+    if 'facility_id' in filters:
+        facility_ids = filters['facility_id']
+        queryset = queryset.filter(facility_id__in=facility_ids if isinstance(facility_ids, list) else [facility_ids])
+    if 'start_date' in filters:
+        queryset = queryset.filter(DatePicker__gte=_parse_day(filters, 'start_date'))
+    if 'end_date' in filters:
+        queryset = queryset.filter(DatePicker__lte=_parse_day(filters, 'end_date'))
+    return queryset
+
+
+def clean_changes(model, changes):
+    """Validates the field -> value changes of a batch update like the create serializers do."""
+    if not isinstance(changes, dict) or not changes:
+        raise BatchRequestError('"changes" must be a non-empty object.')
+    fields = editable_fields(model)
+    errors = {}
+    for name, value in changes.items():
+        field = fields.get(name)
+        if field is None:
+            errors[name] = 'This field cannot be changed in a batch.'
+        elif isinstance(field, (models.FloatField, models.IntegerField)):
+            if isinstance(value, bool) or not isinstance(value, (int, float)) or value < 0:
+                errors[name] = f'{name.replace("_", " ").title()} must be a positive number.'
+            elif isinstance(field, models.IntegerField) and value != int(value):
+                errors[name] = f'{name.replace("_", " ").title()} must be a whole number.'
+        elif not isinstance(value, str) or not value.strip():
+            errors[name] = f'{name.replace("_", " ").title()} must be a non-empty string.'
+    if errors:
+        raise BatchRequestError(errors)
+    return changes
+
+
+def batch_update(user, model_name, payload):
+    """Applies payload["changes"] to the selected rows in one UPDATE. Returns the number of rows."""
+    model, _ = BATCH_MODELS[model_name]
+    queryset = batch_queryset(user, model_name, payload)
+    changes = clean_changes(model, payload.get('changes'))
+    with transaction.atomic():
+        return queryset.update(**changes)
+
+
+def batch_delete(user, model_name, payload):
+    """Deletes the selected rows in one DELETE. Returns the number of rows."""
+    queryset = batch_queryset(user, model_name, payload)
+    with transaction.atomic():
+        deleted, _ = queryset.delete()
+    return deleted
@@ -0,0 +1,2 @@
+from .data import generate_dataset
+from .runner import ROUTE_PARAMS, benchmark_report, compare_reports, get_endpoints, run_benchmarks
@@ -0,0 +1,95 @@
+import math
+import random
+from datetime import date
+
+from ..models import CustomUser, Facility, Waste, Energy, Water, Biodiversity, Logistices
+
+LOCATIONS = ['Pune', 'Mumbai', 'Chennai', 'Bengaluru', 'Delhi', 'Hyderabad']
+SPECIES = ['Neem', 'Banyan', 'Peepal', 'Mango', 'Teak', 'Gulmohar']
+FISCAL_MONTHS = [4, 5, 6, 7, 8, 9, 10, 11, 12, 1, 2, 3]
+
+
+def _seasonal(month, peak):
+    """1 +/- 30% over the year, highest in the peak month."""
+    return 1 + 0.3 * math.cos(2 * math.pi * (month - peak) / 12)
+
+
+def _amount(rng, mean, scale=1.0):
+    # Activity volumes are right-skewed: mostly near the mean, occasionally far above it
+    return round(rng.lognormvariate(math.log(mean * scale), 0.35), 2)
+
+
+def _month_entries(rng, user, facility, day, scale):
+    common = {'user': user, 'facility': facility, 'category': 'benchmark', 'DatePicker': day}
+    cooling = _seasonal(day.month, peak=5) * scale
+    monsoon = _seasonal(day.month, peak=8) * scale
+    sunny = _seasonal(day.month, peak=4) * scale
+
+    waste = Waste(
+        food_waste=_amount(rng, 120, scale), solid_Waste=_amount(rng, 300, scale), E_Waste=_amount(rng, 15, scale),
+        Biomedical_waste=_amount(rng, 5, scale), liquid_discharge=_amount(rng, 800, scale), other_waste=_amount(rng, 40, scale),
+        Recycle_waste=_amount(rng, 180, scale), Landfill_waste=_amount(rng, 90, scale), **common
+    )
+    energy = Energy(
+        hvac=_amount(rng, 9000, cooling), production=_amount(rng, 25000, scale), stp=_amount(rng, 1200, scale),
+        admin_block=_amount(rng, 2500, cooling), utilities=_amount(rng, 3000, scale), others=_amount(rng, 800, scale),
+        coking_coal=_amount(rng, 4, scale), coke_oven_coal=_amount(rng, 2, scale), natural_gas=_amount(rng, 60, scale),
+        diesel=_amount(rng, 1.5, scale), biomass_wood=_amount(rng, 3, scale), biomass_other_solid=_amount(rng, 1, scale),
+        renewable_solar=_amount(rng, 4000, sunny), renewable_other=_amount(rng, 500, scale), **common
+    )
+    water = Water(
+        Generated_Water=_amount(rng, 5000, monsoon), Recycled_Water=_amount(rng, 1500, scale), Softener_usage=_amount(rng, 400, scale),
+        Boiler_usage=_amount(rng, 700, scale), otherUsage=_amount(rng, 300, scale), **common
+    )
+    biodiversity = Biodiversity(
+        species=rng.choice(SPECIES), no_trees=rng.randint(5, 200), age=rng.randint(1, 40),
+        height=round(rng.uniform(2, 25), 1), width=round(rng.uniform(0.2, 1.5), 2), totalArea=round(rng.uniform(1000, 50000)),
+        new_trees_planted=rng.randint(0, 30), head_count=rng.randint(50, 2000), **common
+    )
+    logistices = [
+        Logistices(
+            logistices_types=kind, Typeof_fuel=fuel, km_travelled=_amount(rng, 6000, scale), No_Trips=rng.randint(10, 300),
+            fuel_consumption=_amount(rng, 2.5, scale), No_Vehicles=rng.randint(1, 25), Spends_on_fuel=_amount(rng, 250000, scale), **common
+        )
+        # Not every fleet runs every vehicle and fuel type each month
+        for kind in ('Staff', 'Cargo') for fuel in ('Diesel', 'Petrol') if rng.random() < 0.75
+    ]
+    return waste, energy, water, biodiversity, logistices
+
+
+def generate_dataset(users=2, facilities=3, years=2, first_year=2022, seed=0):
+    """
+    Creates `users` users with `facilities` facilities each and one month of
+    every activity model per facility over `years` fiscal years starting at
+    `first_year`. The same arguments always produce the same values.
+
+    Returns the created users.
+    """
+    rng = random.Random(seed)
+    created = []
+    for user_number in range(users):
+        user = CustomUser.objects.create_user(email=f'benchmark{user_number}@example.com')
+        created.append(user)
+
+        for facility_number in range(facilities):
+            facility = Facility.objects.create(
+                user=user, facility_name=f'Facility {facility_number + 1}', facility_head='Benchmark',
+                facility_location=rng.choice(LOCATIONS), facility_description='Synthetic benchmark facility'
+            )
+            # Facilities differ in size by up to an order of magnitude
+            scale = rng.lognormvariate(0, 0.6)
+            # Inserted per facility, so each rollup refresh covers `years` * 12 cells
+            rows = {model: [] for model in (Waste, Energy, Water, Biodiversity, Logistices)}
+            for fiscal_year in range(first_year, first_year + years):
+                for month in FISCAL_MONTHS:
+                    day = date(fiscal_year if month >= 4 else fiscal_year + 1, month, rng.randint(1, 28))
+                    waste, energy, water, biodiversity, logistices = _month_entries(rng, user, facility, day, scale)
+                    rows[Waste].append(waste)
+                    rows[Energy].append(energy)
+                    rows[Water].append(water)
+                    rows[Biodiversity].append(biodiversity)
+                    rows[Logistices].extend(logistices)
+
+            for model, objs in rows.items():
+                model.objects.bulk_create(objs, batch_size=1000)
+    return created
@@ -0,0 +1,141 @@
+import platform
+import re
+import statistics
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+import django
+from django.core.cache import caches
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from .. import urls
+from ..response_cache import RESPONSE_CACHE_ALIAS
+
+# Values for the path parameters of GET routes; routes with other parameters are skipped
+ROUTE_KWARGS = {
+    'model_name': 'waste',
+}
+
+# Query parameters a route needs on top of the shared year
+ROUTE_PARAMS = {
+    'api/dashboard/batch/': {'widgets': 'WasteViewCard_Over,EnergyViewCard_Over,WaterViewCard_Over,OverallUsageView'},
+}
+
+
+def get_endpoints():
+    """(route, path) of every GET endpoint in users_pzc/urls.py the runner can call."""
+    endpoints = []
+    for pattern in urls.urlpatterns:
+        view_class = getattr(pattern.callback, 'view_class', None)
+        if view_class is None or not hasattr(view_class, 'get'):
+            continue
+        if any(name not in ROUTE_KWARGS for name in pattern.pattern.converters):
+            continue
+        # Routes are keyed like the request's resolver_match.route (see instrumentation.QUERY_BUDGETS)
+        route = f'api/{pattern.pattern}'
+        path = re.sub(r'<(?:\w+:)?(\w+)>', lambda match: ROUTE_KWARGS[match.group(1)], route)
+        endpoints.append((route, f'/{path}'))
+    return endpoints
+
+
+def _percentile(timings, percent):
+    if len(timings) == 1:
+        return timings[0]
+    return statistics.quantiles(timings, n=100, method='inclusive')[percent - 1]
+
+
+def _consume(response):
+    # Streaming exports only do their work while being read
+    if response.streaming:
+        return b''.join(response.streaming_content)
+    return response.content
+
+
+def time_endpoint(client, path, params, iterations, warm=False):
+    """
+    Latency of `iterations` calls, then one traced call for the query count
+    and the peak memory allocated while handling the request.
+    """
+    cache = caches[RESPONSE_CACHE_ALIAS]
+    timings = []
+    status_code = None
+    for _ in range(iterations):
+        if not warm:
+            cache.clear()
+        started = time.perf_counter()
+        response = client.get(path, params)
+        _consume(response)
+        timings.append(time.perf_counter() - started)
+        status_code = response.status_code
+
+    if not warm:
+        cache.clear()
+    tracemalloc.start()
+    try:
+        with CaptureQueriesContext(connection) as queries:
+            _consume(client.get(path, params))
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        'status': status_code,
+        'p50_ms': round(_percentile(timings, 50) * 1000, 3),
+        'p95_ms': round(_percentile(timings, 95) * 1000, 3),
+        'mean_ms': round(statistics.mean(timings) * 1000, 3),
+        'queries': len(queries),
+        'peak_memory_kib': round(peak / 1024, 1),
+    }
+
+
+def run_benchmarks(user, year, iterations=20, warm=False, only=None):
+    """
+    Times every GET endpoint as `user` with the given fiscal year. Requests go
+    through the full middleware stack with a JWT, like the frontend's calls.
+    Caches are cleared before every call unless `warm` is set.
+    """
+    token = RefreshToken.for_user(user).access_token
+    client = Client(headers={'Authorization': f'Bearer {token}'})
+    results = {}
+    for route, path in get_endpoints():
+        if only and route not in only:
+            continue
+        params = {'year': year, **ROUTE_PARAMS.get(route, {})}
+        results[route] = time_endpoint(client, path, params, iterations, warm)
+    return results
+
+
+def benchmark_report(results, dataset, iterations, warm):
+    return {
+        'meta': {
+            'created': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'database': connection.vendor,
+            'dataset': dataset,
+            'iterations': iterations,
+            'warm_cache': warm,
+        },
+        'endpoints': results,
+    }
+
+
+def compare_reports(before, after):
+    """Per endpoint p50/p95/query changes between two reports, as rows of strings."""
+    rows = []
+    for route, current in after['endpoints'].items():
+        previous = before['endpoints'].get(route)
+        if previous is None:
+            rows.append((route, 'new', '', ''))
+            continue
+        rows.append((
+            route,
+            f"{previous['p50_ms']:.2f} -> {current['p50_ms']:.2f} ms",
+            f"{previous['p95_ms']:.2f} -> {current['p95_ms']:.2f} ms",
+            f"{previous['queries']} -> {current['queries']} queries",
+        ))
+    return rows
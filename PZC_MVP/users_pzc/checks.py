@@ -0,0 +1,32 @@
+from django.conf import settings
+from django.core.checks import Tags, Warning, register
+
+PROCESS_LOCAL_CACHES = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+
+@register(Tags.caches)
+def shared_cache_check(app_configs, **kwargs):
+    """
+    The response cache alias holds the data versions and the user cache alias
+    the revocation stamps, which every worker process has to see.
+    """
+    from .response_cache import RESPONSE_CACHE_ALIAS
+    from .user_cache import AUTH_USER_CACHE_ALIAS
+    if settings.DEBUG:
+        return []
+    warnings = []
+    for alias in sorted({RESPONSE_CACHE_ALIAS, AUTH_USER_CACHE_ALIAS}):
+        backend = settings.CACHES.get(alias, {}).get('BACKEND')
+        if backend in PROCESS_LOCAL_CACHES:
+            warnings.append(Warning(
+                f"The '{alias}' cache uses {backend.rsplit('.', 1)[-1]}, which is private to each worker process.",
+                hint=(
+                    "Writes, logouts and deactivations then only reach the cached responses, ETags and users "
+                    "of the worker that handled them. Set PZC_REDIS_URL to share a Redis cache between the workers."
+                ),
+                id='users_pzc.W001',
+            ))
+    return warnings
@@ -0,0 +1,33 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections
+
+# Threads running ORM queries for the async views; each holds at most one DB connection per alias
+ANALYTICS_ASYNC_WORKERS = getattr(settings, 'ANALYTICS_ASYNC_WORKERS', 8)
+
+_executor = ThreadPoolExecutor(max_workers=ANALYTICS_ASYNC_WORKERS, thread_name_prefix='analytics')
+
+
+def _closing_connections(call):
+    def run():
+        try:
+            return call()
+        finally:
+            # Worker threads outlive the request, so request_finished never recycles their
+            # connections; CONN_MAX_AGE decides whether they are kept for the next query
+            close_old_connections()
+    return run
+
+
+async def gather_queries(*calls):
+    """
+    Runs independent zero-argument ORM callables concurrently on the bounded
+    analytics thread pool and returns their results in order.
+    """
+    return await asyncio.gather(*(
+        sync_to_async(_closing_connections(call), thread_sensitive=False, executor=_executor)()
+        for call in calls
+    ))
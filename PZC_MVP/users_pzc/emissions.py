@@ -0,0 +1,132 @@
+from functools import partial
+
+import numpy as np
+from django.db.models import Case, F, FloatField, Sum, Value, When
+from django.db.models.functions import Coalesce
+
+from .concurrency import gather_queries
+from .models import Energy, Water, Waste, Logistices
+
+# Fiscal months in display order (April to March)
+FISCAL_MONTH_ORDER = [4, 5, 6, 7, 8, 9, 10, 11, 12, 1, 2, 3]
+
+ELECTRICITY_FACTOR = 0.82
+WATER_FACTOR = 0.46
+DIESEL_FACTOR = 2.91 * 1000  # Diesel in liters, convert to kg
+PETROL_FACTOR = 2.29 * 1000
+
+# Emission factor per summed column, grouped by the model the column lives on
+ENERGY_FACTORS = {
+    'hvac': ELECTRICITY_FACTOR,
+    'production': ELECTRICITY_FACTOR,
+    'stp': ELECTRICITY_FACTOR,
+    'admin_block': ELECTRICITY_FACTOR,
+    'utilities': ELECTRICITY_FACTOR,
+    'others': ELECTRICITY_FACTOR,
+    'coking_coal': 2.66,
+    'coke_oven_coal': 3.1,
+    'natural_gas': 2.7,
+    'diesel': DIESEL_FACTOR,
+    'biomass_wood': 1.75,
+    'biomass_other_solid': 1.16,
+}
+WATER_FACTORS = {
+    'Generated_Water': WATER_FACTOR,
+    'Recycled_Water': WATER_FACTOR,
+    'Softener_usage': WATER_FACTOR,
+    'Boiler_usage': WATER_FACTOR,
+    'otherUsage': WATER_FACTOR,
+}
+WASTE_FACTORS = {
+    'Landfill_waste': 300,
+    'Recycle_waste': 10,
+}
+LOGISTICES_FACTORS = {
+    'diesel_fuel': DIESEL_FACTOR,
+    'petrol_fuel': PETROL_FACTOR,
+}
+
+
+def _float_sum(expression):
+    return Coalesce(Sum(expression, output_field=FloatField()), Value(0.0, output_field=FloatField()))
+
+
+def _fuel_sum(fuel):
+    # Fuel types are stored as 'Diesel'/'Petrol' (the model default is 'diesel'). MySQL's
+    # collation already matched them case-insensitively; iexact does so on every backend
+    return _float_sum(Case(
+        When(Typeof_fuel__iexact=fuel, then='fuel_consumption'),
+        default=Value(0.0),
+        output_field=FloatField(),
+    ))
+
+
+def monthly_matrix(queryset, aggregates):
+    """
+    Runs one GROUP BY month query and returns a 12 x len(aggregates) matrix
+    of sums in fiscal month order, plus whether any row matched.
+    """
+    columns = list(aggregates)
+    rows = (
+        queryset
+        .values(month=F('fiscal_month'))
+        .annotate(**aggregates)
+        .order_by()
+    )
+
+    matrix = np.zeros((len(FISCAL_MONTH_ORDER), len(columns)))
+    has_data = False
+    for row in rows:
+        if row['month'] is None:
+            continue
+        has_data = True
+        matrix[FISCAL_MONTH_ORDER.index(row['month'])] = [row[column] for column in columns]
+    return matrix, has_data
+
+
+def emission_domains():
+    """(model, aggregates, factors) of each model contributing to the emissions."""
+    return [
+        (Energy, {field: _float_sum(field) for field in ENERGY_FACTORS}, ENERGY_FACTORS),
+        (Water, {field: _float_sum(field) for field in WATER_FACTORS}, WATER_FACTORS),
+        (Waste, {field: _float_sum(field) for field in WASTE_FACTORS}, WASTE_FACTORS),
+        (Logistices, {'diesel_fuel': _fuel_sum('diesel'), 'petrol_fuel': _fuel_sum('petrol')}, LOGISTICES_FACTORS),
+    ]
+
+
+def domain_emissions(model, aggregates, factors, filters):
+    """Monthly emissions of one model in fiscal month order, and whether it has rows."""
+    matrix, has_data = monthly_matrix(model.objects.filter(**filters), aggregates)
+    return matrix @ np.array([factors[column] for column in aggregates]), has_data
+
+
+def combine_emissions(results):
+    emissions = np.zeros(len(FISCAL_MONTH_ORDER))
+    has_data = False
+    for model_emissions, model_has_data in results:
+        emissions += model_emissions
+        has_data = has_data or model_has_data
+    return emissions, has_data
+
+
+def monthly_emissions(filters):
+    """
+    Returns (emissions, has_data) where emissions is an array of the total
+    monthly emissions in fiscal month order for the given queryset filters.
+
+    Each model contributes one grouped query; the factors are applied as a
+    month x column matrix product.
+    """
+    return combine_emissions(
+        domain_emissions(model, aggregates, factors, filters)
+        for model, aggregates, factors in emission_domains()
+    )
+
+
+async def monthly_emissions_async(filters):
+    """monthly_emissions() with the per-model queries running concurrently."""
+    results = await gather_queries(*(
+        partial(domain_emissions, model, aggregates, factors, filters)
+        for model, aggregates, factors in emission_domains()
+    ))
+    return combine_emissions(results)
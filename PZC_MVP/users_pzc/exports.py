@@ -0,0 +1,69 @@
+import csv
+import json
+
+from django.conf import settings
+from django.db.models import F
+
+from .filters import WasteFilter, EnergyFilter, WaterFilter, BiodiversityFilter, LogisticesFilter
+from .models import Waste, Energy, Water, Biodiversity, Logistices
+
+EXPORT_CHUNK_SIZE = getattr(settings, 'EXPORT_CHUNK_SIZE', 2000)
+
+# Export name -> (model, FilterSet applied to the query parameters)
+EXPORT_MODELS = {
+    'waste': (Waste, WasteFilter),
+    'energy': (Energy, EnergyFilter),
+    'water': (Water, WaterFilter),
+    'biodiversity': (Biodiversity, BiodiversityFilter),
+    'logistices': (Logistices, LogisticesFilter),
+}
+
+EXPORT_FORMATS = {
+    'csv': 'text/csv',
+    'ndjson': 'application/x-ndjson',
+}
+
+
+def export_columns(model):
+    columns = [field.attname for field in model._meta.concrete_fields if field.attname != 'user_id']
+    return columns + ['facility_name']
+
+
+def export_rows(queryset):
+    """Rows as dicts, fetched chunk by chunk in (DatePicker, pk) order."""
+    columns = export_columns(queryset.model)
+    rows = (
+        queryset
+        .annotate(facility_name=F('facility__facility_name'))
+        .order_by('DatePicker', 'pk')
+        .values(*columns)
+    )
+    return rows.iterator(chunk_size=EXPORT_CHUNK_SIZE)
+
+
+class _Echo:
+    # csv.writer only needs write(); hand each formatted line straight back
+    def write(self, value):
+        return value
+
+
+def stream_csv(sections, columns):
+    """
+    CSV lines for (label, rows) sections sharing one header. The label fills
+    the leading 'model' column when several models are exported together.
+    """
+    writer = csv.writer(_Echo())
+    labelled = len(sections) > 1
+    yield writer.writerow((['model'] if labelled else []) + columns)
+    for label, rows in sections:
+        for row in rows:
+            yield writer.writerow(([label] if labelled else []) + [row.get(column, '') for column in columns])
+
+
+def stream_ndjson(sections):
+    labelled = len(sections) > 1
+    for label, rows in sections:
+        for row in rows:
+            if labelled:
+                row = {'model': label, **row}
+            yield json.dumps(row, default=str) + '\n'
@@ -1,3 +1,4 @@
+from datetime import date
 from django_filters import rest_framework as filters
 from django.core.exceptions import ValidationError
 from django.db.models import Q
@@ -19,8 +20,8 @@ class FacilityFilter(filters.FilterSet):
 class FacilityDateFilterBase(filters.FilterSet):
     facility_id = filters.CharFilter(field_name="facility__facility_id")
     facility_location = filters.CharFilter(field_name="facility__facility_location", lookup_expr='icontains')
-    start_year = filters.NumberFilter(field_name="DatePicker", lookup_expr="year__gte")
-    end_year = filters.NumberFilter(field_name="DatePicker", lookup_expr="year__lte")
+    start_year = filters.NumberFilter(field_name="DatePicker", method="filter_start_year")
+    end_year = filters.NumberFilter(field_name="DatePicker", method="filter_end_year")
 
     class Meta:
         model = Facility
@@ -37,6 +38,14 @@ class FacilityDateFilterBase(filters.FilterSet):
             except ValueError:
                 raise ValidationError("Start year and end year must be valid numbers.")
 
+    # Compare against plain date bounds instead of DatePicker__year so the
+    # (user, DatePicker) / (facility, DatePicker) indexes can be range scanned
+    def filter_start_year(self, queryset, name, value):
+        return queryset.filter(**{f"{name}__gte": date(int(value), 1, 1)})
+
+    def filter_end_year(self, queryset, name, value):
+        return queryset.filter(**{f"{name}__lt": date(int(value) + 1, 1, 1)})
+
     def filter_queryset(self, queryset):
         self.clean_years()
 
@@ -63,7 +72,10 @@ class WasteFilter(FacilityDateFilterBase):
         end_year = self.data.get('end_year')
 
         if start_year and end_year:
-            queryset = queryset.filter(DatePicker__year__gte=start_year, DatePicker__year__lte=end_year)
+            queryset = queryset.filter(
+                DatePicker__gte=date(int(start_year), 1, 1),
+                DatePicker__lt=date(int(end_year) + 1, 1, 1)
+            )
 
         return super().filter_queryset(queryset)
 
@@ -83,7 +95,10 @@ class EnergyFilter(FacilityDateFilterBase):
         end_year = self.data.get('end_year')
 
         if start_year and end_year:
-            queryset = queryset.filter(DatePicker__year__gte=start_year, DatePicker__year__lte=end_year)
+            queryset = queryset.filter(
+                DatePicker__gte=date(int(start_year), 1, 1),
+                DatePicker__lt=date(int(end_year) + 1, 1, 1)
+            )
 
         return super().filter_queryset(queryset)
 
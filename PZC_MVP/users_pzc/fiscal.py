@@ -0,0 +1,95 @@
+from datetime import date, datetime
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Max
+
+# Seconds a cached latest date is trusted; writes through the models also drop it explicitly
+LATEST_DATE_TIMEOUT = getattr(settings, 'FISCAL_CALENDAR_CACHE_TIMEOUT', 300)
+
+_MISSING = object()
+
+
+def fiscal_year_of(day):
+    """Fiscal years run April to March and are named after the April year."""
+    return day.year if day.month >= 4 else day.year - 1
+
+
+def fiscal_month_start(fiscal_year, month):
+    """First day of the calendar `month` within the fiscal year."""
+    return date(fiscal_year if month >= 4 else fiscal_year + 1, month, 1)
+
+
+def current_fiscal_year():
+    return fiscal_year_of(datetime.now())
+
+
+def fiscal_year_range(year):
+    return datetime(year, 4, 1), datetime(year + 1, 3, 31)
+
+
+def _facility_key(facility_id):
+    if not facility_id or str(facility_id).lower() == 'all':
+        return 'all'
+    return facility_id
+
+
+def _latest_date_key(user_id, model, facility_id):
+    return f"fiscal:latest:{model._meta.label_lower}:{user_id}:{_facility_key(facility_id)}"
+
+
+def latest_entry_date(user, model, facility_id=None):
+    """Latest DatePicker of the user's rows of the model, optionally for one facility."""
+    user_id = getattr(user, 'pk', user)
+    key = _latest_date_key(user_id, model, facility_id)
+
+    value = cache.get(key, _MISSING)
+    if value is _MISSING:
+        queryset = model.objects.filter(user_id=user_id)
+        if _facility_key(facility_id) != 'all':
+            queryset = queryset.filter(facility_id=facility_id)
+        value = queryset.aggregate(latest_date=Max('DatePicker'))['latest_date']
+        cache.set(key, value, LATEST_DATE_TIMEOUT)
+    return value
+
+
+def latest_fiscal_year(user, model, facility_id=None, default=None):
+    """
+    Fiscal year of the latest entry, or `default` (the current fiscal year
+    unless given) when the user has no data yet.
+    """
+    latest = latest_entry_date(user, model, facility_id)
+    if latest is None:
+        return current_fiscal_year() if default is None else default
+    return fiscal_year_of(latest)
+
+
+def available_fiscal_years(user, models, facility_id=None):
+    """
+    Fiscal years with any entry of the user in the given activity models, newest
+    first. One UNION of DISTINCT selects on the indexed fiscal_year column, so
+    the cost follows the number of years rather than the number of rows.
+    """
+    user_id = getattr(user, 'pk', user)
+    selects = []
+    for model in models:
+        queryset = model.objects.filter(user_id=user_id, fiscal_year__isnull=False)
+        if _facility_key(facility_id) != 'all':
+            queryset = queryset.filter(facility_id=facility_id)
+        selects.append(queryset.order_by().values_list('fiscal_year', flat=True).distinct())
+    years = selects[0].union(*selects[1:])
+    return sorted(years, reverse=True)
+
+
+def invalidate_latest_dates(model, cells):
+    """Drops the cached latest dates touched by writes to the (user_id, facility_id, month) cells."""
+    keys = set()
+    for user_id, facility_id, _ in cells:
+        keys.add(_latest_date_key(user_id, model, None))
+        keys.add(_latest_date_key(user_id, model, facility_id))
+    if not keys:
+        return
+    cache.delete_many(keys)
+    # A read racing the write may have cached the old value again before commit
+    transaction.on_commit(lambda: cache.delete_many(keys))
@@ -0,0 +1,175 @@
+from collections import defaultdict
+from dataclasses import dataclass
+from zipfile import BadZipFile
+
+import pandas as pd
+from django.conf import settings
+from django.db import IntegrityError, transaction
+
+from .models import Facility, Waste, Energy, Water
+
+IMPORT_BATCH_SIZE = getattr(settings, 'IMPORT_BATCH_SIZE', 1000)
+
+
+@dataclass(frozen=True)
+class ImportSpec:
+    model: type
+    label: str
+    # Columns that must be present, numeric and non-negative
+    numeric_fields: tuple
+
+
+IMPORT_SPECS = {
+    'waste': ImportSpec(
+        model=Waste, label='Waste',
+        numeric_fields=(
+            'food_waste', 'solid_Waste', 'E_Waste', 'Biomedical_waste',
+            'liquid_discharge', 'other_waste', 'Recycle_waste', 'Landfill_waste'
+        ),
+    ),
+    'energy': ImportSpec(
+        model=Energy, label='Energy',
+        numeric_fields=(
+            'hvac', 'production', 'stp', 'admin_block', 'utilities', 'others',
+            'coking_coal', 'coke_oven_coal', 'natural_gas', 'diesel', 'biomass_wood',
+            'biomass_other_solid', 'renewable_solar', 'renewable_other'
+        ),
+    ),
+    'water': ImportSpec(
+        model=Water, label='Water',
+        numeric_fields=('Generated_Water', 'Recycled_Water', 'Softener_usage', 'Boiler_usage', 'otherUsage'),
+    ),
+}
+
+
+class ImportFileError(Exception):
+    """The upload as a whole cannot be processed (format or missing columns)."""
+
+
+class ImportConflictError(Exception):
+    """A concurrent write took months the upload was validated against."""
+
+
+def _title(field):
+    return field.replace('_', ' ').title()
+
+
+def read_spreadsheet(uploaded_file):
+    name = (uploaded_file.name or '').lower()
+    try:
+        if name.endswith('.csv'):
+            frame = pd.read_csv(uploaded_file, dtype=str, keep_default_na=False)
+        elif name.endswith('.xlsx'):
+            # openpyxl only: legacy .xls workbooks would need xlrd, which is not installed
+            frame = pd.read_excel(uploaded_file, engine='openpyxl')
+        else:
+            raise ImportFileError('Upload a .csv or .xlsx file.')
+    except (ValueError, BadZipFile, pd.errors.ParserError) as e:
+        raise ImportFileError(f'Could not read the file: {e}')
+    frame.columns = [str(column).strip() for column in frame.columns]
+    return frame
+
+
+def import_activity_file(user, model_name, uploaded_file, partial=False, upsert=False):
+    """
+    Validates a spreadsheet of activity rows column by column and bulk inserts
+    the valid rows. Facilities and existing months are resolved with one query
+    each. Without `partial`, nothing is inserted when any row has an error.
+    With `upsert`, rows for months that already have an entry overwrite it
+    instead of being rejected, one statement per batch.
+
+    Returns a report: {'total_rows', 'created', 'updated', 'errors': [{'row', 'errors'}]}
+    where 'updated' counts the entries overwritten by `upsert` and 'row' is
+    the spreadsheet row number (the header is row 1). Raises
+    ImportConflictError when a concurrent write took one of the months.
+    """
+    spec = IMPORT_SPECS[model_name]
+    frame = read_spreadsheet(uploaded_file)
+
+    required = ['facility_id', 'category', 'DatePicker', *spec.numeric_fields]
+    missing = [column for column in required if column not in frame.columns]
+    if missing:
+        raise ImportFileError(f"Missing columns: {', '.join(missing)}.")
+
+    errors = defaultdict(dict)
+
+    def flag(mask, field, message):
+        for index in frame.index[mask]:
+            errors[index].setdefault(field, message)
+
+    facility_ids = frame['facility_id'].fillna('').astype(str).str.strip()
+    categories = frame['category'].fillna('').astype(str).str.strip()
+    dates = pd.to_datetime(frame['DatePicker'], errors='coerce', format='ISO8601')
+
+    flag(facility_ids == '', 'facility_id', 'Facility ID is required.')
+    flag(categories == '', 'category', 'Category is required.')
+    flag(dates.isna(), 'DatePicker', 'Invalid date format. Please use YYYY-MM-DD.')
+
+    numbers = frame[list(spec.numeric_fields)].apply(pd.to_numeric, errors='coerce')
+    for field in spec.numeric_fields:
+        flag(numbers[field].isna(), field, f'{_title(field)} is required and must be a number.')
+        flag(numbers[field] < 0, field, f'{_title(field)} must be a positive number.')
+
+    # One query resolves every facility referenced by the file
+    known_facilities = set(
+        Facility.objects.filter(user=user, facility_id__in=set(facility_ids) - {''})
+        .values_list('facility_id', flat=True)
+    )
+    flag((facility_ids != '') & ~facility_ids.isin(known_facilities), 'facility_id', 'The selected facility does not exist.')
+
+    # One entry per facility and month: within the file and against the table
+    months = dates.dt.to_period('M')
+    flag(dates.notna() & pd.DataFrame({'f': facility_ids, 'm': months}).duplicated(), 'DatePicker',
+         'This facility appears more than once for this month in the file.')
+
+    dated = dates.notna() & facility_ids.isin(known_facilities)
+    existing = set()
+    if dated.any():
+        existing = set(
+            spec.model.objects.filter(
+                facility_id__in=set(facility_ids[dated]),
+                entry_month__gte=dates[dated].min().date().replace(day=1),
+                entry_month__lte=dates[dated].max().date().replace(day=1),
+            )
+            .values_list('facility_id', 'entry_month')
+        )
+    taken = pd.Series([
+        is_dated and (facility_id, day.date().replace(day=1)) in existing
+        for is_dated, facility_id, day in zip(dated, facility_ids, dates)
+    ], index=frame.index, dtype=bool)
+    if not upsert:
+        flag(taken, 'non_field_errors', f'A {spec.label} entry for this facility already exists for this month.')
+
+    report = {
+        'total_rows': len(frame),
+        'created': 0,
+        'updated': 0,
+        'errors': [{'row': index + 2, 'errors': errors[index]} for index in sorted(errors)],
+    }
+    if errors and not partial:
+        return report
+
+    valid = ~frame.index.isin(list(errors))
+    # Ids and overall_usage are filled in by bulk_create() through set_derived_fields()
+    objs = [
+        spec.model(user=user, facility_id=facility_id, category=category, DatePicker=day.date(), **values)
+        for facility_id, category, day, values in zip(
+            facility_ids[valid], categories[valid], dates[valid], numbers[valid].to_dict('records')
+        )
+    ]
+    try:
+        with transaction.atomic():
+            if upsert:
+                spec.model.objects.upsert(objs, batch_size=IMPORT_BATCH_SIZE)
+            else:
+                spec.model.objects.bulk_create(objs, batch_size=IMPORT_BATCH_SIZE)
+    except IntegrityError:
+        # Another request added an entry for one of the months after the check above
+        raise ImportConflictError(
+            f'{spec.label} entries for some of these facilities and months were added meanwhile. '
+            'Upload the file again to see which rows conflict.'
+        )
+    # Rows for months that had an entry overwrote it (only possible with upsert)
+    report['updated'] = int(taken[valid].sum())
+    report['created'] = len(objs) - report['updated']
+    return report
@@ -0,0 +1,165 @@
+import threading
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+
+from .metrics import observe_request, view_label
+from .slow_queries import record_slow_query, slow_query_threshold
+
+# Most queries an endpoint may run on a cold cache against the seeded test
+# dataset, keyed by its route in users_pzc/urls.py. QueryBudgetTests requires
+# one for every GET route, including the rows a streaming export reads.
+QUERY_BUDGETS = {
+    'api/dashboard/': 0,
+    'api/Organization_view/': 1,
+    'api/view_facility/': 4,
+    'api/view_waste/': 2,
+    'api/view_energy/': 2,
+    'api/view_water/': 2,
+    'api/view_biodiversity/': 2,
+    'api/view_logistices/': 2,
+    'api/OverallUsageView/': 5,
+    'api/WasteViewCard_Over/': 1,
+    'api/FoodWasteOverviewView/': 1,
+    'api/SolidWasteOverviewView/': 1,
+    'api/E_WasteOverviewView/': 1,
+    'api/Biomedical_WasteOverviewView/': 1,
+    'api/Liquid_DischargeOverviewView/': 1,
+    'api/OthersOverviewView/': 1,
+    'api/Waste_Sent_For_RecycleOverviewView/': 1,
+    'api/Waste_Sent_For_LandFillOverviewView/': 1,
+    'api/StackedWasteOverviewView/': 9,
+    'api/WasteOverallDonutChartView/': 2,
+    'api/SentToLandfillOverviewView/': 3,
+    'api/SentToRecycledOverviewView/': 3,
+    'api/EnergyViewCard_Over/': 1,
+    'api/HVACOverviewView/': 1,
+    'api/ProductionOverviewView/': 1,
+    'api/StpOverviewView/': 1,
+    'api/Admin_BlockOverviewView/': 1,
+    'api/Utilities_OverviewView/': 1,
+    'api/Others_OverviewView/': 1,
+    'api/Renewable_EnergyOverView/': 2,
+    'api/Fuel_Used_OperationsOverView/': 2,
+    'api/StackedEnergyOverviewView/': 7,
+    'api/EnergyAnalyticsView/': 1,
+    'api/WaterViewCard_Over/': 1,
+    'api/Generated_WaterOverviewView/': 1,
+    'api/Recycle_WaterOverviewView/': 1,
+    'api/Softener_usageOverviewView/': 1,
+    'api/Boiler_usageOverviewView/': 1,
+    'api/otherUsage_OverviewView/': 1,
+    'api/StackedWaterOverviewView/': 5,
+    'api/WaterAnalyticsView/': 2,
+    'api/BiodiversityMetricsGraphsView/': 2,
+    'api/LogisticesOverviewAndGraphs/': 8,
+    'api/EmissionCalculations/': 4,
+    'api/YearFacilityDataAPIView/': 1,
+    'api/dashboard/batch/': 8,
+    'api/export/<str:model_name>/': 1,
+    'api/async/OverallUsageView/': 6,
+    'api/async/EmissionCalculations/': 5,
+    'api/slow_queries/': 0,
+}
+
+_stats_lock = threading.Lock()
+_endpoint_stats = {}
+
+
+class _QueryTimer:
+    """
+    execute_wrapper counting the queries and summing their time. Queries over
+    the slow query threshold are captured with their plan.
+    """
+
+    def __init__(self, request, slow_threshold=None):
+        self.request = request
+        self.slow_threshold = slow_threshold
+        self.queries = 0
+        self.seconds = 0.0
+        self._explaining = False
+
+    def __call__(self, execute, sql, params, many, context):
+        if self._explaining:
+            return execute(sql, params, many, context)
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - started
+            self.seconds += elapsed
+            self.queries += 1
+            if self.slow_threshold is not None and elapsed >= self.slow_threshold and not many:
+                self._capture(context['connection'], sql, params, elapsed)
+
+    def _capture(self, connection, sql, params, elapsed):
+        # The EXPLAIN goes through this wrapper too, but is neither counted nor captured
+        self._explaining = True
+        try:
+            record_slow_query(connection, sql, params, elapsed, view_label(self.request), self.request.path)
+        finally:
+            self._explaining = False
+
+
+def _record(endpoint, queries, db_seconds, wall_seconds):
+    with _stats_lock:
+        stats = _endpoint_stats.setdefault(endpoint, {'requests': 0, 'queries': 0, 'db_seconds': 0.0, 'wall_seconds': 0.0, 'max_queries': 0})
+        stats['requests'] += 1
+        stats['queries'] += queries
+        stats['db_seconds'] += db_seconds
+        stats['wall_seconds'] += wall_seconds
+        stats['max_queries'] = max(stats['max_queries'], queries)
+
+
+def endpoint_stats():
+    """Per-route totals recorded since the process started."""
+    with _stats_lock:
+        return {endpoint: dict(stats) for endpoint, stats in _endpoint_stats.items()}
+
+
+def reset_endpoint_stats():
+    with _stats_lock:
+        _endpoint_stats.clear()
+
+
+def endpoint_of(request):
+    # The route pattern, so every facility or record id lands on the same endpoint
+    match = getattr(request, 'resolver_match', None)
+    return match.route if match else None
+
+
+class QueryInstrumentationMiddleware:
+    """
+    Counts the queries, DB time and wall time of every request and records
+    them per endpoint and in the Prometheus metrics. With QUERY_INSTRUMENTATION_HEADERS on, they are also
+    returned in X-DB-Queries, X-DB-Time and X-Response-Time (milliseconds).
+
+    Only queries made on the request's thread before the response is
+    returned are seen: the worker threads of the async analytics views and
+    the rows fetched while a streaming export is sent are not counted.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        timer = _QueryTimer(request, slow_query_threshold())
+        started = time.perf_counter()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(timer))
+            response = self.get_response(request)
+        wall_seconds = time.perf_counter() - started
+
+        endpoint = endpoint_of(request)
+        if endpoint is not None:
+            _record(endpoint, timer.queries, timer.seconds, wall_seconds)
+        observe_request(request, response, wall_seconds, timer.queries)
+
+        if getattr(settings, 'QUERY_INSTRUMENTATION_HEADERS', False):
+            response['X-DB-Queries'] = str(timer.queries)
+            response['X-DB-Time'] = f"{timer.seconds * 1000:.2f}"
+            response['X-Response-Time'] = f"{wall_seconds * 1000:.2f}"
+        return response
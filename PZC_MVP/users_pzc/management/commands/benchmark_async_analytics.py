@@ -0,0 +1,109 @@
+import asyncio
+import json
+import statistics
+import time
+from urllib.parse import urlencode
+from urllib.request import Request, urlopen
+
+from django.core.management.base import BaseCommand, CommandError
+from django.test import AsyncClient, Client
+from django.test.utils import setup_test_environment
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from users_pzc.models import CustomUser
+
+# Sync endpoint -> its async variant
+ENDPOINTS = {
+    '/api/OverallUsageView/': '/api/async/OverallUsageView/',
+    '/api/EmissionCalculations/': '/api/async/EmissionCalculations/',
+}
+
+
+def _summary(timings):
+    return {
+        'mean_ms': round(statistics.mean(timings) * 1000, 2),
+        'p50_ms': round(statistics.median(timings) * 1000, 2),
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        "Compares the latency of the sync analytics views with their async variants. "
+        "Runs in-process by default; pass --base-url to hit a running ASGI server (e.g. uvicorn)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('email', help="User whose data is queried.")
+        parser.add_argument('--requests', type=int, default=20, help="Requests per endpoint.")
+        parser.add_argument('--concurrency', type=int, default=1, help="Concurrent requests against the async views.")
+        parser.add_argument('--year', help="Fiscal year to query; defaults to each view's own default.")
+        parser.add_argument('--base-url', help="Server to benchmark instead of the in-process test clients.")
+
+    def handle(self, *args, **options):
+        try:
+            user = CustomUser.objects.get(email=options['email'])
+        except CustomUser.DoesNotExist:
+            raise CommandError(f"No user with email {options['email']}.")
+
+        token = str(RefreshToken.for_user(user).access_token)
+        params = {'year': options['year']} if options['year'] else {}
+        runs = options['requests']
+
+        if not options['base_url']:
+            # Lets the test clients' 'testserver' host through ALLOWED_HOSTS
+            setup_test_environment()
+
+        results = {}
+        for sync_path, async_path in ENDPOINTS.items():
+            if options['base_url']:
+                sync_timings = self.time_http(options['base_url'], sync_path, params, token, runs)
+                async_timings = self.time_http(options['base_url'], async_path, params, token, runs)
+            else:
+                sync_timings = self.time_sync(sync_path, params, token, runs)
+                async_timings = asyncio.run(self.time_async(async_path, params, token, runs, options['concurrency']))
+            results[sync_path] = {'sync': _summary(sync_timings), 'async': _summary(async_timings)}
+
+        self.stdout.write(json.dumps(results, indent=2))
+
+    def time_sync(self, path, params, token, runs):
+        client = Client(headers={'Authorization': f'Bearer {token}'})
+        timings = []
+        for run in range(runs):
+            # A distinct query string per run keeps the response cache out of the numbers
+            started = time.perf_counter()
+            response = client.get(path, {**params, '_': run})
+            timings.append(time.perf_counter() - started)
+            self.check_status(path, response.status_code)
+        return timings
+
+    async def time_async(self, path, params, token, runs, concurrency):
+        # Client-level headers only reach WSGI requests, so they are passed per request
+        client = AsyncClient()
+        headers = {'Authorization': f'Bearer {token}'}
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def one(run):
+            async with semaphore:
+                started = time.perf_counter()
+                response = await client.get(path, {**params, '_': run}, headers=headers)
+                elapsed = time.perf_counter() - started
+            self.check_status(path, response.status_code)
+            return elapsed
+
+        return await asyncio.gather(*(one(run) for run in range(runs)))
+
+    def time_http(self, base_url, path, params, token, runs):
+        timings = []
+        for run in range(runs):
+            url = f"{base_url.rstrip('/')}{path}?{urlencode({**params, '_': run})}"
+            started = time.perf_counter()
+            with urlopen(Request(url, headers={'Authorization': f'Bearer {token}'})) as response:
+                response.read()
+                status = response.status
+            timings.append(time.perf_counter() - started)
+            self.check_status(path, status)
+        return timings
+
+    def check_status(self, path, status_code):
+        if status_code != 200:
+            raise CommandError(f"{path} answered {status_code}.")
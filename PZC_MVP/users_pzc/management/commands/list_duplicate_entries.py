@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand
+
+from users_pzc.batch_edits import BATCH_MODELS
+
+
+class Command(BaseCommand):
+    help = (
+        "Lists the activity entries that duplicate another entry of their facility and month. "
+        "Migration 0004 left them without an entry_month; merge or delete them, editing one "
+        "without changing its month is rejected."
+    )
+
+    def handle(self, *args, **options):
+        found = 0
+        for name, (model, id_field) in BATCH_MODELS.items():
+            duplicates = (
+                model.objects.filter(entry_month=None).exclude(DatePicker=None)
+                .order_by('facility_id', 'DatePicker')
+                .values_list(id_field, 'user__email', 'facility_id', 'DatePicker', *model.entry_key_fields)
+            )
+            for entry_id, email, facility_id, day, *key in duplicates:
+                kept = model.objects.filter(
+                    facility_id=facility_id, entry_month=day.replace(day=1),
+                    **dict(zip(model.entry_key_fields, key)),
+                ).values_list(id_field, flat=True).first()
+                self.stdout.write(f"{name} {entry_id} ({email}, facility {facility_id}, {day}) duplicates {kept}")
+                found += 1
+        if found:
+            self.stdout.write(self.style.WARNING(f"{found} duplicate entries."))
+        else:
+            self.stdout.write(self.style.SUCCESS("No duplicate entries."))
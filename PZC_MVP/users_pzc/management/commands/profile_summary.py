@@ -0,0 +1,41 @@
+import pstats
+from collections import defaultdict
+from io import StringIO
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from users_pzc.profiling import PROFILE_SUFFIX, profiling_dir
+
+
+class Command(BaseCommand):
+    help = "Summarises the cProfile files of ProfilingMiddleware: the top functions of each endpoint, merged over its profiles."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dir', help="Profile directory; defaults to PROFILING_DIR.")
+        parser.add_argument('--endpoint', action='append', dest='endpoints', help="Only summarise this URL name.")
+        parser.add_argument('--top', type=int, default=20, help="Functions listed per endpoint.")
+        parser.add_argument('--sort', default='cumulative', help="pstats sort key, e.g. cumulative or tottime.")
+
+    def handle(self, *args, **options):
+        directory = Path(options['dir']) if options['dir'] else profiling_dir()
+        if not directory.is_dir():
+            raise CommandError(f"No profile directory at {directory}.")
+
+        # <url name>-<timestamp>-<id>.prof; URL names may contain dashes themselves
+        profiles = defaultdict(list)
+        for path in sorted(directory.glob(f'*{PROFILE_SUFFIX}')):
+            endpoint = path.name[:-len(PROFILE_SUFFIX)].rsplit('-', 2)[0]
+            if not options['endpoints'] or endpoint in options['endpoints']:
+                profiles[endpoint].append(str(path))
+
+        if not profiles:
+            self.stdout.write("No profiles found.")
+            return
+
+        for endpoint, paths in sorted(profiles.items()):
+            stream = StringIO()
+            stats = pstats.Stats(*paths, stream=stream)
+            stats.strip_dirs().sort_stats(options['sort']).print_stats(options['top'])
+            self.stdout.write(self.style.MIGRATE_HEADING(f"{endpoint} ({len(paths)} profiles)"))
+            self.stdout.write(stream.getvalue())
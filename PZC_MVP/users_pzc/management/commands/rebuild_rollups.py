@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from users_pzc.rollups import rebuild_rollups
+
+
+class Command(BaseCommand):
+    help = "Rebuilds the MonthlyFacilityRollup table from the raw activity tables."
+
+    def handle(self, *args, **options):
+        created = rebuild_rollups()
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {created} monthly rollup rows."))
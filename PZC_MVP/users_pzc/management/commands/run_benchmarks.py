@@ -0,0 +1,56 @@
+import json
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import setup_test_environment
+
+from users_pzc.benchmarks import benchmark_report, compare_reports, generate_dataset, run_benchmarks
+
+
+class Command(BaseCommand):
+    help = (
+        "Seeds a throwaway SQLite database with synthetic data and times every GET endpoint. "
+        "Run with --settings=PZC_MVP.benchmark_settings."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=2)
+        parser.add_argument('--facilities', type=int, default=3, help="Facilities per user.")
+        parser.add_argument('--years', type=int, default=2, help="Fiscal years of monthly data per facility.")
+        parser.add_argument('--first-year', type=int, default=2022)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--iterations', type=int, default=20, help="Timed calls per endpoint.")
+        parser.add_argument('--warm', action='store_true', help="Keep the response caches between calls.")
+        parser.add_argument('--endpoint', action='append', dest='endpoints', help="Only time this route, e.g. api/OverallUsageView/.")
+        parser.add_argument('--output', help="Where to write the JSON report; printed when omitted.")
+        parser.add_argument('--compare', help="Earlier JSON report to compare the results with.")
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite':
+            raise CommandError("Benchmarks run on SQLite only; pass --settings=PZC_MVP.benchmark_settings.")
+        if options['iterations'] < 1:
+            raise CommandError("--iterations must be at least 1.")
+
+        dataset = {key: options[key] for key in ('users', 'facilities', 'years', 'first_year', 'seed')}
+        # A fresh test database every run, so results only depend on the dataset parameters
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        setup_test_environment()
+        try:
+            users = generate_dataset(**dataset)
+            year = options['first_year'] + options['years'] - 1
+            results = run_benchmarks(users[0], year, options['iterations'], options['warm'], options['endpoints'])
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+        report = benchmark_report(results, dataset, options['iterations'], options['warm'])
+        if options['output']:
+            Path(options['output']).write_text(json.dumps(report, indent=2))
+            self.stdout.write(self.style.SUCCESS(f"Timed {len(results)} endpoints, report written to {options['output']}."))
+        else:
+            self.stdout.write(json.dumps(report, indent=2))
+
+        if options['compare']:
+            before = json.loads(Path(options['compare']).read_text())
+            for row in compare_reports(before, report):
+                self.stdout.write('  '.join(row))
@@ -0,0 +1,133 @@
+import bisect
+import math
+import threading
+
+# Registry of this process; each worker process of a multi-process server is scraped on its own
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(names, values, extra=()):
+    pairs = [*zip(names, values), *extra]
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+
+def _number(value):
+    if value == math.inf:
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    def __init__(self, name, documentation, labelnames):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def inc(self, labels, amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def value(self, labels):
+        with self._lock:
+            return self._values.get(labels, 0)
+
+    def collect(self):
+        with self._lock:
+            values = dict(self._values)
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} counter']
+        for labels, value in sorted(values.items()):
+            lines.append(f'{self.name}{_labels(self.labelnames, labels)} {_number(value)}')
+        return lines
+
+    def clear(self):
+        with self._lock:
+            self._values.clear()
+
+
+class Histogram:
+    def __init__(self, name, documentation, labelnames, buckets):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        # labels -> [count per bucket (the last one is +Inf), sum, count]
+        self._values = {}
+
+    def observe(self, labels, value):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._values.get(labels)
+            if series is None:
+                series = self._values[labels] = [[0] * (len(self.buckets) + 1), 0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def collect(self):
+        with self._lock:
+            values = {labels: (list(counts), total, count) for labels, (counts, total, count) in self._values.items()}
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} histogram']
+        for labels, (counts, total, count) in sorted(values.items()):
+            cumulative = 0
+            for bound, bucket_count in zip((*self.buckets, math.inf), counts):
+                cumulative += bucket_count
+                lines.append(f'{self.name}_bucket{_labels(self.labelnames, labels, [("le", _number(bound))])} {cumulative}')
+            lines.append(f'{self.name}_sum{_labels(self.labelnames, labels)} {_number(total)}')
+            lines.append(f'{self.name}_count{_labels(self.labelnames, labels)} {count}')
+        return lines
+
+    def clear(self):
+        with self._lock:
+            self._values.clear()
+
+
+REQUEST_LABELS = ('view', 'method', 'status')
+
+REQUESTS = Counter('pzc_http_requests_total', 'Requests handled, by view class, method and status code.', REQUEST_LABELS)
+LATENCY = Histogram('pzc_http_request_duration_seconds', 'Wall time of a request including middleware.', REQUEST_LABELS, LATENCY_BUCKETS)
+DB_QUERIES = Histogram('pzc_http_request_db_queries', 'Database queries run while handling a request.', REQUEST_LABELS, QUERY_BUCKETS)
+RESPONSE_SIZE = Histogram('pzc_http_response_size_bytes', 'Size of non-streaming response bodies.', REQUEST_LABELS, SIZE_BUCKETS)
+AUTH_USER_CACHE = Counter('pzc_auth_user_cache_lookups_total', 'Users resolved from access tokens, by cache result (hit or miss).', ('result',))
+
+REGISTRY = (REQUESTS, LATENCY, DB_QUERIES, RESPONSE_SIZE, AUTH_USER_CACHE)
+
+
+def view_label(request):
+    """The view class of the resolved URL; requests matching no URL share one label."""
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return 'unresolved'
+    view_class = getattr(match.func, 'view_class', None)
+    return view_class.__name__ if view_class else match.func.__name__
+
+
+def observe_request(request, response, seconds, queries):
+    labels = (view_label(request), request.method, str(response.status_code))
+    REQUESTS.inc(labels)
+    LATENCY.observe(labels, seconds)
+    DB_QUERIES.observe(labels, queries)
+    if not response.streaming:
+        RESPONSE_SIZE.observe(labels, len(response.content))
+
+
+def render_metrics():
+    """All metrics in the Prometheus text exposition format."""
+    return '\n'.join(line for metric in REGISTRY for line in metric.collect()) + '\n'
+
+
+def reset_metrics():
+    for metric in REGISTRY:
+        metric.clear()
@@ -0,0 +1,53 @@
+# Generated by Django 5.1.2 on 2026-10-18 13:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users_pzc', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='biodiversity',
+            index=models.Index(fields=['user', 'DatePicker'], name='users_pzc_b_user_id_0d42a8_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='biodiversity',
+            index=models.Index(fields=['facility', 'DatePicker'], name='users_pzc_b_facilit_4a455d_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='energy',
+            index=models.Index(fields=['user', 'DatePicker'], name='users_pzc_e_user_id_2eb52f_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='energy',
+            index=models.Index(fields=['facility', 'DatePicker'], name='users_pzc_e_facilit_42332a_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='logistices',
+            index=models.Index(fields=['user', 'DatePicker'], name='users_pzc_l_user_id_7a267b_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='logistices',
+            index=models.Index(fields=['facility', 'DatePicker'], name='users_pzc_l_facilit_1be407_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='waste',
+            index=models.Index(fields=['user', 'DatePicker'], name='users_pzc_w_user_id_b4f332_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='waste',
+            index=models.Index(fields=['facility', 'DatePicker'], name='users_pzc_w_facilit_e20530_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='water',
+            index=models.Index(fields=['user', 'DatePicker'], name='users_pzc_w_user_id_243039_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='water',
+            index=models.Index(fields=['facility', 'DatePicker'], name='users_pzc_w_facilit_5eef1c_idx'),
+        ),
+    ]
@@ -0,0 +1,84 @@
+# Generated by Django 5.1.2 on 2026-10-18 13:09
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Sum
+from django.db.models.functions import ExtractMonth, ExtractYear
+
+# rollups.ROLLUP_METRICS as of this migration, frozen here
+ROLLUP_METRICS = {
+    'Waste': [
+        'food_waste', 'solid_Waste', 'E_Waste', 'Biomedical_waste', 'liquid_discharge',
+        'other_waste', 'Recycle_waste', 'Landfill_waste', 'overall_usage'
+    ],
+    'Energy': [
+        'hvac', 'production', 'stp', 'admin_block', 'utilities', 'others',
+        'coking_coal', 'coke_oven_coal', 'natural_gas', 'diesel', 'biomass_wood',
+        'biomass_other_solid', 'renewable_solar', 'renewable_other', 'overall_usage'
+    ],
+    'Water': [
+        'Generated_Water', 'Recycled_Water', 'Softener_usage', 'Boiler_usage', 'otherUsage', 'overall_usage'
+    ],
+    'Biodiversity': [
+        'no_trees', 'totalArea', 'new_trees_planted', 'head_count', 'overall_Trees'
+    ],
+    'Logistices': [
+        'km_travelled', 'No_Trips', 'fuel_consumption', 'No_Vehicles', 'Spends_on_fuel', 'total_fuelconsumption'
+    ],
+}
+
+
+def fill_rollups(apps, schema_editor):
+    """The same rows as rollups.rebuild_rollups(): one grouped query per activity model."""
+    MonthlyFacilityRollup = apps.get_model('users_pzc', 'MonthlyFacilityRollup')
+    for model_name, fields in ROLLUP_METRICS.items():
+        model = apps.get_model('users_pzc', model_name)
+        rows = (
+            model.objects.exclude(DatePicker=None)
+            .annotate(entry_year=ExtractYear('DatePicker'), entry_month=ExtractMonth('DatePicker'))
+            .values('user_id', 'facility_id', 'entry_year', 'entry_month')
+            .annotate(**{f"total_{field}": Sum(field) for field in fields})
+            .order_by()
+        )
+        rollups = [
+            MonthlyFacilityRollup(
+                user_id=row['user_id'],
+                facility_id=row['facility_id'],
+                # April to March fiscal years named after the April year
+                fiscal_year=row['entry_year'] if row['entry_month'] >= 4 else row['entry_year'] - 1,
+                month=row['entry_month'],
+                metric=f"{model_name.lower()}.{field}",
+                value=row[f"total_{field}"] or 0,
+            )
+            for row in rows.iterator(chunk_size=2000)
+            for field in fields
+        ]
+        MonthlyFacilityRollup.objects.bulk_create(rollups, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users_pzc', '0002_activity_date_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MonthlyFacilityRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fiscal_year', models.IntegerField()),
+                ('month', models.IntegerField()),
+                ('metric', models.CharField(max_length=64)),
+                ('value', models.FloatField(default=0.0)),
+                ('facility', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='users_pzc.facility')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['user', 'fiscal_year', 'metric'], name='users_pzc_m_user_id_1ec22d_idx')],
+                'constraints': [models.UniqueConstraint(fields=('user', 'facility', 'fiscal_year', 'month', 'metric'), name='unique_monthly_facility_rollup')],
+            },
+        ),
+        migrations.RunPython(fill_rollups, migrations.RunPython.noop),
+    ]
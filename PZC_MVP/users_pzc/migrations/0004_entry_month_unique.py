@@ -0,0 +1,93 @@
+# Generated by Django 5.1.2 on 2026-10-18 13:23
+
+from django.db import migrations, models
+
+ACTIVITY_MODELS = {
+    'Waste': (),
+    'Energy': (),
+    'Water': (),
+    'Biodiversity': (),
+    'Logistices': ('logistices_types', 'Typeof_fuel'),
+}
+
+
+def fill_entry_month(apps, schema_editor):
+    """
+    Sets entry_month from DatePicker. Where a facility already has several
+    entries for a month, only the latest keeps its entry_month; the others stay
+    NULL so the constraints can be created; `manage.py list_duplicate_entries`
+    lists them for clean-up.
+    """
+    for model_name, key_fields in ACTIVITY_MODELS.items():
+        model = apps.get_model('users_pzc', model_name)
+        seen = set()
+        batch = []
+        rows = model.objects.exclude(DatePicker=None).order_by('-DatePicker', '-pk')
+        for entry in rows.only('pk', 'facility_id', 'DatePicker', *key_fields).iterator(chunk_size=2000):
+            month = entry.DatePicker.replace(day=1)
+            key = (entry.facility_id, month, *(getattr(entry, field) for field in key_fields))
+            if key in seen:
+                continue
+            seen.add(key)
+            entry.entry_month = month
+            batch.append(entry)
+            if len(batch) >= 1000:
+                model.objects.bulk_update(batch, ['entry_month'])
+                batch = []
+        model.objects.bulk_update(batch, ['entry_month'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users_pzc', '0003_monthly_facility_rollup'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='biodiversity',
+            name='entry_month',
+            field=models.DateField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='energy',
+            name='entry_month',
+            field=models.DateField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='logistices',
+            name='entry_month',
+            field=models.DateField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='waste',
+            name='entry_month',
+            field=models.DateField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='water',
+            name='entry_month',
+            field=models.DateField(blank=True, editable=False, null=True),
+        ),
+        migrations.RunPython(fill_entry_month, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='biodiversity',
+            constraint=models.UniqueConstraint(fields=('facility', 'entry_month'), name='unique_biodiversity_facility_month'),
+        ),
+        migrations.AddConstraint(
+            model_name='energy',
+            constraint=models.UniqueConstraint(fields=('facility', 'entry_month'), name='unique_energy_facility_month'),
+        ),
+        migrations.AddConstraint(
+            model_name='logistices',
+            constraint=models.UniqueConstraint(fields=('facility', 'entry_month', 'logistices_types', 'Typeof_fuel'), name='unique_logistices_facility_month'),
+        ),
+        migrations.AddConstraint(
+            model_name='waste',
+            constraint=models.UniqueConstraint(fields=('facility', 'entry_month'), name='unique_waste_facility_month'),
+        ),
+        migrations.AddConstraint(
+            model_name='water',
+            constraint=models.UniqueConstraint(fields=('facility', 'entry_month'), name='unique_water_facility_month'),
+        ),
+    ]
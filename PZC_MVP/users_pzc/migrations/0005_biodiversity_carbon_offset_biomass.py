@@ -0,0 +1,34 @@
+# Generated by Django 5.1.2 on 2026-10-18 13:27
+
+from django.db import migrations, models
+from django.db.models import F
+
+
+def fill_tree_metrics(apps, schema_editor):
+    # Same formulas as models.tree_carbon_offset/tree_biomass, frozen here
+    Biodiversity = apps.get_model('users_pzc', 'Biodiversity')
+    Biodiversity.objects.update(
+        carbon_offset=0.00006 * F('width') * F('width') * F('height') * F('no_trees'),
+        biomass=0.0998 * F('width') * F('width') * F('height'),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users_pzc', '0004_entry_month_unique'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='biodiversity',
+            name='biomass',
+            field=models.FloatField(default=0.0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='biodiversity',
+            name='carbon_offset',
+            field=models.FloatField(default=0.0, editable=False),
+        ),
+        migrations.RunPython(fill_tree_metrics, migrations.RunPython.noop),
+    ]
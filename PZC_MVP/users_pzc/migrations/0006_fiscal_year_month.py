@@ -0,0 +1,119 @@
+# Generated by Django 5.1.2 on 2026-10-18 13:29
+
+from django.db import migrations, models
+from django.db.models import Case, F, When
+from django.db.models.functions import ExtractMonth, ExtractYear
+
+
+def fill_fiscal_columns(apps, schema_editor):
+    # One UPDATE per model; April to March fiscal years named after the April year
+    for model_name in ('Waste', 'Energy', 'Water', 'Biodiversity', 'Logistices'):
+        model = apps.get_model('users_pzc', model_name)
+        model.objects.exclude(DatePicker=None).update(
+            fiscal_year=Case(
+                When(DatePicker__month__gte=4, then=ExtractYear('DatePicker')),
+                default=ExtractYear('DatePicker') - 1,
+            ),
+            fiscal_month=ExtractMonth('DatePicker'),
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users_pzc', '0005_biodiversity_carbon_offset_biomass'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='biodiversity',
+            name='fiscal_month',
+            field=models.IntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='biodiversity',
+            name='fiscal_year',
+            field=models.IntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='energy',
+            name='fiscal_month',
+            field=models.IntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='energy',
+            name='fiscal_year',
+            field=models.IntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='logistices',
+            name='fiscal_month',
+            field=models.IntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='logistices',
+            name='fiscal_year',
+            field=models.IntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='waste',
+            name='fiscal_month',
+            field=models.IntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='waste',
+            name='fiscal_year',
+            field=models.IntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='water',
+            name='fiscal_month',
+            field=models.IntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='water',
+            name='fiscal_year',
+            field=models.IntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.RunPython(fill_fiscal_columns, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='biodiversity',
+            index=models.Index(fields=['user', 'fiscal_year', 'fiscal_month'], name='users_pzc_b_user_id_4f7f5b_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='biodiversity',
+            index=models.Index(fields=['facility', 'fiscal_year', 'fiscal_month'], name='users_pzc_b_facilit_b513bb_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='energy',
+            index=models.Index(fields=['user', 'fiscal_year', 'fiscal_month'], name='users_pzc_e_user_id_5b3c55_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='energy',
+            index=models.Index(fields=['facility', 'fiscal_year', 'fiscal_month'], name='users_pzc_e_facilit_0930db_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='logistices',
+            index=models.Index(fields=['user', 'fiscal_year', 'fiscal_month'], name='users_pzc_l_user_id_e42c3f_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='logistices',
+            index=models.Index(fields=['facility', 'fiscal_year', 'fiscal_month'], name='users_pzc_l_facilit_2b1842_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='waste',
+            index=models.Index(fields=['user', 'fiscal_year', 'fiscal_month'], name='users_pzc_w_user_id_0b0b5f_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='waste',
+            index=models.Index(fields=['facility', 'fiscal_year', 'fiscal_month'], name='users_pzc_w_facilit_d56cf0_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='water',
+            index=models.Index(fields=['user', 'fiscal_year', 'fiscal_month'], name='users_pzc_w_user_id_079bf5_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='water',
+            index=models.Index(fields=['facility', 'fiscal_year', 'fiscal_month'], name='users_pzc_w_facilit_fa12f7_idx'),
+        ),
+    ]
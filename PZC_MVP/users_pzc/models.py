@@ -1,10 +1,33 @@
 # myapp/models.py
+import operator
 import uuid
-from django.db import models
+from functools import reduce
+from django.db import connections, models, transaction
+from django.db.models import Case, ExpressionWrapper, F, Value, When
+from django.db.models.functions import ExtractMonth, ExtractYear, TruncMonth
+from django.db.models.lookups import GreaterThanOrEqual
 from django.utils import timezone 
 from django.contrib.auth.models import AbstractBaseUser, BaseUserManager, PermissionsMixin
 
-class CustomUserManager(BaseUserManager):
+from .fiscal import fiscal_year_of, invalidate_latest_dates
+from .response_cache import bump_data_version
+from .user_cache import evict_all_users, evict_user
+
+
+class CustomUserQuerySet(models.QuerySet):
+    """Bulk updates and deletes bypass CustomUser.save()/delete(), so they drop every cached user."""
+    def update(self, **kwargs):
+        rows = super().update(**kwargs)
+        evict_all_users()
+        return rows
+
+    def delete(self):
+        result = super().delete()
+        evict_all_users()
+        return result
+
+
+class CustomUserManager(BaseUserManager.from_queryset(CustomUserQuerySet)):
     def create_user(self, email, password=None, **extra_fields):
         if not email:
             raise ValueError('The Email field must be set')
@@ -32,6 +55,8 @@ class CustomUser(AbstractBaseUser, PermissionsMixin):
     last_name = models.CharField(max_length=30, blank=True)
     is_active = models.BooleanField(default=True)
     is_staff = models.BooleanField(default=False)
+    # Carried in issued tokens; bumping it revokes every token issued before
+    token_version = models.PositiveIntegerField(default=0)
 
     objects = CustomUserManager()
 
@@ -41,6 +66,16 @@ class CustomUser(AbstractBaseUser, PermissionsMixin):
     def __str__(self):
         return self.email
 
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        evict_user(self.pk)
+
+    def delete(self, *args, **kwargs):
+        user_id = self.pk
+        result = super().delete(*args, **kwargs)
+        evict_user(user_id)
+        return result
+
 
 class Org_registration(models.Model):
     user = models.ForeignKey(CustomUser,on_delete=models.CASCADE)
@@ -69,8 +104,195 @@ class Facility(models.Model):
         if not self.facility_id:
             self.facility_id = uuid.uuid4().hex[:8].upper()
         super().save(*args, **kwargs)
+        # Facility names appear in the cached analytics responses
+        bump_data_version([self.user_id])
+
+    def delete(self, *args, **kwargs):
+        # The activity rows go with the facility through the cascade, which bypasses their delete()
+        cells = [(self.user_id, self.facility_id, None)]
+        result = super().delete(*args, **kwargs)
+        for model in (Waste, Energy, Water, Biodiversity, Logistices):
+            invalidate_latest_dates(model, cells)
+        bump_data_version([self.user_id])
+        return result
+
+def activity_changed(model, cells):
+    """Refreshes the data derived from the given (user_id, facility_id, month start) cells."""
+    from .rollups import refresh_rollups
+    refresh_rollups(model, cells)
+    invalidate_latest_dates(model, cells)
+    bump_data_version({user_id for user_id, _, _ in cells})
+
+
+def total(*values):
+    return reduce(operator.add, values)
+
+
+def date_columns(day):
+    """SQL expressions of the columns derived from DatePicker, for the `day` expression."""
+    month = ExtractMonth(day)
+    return {
+        'entry_month': TruncMonth(day, output_field=models.DateField()),
+        'fiscal_year': Case(When(GreaterThanOrEqual(month, 4), then=ExtractYear(day)), default=ExtractYear(day) - 1),
+        'fiscal_month': month,
+    }
+
+
+def _as_expression(value):
+    return value if hasattr(value, 'resolve_expression') else Value(value)
+
+
+# Columns placing a row in its (user, facility, month) rollup cell
+CELL_FIELDS = {'user', 'user_id', 'facility', 'facility_id', 'DatePicker'}
+
+
+class ActivityQuerySet(models.QuerySet):
+    """
+    Keeps MonthlyFacilityRollup and the cached latest dates in step with the
+    bulk write paths, which bypass Model.save()/delete(). bulk_update goes
+    through update().
+    """
+    def bulk_create(self, objs, *args, **kwargs):
+        from .rollups import instance_cells
+        objs = list(objs)
+        for obj in objs:
+            obj.set_derived_fields()
+        with transaction.atomic(using=self.db):
+            objs = super().bulk_create(objs, *args, **kwargs)
+            activity_changed(self.model, instance_cells(objs))
+        return objs
+
+    def upsert(self, objs, batch_size=None):
+        """
+        Inserts the entries, overwriting the existing entry of the same
+        facility and month (see unique_entry_fields()) in the same statement:
+        ON CONFLICT on the entry's unique fields where the database takes a
+        conflict target, ON DUPLICATE KEY UPDATE on MySQL, which cannot and
+        relies on the unique constraint. The user and the id of an overwritten
+        entry are kept.
+        """
+        unique_fields = self.model.unique_entry_fields()
+        update_fields = [
+            field.name for field in self.model._meta.concrete_fields
+            if not (field.primary_key or field.unique or field.name in unique_fields or field.name == 'user')
+        ]
+        conflict_target = {}
+        if connections[self.db].features.supports_update_conflicts_with_target:
+            conflict_target['unique_fields'] = unique_fields
+        return self.bulk_create(
+            objs, batch_size=batch_size, update_conflicts=True,
+            update_fields=update_fields, **conflict_target,
+        )
+
+    def update(self, **kwargs):
+        from .rollups import ROLLUP_REFRESH_CHUNK, queryset_cells
+        # Recompute the derived columns in the same statement, from the new values where given
+        if 'DatePicker' in kwargs:
+            kwargs.update(date_columns(_as_expression(kwargs['DatePicker'])))
+        for target, (fields, formula) in self.model.derived_fields.items():
+            if target not in kwargs and any(field in kwargs for field in fields):
+                kwargs[target] = ExpressionWrapper(
+                    formula(*(_as_expression(kwargs.get(field, F(field))) for field in fields)),
+                    output_field=models.FloatField(),
+                )
+        with transaction.atomic(using=self.db):
+            previous = queryset_cells(self)
+            moving = CELL_FIELDS & kwargs.keys()
+            owners = set(self.values_list('user_id', 'facility_id').order_by().distinct()) if moving else set()
+            rows = super().update(**kwargs)
+            # A chunk of owners at a time keeps the IN lists under the database's parameter limit
+            owners = sorted(owners)
+            for start in range(0, len(owners), ROLLUP_REFRESH_CHUNK):
+                destination = self._destination_filters(owners[start:start + ROLLUP_REFRESH_CHUNK], kwargs)
+                previous |= queryset_cells(self.model.objects.filter(**destination))
+            activity_changed(self.model, previous)
+        return rows
+
+    @staticmethod
+    def _destination_filters(owners, kwargs):
+        """
+        Narrows down where rows moved by an update of CELL_FIELDS can be now; the
+        original filter may no longer match them. Among the rows of the same
+        users and facilities, or of the new ones, on the new date when it is a
+        constant. Refreshing a few extra cells is harmless.
+        """
+        def new_value(*names):
+            for name in names:
+                if name in kwargs:
+                    value = kwargs[name]
+                    return None if hasattr(value, 'resolve_expression') else getattr(value, 'pk', value)
+            return None
+
+        user_id = new_value('user', 'user_id')
+        facility_id = new_value('facility', 'facility_id')
+        filters = {
+            'user_id__in': {user_id} if user_id is not None else {owner for owner, _ in owners},
+            'facility_id__in': {facility_id} if facility_id is not None else {facility for _, facility in owners},
+        }
+        day = new_value('DatePicker')
+        if day is not None:
+            filters['DatePicker'] = day
+        return filters
+
+    def delete(self):
+        from .rollups import queryset_cells
+        with transaction.atomic(using=self.db):
+            previous = queryset_cells(self)
+            result = super().delete()
+            activity_changed(self.model, previous)
+        return result
+
+
+class ActivityModel(models.Model):
+    """Base for the monthly activity models; saves and deletes update the derived data."""
+    # First day of the DatePicker month; the unique constraints allow one entry per facility and month
+    entry_month = models.DateField(null=True, blank=True, editable=False)
+    # April to March fiscal year of DatePicker and its calendar month, indexed for year filters and month groupings
+    fiscal_year = models.IntegerField(null=True, blank=True, editable=False)
+    fiscal_month = models.IntegerField(null=True, blank=True, editable=False)
+
+    objects = ActivityQuerySet.as_manager()
+
+    # Fields identifying an entry besides the facility and month, see unique_entry_fields()
+    entry_key_fields = ()
+
+    # Computed column -> (source columns, formula over them). Formulas only use arithmetic
+    # operators so they work on values in set_derived_fields() and on F() expressions in update()
+    derived_fields = {}
+
+    class Meta:
+        abstract = True
+
+    @classmethod
+    def unique_entry_fields(cls):
+        return ('facility', 'entry_month', *cls.entry_key_fields)
+
+    def set_derived_fields(self):
+        """Fills the generated id and the computed columns; bulk_create bypasses save() and calls it too."""
+        self.entry_month = self.DatePicker.replace(day=1) if self.DatePicker else None
+        self.fiscal_year = fiscal_year_of(self.DatePicker) if self.DatePicker else None
+        self.fiscal_month = self.DatePicker.month if self.DatePicker else None
+        for target, (fields, formula) in self.derived_fields.items():
+            setattr(self, target, formula(*(getattr(self, field) or 0 for field in fields)))
+
+    def save(self, *args, **kwargs):
+        from .rollups import instance_cells, queryset_cells
+        self.set_derived_fields()
+        with transaction.atomic():
+            previous = queryset_cells(type(self).objects.filter(pk=self.pk)) if self.pk else set()
+            super().save(*args, **kwargs)
+            activity_changed(type(self), previous | instance_cells([self]))
+
+    def delete(self, *args, **kwargs):
+        from .rollups import queryset_cells
+        with transaction.atomic():
+            previous = queryset_cells(type(self).objects.filter(pk=self.pk))
+            result = super().delete(*args, **kwargs)
+            activity_changed(type(self), previous)
+        return result
+
     
-class Waste(models.Model):
+class Waste(ActivityModel):
     user = models.ForeignKey(CustomUser,on_delete=models.CASCADE)
     waste_id =  models.CharField(max_length=255,primary_key=True, editable=False)
     facility = models.ForeignKey(Facility, on_delete=models.CASCADE)
@@ -86,19 +308,29 @@ class Waste(models.Model):
     Landfill_waste = models.FloatField(default=0.0)
     overall_usage = models.FloatField(default=0.0, editable=False)
 
+    derived_fields = {'overall_usage': (('food_waste', 'solid_Waste', 'E_Waste', 'Biomedical_waste', 'other_waste'), total)}
+
     def __str__(self):
         return f"Waste data for {self.user.email}"
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'DatePicker']),
+            models.Index(fields=['facility', 'DatePicker']),
+            models.Index(fields=['user', 'fiscal_year', 'fiscal_month']),
+            models.Index(fields=['facility', 'fiscal_year', 'fiscal_month']),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=['facility', 'entry_month'], name='unique_waste_facility_month'),
+        ]
     
-    def save(self, *args, **kwargs):
+    def set_derived_fields(self):
+        super().set_derived_fields()
         if not self.waste_id:
             self.waste_id = uuid.uuid4().hex[:8].upper()
-        self.overall_usage = (self.food_waste + self.solid_Waste + self.E_Waste +
-                              self.Biomedical_waste + self.other_waste)
-        
-        super().save(*args, **kwargs)
 
 
-class Energy(models.Model):
+class Energy(ActivityModel):
     user = models.ForeignKey(CustomUser,on_delete=models.CASCADE)
     facility = models.ForeignKey(Facility, on_delete=models.CASCADE)
     energy_id =  models.CharField(max_length=255, primary_key=True, editable=False)
@@ -120,15 +352,28 @@ class Energy(models.Model):
     renewable_other = models.FloatField(default=0.0)
     overall_usage = models.FloatField(default=0.0, editable=False)
     
+    derived_fields = {'overall_usage': (('hvac', 'production', 'stp', 'admin_block', 'utilities', 'others'), total)}
+
     def __str__(self):
         return f"Energy data for {self.user.email}"
-    def save(self,*args, **kwargs):
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'DatePicker']),
+            models.Index(fields=['facility', 'DatePicker']),
+            models.Index(fields=['user', 'fiscal_year', 'fiscal_month']),
+            models.Index(fields=['facility', 'fiscal_year', 'fiscal_month']),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=['facility', 'entry_month'], name='unique_energy_facility_month'),
+        ]
+
+    def set_derived_fields(self):
+        super().set_derived_fields()
         if not self.energy_id:
             self.energy_id = uuid.uuid4().hex[:8].upper()
-        self.overall_usage = (self.hvac + self.production + self.stp + self.admin_block + self.utilities + self.others)
-        super(Energy,self).save(*args, **kwargs)
 
-class Water(models.Model):
+class Water(ActivityModel):
     user = models.ForeignKey(CustomUser,on_delete=models.CASCADE)
     facility = models.ForeignKey(Facility, on_delete=models.CASCADE)
     category = models.CharField(max_length=255)
@@ -141,15 +386,37 @@ class Water(models.Model):
     otherUsage = models.FloatField(default=0.0)
     overall_usage = models.FloatField(default=0.0, editable=False)
     
+    derived_fields = {'overall_usage': (('Generated_Water', 'Recycled_Water', 'Softener_usage', 'Boiler_usage', 'otherUsage'), total)}
+
     def __str__(self):
         return f"Water data for {self.user.email}"
-    def save(self, *args, **kwargs):
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'DatePicker']),
+            models.Index(fields=['facility', 'DatePicker']),
+            models.Index(fields=['user', 'fiscal_year', 'fiscal_month']),
+            models.Index(fields=['facility', 'fiscal_year', 'fiscal_month']),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=['facility', 'entry_month'], name='unique_water_facility_month'),
+        ]
+
+    def set_derived_fields(self):
+        super().set_derived_fields()
         if not self.water_id:
             self.water_id = uuid.uuid4().hex[:8].upper()
-        self.overall_usage = (self.Generated_Water + self.Recycled_Water + self.Softener_usage + self.Boiler_usage + self.otherUsage)
-        super(Water, self).save(*args, **kwargs)
     
-class Biodiversity(models.Model):
+def tree_carbon_offset(width, height, no_trees):
+    """Carbon offset of an entry's trees from their canopy width and height."""
+    return 0.00006 * width * width * height * no_trees
+
+
+def tree_biomass(width, height):
+    return 0.0998 * width * width * height
+
+
+class Biodiversity(ActivityModel):
     user = models.ForeignKey(CustomUser,on_delete=models.CASCADE)
     facility = models.ForeignKey(Facility, on_delete=models.CASCADE)
     category = models.CharField(max_length=255)
@@ -164,19 +431,36 @@ class Biodiversity(models.Model):
     new_trees_planted = models.FloatField(default=0.0)
     head_count = models.FloatField(default=0.0)
     overall_Trees = models.FloatField(default=0.0, editable=False)
+    carbon_offset = models.FloatField(default=0.0, editable=False)
+    biomass = models.FloatField(default=0.0, editable=False)
+
+    derived_fields = {
+        'overall_Trees': (('no_trees',), total),
+        'carbon_offset': (('width', 'height', 'no_trees'), tree_carbon_offset),
+        'biomass': (('width', 'height'), tree_biomass),
+    }
 
-    
     def __str__(self):
         return f"biodiversity data for {self.user.email}"
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'DatePicker']),
+            models.Index(fields=['facility', 'DatePicker']),
+            models.Index(fields=['user', 'fiscal_year', 'fiscal_month']),
+            models.Index(fields=['facility', 'fiscal_year', 'fiscal_month']),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=['facility', 'entry_month'], name='unique_biodiversity_facility_month'),
+        ]
     
-    def save(self,*args, **kwargs):
+    def set_derived_fields(self):
+        super().set_derived_fields()
         if not self.biodiversity_id:
             self.biodiversity_id = uuid.uuid4().hex[:8].upper()
-        self.overall_Trees = (self.no_trees)
-        super(Biodiversity,self).save(*args, **kwargs)
         
     
-class Logistices(models.Model):
+class Logistices(ActivityModel):
     user = models.ForeignKey(CustomUser,on_delete=models.CASCADE)
     facility = models.ForeignKey(Facility, on_delete=models.CASCADE)
     LOGISTICES_TYPE_CHOICES=[
@@ -198,12 +482,50 @@ class Logistices(models.Model):
     No_Vehicles = models.IntegerField()
     Spends_on_fuel = models.FloatField(default=0.0)
     total_fuelconsumption = models.FloatField(default=0.0, editable=False)
+
+    entry_key_fields = ('logistices_types', 'Typeof_fuel')
+
+    derived_fields = {'total_fuelconsumption': (('fuel_consumption',), total)}
+
     def __str__(self):
         return f" data for {self.user.email}"
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'DatePicker']),
+            models.Index(fields=['facility', 'DatePicker']),
+            models.Index(fields=['user', 'fiscal_year', 'fiscal_month']),
+            models.Index(fields=['facility', 'fiscal_year', 'fiscal_month']),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=['facility', 'entry_month', 'logistices_types', 'Typeof_fuel'], name='unique_logistices_facility_month'),
+        ]
     
-    def save(self,*args, **kwargs):
+    def set_derived_fields(self):
+        super().set_derived_fields()
         if not self.logistices_id:
             self.logistices_id = uuid.uuid4().hex[:8].upper()
-        self.total_fuelconsumption = (self.fuel_consumption)
-        super(Logistices,self).save(*args, **kwargs)
-    
\ No newline at end of file
+
+
+class MonthlyFacilityRollup(models.Model):
+    """Per facility monthly sums of every activity metric, maintained on write."""
+    user = models.ForeignKey(CustomUser, on_delete=models.CASCADE)
+    facility = models.ForeignKey(Facility, on_delete=models.CASCADE)
+    fiscal_year = models.IntegerField()
+    month = models.IntegerField()
+    metric = models.CharField(max_length=64)
+    value = models.FloatField(default=0.0)
+
+    def __str__(self):
+        return f"{self.metric} {self.fiscal_year}/{self.month} for {self.facility_id}"
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'facility', 'fiscal_year', 'month', 'metric'],
+                name='unique_monthly_facility_rollup'
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['user', 'fiscal_year', 'metric']),
+        ]
@@ -0,0 +1,55 @@
+import base64
+import binascii
+from datetime import date
+
+from django.conf import settings
+from django.db.models import Q
+
+LISTING_PAGE_SIZE = getattr(settings, 'LISTING_PAGE_SIZE', 500)
+LISTING_MAX_PAGE_SIZE = getattr(settings, 'LISTING_MAX_PAGE_SIZE', 1000)
+
+
+def encode_cursor(row):
+    raw = f"{row.DatePicker.isoformat()}|{row.pk}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(cursor):
+    try:
+        day, pk = base64.urlsafe_b64decode(cursor.encode()).decode().split('|', 1)
+        return date.fromisoformat(day), pk
+    except (ValueError, UnicodeDecodeError, binascii.Error):
+        raise ValueError('Invalid cursor.')
+
+
+def page_size_of(request):
+    value = request.GET.get('page_size')
+    if not value:
+        return LISTING_PAGE_SIZE
+    try:
+        size = int(value)
+    except ValueError:
+        raise ValueError('page_size must be an integer.')
+    if size < 1:
+        raise ValueError('page_size must be positive.')
+    return min(size, LISTING_MAX_PAGE_SIZE)
+
+
+def keyset_page(queryset, request):
+    """
+    One page of the queryset ordered on (DatePicker, pk), continuing after the
+    `cursor` query parameter. Returns the rows and the cursor of the next page,
+    None on the last page. Raises ValueError for a bad cursor or page_size.
+    """
+    size = page_size_of(request)
+    queryset = queryset.order_by('DatePicker', 'pk')
+
+    cursor = request.GET.get('cursor')
+    if cursor:
+        day, pk = decode_cursor(cursor)
+        queryset = queryset.filter(Q(DatePicker__gt=day) | Q(DatePicker=day, pk__gt=pk))
+
+    # One extra row tells whether another page follows
+    rows = list(queryset[:size + 1])
+    next_cursor = encode_cursor(rows[size - 1]) if len(rows) > size else None
+    return rows[:size], next_cursor
@@ -0,0 +1,78 @@
+import cProfile
+import os
+import random
+import time
+import uuid
+from pathlib import Path
+
+from django.conf import settings
+
+from .authentication import staff_user
+
+PROFILE_SUFFIX = '.prof'
+
+
+def profiling_dir():
+    return Path(getattr(settings, 'PROFILING_DIR', Path(settings.BASE_DIR) / 'profiles'))
+
+
+def _wants_profile(request):
+    if request.headers.get('X-Profile'):
+        return True
+    return random.random() < getattr(settings, 'PROFILING_SAMPLE_RATE', 0.0)
+
+
+def profile_tag(request):
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return 'unresolved'
+    return match.url_name or match.func.__name__
+
+
+def _rotate(directory, keep):
+    profiles = sorted(directory.glob(f'*{PROFILE_SUFFIX}'), key=lambda path: path.stat().st_mtime, reverse=True)
+    for path in profiles[keep:]:
+        # Another worker may be rotating the same directory
+        path.unlink(missing_ok=True)
+
+
+def save_profile(profiler, tag):
+    """Writes the stats as <tag>-<timestamp>-<id>.prof and drops the oldest files beyond PROFILING_MAX_FILES."""
+    directory = profiling_dir()
+    directory.mkdir(parents=True, exist_ok=True)
+    name = f"{tag}-{time.strftime('%Y%m%dT%H%M%S')}-{uuid.uuid4().hex[:8]}{PROFILE_SUFFIX}"
+    partial = directory / f'.{name}.tmp'
+    profiler.dump_stats(partial)
+    os.replace(partial, directory / name)
+    _rotate(directory, getattr(settings, 'PROFILING_MAX_FILES', 200))
+    return name
+
+
+class ProfilingMiddleware:
+    """
+    Profiles requests of staff users with cProfile when PROFILING_ENABLED is
+    on, either because they send an X-Profile header or at random with
+    PROFILING_SAMPLE_RATE. Profiles are written to PROFILING_DIR tagged with
+    the URL name and summarised by `manage.py profile_summary`.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not getattr(settings, 'PROFILING_ENABLED', False) or not _wants_profile(request) or staff_user(request) is None:
+            return self.get_response(request)
+
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:
+            # From Python 3.12 one profiler runs per process: another request or tool holds it, serve this one unprofiled
+            return self.get_response(request)
+        try:
+            response = self.get_response(request)
+        finally:
+            profiler.disable()
+
+        response['X-Profile-Id'] = save_profile(profiler, profile_tag(request))
+        return response
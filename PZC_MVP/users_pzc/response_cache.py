@@ -0,0 +1,145 @@
+import hashlib
+import threading
+import time
+from datetime import date
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.utils.http import parse_etags
+from rest_framework.response import Response
+
+# Entries are pickled. The data versions are kept here too, so the backend must be shared by
+# the worker processes (see settings.CACHES and checks.py): with a process-local one, a write
+# only reaches the versions of the worker that handled it
+RESPONSE_CACHE_ALIAS = getattr(settings, 'RESPONSE_CACHE_ALIAS', 'default')
+RESPONSE_CACHE_TIMEOUT = getattr(settings, 'RESPONSE_CACHE_TIMEOUT', 600)
+
+_stats_lock = threading.Lock()
+_stats = {'hits': 0, 'misses': 0}
+
+
+def _cache():
+    return caches[RESPONSE_CACHE_ALIAS]
+
+
+def _version_key(user_id):
+    return f"response:version:{user_id}"
+
+
+def data_version(user_id):
+    """
+    Current data version of the user. Versions start from a timestamp so an
+    evicted counter never restarts at a value older cache entries were keyed by.
+    """
+    cache = _cache()
+    version = cache.get(_version_key(user_id))
+    if version is None:
+        cache.add(_version_key(user_id), time.time_ns(), None)
+        version = cache.get(_version_key(user_id))
+    return version
+
+
+def _bump(user_ids):
+    cache = _cache()
+    for user_id in user_ids:
+        try:
+            cache.incr(_version_key(user_id))
+        except ValueError:
+            cache.add(_version_key(user_id), time.time_ns(), None)
+
+
+def bump_data_version(user_ids):
+    """Makes every cached response of the users unreachable."""
+    user_ids = {user_id for user_id in user_ids if user_id is not None}
+    if not user_ids:
+        return
+    _bump(user_ids)
+    # A read racing the write may have cached the old data under the new version before commit
+    transaction.on_commit(lambda: _bump(user_ids))
+
+
+def response_fingerprint(view_name, user_id, query_params):
+    """
+    Identifies a response without computing it: the view, the user's data
+    version and the query string. The date is included because default years
+    and fiscal ranges are resolved relative to today.
+    """
+    params = '&'.join(f"{key}={value}" for key, values in sorted(query_params.lists()) for value in values)
+    seed = f"{view_name}:{user_id}:{data_version(user_id)}:{date.today().isoformat()}:{params}"
+    return hashlib.md5(seed.encode()).hexdigest()
+
+
+def response_cache_key(view_name, user_id, query_params):
+    return f"response:{view_name}:{user_id}:{response_fingerprint(view_name, user_id, query_params)}"
+
+
+def response_cache_stats():
+    with _stats_lock:
+        stats = dict(_stats)
+    lookups = stats['hits'] + stats['misses']
+    stats['hit_rate'] = stats['hits'] / lookups if lookups else 0.0
+    return stats
+
+
+def _count(outcome):
+    with _stats_lock:
+        _stats[outcome] += 1
+
+
+def cache_response(get):
+    """
+    Caches successful responses of an APIView GET handler per user, view and
+    query string. Entries are keyed by the user's data version, so writes make
+    them unreachable instead of having to be found and deleted.
+    """
+    @wraps(get)
+    def wrapper(self, request, *args, **kwargs):
+        user_id = request.user.pk
+        key = response_cache_key(type(self).__name__, user_id, request.GET)
+
+        cached = _cache().get(key)
+        if cached is not None:
+            _count('hits')
+            response = Response(cached, status=200)
+            response['X-Cache'] = 'HIT'
+            return response
+
+        _count('misses')
+        response = get(self, request, *args, **kwargs)
+        if response.status_code == 200:
+            _cache().set(key, response.data, RESPONSE_CACHE_TIMEOUT)
+        response['X-Cache'] = 'MISS'
+        return response
+
+    return wrapper
+
+
+def etag_response(get):
+    """
+    Adds a strong ETag derived from the response fingerprint to an APIView GET
+    handler and answers If-None-Match with 304 before the view runs. The ETag
+    holds no process state beyond the data version read from the shared cache,
+    so every worker agrees on it.
+    """
+    @wraps(get)
+    def wrapper(self, request, *args, **kwargs):
+        etag = f'"{response_fingerprint(type(self).__name__, request.user.pk, request.GET)}"'
+
+        if_none_match = request.META.get('HTTP_IF_NONE_MATCH')
+        if if_none_match and (if_none_match.strip() == '*' or etag in parse_etags(if_none_match)):
+            response = Response(status=304)
+        else:
+            response = get(self, request, *args, **kwargs)
+            if response.status_code != 200:
+                return response
+
+        response['ETag'] = etag
+        # Per user and revalidated on every poll
+        patch_cache_control(response, private=True, no_cache=True)
+        patch_vary_headers(response, ['Authorization'])
+        return response
+
+    return wrapper
@@ -0,0 +1,166 @@
+from datetime import date
+from functools import reduce
+import operator
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Q, Sum
+
+from .fiscal import fiscal_month_start, fiscal_year_of
+from .models import MonthlyFacilityRollup, Waste, Energy, Water, Biodiversity, Logistices
+
+# Cells refreshed per round of queries. Bounds the OR'd filter of the stale rows,
+# which SQLite rejects beyond an expression depth of 1000
+ROLLUP_REFRESH_CHUNK = getattr(settings, 'ROLLUP_REFRESH_CHUNK', 200)
+
+# Numeric columns kept in the monthly rollup for each activity model
+ROLLUP_METRICS = {
+    Waste: [
+        'food_waste', 'solid_Waste', 'E_Waste', 'Biomedical_waste', 'liquid_discharge',
+        'other_waste', 'Recycle_waste', 'Landfill_waste', 'overall_usage'
+    ],
+    Energy: [
+        'hvac', 'production', 'stp', 'admin_block', 'utilities', 'others',
+        'coking_coal', 'coke_oven_coal', 'natural_gas', 'diesel', 'biomass_wood',
+        'biomass_other_solid', 'renewable_solar', 'renewable_other', 'overall_usage'
+    ],
+    Water: [
+        'Generated_Water', 'Recycled_Water', 'Softener_usage', 'Boiler_usage', 'otherUsage', 'overall_usage'
+    ],
+    Biodiversity: [
+        'no_trees', 'totalArea', 'new_trees_planted', 'head_count', 'overall_Trees'
+    ],
+    Logistices: [
+        'km_travelled', 'No_Trips', 'fuel_consumption', 'No_Vehicles', 'Spends_on_fuel', 'total_fuelconsumption'
+    ],
+}
+
+
+def metric_name(model, field):
+    return f"{model._meta.model_name}.{field}"
+
+
+def instance_cells(instances):
+    """(user_id, facility_id, first day of month) for unsaved or saved instances."""
+    return {
+        (instance.user_id, instance.facility_id, instance.DatePicker.replace(day=1))
+        for instance in instances
+        if instance.DatePicker
+    }
+
+
+def queryset_cells(queryset):
+    """(user_id, facility_id, first day of month) for every row matched by the queryset."""
+    rows = (
+        queryset
+        .filter(DatePicker__isnull=False)
+        .values_list('user_id', 'facility_id', 'fiscal_year', 'fiscal_month')
+        .order_by()
+        .distinct()
+    )
+    return {(user_id, facility_id, fiscal_month_start(year, month)) for user_id, facility_id, year, month in rows}
+
+
+def grouped_totals(model, queryset):
+    """Sums every rollup metric of the model per (user, facility, month) in one query."""
+    fields = ROLLUP_METRICS[model]
+    rows = (
+        queryset
+        .filter(DatePicker__isnull=False)
+        .values('user_id', 'facility_id', 'fiscal_year', 'fiscal_month')
+        .annotate(row_count=Count('pk'), **{f"total_{field}": Sum(field) for field in fields})
+        .order_by()
+    )
+    return {
+        (row['user_id'], row['facility_id'], fiscal_month_start(row['fiscal_year'], row['fiscal_month'])): {
+            field: row[f"total_{field}"] or 0 for field in fields
+        }
+        for row in rows
+        if row['row_count']
+    }
+
+
+def build_rollups(model, cell_totals):
+    return [
+        MonthlyFacilityRollup(
+            user_id=user_id,
+            facility_id=facility_id,
+            fiscal_year=fiscal_year_of(month_start),
+            month=month_start.month,
+            metric=metric_name(model, field),
+            value=value,
+        )
+        for (user_id, facility_id, month_start), totals in cell_totals.items()
+        for field, value in totals.items()
+    ]
+
+
+def refresh_rollups(model, cells):
+    """
+    Recomputes the rollup rows of the given (user_id, facility_id, month start)
+    cells from the raw table. Runs three queries per ROLLUP_REFRESH_CHUNK cells,
+    taken in facility and month order so each chunk reads a narrow date range.
+    """
+    cells = sorted({cell for cell in cells if cell[1] is not None}, key=lambda cell: (cell[1], cell[2]))
+    with transaction.atomic():
+        for start in range(0, len(cells), ROLLUP_REFRESH_CHUNK):
+            _refresh_chunk(model, set(cells[start:start + ROLLUP_REFRESH_CHUNK]))
+
+
+def _refresh_chunk(model, cells):
+    lower = min(month_start for _, _, month_start in cells)
+    upper = max(month_start for _, _, month_start in cells)
+    upper = date(upper.year + 1, 1, 1) if upper.month == 12 else date(upper.year, upper.month + 1, 1)
+
+    raw_rows = model.objects.filter(
+        facility_id__in={facility_id for _, facility_id, _ in cells},
+        DatePicker__gte=lower,
+        DatePicker__lt=upper,
+    )
+    totals = {cell: values for cell, values in grouped_totals(model, raw_rows).items() if cell in cells}
+
+    stale = reduce(operator.or_, (
+        Q(user_id=user_id, facility_id=facility_id,
+          fiscal_year=fiscal_year_of(month_start), month=month_start.month)
+        for user_id, facility_id, month_start in cells
+    ))
+    MonthlyFacilityRollup.objects.filter(
+        stale, metric__in=[metric_name(model, field) for field in ROLLUP_METRICS[model]]
+    ).delete()
+    MonthlyFacilityRollup.objects.bulk_create(build_rollups(model, totals), batch_size=1000)
+
+
+def rebuild_rollups():
+    """Drops every rollup row and recomputes the table from the raw activity tables."""
+    with transaction.atomic():
+        MonthlyFacilityRollup.objects.all().delete()
+        created = 0
+        for model in ROLLUP_METRICS:
+            rollups = build_rollups(model, grouped_totals(model, model.objects.all()))
+            MonthlyFacilityRollup.objects.bulk_create(rollups, batch_size=1000)
+            created += len(rollups)
+    return created
+
+
+def rollup_queryset(user, fiscal_year, metrics, facility_id=None, facility_location=None):
+    """Rollup rows for the overview charts of one fiscal year."""
+    queryset = MonthlyFacilityRollup.objects.filter(user=user, fiscal_year=fiscal_year, metric__in=metrics)
+    if facility_id and facility_id.lower() != 'all':
+        queryset = queryset.filter(facility__facility_id=facility_id)
+    if facility_location:
+        queryset = queryset.filter(facility__facility_location__icontains=facility_location)
+    return queryset
+
+
+def metric_cells(user, fiscal_year, metrics, facility_id=None, facility_location=None):
+    """{metric: {(month, facility name): value}} of the rollup rows of one fiscal year, in one query."""
+    cells = {metric: {} for metric in metrics}
+    rows = (
+        rollup_queryset(user, fiscal_year, metrics, facility_id, facility_location)
+        .values('metric', 'month', 'facility__facility_name')
+        .annotate(value=Sum('value'))
+        .order_by()
+    )
+    for row in rows:
+        cells[row['metric']][(row['month'], row['facility__facility_name'])] = row['value']
+    return cells
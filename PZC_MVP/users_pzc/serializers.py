@@ -1,15 +1,151 @@
 
 from datetime import date
 import re
-from venv import logger
 from rest_framework import serializers
 from django.contrib.auth import authenticate
 from django.core.exceptions import ValidationError
+from django.db import IntegrityError
 from django.utils.translation import gettext_lazy as _
 from django.utils.translation import gettext as _
 from .models import CustomUser,Waste,Energy,Water,Biodiversity,Facility,Logistices,Org_registration
 import logging
 
+
+def _parse_date(value):
+    try:
+        return date.fromisoformat(str(value))
+    except ValueError:
+        return None
+
+
+class MonthlyEntryLookupMixin:
+    """
+    Facility and duplicate-month lookups of the activity create serializers.
+    Validated one at a time they query the database; under
+    MonthlyEntryListSerializer they answer from sets loaded once per request.
+    """
+    _facilities = None
+    _taken_keys = None
+
+    def user_facilities(self):
+        """Facilities of the requesting user; other users' facility ids are rejected like unknown ones."""
+        return Facility.objects.filter(user=self.context['request'].user)
+
+    def entry_key(self, facility_id, day, data):
+        return (facility_id, day.replace(day=1), *(data.get(field) for field in self.Meta.model.entry_key_fields))
+
+    def prefetch_entries(self, items, existing=True):
+        """
+        Loads every facility and, unless `existing` is False, every already
+        used month the items refer to, one query each.
+        """
+        model = self.Meta.model
+        items = [item for item in items if isinstance(item, dict)]
+        facility_ids = {str(item.get('facility_id')) for item in items if item.get('facility_id')}
+        days = [day for day in (_parse_date(item.get('DatePicker')) for item in items) if day]
+
+        self._facilities = self.user_facilities().in_bulk(facility_ids, field_name='facility_id') if facility_ids else {}
+        self._taken_keys = set()
+        if existing and self._facilities and days:
+            self._taken_keys = set(
+                model.objects.filter(
+                    facility_id__in=self._facilities,
+                    entry_month__gte=min(days).replace(day=1),
+                    entry_month__lte=max(days).replace(day=1),
+                )
+                .values_list('facility_id', 'entry_month', *model.entry_key_fields)
+                .distinct()
+            )
+
+    def clear_prefetch(self):
+        self._facilities = None
+        self._taken_keys = None
+
+    def get_facility(self, facility_id):
+        if self._facilities is not None:
+            facility = self._facilities.get(facility_id)
+        else:
+            facility = self.user_facilities().filter(facility_id=facility_id).first()
+        if facility is None:
+            raise serializers.ValidationError({"facility_id": "The selected facility does not exist."})
+        return facility
+
+    def month_taken(self, facility, day, data):
+        """
+        Whether another entry of the facility exists for the month of `day`
+        (and the model's entry_key_fields of `data`). Under the list serializer
+        the key is claimed, so a later item of the same request is a duplicate.
+        """
+        if self._taken_keys is not None and self.instance is None:
+            key = self.entry_key(facility.facility_id, day, data)
+            if key in self._taken_keys:
+                return True
+            self._taken_keys.add(key)
+            return False
+
+        existing = self.Meta.model.objects.filter(
+            facility=facility,
+            entry_month=day.replace(day=1),
+            **{field: data.get(field) for field in self.Meta.model.entry_key_fields}
+        )
+        if self.instance is not None:
+            existing = existing.exclude(pk=self.instance.pk)
+        return existing.exists()
+
+    def build_entry(self, validated_data):
+        validated_data.pop('facility_id', None)
+        validated_data.setdefault('user', self.context['request'].user)
+        return self.Meta.model(**validated_data)
+
+    def save(self, **kwargs):
+        try:
+            return super().save(**kwargs)
+        except IntegrityError:
+            raise _entry_conflict()
+
+
+def _entry_conflict():
+    # The unique constraint caught an entry written between validation and insert
+    return serializers.ValidationError({
+        "non_field_errors": [_("An entry for this facility already exists for this month.")]
+    })
+
+
+class MonthlyEntryListSerializer(serializers.ListSerializer):
+    """
+    many=True counterpart of the activity create serializers: facilities and
+    existing months are loaded before the items are validated and the items are
+    inserted with one bulk_create, so a bulk POST costs a constant number of
+    queries whatever its size.
+
+    With ?upsert=true in the request, entries for months that already have one
+    overwrite it in the same statement instead of being rejected.
+    """
+    def upsert_requested(self):
+        request = self.context.get('request')
+        return request is not None and str(request.query_params.get('upsert', '')).lower() in ('1', 'true', 'yes')
+
+    def to_internal_value(self, data):
+        if not isinstance(data, list):
+            return super().to_internal_value(data)
+        self.child.prefetch_entries(data, existing=not self.upsert_requested())
+        try:
+            return super().to_internal_value(data)
+        finally:
+            self.child.clear_prefetch()
+
+    def create(self, validated_data):
+        entries = [self.child.build_entry(attrs) for attrs in validated_data]
+        if self.upsert_requested():
+            return self.child.Meta.model.objects.upsert(entries)
+        return self.child.Meta.model.objects.bulk_create(entries)
+
+    def save(self, **kwargs):
+        try:
+            return super().save(**kwargs)
+        except IntegrityError:
+            raise _entry_conflict()
+
 #Registration Serializers starts
 class UserRegisterSerializer(serializers.ModelSerializer):
     class Meta:
@@ -176,7 +312,7 @@ class WasteSerializer(serializers.ModelSerializer):
         fields = ['user_id','facility_id','category', 'DatePicker', 'food_waste', 'solid_Waste', 
                   'E_Waste', 'Biomedical_waste', 'liquid_discharge', 
                   'other_waste', 'Recycle_waste','Landfill_waste','waste_id']
-class WasteCreateSerializer(serializers.ModelSerializer):
+class WasteCreateSerializer(MonthlyEntryLookupMixin, serializers.ModelSerializer):
     facility_id = serializers.CharField(
         write_only=True, required=True,
         error_messages={
@@ -217,6 +353,7 @@ class WasteCreateSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Waste
+        list_serializer_class = MonthlyEntryListSerializer
         fields = [
             'facility_id', 'category', 'DatePicker', 'food_waste', 'solid_Waste',
             'E_Waste', 'Biomedical_waste', 'liquid_discharge', 'other_waste',
@@ -235,36 +372,17 @@ class WasteCreateSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError({"facility_id": "Facility ID is required."})
 
         # Ensure the facility exists
-        try:
-            facility = Facility.objects.get(facility_id=facility_id)
-            data['facility'] = facility  # Set facility object on validated data
-        except Facility.DoesNotExist:
-            raise serializers.ValidationError({"facility_id": "The selected facility does not exist."})
-
-        # Extract the month and year from the provided date
-        month = date.month
-        year = date.year
+        facility = self.get_facility(facility_id)
+        data['facility'] = facility  # Set facility object on validated data
 
-        if self.instance is None:
-            if Waste.objects.filter(
-                facility=facility,
-                DatePicker__year=year,
-                DatePicker__month=month
-            ).exists():
+        if self.month_taken(facility, date, data):
+            if self.instance is None:
                 raise serializers.ValidationError({
                     "non_field_errors": _("A Waste entry for this facility already exists for this month.")
                 })
-        else:
-            existing_entry = Waste.objects.filter(
-                facility=facility,
-                DatePicker__year=year,
-                DatePicker__month=month
-            ).exclude(waste_id=self.instance.waste_id)  
-
-            if existing_entry.exists():
-                raise serializers.ValidationError({
-                    "non_field_errors": _("A different Waste entry for this facility already exists for this month.")
-                })
+            raise serializers.ValidationError({
+                "non_field_errors": _("A different Waste entry for this facility already exists for this month.")
+            })
 
         # Validate waste fields
         waste_fields = [
@@ -303,7 +421,7 @@ class EnergySerializer(serializers.ModelSerializer):
             'renewable_solar', 'renewable_other', 'overall_usage', 'energy_id'
         ]
 
-class EnergyCreateSerializer(serializers.ModelSerializer):
+class EnergyCreateSerializer(MonthlyEntryLookupMixin, serializers.ModelSerializer):
     facility_id = serializers.CharField(
         write_only=True, required=True,
         error_messages={
@@ -361,6 +479,7 @@ class EnergyCreateSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Energy
+        list_serializer_class = MonthlyEntryListSerializer
         fields = [
             'facility_id', 'category', 'DatePicker', 'hvac', 'production', 'stp', 
             'admin_block', 'utilities', 'others', 'coking_coal', 'coke_oven_coal',
@@ -380,37 +499,17 @@ class EnergyCreateSerializer(serializers.ModelSerializer):
         if not facility_id:
             raise serializers.ValidationError({"facility_id": "Facility ID is required."})
 
-        try:
-            facility = Facility.objects.get(facility_id=facility_id)
-            data['facility'] = facility  # Set facility object on validated data
-        except Facility.DoesNotExist:
-            raise serializers.ValidationError({"facility_id": "The selected facility does not exist."})
+        facility = self.get_facility(facility_id)
+        data['facility'] = facility  # Set facility object on validated data
 
-        # Extract the month and year from the provided date
-        month = date.month
-        year = date.year
-
-        # Check if there is an existing entry for this facility and month
-        if self.instance is None:  # New entry (POST)
-            if Energy.objects.filter(
-                facility=facility,
-                DatePicker__year=year,
-                DatePicker__month=month
-            ).exists():
+        if self.month_taken(facility, date, data):
+            if self.instance is None:
                 raise serializers.ValidationError({
                     "non_field_errors": _("An Energy entry for this facility already exists for this month.")
                 })
-        else:  # Update (PUT)
-            existing_entry = Energy.objects.filter(
-                facility=facility,
-                DatePicker__year=year,
-                DatePicker__month=month
-            ).exclude(energy_id=self.instance.energy_id)  # Exclude the current instance being updated
-
-            if existing_entry.exists():
-                raise serializers.ValidationError({
-                    "non_field_errors": _("A different Energy entry for this facility already exists for this month.")
-                })
+            raise serializers.ValidationError({
+                "non_field_errors": _("A different Energy entry for this facility already exists for this month.")
+            })
 
         # Validate required fields (ensure they are numeric)
         energy_fields = [
@@ -464,7 +563,7 @@ class WaterSerializer(serializers.ModelSerializer):
         fields = ['facility_id','DatePicker','category','Generated_Water', 'Recycled_Water', 'Softener_usage', 
                   'Boiler_usage', 'otherUsage', 'water_id']
 
-class WaterCreateSerializer(serializers.ModelSerializer):
+class WaterCreateSerializer(MonthlyEntryLookupMixin, serializers.ModelSerializer):
     facility_id = serializers.CharField(
         write_only=True, required=True,
         error_messages={
@@ -503,6 +602,7 @@ class WaterCreateSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Water
+        list_serializer_class = MonthlyEntryListSerializer
         fields = [
             'facility_id', 'DatePicker', 'category', 'Generated_Water', 'Recycled_Water',
             'Softener_usage', 'Boiler_usage', 'otherUsage', 'water_id'
@@ -519,35 +619,17 @@ class WaterCreateSerializer(serializers.ModelSerializer):
         if not facility_id:
             raise serializers.ValidationError({"facility_id": "Facility ID is required."})
 
-        try:
-            facility = Facility.objects.get(facility_id=facility_id)
-            data['facility'] = facility
-        except Facility.DoesNotExist:
-            raise serializers.ValidationError({"facility_id": "The selected facility does not exist."})
-
-        month = date.month
-        year = date.year
+        facility = self.get_facility(facility_id)
+        data['facility'] = facility  # Set facility object on validated data
 
-        if self.instance is None:
-            if Water.objects.filter(
-                facility=facility,
-                DatePicker__year=year,
-                DatePicker__month=month
-            ).exists():
+        if self.month_taken(facility, date, data):
+            if self.instance is None:
                 raise serializers.ValidationError({
                     "non_field_errors": _("A Water entry for this facility already exists for this month.")
                 })
-        else:
-            existing_entry = Water.objects.filter(
-                facility=facility,
-                DatePicker__year=year,
-                DatePicker__month=month
-            ).exclude(water_id=self.instance.water_id)
-
-            if existing_entry.exists():
-                raise serializers.ValidationError({
-                    "non_field_errors": _("A different Water entry for this facility already exists for this month.")
-                })
+            raise serializers.ValidationError({
+                "non_field_errors": _("A different Water entry for this facility already exists for this month.")
+            })
 
         # Validate positive values for all water fields
         water_fields = [
@@ -578,7 +660,7 @@ class BiodiversitySerializer(serializers.ModelSerializer):
         model = Biodiversity
         fields = ['facility_id','DatePicker','category','no_trees', 'species', 'age', 'height', 'width','totalArea','new_trees_planted','head_count', 'biodiversity_id']
 
-class BiodiversityCreateSerializer(serializers.ModelSerializer):
+class BiodiversityCreateSerializer(MonthlyEntryLookupMixin, serializers.ModelSerializer):
     facility_id = serializers.CharField(
         write_only=True, required=True,
         error_messages={
@@ -621,6 +703,7 @@ class BiodiversityCreateSerializer(serializers.ModelSerializer):
     
     class Meta:
         model = Biodiversity
+        list_serializer_class = MonthlyEntryListSerializer
         fields = [
             'facility_id','DatePicker', 'category', 'no_trees', 'species', 'age', 'height', 'width',
             'totalArea', 'new_trees_planted', 'head_count', 'biodiversity_id'
@@ -633,37 +716,17 @@ class BiodiversityCreateSerializer(serializers.ModelSerializer):
     def validate(self, data):
         facility_id = data.get('facility_id')
         date = data.get('DatePicker')
-        try:
-            facility = Facility.objects.get(facility_id=facility_id)
-            data['facility'] = facility
-        except Facility.DoesNotExist:
-            raise serializers.ValidationError({"facility_id": "The selected facility does not exist."})
-
-        month = date.month
-        year = date.year
+        facility = self.get_facility(facility_id)
+        data['facility'] = facility  # Set facility object on validated data
 
-        # Ensure there’s no existing Biodiversity entry for the same month and year
-        if self.instance is None:
-            if Biodiversity.objects.filter(
-                facility=facility,
-                DatePicker__year=year,
-                DatePicker__month=month
-            ).exists():
+        if self.month_taken(facility, date, data):
+            if self.instance is None:
                 raise serializers.ValidationError({
                     "non_field_errors": _("A Biodiversity entry for this facility already exists for this month.")
                 })
-        else:
-            # Exclude the current instance in the check when updating
-            existing_entry = Biodiversity.objects.filter(
-                facility=facility,
-                DatePicker__year=year,
-                DatePicker__month=month
-            ).exclude(biodiversity_id=self.instance.biodiversity_id)
-
-            if existing_entry.exists():
-                raise serializers.ValidationError({
-                    "non_field_errors": _("A different Biodiversity entry for this facility already exists for this month.")
-                })
+            raise serializers.ValidationError({
+                "non_field_errors": _("A different Biodiversity entry for this facility already exists for this month.")
+            })
         
         return data
     
@@ -678,7 +741,7 @@ class BiodiversityCreateSerializer(serializers.ModelSerializer):
 #Biodiversity Serializers Ends
 #Logistices Serializer Starts
 
-class LogisticesSerializer(serializers.ModelSerializer):
+class LogisticesSerializer(MonthlyEntryLookupMixin, serializers.ModelSerializer):
     facility_id = serializers.CharField(
         write_only=True,
         required=True,
@@ -726,6 +789,7 @@ class LogisticesSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Logistices
+        list_serializer_class = MonthlyEntryListSerializer
         fields = [
             'facility_id', 'DatePicker', 'category', 'logistices_types', 'Typeof_fuel',
             'km_travelled', 'No_Trips', 'fuel_consumption', 'No_Vehicles',
@@ -746,29 +810,11 @@ class LogisticesSerializer(serializers.ModelSerializer):
         Typeof_fuel = data.get('Typeof_fuel')
 
         # Verify if the facility exists
-        try:
-            facility = Facility.objects.get(facility_id=facility_id)
-            data['facility'] = facility
-        except Facility.DoesNotExist:
-            raise serializers.ValidationError({"facility_id": "The selected facility does not exist."})
-
-        month = date.month
-        year = date.year
+        facility = self.get_facility(facility_id)
+        data['facility'] = facility
 
         # Check if an entry already exists for the same logistices_types and Typeof_fuel
-        existing_entry = Logistices.objects.filter(
-            facility=facility,
-            DatePicker__year=year,
-            DatePicker__month=month,
-            logistices_types=logistices_types,
-            Typeof_fuel=Typeof_fuel
-        )
-
-        if self.instance:
-            # Exclude the current instance in the check (update operation)
-            existing_entry = existing_entry.exclude(logistices_id=self.instance.logistices_id)
-
-        if existing_entry.exists():
+        if self.month_taken(facility, date, data):
             raise serializers.ValidationError({
                 "non_field_errors": (
                     f"An entry for logistices type '{logistices_types}' and fuel type '{Typeof_fuel}' "
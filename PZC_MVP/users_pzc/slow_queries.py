@@ -0,0 +1,63 @@
+import logging
+import threading
+from collections import deque
+from datetime import datetime, timezone
+
+from django.conf import settings
+from django.db import DatabaseError
+
+# Queries slower than this (milliseconds) are captured; None turns capturing off
+SLOW_QUERY_THRESHOLD_MS = getattr(settings, 'SLOW_QUERY_THRESHOLD_MS', 500)
+SLOW_QUERY_BUFFER_SIZE = getattr(settings, 'SLOW_QUERY_BUFFER_SIZE', 200)
+
+# Written to logs/slow_queries.jsonl by the queued JSON handler (see settings.LOGGING)
+logger = logging.getLogger('users_pzc.slow_queries')
+
+_buffer_lock = threading.Lock()
+_buffer = deque(maxlen=SLOW_QUERY_BUFFER_SIZE)
+
+
+def slow_query_threshold():
+    threshold = getattr(settings, 'SLOW_QUERY_THRESHOLD_MS', SLOW_QUERY_THRESHOLD_MS)
+    return None if threshold is None else threshold / 1000
+
+
+def explain(connection, sql, params):
+    """The plan of a SELECT as a list of rows, or the error that prevented getting it."""
+    if not sql.lstrip().upper().startswith('SELECT'):
+        return None
+    prefix = 'EXPLAIN QUERY PLAN' if connection.vendor == 'sqlite' else 'EXPLAIN'
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(f'{prefix} {sql}', params)
+            return [[str(value) for value in row] for row in cursor.fetchall()]
+    except DatabaseError as e:
+        return [f'EXPLAIN failed: {e}']
+
+
+def record_slow_query(connection, sql, params, seconds, view, path):
+    entry = {
+        'time': datetime.now(timezone.utc).isoformat(timespec='milliseconds'),
+        'view': view,
+        'path': path,
+        'duration_ms': round(seconds * 1000, 2),
+        'sql': sql,
+        'params': [str(value) for value in params] if params else [],
+        'explain': explain(connection, sql, params),
+    }
+    with _buffer_lock:
+        _buffer.append(entry)
+    logger.warning('Slow query in %s', view, extra={'slow_query': entry})
+    return entry
+
+
+def recent_slow_queries(limit=None):
+    """Captured queries, newest first."""
+    with _buffer_lock:
+        entries = list(reversed(_buffer))
+    return entries[:limit] if limit else entries
+
+
+def clear_slow_queries():
+    with _buffer_lock:
+        _buffer.clear()
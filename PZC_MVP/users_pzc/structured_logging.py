@@ -0,0 +1,132 @@
+import atexit
+import copy
+import json
+import logging
+import queue
+import random
+import sys
+import threading
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener, WatchedFileHandler
+from pathlib import Path
+
+# Attributes every LogRecord has; anything else was passed through `extra`
+_RECORD_ATTRIBUTES = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime'}
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line with the record's `extra` fields merged in."""
+
+    def format(self, record):
+        entry = {
+            'time': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+            'module': record.module,
+            'function': record.funcName,
+            'line': record.lineno,
+            'thread': record.threadName,
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES and not key.startswith('_'):
+                entry[key] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry['exception'] = record.exc_text
+        return json.dumps(entry, default=str)
+
+
+class SamplingFilter(logging.Filter):
+    """Lets through a `rate` share of the records below `below`; records at or above it always pass."""
+
+    def __init__(self, rate=0.01, below='INFO'):
+        super().__init__()
+        self.rate = float(rate)
+        self.below = logging.getLevelName(below) if isinstance(below, str) else below
+
+    def filter(self, record):
+        return record.levelno >= self.below or random.random() < self.rate
+
+
+class NonBlockingQueueHandler(QueueHandler):
+    """
+    Hands records to a QueueListener thread that does the formatting and the
+    I/O. When the queue is full, records are dropped and counted rather than
+    blocking the request thread. The listener starts with the first record,
+    so configuring logging (every manage.py command) starts no thread.
+    """
+
+    def __init__(self, log_queue, listener=None):
+        super().__init__(log_queue)
+        self.listener = listener
+        self.dropped = 0
+        self._dropped_lock = threading.Lock()
+        self._listening = False
+        self._listen_lock = threading.Lock()
+
+    def _listen(self):
+        with self._listen_lock:
+            if not self._listening:
+                self.listener.start()
+                # Flushes what is still queued when the process exits
+                atexit.register(self.listener.stop)
+                self._listening = True
+
+    def prepare(self, record):
+        # Only what the listener needs: the merged message, and the traceback as text
+        record = copy.copy(record)
+        record.message = record.getMessage()
+        record.msg = record.message
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        if not self._listening:
+            self._listen()
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            with self._dropped_lock:
+                self.dropped += 1
+
+
+class _Listener(QueueListener):
+    def stop(self):
+        # Also registered with atexit, so it may run after an explicit stop
+        if self._thread is not None:
+            super().stop()
+
+
+class _LogFileHandler(WatchedFileHandler):
+    """Creates the log directory with the first line written rather than when logging is configured."""
+
+    def _open(self):
+        Path(self.baseFilename).parent.mkdir(parents=True, exist_ok=True)
+        return super()._open()
+
+
+def queued_json_handler(filename=None, console=False, level='DEBUG', queue_size=10000):
+    """
+    dictConfig factory: a NonBlockingQueueHandler feeding JSON lines to a
+    WatchedFileHandler (safe with logrotate) and/or stderr on a listener thread.
+    With neither, records are discarded by a NullHandler.
+    """
+    formatter = JsonFormatter()
+    targets = []
+    if filename:
+        targets.append(_LogFileHandler(filename, delay=True))
+    if console:
+        targets.append(logging.StreamHandler(sys.stderr))
+    if not targets:
+        return logging.NullHandler()
+    for target in targets:
+        target.setFormatter(formatter)
+        target.setLevel(level)
+
+    log_queue = queue.Queue(maxsize=queue_size)
+    return NonBlockingQueueHandler(log_queue, _Listener(log_queue, *targets, respect_handler_level=True))
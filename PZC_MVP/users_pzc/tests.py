@@ -1,3 +1,1128 @@
-from django.test import TestCase
+import json
+import logging
+import sys
+import tempfile
+import threading
+from pathlib import Path
+from unittest import mock
+from datetime import date, datetime
+from io import StringIO
 
-# Create your tests here.
+from asgiref.sync import sync_to_async
+from django.core.cache import cache, caches
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import IntegrityError, connection, transaction
+from django.db.models import QuerySet, Sum
+from django.test import AsyncClient, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from .checks import shared_cache_check
+from .benchmarks import ROUTE_PARAMS, generate_dataset, get_endpoints, run_benchmarks
+from .fiscal import latest_fiscal_year
+from .structured_logging import JsonFormatter, SamplingFilter, queued_json_handler
+from .slow_queries import clear_slow_queries
+from .metrics import Histogram, reset_metrics
+from .instrumentation import QUERY_BUDGETS, endpoint_stats, reset_endpoint_stats
+from .user_cache import AUTH_USER_CACHE_ALIAS, clear_user_cache, user_cache_stats
+from .response_cache import RESPONSE_CACHE_ALIAS, response_cache_stats
+from .models import CustomUser, Facility, Waste, Energy, Water, Biodiversity, Logistices, MonthlyFacilityRollup, Org_registration
+
+
+class FacilityTestMixin:
+    """A user with one facility, 'Plant', and self.client authenticated as them."""
+    email = 'user@example.com'
+
+    def setUp(self):
+        super().setUp()
+        self.user = self.make_user(self.email)
+        self.facility = self.make_facility()
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def make_user(self, email, **fields):
+        return CustomUser.objects.create_user(email=email, password='Secret#123', **fields)
+
+    def make_facility(self, facility_name='Plant', user=None, **fields):
+        fields = {'facility_head': 'Head', 'facility_location': 'Pune', 'facility_description': 'Main plant', **fields}
+        return Facility.objects.create(user=user or self.user, facility_name=facility_name, **fields)
+
+
+class EmissionCalculationsTests(FacilityTestMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+
+        # The view resolves the fiscal year relative to today's month
+        self.year = 2023
+        self.start_year = self.year if datetime.now().month >= 4 else self.year - 1
+
+    def create_month(self, month):
+        entry_year = self.start_year if month >= 4 else self.start_year + 1
+        day = date(entry_year, month, 15)
+        common = {'user': self.user, 'facility': self.facility, 'category': 'test', 'DatePicker': day}
+        Energy.objects.create(hvac=10, production=5, coking_coal=2, diesel=1, **common)
+        Water.objects.create(Generated_Water=100, Recycled_Water=20, **common)
+        Waste.objects.create(Landfill_waste=3, Recycle_waste=4, **common)
+        Logistices.objects.create(Typeof_fuel='Diesel', fuel_consumption=2, No_Trips=1, No_Vehicles=1, **common)
+        Logistices.objects.create(Typeof_fuel='Petrol', fuel_consumption=1, No_Trips=1, No_Vehicles=1, **common)
+
+    def test_monthly_emissions_use_one_query_per_model(self):
+        self.create_month(4)
+        self.create_month(1)
+
+        with self.assertNumQueries(4):
+            response = self.client.get('/api/EmissionCalculations/', {'year': self.year})
+
+        self.assertEqual(response.status_code, 200)
+        line_chart_data = response.data['line_chart_data']
+        self.assertEqual([entry['month'] for entry in line_chart_data][:2], ['Apr', 'May'])
+
+        expected = (
+            15 * 0.82 + 2 * 2.66 + 1 * 2.91 * 1000  # energy
+            + 120 * 0.46                           # water
+            + 3 * 300 + 4 * 10                     # waste
+            + 2 * 2.91 * 1000 + 1 * 2.29 * 1000    # logistices
+        )
+        totals = {entry['month']: entry['total_emissions'] for entry in line_chart_data}
+        self.assertAlmostEqual(totals['Apr'], expected)
+        self.assertAlmostEqual(totals['Jan'], expected)
+        self.assertEqual(totals['May'], 0)
+
+    def test_logistics_fuel_types_match_case_insensitively(self):
+        day = date(self.start_year, 4, 15)
+        common = {'user': self.user, 'category': 'test', 'DatePicker': day, 'No_Trips': 1, 'No_Vehicles': 1}
+        Logistices.objects.create(facility=self.facility, logistices_types='Cargo', Typeof_fuel='Diesel', fuel_consumption=2, **common)
+        Logistices.objects.create(facility=self.facility, logistices_types='Staff', Typeof_fuel='petrol', fuel_consumption=1, **common)
+        Logistices.objects.create(facility=self.make_facility('Depot'), Typeof_fuel='CNG', fuel_consumption=5, **common)
+
+        response = self.client.get('/api/EmissionCalculations/', {'year': self.year})
+
+        totals = {entry['month']: entry['total_emissions'] for entry in response.data['line_chart_data']}
+        self.assertAlmostEqual(totals['Apr'], 2 * 2.91 * 1000 + 1 * 2.29 * 1000)
+
+    def test_no_data_returns_zero_series(self):
+        response = self.client.get('/api/EmissionCalculations/', {'year': self.year})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['line_chart_data']), 12)
+        self.assertTrue(all(entry['total_emissions'] == 0 for entry in response.data['line_chart_data']))
+
+
+class DuplicateMonthValidationTests(FacilityTestMixin, TestCase):
+    def waste_payload(self, day):
+        fields = [
+            'food_waste', 'solid_Waste', 'E_Waste', 'Biomedical_waste',
+            'liquid_discharge', 'other_waste', 'Recycle_waste', 'Landfill_waste'
+        ]
+        return {'facility_id': self.facility.facility_id, 'category': 'test', 'DatePicker': day, **{field: 1 for field in fields}}
+
+    def test_same_month_is_rejected_and_next_month_accepted(self):
+        self.assertEqual(self.client.post('/api/add_waste/', self.waste_payload('2023-12-01'), format='json').status_code, 201)
+        self.assertEqual(self.client.post('/api/add_waste/', self.waste_payload('2023-12-31'), format='json').status_code, 400)
+        self.assertEqual(self.client.post('/api/add_waste/', self.waste_payload('2024-01-01'), format='json').status_code, 201)
+
+    def test_bulk_post_costs_constant_queries(self):
+        def post_months(year, count):
+            payload = [self.waste_payload(f'{year}-{month:02d}-15') for month in range(1, count + 1)]
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.post('/api/add_waste/', payload, format='json')
+            self.assertEqual(response.status_code, 201)
+            return len(queries)
+
+        self.assertEqual(post_months(2021, 2), post_months(2022, 12))
+        self.assertEqual(Waste.objects.filter(user=self.user).count(), 14)
+        self.assertEqual(Waste.objects.get(DatePicker=date(2022, 3, 15)).overall_usage, 5)
+
+    def test_bulk_post_rejects_taken_and_repeated_months(self):
+        self.client.post('/api/add_waste/', self.waste_payload('2023-12-01'), format='json')
+        payload = [self.waste_payload('2023-12-20'), self.waste_payload('2024-02-01'), self.waste_payload('2024-02-10')]
+        response = self.client.post('/api/add_waste/', payload, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('non_field_errors', response.data[0])
+        self.assertEqual(response.data[1], {})
+        self.assertIn('non_field_errors', response.data[2])
+        self.assertEqual(Waste.objects.filter(user=self.user).count(), 1)
+
+
+class MonthlyEntryConstraintTests(FacilityTestMixin, TestCase):
+    def water_payload(self, day, generated):
+        return {
+            'facility_id': self.facility.facility_id, 'category': 'test', 'DatePicker': day,
+            'Generated_Water': generated, 'Recycled_Water': 0, 'Softener_usage': 0, 'Boiler_usage': 0, 'otherUsage': 0,
+        }
+
+    def test_database_rejects_second_entry_for_month(self):
+        common = {'user': self.user, 'facility': self.facility, 'category': 'test'}
+        Water.objects.create(DatePicker=date(2023, 7, 1), **common)
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Water.objects.create(DatePicker=date(2023, 7, 30), **common)
+
+        # Logistices entries are unique per type and fuel within the month
+        Logistices.objects.create(DatePicker=date(2023, 7, 1), logistices_types='Staff', Typeof_fuel='Diesel', No_Trips=1, No_Vehicles=1, **common)
+        Logistices.objects.create(DatePicker=date(2023, 7, 1), logistices_types='Staff', Typeof_fuel='Petrol', No_Trips=1, No_Vehicles=1, **common)
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Logistices.objects.create(DatePicker=date(2023, 7, 9), logistices_types='Staff', Typeof_fuel='Petrol', No_Trips=1, No_Vehicles=1, **common)
+
+    def test_bulk_upsert_overwrites_existing_months(self):
+        self.client.post('/api/add_water/', self.water_payload('2023-07-01', 10), format='json')
+        water_id = Water.objects.get().water_id
+
+        payload = [self.water_payload('2023-07-15', 25), self.water_payload('2023-08-01', 5)]
+        self.assertEqual(self.client.post('/api/add_water/', payload, format='json').status_code, 400)
+        response = self.client.post('/api/add_water/?upsert=true', payload, format='json')
+        self.assertEqual(response.status_code, 201)
+
+        july = Water.objects.get(entry_month=date(2023, 7, 1))
+        self.assertEqual((july.water_id, july.DatePicker, july.overall_usage), (water_id, date(2023, 7, 15), 25))
+        self.assertEqual(Water.objects.count(), 2)
+        self.assertEqual(
+            MonthlyFacilityRollup.objects.get(metric='water.Generated_Water', fiscal_year=2023, month=7).value, 25
+        )
+
+    def test_legacy_duplicates_are_listed_and_cannot_be_edited_into_conflict(self):
+        self.client.post('/api/add_water/', [self.water_payload('2023-07-01', 10), self.water_payload('2023-08-01', 5)], format='json')
+        # A duplicate month as migration 0004 leaves it: entry_month unset
+        legacy = Water.objects.get(entry_month=date(2023, 8, 1))
+        QuerySet.update(Water.objects.filter(pk=legacy.pk), DatePicker=date(2023, 7, 20), entry_month=None)
+
+        out = StringIO()
+        call_command('list_duplicate_entries', stdout=out)
+        kept = Water.objects.get(entry_month=date(2023, 7, 1)).water_id
+        self.assertIn(f'water {legacy.water_id} ({self.user.email}, facility {self.facility.facility_id}, 2023-07-20) duplicates {kept}', out.getvalue())
+
+        response = self.client.put(f'/api/water_update/{legacy.water_id}/', self.water_payload('2023-07-20', 7), format='json')
+        self.assertEqual(response.status_code, 400)
+
+    def test_facilities_of_other_users_are_rejected(self):
+        self.client.post('/api/add_water/', self.water_payload('2023-07-01', 10), format='json')
+        intruder = self.make_user('intruder@example.com')
+        self.client.force_authenticate(user=intruder)
+
+        for path in ('/api/add_water/', '/api/add_water/?upsert=true'):
+            response = self.client.post(path, [self.water_payload('2023-07-01', 99)], format='json')
+            self.assertEqual(response.status_code, 400)
+        response = self.client.post('/api/add_water/', self.water_payload('2023-08-01', 99), format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(Water.objects.get().overall_usage, 10)
+
+    def test_upsert_without_conflict_target_relies_on_unique_constraint(self):
+        # MySQL cannot name the conflicting columns; ON DUPLICATE KEY UPDATE fires on any unique key
+        entry = Water(user=self.user, facility=self.facility, category='test', DatePicker=date(2023, 7, 1))
+        with mock.patch.object(connection.features, 'supports_update_conflicts_with_target', False), \
+                mock.patch('django.db.models.QuerySet.bulk_create', side_effect=lambda objs, **kwargs: objs) as bulk_create:
+            Water.objects.upsert([entry])
+
+        options = bulk_create.call_args_list[0].kwargs
+        self.assertTrue(options['update_conflicts'])
+        self.assertNotIn('unique_fields', options)
+        self.assertIn('Generated_Water', options['update_fields'])
+        self.assertNotIn('water_id', options['update_fields'])
+
+
+class MonthlyFacilityRollupTests(FacilityTestMixin, TestCase):
+    def rollup_value(self, metric, fiscal_year, month):
+        return MonthlyFacilityRollup.objects.filter(
+            user=self.user, metric=metric, fiscal_year=fiscal_year, month=month
+        ).aggregate(total=Sum('value'))['total']
+
+    def test_update_moving_rows_out_of_its_filter_refreshes_both_months(self):
+        Waste.objects.bulk_create([
+            Waste(waste_id=f'MOVE{month:04}', user=self.user, facility=self.facility, category='test', DatePicker=date(2023, month, 1), food_waste=2)
+            for month in (5, 6)
+        ])
+
+        # The ids are not loaded into an IN list, and the filter no longer matches the moved row
+        with CaptureQueriesContext(connection) as captured:
+            Waste.objects.filter(DatePicker__month=6).update(DatePicker=date(2023, 8, 9))
+        self.assertFalse([query for query in captured if 'MOVE0006' in query['sql']])
+        self.assertIsNone(self.rollup_value('waste.food_waste', 2023, 6))
+        self.assertEqual(self.rollup_value('waste.food_waste', 2023, 8), 2)
+        self.assertEqual(self.rollup_value('waste.food_waste', 2023, 5), 2)
+
+    def test_writes_touching_over_a_thousand_cells_refresh_in_chunks(self):
+        facilities = [self.facility] + [self.make_facility(f'Plant {number}') for number in range(20)]
+        days = [date(year, month, 1) for year in range(2019, 2024) for month in range(1, 13)]
+        Waste.objects.bulk_create([
+            Waste(user=self.user, facility=facility, category='test', DatePicker=day, food_waste=2)
+            for facility in facilities for day in days
+        ])
+
+        rollups = MonthlyFacilityRollup.objects.filter(metric='waste.food_waste')
+        self.assertEqual(rollups.count(), len(facilities) * len(days))
+        self.assertEqual(self.rollup_value('waste.food_waste', 2023, 5), 2 * len(facilities))
+
+        Waste.objects.filter(DatePicker__year__lt=2023).delete()
+        self.assertEqual(rollups.count(), len(facilities) * 12)
+
+    def test_rollups_follow_writes_and_rebuild(self):
+        waste = Waste.objects.create(
+            user=self.user, facility=self.facility, category='test', DatePicker=date(2023, 5, 10), food_waste=7
+        )
+        self.assertEqual(self.rollup_value('waste.food_waste', 2023, 5), 7)
+
+        # Moving the entry to another month clears the old cell
+        waste.DatePicker = date(2024, 2, 10)
+        waste.food_waste = 9
+        waste.save()
+        self.assertIsNone(self.rollup_value('waste.food_waste', 2023, 5))
+        self.assertEqual(self.rollup_value('waste.food_waste', 2023, 2), 9)
+
+        # One entry per facility and month, so the second one goes to another facility
+        warehouse = self.make_facility('Warehouse', facility_description='Storage')
+        Waste.objects.bulk_create([
+            Waste(waste_id='BULK0001', user=self.user, facility=self.facility, category='test', DatePicker=date(2023, 6, 1), food_waste=2),
+            Waste(waste_id='BULK0002', user=self.user, facility=warehouse, category='test', DatePicker=date(2023, 6, 20), food_waste=3),
+        ])
+        self.assertEqual(self.rollup_value('waste.food_waste', 2023, 6), 5)
+
+        Waste.objects.filter(DatePicker__month=6).update(food_waste=4)
+        self.assertEqual(self.rollup_value('waste.food_waste', 2023, 6), 8)
+
+        waste.delete()
+        self.assertIsNone(self.rollup_value('waste.food_waste', 2023, 2))
+
+        incremental = set(MonthlyFacilityRollup.objects.values_list('metric', 'fiscal_year', 'month', 'value'))
+        call_command('rebuild_rollups', stdout=StringIO())
+        rebuilt = set(MonthlyFacilityRollup.objects.values_list('metric', 'fiscal_year', 'month', 'value'))
+        self.assertEqual(incremental, rebuilt)
+
+        response = self.client.get('/api/FoodWasteOverviewView/', {'year': 2023})
+        self.assertEqual(response.status_code, 200)
+        monthly = {entry['month']: entry['food_waste'] for entry in response.data['line_chart_data']}
+        self.assertEqual(monthly['Jun'], 8)
+
+
+class CardViewTests(FacilityTestMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.plant = self.facility
+        self.office = self.make_facility('Office', facility_location='Mumbai', facility_description='Head office')
+
+    def test_waste_card_uses_one_grouped_query(self):
+        Waste.objects.create(user=self.user, facility=self.plant, category='test', DatePicker=date(2023, 5, 1), food_waste=5, Landfill_waste=1)
+        Waste.objects.create(user=self.user, facility=self.office, category='test', DatePicker=date(2023, 6, 1), food_waste=8, Landfill_waste=4)
+
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/WasteViewCard_Over/', {'year': 2023})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['overall_waste_totals']['overall_food_waste'], 13)
+        self.assertEqual(response.data['overall_waste_totals']['overall_Landfill_waste'], 5)
+        self.assertEqual(
+            response.data['facility_waste_data']['food_waste'],
+            [{'facility_name': 'Office', 'total_food_waste': 8}, {'facility_name': 'Plant', 'total_food_waste': 5}]
+        )
+
+    def test_energy_card_totals_and_empty_year(self):
+        Energy.objects.create(user=self.user, facility=self.plant, category='test', DatePicker=date(2023, 5, 1), hvac=10, renewable_solar=3, renewable_other=2, diesel=1, natural_gas=4)
+
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/EnergyViewCard_Over/', {'year': 2023})
+        totals = response.data['overall_energy_totals']
+        self.assertEqual(totals['overall_hvac'], 10)
+        self.assertEqual(totals['overall_renewable_energy'], 5)
+        self.assertEqual(totals['overall_fuel_used_in_operations'], 5)
+        self.assertNotIn('overall_diesel', totals)
+
+        empty = self.client.get('/api/EnergyViewCard_Over/', {'year': 2020}).data['overall_energy_totals']
+        self.assertEqual(empty['overall_renewable_energy'], 0.0)
+
+
+class FiscalCalendarTests(FacilityTestMixin, TestCase):
+    def setUp(self):
+        cache.clear()
+        super().setUp()
+
+    def test_latest_fiscal_year_is_cached_until_a_write(self):
+        Waste.objects.create(user=self.user, facility=self.facility, category='test', DatePicker=date(2023, 2, 1))
+
+        with self.assertNumQueries(1):
+            self.assertEqual(latest_fiscal_year(self.user, Waste), 2022)
+            self.assertEqual(latest_fiscal_year(self.user, Waste), 2022)
+
+        Waste.objects.create(user=self.user, facility=self.facility, category='test', DatePicker=date(2024, 5, 1))
+        self.assertEqual(latest_fiscal_year(self.user, Waste), 2024)
+        self.assertEqual(latest_fiscal_year(self.user, Waste, self.facility.facility_id), 2024)
+        self.assertEqual(latest_fiscal_year(self.user, Energy, default=1999), 1999)
+
+    def test_fiscal_columns_follow_every_write_path(self):
+        waste = Waste.objects.create(user=self.user, facility=self.facility, category='test', DatePicker=date(2024, 3, 31))
+        self.assertEqual((waste.fiscal_year, waste.fiscal_month), (2023, 3))
+
+        Waste.objects.filter(pk=waste.pk).update(DatePicker=date(2024, 4, 1))
+        waste.refresh_from_db()
+        self.assertEqual((waste.fiscal_year, waste.fiscal_month, waste.entry_month), (2024, 4, date(2024, 4, 1)))
+
+        [bulk] = Waste.objects.bulk_create([
+            Waste(user=self.user, facility=self.facility, category='test', DatePicker=date(2025, 1, 15))
+        ])
+        self.assertEqual((bulk.fiscal_year, bulk.fiscal_month), (2024, 1))
+        self.assertEqual(Waste.objects.filter(fiscal_year=2024).count(), 2)
+
+    def test_year_list_is_one_distinct_query(self):
+        for month in range(1, 13):
+            Waste.objects.create(user=self.user, facility=self.facility, category='test', DatePicker=date(2023, month, 1))
+        Water.objects.create(user=self.user, facility=self.facility, category='test', DatePicker=date(2020, 6, 1))
+
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/YearFacilityDataAPIView/')
+
+        self.assertEqual(response.data['available_years'], [{'year': 2023}, {'year': 2022}, {'year': 2020}])
+
+
+class DashboardBatchTests(FacilityTestMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        Waste.objects.create(user=self.user, facility=self.facility, category='test', DatePicker=date(2023, 5, 1), food_waste=5)
+
+    def test_batch_matches_standalone_endpoints(self):
+        widgets = ['WasteViewCard_Over', 'FoodWasteOverviewView', 'SolidWasteOverviewView', 'HVACOverviewView', 'OverallUsageView']
+        # 2010 has no data, so the metric widgets return their empty payloads
+        for year in (2023, 2010):
+            response = self.client.get('/api/dashboard/batch/', {'widgets': ','.join(widgets), 'year': year})
+
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.data['errors'], {})
+            for name in widgets:
+                standalone = self.client.get(f'/api/{name}/', {'year': year})
+                self.assertEqual(response.data['widgets'][name], standalone.data)
+
+    def test_empty_metric_overview_is_keyed_by_its_field(self):
+        response = self.client.get('/api/SolidWasteOverviewView/', {'year': 2010})
+
+        self.assertEqual(response.data['line_chart_data'][0], {'month': 'Apr', 'solid_Waste': 0})
+        self.assertEqual(response.data['donut_chart_data'], [{'facility_name': 'No Facility', 'percentage': 0}])
+
+    def test_widgets_share_the_standalone_cache_and_ignore_conditional_headers(self):
+        standalone = self.client.get('/api/WasteViewCard_Over/', {'year': 2023})
+        hits = response_cache_stats()['hits']
+
+        # The widget's own ETag must not turn it into a 304 inside the 200 batch
+        response = self.client.get(
+            '/api/dashboard/batch/', {'widgets': 'WasteViewCard_Over', 'year': 2023},
+            HTTP_IF_NONE_MATCH=standalone['ETag'],
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['widgets']['WasteViewCard_Over'], standalone.data)
+        self.assertEqual(response_cache_stats()['hits'], hits + 1)
+
+    def test_unknown_widget_is_rejected(self):
+        response = self.client.get('/api/dashboard/batch/', {'widgets': 'WasteViewCard_Over,NoSuchWidget'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_metric_widgets_share_one_rollup_read(self):
+        other = self.make_facility('Depot', facility_description='Depot')
+        Waste.objects.create(user=self.user, facility=other, category='test', DatePicker=date(2023, 6, 1), food_waste=2, solid_Waste=3)
+        Energy.objects.create(user=self.user, facility=other, category='test', DatePicker=date(2023, 6, 1), hvac=7)
+        widgets = ['FoodWasteOverviewView', 'SolidWasteOverviewView', 'HVACOverviewView', 'Generated_WaterOverviewView']
+
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/dashboard/batch/', {'widgets': ','.join(widgets), 'year': 2023})
+
+        for name in widgets:
+            standalone = self.client.get(f'/api/{name}/', {'year': 2023})
+            self.assertEqual(response.data['widgets'][name], standalone.data)
+        # Without a year each widget defaults to its model's latest fiscal year, like the standalone views
+        for name in widgets:
+            self.assertEqual(
+                self.client.get('/api/dashboard/batch/', {'widgets': name}).data['widgets'][name],
+                self.client.get(f'/api/{name}/').data,
+            )
+
+
+class ResponseCacheTests(FacilityTestMixin, TestCase):
+    def test_repeat_loads_skip_sql_until_a_write(self):
+        waste = Waste.objects.create(user=self.user, facility=self.facility, category='test', DatePicker=date(2023, 5, 1), food_waste=5)
+        params = {'year': 2023}
+
+        first = self.client.get('/api/WasteViewCard_Over/', params)
+        self.assertEqual(first['X-Cache'], 'MISS')
+
+        hits = response_cache_stats()['hits']
+        with self.assertNumQueries(0):
+            second = self.client.get('/api/WasteViewCard_Over/', params)
+        self.assertEqual(second['X-Cache'], 'HIT')
+        self.assertEqual(second.data, first.data)
+        self.assertEqual(response_cache_stats()['hits'], hits + 1)
+
+        waste.food_waste = 9
+        waste.save()
+        third = self.client.get('/api/WasteViewCard_Over/', params)
+        self.assertEqual(third['X-Cache'], 'MISS')
+        self.assertEqual(third.data['overall_waste_totals']['overall_food_waste'], 9)
+
+    def test_process_local_cache_is_flagged_outside_debug(self):
+        locmem = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+        redis = {'default': {'BACKEND': 'django.core.cache.backends.redis.RedisCache', 'LOCATION': 'redis://cache:6379'}}
+        with self.settings(DEBUG=False, CACHES=locmem):
+            self.assertEqual([warning.id for warning in shared_cache_check(None)], ['users_pzc.W001'])
+        with self.settings(DEBUG=False, CACHES=redis):
+            self.assertEqual(shared_cache_check(None), [])
+        with self.settings(DEBUG=True, CACHES=locmem):
+            self.assertEqual(shared_cache_check(None), [])
+
+
+class ETagTests(FacilityTestMixin, TestCase):
+    def test_unchanged_data_returns_304_until_a_write(self):
+        Waste.objects.create(user=self.user, facility=self.facility, category='test', DatePicker=date(2023, 5, 1), food_waste=5)
+        first = self.client.get('/api/view_waste/', {'year': 2023})
+        self.assertEqual(first.status_code, 200)
+        etag = first['ETag']
+
+        with self.assertNumQueries(0):
+            revalidated = self.client.get('/api/view_waste/', {'year': 2023}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(revalidated.status_code, 304)
+        self.assertEqual(revalidated['ETag'], etag)
+
+        # Different parameters describe a different representation
+        self.assertEqual(self.client.get('/api/view_waste/', {'year': 2022}, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+        Waste.objects.create(user=self.user, facility=self.facility, category='test', DatePicker=date(2023, 6, 1), food_waste=1)
+        changed = self.client.get('/api/view_waste/', {'year': 2023}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(changed.status_code, 200)
+        self.assertNotEqual(changed['ETag'], etag)
+
+    def test_write_seen_through_shared_version_store_changes_etag(self):
+        etag = self.client.get('/api/view_waste/', {'year': 2023})['ETag']
+
+        # What a write handled by another worker leaves in the shared cache
+        caches[RESPONSE_CACHE_ALIAS].incr(f'response:version:{self.user.pk}')
+
+        self.assertEqual(self.client.get('/api/view_waste/', {'year': 2023}, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+
+class KeysetPaginationTests(FacilityTestMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        for month in (4, 5, 6):
+            Logistices.objects.create(
+                user=self.user, facility=self.facility, category='test', DatePicker=date(2023, month, 1),
+                Typeof_fuel='Diesel', fuel_consumption=month, No_Trips=1, No_Vehicles=1
+            )
+
+    def test_pages_follow_the_cursor_and_total_covers_the_year(self):
+        seen = []
+        params = {'year': 2023, 'page_size': 2}
+        while True:
+            response = self.client.get('/api/view_logistices/', params)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.data['overall_logistices_usage_total'], 15)
+            seen += [entry['DatePicker'] for entry in response.data['logistices_data']]
+            if not response.data['next_cursor']:
+                break
+            params['cursor'] = response.data['next_cursor']
+
+        self.assertEqual(seen, ['2023-04-01', '2023-05-01', '2023-06-01'])
+        self.assertTrue(all(entry['facility_id'] == self.facility.facility_id for entry in response.data['logistices_data']))
+
+    def test_invalid_cursor_is_rejected(self):
+        response = self.client.get('/api/view_logistices/', {'year': 2023, 'cursor': 'not-a-cursor'})
+        self.assertEqual(response.status_code, 400)
+
+
+class ActivityExportTests(FacilityTestMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        for year in (2021, 2022, 2023):
+            Waste.objects.create(user=self.user, facility=self.facility, category='test', DatePicker=date(year, 5, 1), food_waste=year)
+        Water.objects.create(user=self.user, facility=self.facility, category='test', DatePicker=date(2023, 5, 1), Generated_Water=4)
+
+    def test_csv_export_streams_filtered_rows(self):
+        response = self.client.get('/api/export/waste/', {'start_year': 2022, 'end_year': 2023})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        header = lines[0].split(',')
+        self.assertIn('food_waste', header)
+        self.assertIn('facility_name', header)
+        self.assertEqual([line.split(',')[header.index('food_waste')] for line in lines[1:]], ['2022.0', '2023.0'])
+
+    def test_combined_ndjson_export_labels_each_model(self):
+        response = self.client.get('/api/export/all/', {'export_format': 'ndjson'})
+
+        rows = [json.loads(line) for line in b''.join(response.streaming_content).decode().splitlines()]
+        self.assertEqual(sorted({row['model'] for row in rows}), ['waste', 'water'])
+        self.assertEqual(len(rows), 4)
+
+
+class ActivityImportTests(FacilityTestMixin, TestCase):
+    columns = [
+        'facility_id', 'category', 'DatePicker', 'food_waste', 'solid_Waste', 'E_Waste', 'Biomedical_waste',
+        'liquid_discharge', 'other_waste', 'Recycle_waste', 'Landfill_waste'
+    ]
+
+    def setUp(self):
+        super().setUp()
+        Waste.objects.create(user=self.user, facility=self.facility, category='test', DatePicker=date(2023, 6, 10))
+
+    def upload(self, rows, **data):
+        lines = [','.join(self.columns)] + [','.join(str(value) for value in row) for row in rows]
+        upload = SimpleUploadedFile('waste.csv', '\n'.join(lines).encode(), content_type='text/csv')
+        return self.client.post('/api/import/waste/', {'file': upload, **data}, format='multipart')
+
+    def row(self, day, food_waste=1, facility_id=None):
+        return [facility_id or self.facility.facility_id, 'test', day, food_waste, 1, 1, 1, 1, 1, 1, 1]
+
+    def test_valid_rows_are_bulk_inserted_with_overall_usage(self):
+        response = self.upload([self.row('2023-04-01', food_waste=3), self.row('2023-05-01')])
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['created'], 2)
+        self.assertEqual(Waste.objects.get(DatePicker=date(2023, 4, 1)).overall_usage, 7)
+        self.assertEqual(MonthlyFacilityRollup.objects.get(metric='waste.food_waste', month=4).value, 3)
+
+    def test_errors_are_reported_per_row(self):
+        response = self.upload([
+            self.row('2023-04-01'),
+            self.row('2023-06-01'),
+            self.row('2023-07-01', food_waste=-1),
+            self.row('2023-08-01', facility_id='UNKNOWN'),
+            self.row('not-a-date'),
+        ])
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['created'], 0)
+        reported = {entry['row']: entry['errors'] for entry in response.data['errors']}
+        self.assertEqual(sorted(reported), [3, 4, 5, 6])
+        self.assertIn('non_field_errors', reported[3])
+        self.assertIn('food_waste', reported[4])
+        self.assertIn('facility_id', reported[5])
+        self.assertIn('DatePicker', reported[6])
+        self.assertEqual(Waste.objects.count(), 1)
+
+        partial = self.upload([self.row('2023-04-01'), self.row('2023-06-01')], partial='true')
+        self.assertEqual(partial.status_code, 201)
+        self.assertEqual(partial.data['created'], 1)
+
+    def test_upsert_reports_overwritten_rows_as_updated(self):
+        response = self.upload([self.row('2023-06-01', food_waste=4), self.row('2023-07-01')], upsert='true')
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual((response.data['created'], response.data['updated']), (1, 1))
+        self.assertEqual(Waste.objects.get(DatePicker__month=6).food_waste, 4)
+
+    def test_concurrent_insert_is_a_conflict(self):
+        with mock.patch('users_pzc.models.ActivityQuerySet.bulk_create', side_effect=IntegrityError('UNIQUE constraint failed')):
+            response = self.upload([self.row('2023-04-01')])
+
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(Waste.objects.count(), 1)
+
+    def test_onboarding_import_of_fifty_facilities_over_five_years(self):
+        facilities = [self.make_facility(f'Site {number}') for number in range(50)]
+        rows = [
+            self.row(f'{year}-{month:02d}-01', facility_id=facility.facility_id)
+            for facility in facilities for year in range(2018, 2023) for month in range(1, 13)
+        ]
+
+        response = self.upload(rows)
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual((response.data['created'], response.data['updated']), (3000, 0))
+        self.assertEqual(MonthlyFacilityRollup.objects.filter(metric='waste.food_waste').count(), 3001)
+
+    def test_legacy_and_broken_workbooks_are_rejected(self):
+        # The OLE2 signature of a legacy .xls workbook
+        legacy = b'\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1' + bytes(504)
+        for name in ('waste.xls', 'waste.xlsx'):
+            upload = SimpleUploadedFile(name, legacy, content_type='application/vnd.ms-excel')
+            response = self.client.post('/api/import/waste/', {'file': upload}, format='multipart')
+            self.assertEqual(response.status_code, 400)
+        self.assertEqual(Waste.objects.count(), 1)
+
+
+class ActivityBatchTests(FacilityTestMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.plant = self.facility
+        self.warehouse = self.make_facility('Warehouse', facility_description='Storage')
+        for facility in (self.plant, self.warehouse):
+            for month in (4, 5, 6, 7):
+                Waste.objects.create(
+                    user=self.user, facility=facility, category='test', DatePicker=date(2023, month, 1),
+                    food_waste=1, solid_Waste=1
+                )
+
+    def test_patch_by_filter_recomputes_overall_usage(self):
+        response = self.client.patch('/api/batch/waste/', {
+            'filter': {'facility_id': self.plant.facility_id, 'start_date': '2023-04-01', 'end_date': '2023-06-30'},
+            'changes': {'food_waste': 5},
+        }, format='json')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data, {'updated': 3})
+        usage = dict(Waste.objects.filter(facility=self.plant).values_list('DatePicker__month', 'overall_usage'))
+        self.assertEqual(usage, {4: 6, 5: 6, 6: 6, 7: 2})
+        self.assertEqual(MonthlyFacilityRollup.objects.get(facility=self.plant, metric='waste.food_waste', month=5).value, 5)
+
+    def test_patch_rejects_bad_requests(self):
+        self.assertEqual(self.client.patch('/api/batch/waste/', {'changes': {'food_waste': 5}}, format='json').status_code, 400)
+        response = self.client.patch('/api/batch/waste/', {
+            'filter': {'facility_id': self.plant.facility_id}, 'changes': {'overall_usage': 1, 'food_waste': -1},
+        }, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(set(response.data['error']), {'overall_usage', 'food_waste'})
+        self.assertEqual(self.client.patch('/api/batch/unknown/', {}, format='json').status_code, 404)
+
+    def test_delete_by_ids_only_touches_own_rows(self):
+        other = self.make_user('other@example.com')
+        ids = list(Waste.objects.filter(facility=self.warehouse).values_list('waste_id', flat=True))
+        self.client.force_authenticate(user=other)
+        self.assertEqual(self.client.delete('/api/batch/waste/', {'ids': ids}, format='json').data, {'deleted': 0})
+
+        self.client.force_authenticate(user=self.user)
+        response = self.client.delete('/api/batch/waste/', {'ids': ids}, format='json')
+        self.assertEqual(response.data, {'deleted': 4})
+        self.assertEqual(Waste.objects.count(), 4)
+        self.assertFalse(MonthlyFacilityRollup.objects.filter(facility=self.warehouse).exists())
+
+    def test_edits_over_a_thousand_facility_months(self):
+        facilities = [self.make_facility(f'Site {number}') for number in range(21)]
+        Waste.objects.bulk_create([
+            Waste(user=self.user, facility=facility, category='test', DatePicker=date(year, month, 1), food_waste=1)
+            for facility in facilities for year in range(2018, 2023) for month in range(1, 13)
+        ])
+        selection = {'filter': {'start_date': '2018-01-01', 'end_date': '2022-12-31'}}
+
+        response = self.client.patch('/api/batch/waste/', {**selection, 'changes': {'food_waste': 2}}, format='json')
+        self.assertEqual(response.data, {'updated': 1260})
+        self.assertEqual(
+            MonthlyFacilityRollup.objects.filter(metric='waste.food_waste', fiscal_year=2020).aggregate(total=Sum('value'))['total'],
+            2 * 21 * 12,
+        )
+
+        # Updates of the cell columns look up where rows went one chunk of owners at a time
+        with mock.patch('users_pzc.rollups.ROLLUP_REFRESH_CHUNK', 5):
+            Waste.objects.filter(facility__in=facilities).update(user=self.user)
+        self.assertEqual(MonthlyFacilityRollup.objects.filter(metric='waste.food_waste', value=2).count(), 1260)
+
+        response = self.client.delete('/api/batch/waste/', selection, format='json')
+        self.assertEqual(response.data, {'deleted': 1260})
+        self.assertEqual(MonthlyFacilityRollup.objects.filter(metric='waste.food_waste').count(), 8)
+
+
+class BiodiversityMetricsTests(FacilityTestMixin, TestCase):
+    def plant(self, day, no_trees, width, height):
+        return Biodiversity.objects.create(
+            user=self.user, facility=self.facility, category='test', DatePicker=day, species='Neem',
+            no_trees=no_trees, width=width, height=height, totalArea=100, head_count=10, new_trees_planted=1
+        )
+
+    def test_tree_metrics_are_stored_and_follow_updates(self):
+        entry = self.plant(date(2023, 5, 1), no_trees=10, width=2, height=5)
+        self.assertAlmostEqual(entry.carbon_offset, 0.00006 * 4 * 5 * 10)
+        self.assertAlmostEqual(entry.biomass, 0.0998 * 4 * 5)
+
+        Biodiversity.objects.filter(pk=entry.pk).update(width=3)
+        entry.refresh_from_db()
+        self.assertAlmostEqual(entry.carbon_offset, 0.00006 * 9 * 5 * 10)
+        self.assertAlmostEqual(entry.biomass, 0.0998 * 9 * 5)
+
+    def test_metrics_view_sums_stored_columns(self):
+        self.plant(date(2022, 6, 1), no_trees=10, width=2, height=5)
+        self.plant(date(2023, 5, 1), no_trees=10, width=2, height=5)
+        self.plant(date(2024, 1, 1), no_trees=20, width=1, height=10)
+        latest_fiscal_year(self.user, Biodiversity)
+
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/BiodiversityMetricsGraphsView/', {'year': 2023})
+
+        self.assertEqual(response.status_code, 200)
+        offset = lambda trees, width, height: 0.00006 * width * width * height * trees
+        metrics = response.data['current_year_metrics']
+        self.assertEqual(metrics['total_trees'], 30)
+        self.assertAlmostEqual(metrics['carbon_offset'], offset(10, 2, 5) + offset(20, 1, 10))
+        self.assertAlmostEqual(metrics['biomass'], 0.0998 * (4 * 5 + 1 * 10))
+        self.assertAlmostEqual(metrics['co2_sequestration_rate'], offset(20, 1, 10))
+        self.assertEqual(metrics['green_belt_density'], 30 / 200 * 10000)
+        self.assertEqual([entry['year'] for entry in response.data['Offset_year']], [2024, 2023, 2022])
+        self.assertEqual(response.data['Trees_Per_Capita'][0]['trees_per_capita'], 2)
+
+
+class AsyncAnalyticsTests(FacilityTestMixin, TransactionTestCase):
+    # The async views query from worker threads, which cannot see a test transaction
+    def setUp(self):
+        super().setUp()
+        common = {'user': self.user, 'facility': self.facility, 'category': 'test', 'DatePicker': date(2023, 5, 10)}
+        Energy.objects.create(hvac=10, production=5, coking_coal=2, **common)
+        Water.objects.create(Generated_Water=100, Recycled_Water=20, **common)
+        Waste.objects.create(food_waste=1, solid_Waste=2, Landfill_waste=3, Recycle_waste=4, **common)
+        Logistices.objects.create(Typeof_fuel='Diesel', fuel_consumption=2, No_Trips=1, No_Vehicles=1, **common)
+        self.auth = {'Authorization': f'Bearer {RefreshToken.for_user(self.user).access_token}'}
+
+    async def test_async_views_match_sync_views(self):
+        for path, params in [('OverallUsageView/', {'year': 2023}), ('EmissionCalculations/', {'year': 2023})]:
+            expected = (await sync_to_async(self.client.get)(f'/api/{path}', params)).json()
+            response = await self.async_client.get(f'/api/async/{path}', params, headers=self.auth)
+
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.json(), expected)
+
+    async def test_async_views_require_a_token(self):
+        response = await AsyncClient().get('/api/async/OverallUsageView/')
+
+        self.assertEqual(response.status_code, 401)
+
+    async def test_async_views_apply_throttles(self):
+        throttle = mock.Mock(**{'allow_request.return_value': False, 'wait.return_value': 4.2})
+        with mock.patch('users_pzc.views.OverallUsageAsyncView.throttle_classes', [lambda: throttle]):
+            response = await self.async_client.get('/api/async/OverallUsageView/', headers=self.auth)
+
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response['Retry-After'], '5')
+
+    async def test_only_bad_parameters_are_client_errors(self):
+        response = await self.async_client.get('/api/async/EmissionCalculations/', {'year': 'abc'}, headers=self.auth)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {'error': 'Invalid year parameter.'})
+
+        with mock.patch('users_pzc.views.monthly_emissions_async', side_effect=RuntimeError('database is down')):
+            with self.assertRaises(RuntimeError):
+                await self.async_client.get('/api/async/EmissionCalculations/', {'year': 2023}, headers=self.auth)
+
+
+@override_settings(QUERY_INSTRUMENTATION_HEADERS=True)
+class QueryBudgetTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        # Staff, so the staff-only routes are budgeted too
+        cls.user = CustomUser.objects.create_user(email='budget@example.com', password='Secret#123', is_staff=True)
+        Org_registration.objects.create(
+            user=cls.user, Organization_Name='Org', Business_executive_Name='Head',
+            Location='Pune', Branch_ID='B1', description='Head office'
+        )
+        # Two facilities with a full month series over two fiscal years
+        for name in ('Plant', 'Office'):
+            facility = Facility.objects.create(
+                user=cls.user, facility_name=name, facility_head='Head',
+                facility_location='Pune', facility_description=name
+            )
+            days = [date(year, month, 1) for year in (2022, 2023) for month in range(1, 13)]
+            common = {'user': cls.user, 'facility': facility, 'category': 'test'}
+            Waste.objects.bulk_create([Waste(DatePicker=day, food_waste=5, solid_Waste=3, Landfill_waste=2, Recycle_waste=1, **common) for day in days])
+            Energy.objects.bulk_create([Energy(DatePicker=day, hvac=10, production=5, renewable_solar=2, diesel=1, **common) for day in days])
+            Water.objects.bulk_create([Water(DatePicker=day, Generated_Water=100, Recycled_Water=20, **common) for day in days])
+            Biodiversity.objects.bulk_create([
+                Biodiversity(DatePicker=day, species='Neem', no_trees=10, width=2, height=5, totalArea=100, head_count=10, new_trees_planted=1, **common)
+                for day in days
+            ])
+            Logistices.objects.bulk_create([
+                Logistices(DatePicker=day, logistices_types='Cargo', Typeof_fuel='Diesel', fuel_consumption=2, No_Trips=1, No_Vehicles=1, **common)
+                for day in days
+            ])
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        # The async routes authenticate the JWT themselves
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(self.user).access_token}')
+
+    def test_endpoints_stay_within_query_budget(self):
+        async def on_request_thread(*calls):
+            return [await sync_to_async(call)() for call in calls]
+
+        for route, path in get_endpoints():
+            with self.subTest(route=route):
+                self.assertIn(route, QUERY_BUDGETS, 'Every GET route needs a query budget')
+                # Cold caches give the worst case. The async routes' worker threads cannot see the
+                # test transaction and are not counted, so their queries run on the request thread
+                cache.clear()
+                with mock.patch('users_pzc.views.gather_queries', on_request_thread), \
+                        mock.patch('users_pzc.emissions.gather_queries', on_request_thread):
+                    response = self.client.get(path, {'year': 2023, **ROUTE_PARAMS.get(route, {})})
+                queries = int(response['X-DB-Queries'])
+                if response.streaming:
+                    # Streaming exports only query while being read, after the header is set
+                    with CaptureQueriesContext(connection) as streamed:
+                        b''.join(response.streaming_content)
+                    queries += len(streamed)
+
+                self.assertEqual(response.status_code, 200)
+                self.assertLessEqual(queries, QUERY_BUDGETS[route])
+
+    def test_headers_are_off_by_default_but_stats_are_recorded(self):
+        reset_endpoint_stats()
+        with self.settings(QUERY_INSTRUMENTATION_HEADERS=False):
+            response = self.client.get('/api/view_waste/')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('X-DB-Queries', response)
+        stats = endpoint_stats()['api/view_waste/']
+        self.assertEqual(stats['requests'], 1)
+        self.assertGreater(stats['queries'], 0)
+        self.assertEqual(stats['max_queries'], stats['queries'])
+
+
+class BenchmarkSuiteTests(TestCase):
+    def test_generator_covers_every_model_for_each_month(self):
+        users = generate_dataset(users=1, facilities=2, years=1, first_year=2023)
+
+        self.assertEqual(Facility.objects.filter(user=users[0]).count(), 2)
+        for model in (Waste, Energy, Water, Biodiversity):
+            self.assertEqual(model.objects.filter(fiscal_year=2023).count(), 24)
+        self.assertEqual(Logistices.objects.exclude(fiscal_year=2023).count(), 0)
+
+    def test_generator_at_twenty_facilities_over_five_years(self):
+        generate_dataset(users=1, facilities=20, years=5, first_year=2019)
+
+        self.assertEqual(Waste.objects.count(), 1200)
+        rollups = MonthlyFacilityRollup.objects.filter(metric='waste.food_waste')
+        self.assertEqual(rollups.count(), 1200)
+        self.assertAlmostEqual(rollups.aggregate(total=Sum('value'))['total'], Waste.objects.aggregate(total=Sum('food_waste'))['total'])
+
+    def test_runner_times_get_endpoints(self):
+        routes = [route for route, _ in get_endpoints()]
+        self.assertIn('api/OverallUsageView/', routes)
+        self.assertIn('api/export/<str:model_name>/', routes)
+        self.assertNotIn('api/add_waste/', routes)
+
+        users = generate_dataset(users=1, facilities=1, years=1, first_year=2023)
+        results = run_benchmarks(users[0], 2023, iterations=2, only=['api/OverallUsageView/'])
+
+        self.assertEqual(list(results), ['api/OverallUsageView/'])
+        self.assertEqual(results['api/OverallUsageView/']['status'], 200)
+        self.assertGreater(results['api/OverallUsageView/']['queries'], 0)
+
+
+class ProfilingMiddlewareTests(TestCase):
+    def setUp(self):
+        self.profile_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.profile_dir.cleanup)
+        self.staff = CustomUser.objects.create_user(email='staff@example.com', password='Secret#123', is_staff=True)
+        self.member = CustomUser.objects.create_user(email='member@example.com', password='Secret#123')
+
+    def get(self, user, **headers):
+        token = RefreshToken.for_user(user).access_token
+        with self.settings(PROFILING_ENABLED=True, PROFILING_DIR=self.profile_dir.name, PROFILING_MAX_FILES=2):
+            return APIClient().get('/api/OverallUsageView/', headers={'Authorization': f'Bearer {token}', **headers})
+
+    def profiles(self):
+        return sorted(path.name for path in Path(self.profile_dir.name).glob('*.prof'))
+
+    def test_staff_requests_are_profiled_on_demand(self):
+        self.get(self.member, **{'X-Profile': '1'})
+        self.get(self.staff)
+        self.assertEqual(self.profiles(), [])
+
+        response = self.get(self.staff, **{'X-Profile': '1'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.profiles(), [response['X-Profile-Id']])
+        self.assertTrue(response['X-Profile-Id'].startswith('OverallUsageView-'))
+
+        out = StringIO()
+        call_command('profile_summary', dir=self.profile_dir.name, stdout=out)
+        self.assertIn('OverallUsageView (1 profiles)', out.getvalue())
+
+    def test_profile_directory_is_rotated(self):
+        for _ in range(3):
+            self.get(self.staff, **{'X-Profile': '1'})
+
+        self.assertEqual(len(self.profiles()), 2)
+
+    def test_request_is_served_unprofiled_while_another_profile_runs(self):
+        error = ValueError('Another profiling tool is already active')
+        with mock.patch('users_pzc.profiling.cProfile.Profile.enable', side_effect=error):
+            response = self.get(self.staff, **{'X-Profile': '1'})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('X-Profile-Id', response)
+        self.assertEqual(self.profiles(), [])
+
+
+class MetricsTests(TestCase):
+    def setUp(self):
+        reset_metrics()
+        self.user = CustomUser.objects.create_user(email='metrics@example.com', password='Secret#123')
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def test_requests_are_exposed_per_view_and_status(self):
+        self.client.get('/api/OverallUsageView/', {'year': 2023})
+        self.client.get('/api/OverallUsageView/', {'year': 'abc'})
+
+        with self.settings(METRICS_PUBLIC=True):
+            response = self.client.get('/metrics')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['Content-Type'].startswith('text/plain; version=0.0.4'))
+        body = response.content.decode()
+        self.assertIn('pzc_http_requests_total{view="OverallUsageView",method="GET",status="200"} 1', body)
+        self.assertIn('pzc_http_requests_total{view="OverallUsageView",method="GET",status="400"} 1', body)
+        self.assertIn('pzc_http_request_duration_seconds_bucket{view="OverallUsageView",method="GET",status="200",le="+Inf"} 1', body)
+        self.assertIn('pzc_http_request_db_queries_count{view="OverallUsageView",method="GET",status="200"} 1', body)
+        self.assertIn('# TYPE pzc_http_response_size_bytes histogram', body)
+
+    def test_histogram_is_consistent_across_threads(self):
+        histogram = Histogram('test_seconds', 'Test.', ('view',), (0.1, 1.0))
+
+        def observe():
+            for value in (0.05, 0.5, 5.0) * 200:
+                histogram.observe(('V',), value)
+
+        threads = [threading.Thread(target=observe) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        lines = histogram.collect()
+        self.assertIn('test_seconds_bucket{view="V",le="0.1"} 1600', lines)
+        self.assertIn('test_seconds_bucket{view="V",le="1.0"} 3200', lines)
+        self.assertIn('test_seconds_bucket{view="V",le="+Inf"} 4800', lines)
+        self.assertIn('test_seconds_count{view="V"} 4800', lines)
+
+    def test_scrape_token(self):
+        with self.settings(METRICS_TOKEN='scrape-secret'):
+            self.assertEqual(self.client.get('/metrics').status_code, 401)
+            response = self.client.get('/metrics', headers={'Authorization': 'Bearer scrape-secret'})
+        self.assertEqual(response.status_code, 200)
+
+    def test_only_staff_without_a_token(self):
+        staff = CustomUser.objects.create_user(email='ops@example.com', password='Secret#123', is_staff=True)
+        with self.settings(METRICS_TOKEN=None):
+            self.assertEqual(self.client.get('/metrics').status_code, 401)
+            member = RefreshToken.for_user(self.user).access_token
+            self.assertEqual(self.client.get('/metrics', headers={'Authorization': f'Bearer {member}'}).status_code, 401)
+            token = RefreshToken.for_user(staff).access_token
+            response = self.client.get('/metrics', headers={'Authorization': f'Bearer {token}'})
+        self.assertEqual(response.status_code, 200)
+
+
+class StructuredLoggingTests(FacilityTestMixin, TestCase):
+    def record(self, level, msg, *args, **extra):
+        record = logging.LogRecord('users_pzc.views', level, __file__, 1, msg, args, None)
+        record.__dict__.update(extra)
+        return record
+
+    def test_json_lines_carry_extra_fields(self):
+        line = json.loads(JsonFormatter().format(self.record(logging.INFO, 'Loaded %s rows', 3, facility_id='F1')))
+
+        self.assertEqual(line['message'], 'Loaded 3 rows')
+        self.assertEqual(line['level'], 'INFO')
+        self.assertEqual(line['facility_id'], 'F1')
+
+    def test_debug_records_are_sampled(self):
+        sampling = SamplingFilter(rate=0)
+
+        self.assertFalse(sampling.filter(self.record(logging.DEBUG, 'noisy')))
+        self.assertTrue(sampling.filter(self.record(logging.WARNING, 'kept')))
+
+    def test_queue_handler_writes_on_the_listener_thread(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = Path(directory) / 'app.jsonl'
+            handler = queued_json_handler(filename=path)
+            try:
+                raise ValueError('boom')
+            except ValueError:
+                record = logging.LogRecord('users_pzc.views', logging.ERROR, __file__, 1, 'Failed', (), sys.exc_info())
+            handler.handle(record)
+            handler.listener.stop()
+
+            line = json.loads(path.read_text())
+        self.assertEqual(line['message'], 'Failed')
+        self.assertIn('ValueError: boom', line['exception'])
+
+    def test_listing_runs_no_query_for_log_lines(self):
+        Waste.objects.create(user=self.user, facility=self.facility, category='test', DatePicker=date(2023, 5, 1), food_waste=5)
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/view_waste/', {'year': 2023, 'facility_id': self.facility.facility_id})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse([query for query in queries if 'COUNT(' in query['sql']])
+
+
+class SlowQueryCaptureTests(TestCase):
+    def setUp(self):
+        clear_slow_queries()
+        self.staff = CustomUser.objects.create_user(email='dba@example.com', password='Secret#123', is_staff=True)
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.staff)
+
+    def test_queries_over_threshold_are_captured_with_plan(self):
+        with self.settings(SLOW_QUERY_THRESHOLD_MS=0, QUERY_INSTRUMENTATION_HEADERS=True):
+            response = self.client.get('/api/OverallUsageView/', {'year': 2023})
+        with self.settings(SLOW_QUERY_THRESHOLD_MS=None):
+            captured = self.client.get('/api/slow_queries/').data['queries']
+
+        # The EXPLAIN queries are not counted as the request's own
+        self.assertEqual(len(captured), int(response['X-DB-Queries']))
+        entry = captured[0]
+        self.assertEqual(entry['view'], 'OverallUsageView')
+        self.assertEqual(entry['path'], '/api/OverallUsageView/')
+        self.assertTrue(entry['sql'].startswith('SELECT'))
+        self.assertTrue(entry['explain'])
+
+    def test_endpoint_is_staff_only(self):
+        member = CustomUser.objects.create_user(email='viewer@example.com', password='Secret#123')
+        self.client.force_authenticate(user=member)
+
+        self.assertEqual(self.client.get('/api/slow_queries/').status_code, 403)
+
+
+class CachedJWTAuthenticationTests(TestCase):
+    def setUp(self):
+        clear_user_cache()
+        reset_metrics()
+        self.user = CustomUser.objects.create_user(email='jwt@example.com', password='Secret#123')
+        self.client = APIClient()
+        response = self.client.post('/api/login/', {'email': 'jwt@example.com', 'password': 'Secret#123'}, format='json')
+        self.tokens = response.json()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {self.tokens['access']}")
+
+    def user_queries(self, captured):
+        return [query for query in captured if CustomUser._meta.db_table in query['sql']]
+
+    def test_user_is_loaded_once_per_token(self):
+        self.assertEqual(self.client.get('/api/dashboard/').status_code, 200)
+        with CaptureQueriesContext(connection) as captured:
+            response = self.client.get('/api/dashboard/')
+
+        self.assertEqual(response.json()['email'], 'jwt@example.com')
+        self.assertEqual(self.user_queries(captured), [])
+        stats = user_cache_stats()
+        self.assertEqual((stats['hits'], stats['misses'], stats['hit_rate']), (1, 1, 0.5))
+        with self.settings(METRICS_PUBLIC=True):
+            metrics = self.client.get('/metrics').content.decode()
+        self.assertIn('pzc_auth_user_cache_lookups_total{result="hit"} 1', metrics)
+
+    def test_logout_revokes_outstanding_access_tokens(self):
+        self.client.get('/api/dashboard/')
+        self.client.cookies['refresh_token'] = self.tokens['refresh']
+
+        self.assertEqual(self.client.post('/api/logout/').status_code, 205)
+        self.assertEqual(self.client.get('/api/dashboard/').status_code, 401)
+
+    def test_deactivation_takes_effect_immediately(self):
+        self.client.get('/api/dashboard/')
+        self.user.is_active = False
+        self.user.save()
+
+        self.assertEqual(self.client.get('/api/dashboard/').status_code, 401)
+
+    def test_bulk_updates_drop_cached_users(self):
+        self.client.get('/api/dashboard/')
+        CustomUser.objects.filter(pk=self.user.pk).update(is_active=False)
+
+        self.assertEqual(self.client.get('/api/dashboard/').status_code, 401)
+
+    def test_eviction_in_another_worker_reaches_this_one(self):
+        self.client.get('/api/dashboard/')
+        # The other worker's row change and evict_user(): only the shared stamp moves here
+        QuerySet.update(CustomUser.objects.filter(pk=self.user.pk), is_active=False)
+        self.assertEqual(self.client.get('/api/dashboard/').status_code, 200)
+        caches[AUTH_USER_CACHE_ALIAS].incr(f'auth:user:{self.user.pk}:stamp')
+
+        self.assertEqual(self.client.get('/api/dashboard/').status_code, 401)
+
+    def test_tokens_from_token_endpoint_carry_the_version(self):
+        self.user.token_version = 3
+        self.user.save()
+        tokens = self.client.post('/api/api/token/', {'email': 'jwt@example.com', 'password': 'Secret#123'}, format='json').json()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {tokens['access']}")
+
+        self.assertEqual(self.client.get('/api/dashboard/').status_code, 200)
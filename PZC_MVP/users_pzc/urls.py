@@ -1,6 +1,6 @@
 
 from django.urls import   path
-from .views import RegisterView, LoginView, DashboardView, LogoutView,WasteCreateView,WasteView,WasteEditView,WasteDeleteView,EnergyCreateView,EnergyView,EnergyEditView,EnergyDeleteView,WaterView,WaterCreateView,WaterEditView,WaterDeleteView,BiodiversityCreateView,BiodiversityView,BiodiversityEditView,BiodiversityDeleteView,FacilityCreateView,FacilityView,FacilityEditView,FacilityDeleteView,LogisticesCreateView,LogisticesView,LogisticesEditView,LogisticesDeleteView,OrganizationCreate,OrganizationView,FoodWasteOverviewView,SolidWasteOverviewView,E_WasteOverviewView,Biomedical_WasteOverviewView,Liquid_DischargeOverviewView,OthersOverviewView,Waste_Sent_For_RecycleOverviewView,Waste_Sent_For_LandFillOverviewView,StackedWasteOverviewView,WasteOverallDonutChartView,SentToLandfillOverviewView,SentToRecycledOverviewView,HVACOverviewView,ProductionOverviewView,StpOverviewView,Admin_BlockOverviewView,Utilities_OverviewView,WasteViewCard_Over,EnergyViewCard_Over,Others_OverviewView,Renewable_EnergyOverView,StackedEnergyOverviewView,OverallUsageView,Fuel_Used_OperationsOverView,WaterViewCard_Over,Generated_WaterOverviewView,Recycle_WaterOverviewView,Softener_usageOverviewView,Boiler_usageOverviewView,otherUsage_OverviewView,StackedWaterOverviewView,EnergyAnalyticsView,WaterAnalyticsView,BiodiversityMetricsGraphsView,LogisticesOverviewAndGraphs,EmissionCalculations,YearFacilityDataAPIView
+from .views import RegisterView, LoginView, DashboardView, LogoutView,WasteCreateView,WasteView,WasteEditView,WasteDeleteView,EnergyCreateView,EnergyView,EnergyEditView,EnergyDeleteView,WaterView,WaterCreateView,WaterEditView,WaterDeleteView,BiodiversityCreateView,BiodiversityView,BiodiversityEditView,BiodiversityDeleteView,FacilityCreateView,FacilityView,FacilityEditView,FacilityDeleteView,LogisticesCreateView,LogisticesView,LogisticesEditView,LogisticesDeleteView,OrganizationCreate,OrganizationView,FoodWasteOverviewView,SolidWasteOverviewView,E_WasteOverviewView,Biomedical_WasteOverviewView,Liquid_DischargeOverviewView,OthersOverviewView,Waste_Sent_For_RecycleOverviewView,Waste_Sent_For_LandFillOverviewView,StackedWasteOverviewView,WasteOverallDonutChartView,SentToLandfillOverviewView,SentToRecycledOverviewView,HVACOverviewView,ProductionOverviewView,StpOverviewView,Admin_BlockOverviewView,Utilities_OverviewView,WasteViewCard_Over,EnergyViewCard_Over,Others_OverviewView,Renewable_EnergyOverView,StackedEnergyOverviewView,OverallUsageView,Fuel_Used_OperationsOverView,WaterViewCard_Over,Generated_WaterOverviewView,Recycle_WaterOverviewView,Softener_usageOverviewView,Boiler_usageOverviewView,otherUsage_OverviewView,StackedWaterOverviewView,EnergyAnalyticsView,WaterAnalyticsView,BiodiversityMetricsGraphsView,LogisticesOverviewAndGraphs,EmissionCalculations,YearFacilityDataAPIView,DashboardBatchView,ActivityExportView,ActivityImportView,ActivityBatchView,OverallUsageAsyncView,EmissionCalculationsAsyncView,SlowQueryView
 
 
 from rest_framework_simplejwt.views import (
@@ -127,5 +127,18 @@ urlpatterns = [
     path('EmissionCalculations/',EmissionCalculations.as_view(),name="EmissionCalculations"),
     #Apis For YearFacility
     path('YearFacilityDataAPIView/',YearFacilityDataAPIView.as_view(),name="YearFacilityDataAPIView"),
+    #Api For Batched Dashboard Widgets
+    path('dashboard/batch/',DashboardBatchView.as_view(),name="dashboard_batch"),
+    #Apis For Raw Data Export
+    path('export/<str:model_name>/',ActivityExportView.as_view(),name="activity_export"),
+    #Apis For Spreadsheet Import
+    path('import/<str:model_name>/',ActivityImportView.as_view(),name="activity_import"),
+    #Api For Batch Update/Delete Of Activity Data
+    path('batch/<str:model_name>/',ActivityBatchView.as_view(),name="activity_batch"),
+    #Api For Async Overview Totals And Emissions
+    path('async/OverallUsageView/',OverallUsageAsyncView.as_view(),name="overall_usage_async"),
+    path('async/EmissionCalculations/',EmissionCalculationsAsyncView.as_view(),name="emission_calculations_async"),
+    #Api For Captured Slow Queries (staff only)
+    path('slow_queries/',SlowQueryView.as_view(),name="slow_queries"),
 
 ]
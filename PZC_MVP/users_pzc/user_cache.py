@@ -0,0 +1,123 @@
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+
+from .metrics import AUTH_USER_CACHE
+
+# Users resolved from access tokens, per process. Entries are keyed by the token's version,
+# so tokens issued before a logout stop matching once the version is bumped
+AUTH_USER_CACHE_TTL = getattr(settings, 'AUTH_USER_CACHE_TTL', 60)
+AUTH_USER_CACHE_SIZE = getattr(settings, 'AUTH_USER_CACHE_SIZE', 1024)
+# Holds the revocation stamps every worker checks its entries against; must be shared (see checks.py)
+AUTH_USER_CACHE_ALIAS = getattr(settings, 'AUTH_USER_CACHE_ALIAS', 'default')
+
+# Bumped by bulk updates and deletes of users, which do not say which users changed
+_EPOCH_KEY = 'auth:users:epoch'
+
+_lock = threading.Lock()
+# (user id, token version) -> (expiry on the monotonic clock, stamp, user), least recently used first
+_entries = OrderedDict()
+
+
+def _shared():
+    return caches[AUTH_USER_CACHE_ALIAS]
+
+
+def _stamp_key(user_id):
+    return f"auth:user:{user_id}:stamp"
+
+
+def user_stamp(user_id):
+    """
+    The user's revocation stamp and the bulk update stamp, from the shared
+    cache in one round trip. Stamps start from a timestamp like the data
+    versions of response_cache.
+    """
+    cache = _shared()
+    keys = (_stamp_key(user_id), _EPOCH_KEY)
+    stamps = cache.get_many(keys)
+    if len(stamps) < len(keys):
+        for key in keys:
+            if key not in stamps:
+                cache.add(key, time.time_ns(), None)
+        stamps = cache.get_many(keys)
+    return tuple(stamps.get(key) for key in keys)
+
+
+def _bump(keys):
+    cache = _shared()
+    for key in keys:
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.add(key, time.time_ns(), None)
+
+
+def _revoke(keys):
+    _bump(keys)
+    # A worker reloading the user before the change commits would cache the old row under the new stamp
+    transaction.on_commit(lambda: _bump(keys))
+
+
+def cached_user(user_id, version, stamp):
+    """The cached user, unless the entry expired or was cached under an older stamp."""
+    key = (user_id, version)
+    now = time.monotonic()
+    with _lock:
+        entry = _entries.get(key)
+        if entry is not None and entry[0] > now and entry[1] == stamp:
+            _entries.move_to_end(key)
+            user = entry[2]
+        else:
+            if entry is not None:
+                del _entries[key]
+            user = None
+    AUTH_USER_CACHE.inc(('hit',) if user is not None else ('miss',))
+    return user
+
+
+def cache_user(user_id, version, stamp, user):
+    """Caches a user loaded after reading `stamp`, so a change made during the load still invalidates it."""
+    key = (user_id, version)
+    with _lock:
+        _entries[key] = (time.monotonic() + AUTH_USER_CACHE_TTL, stamp, user)
+        _entries.move_to_end(key)
+        while len(_entries) > AUTH_USER_CACHE_SIZE:
+            _entries.popitem(last=False)
+
+
+def evict_user(user_id):
+    """Drops the user here and, through their stamp, in every other worker, e.g. after a logout or a deactivation."""
+    with _lock:
+        for key in [key for key in _entries if key[0] == user_id]:
+            del _entries[key]
+    _revoke([_stamp_key(user_id)])
+
+
+def evict_all_users():
+    """Drops every cached user in every worker; for bulk changes to the user table."""
+    clear_user_cache()
+    _revoke([_EPOCH_KEY])
+
+
+def clear_user_cache():
+    """Empties this process's entries only."""
+    with _lock:
+        _entries.clear()
+
+
+def user_cache_stats():
+    hits = AUTH_USER_CACHE.value(('hit',))
+    misses = AUTH_USER_CACHE.value(('miss',))
+    with _lock:
+        size = len(_entries)
+    return {
+        'hits': hits,
+        'misses': misses,
+        'hit_rate': hits / (hits + misses) if hits + misses else 0.0,
+        'size': size,
+    }
@@ -1,25 +1,54 @@
 import pandas as pd
+from copy import copy
 from datetime import datetime
 from collections import defaultdict
+from functools import partial
 from django.db.models import Sum, Value, FloatField,Min, Max,F
-from django.db.models.functions import Coalesce, Cast, ExtractMonth
+from django.db.models.functions import Coalesce, Cast, ExtractMonth, ExtractYear
 from rest_framework.parsers import MultiPartParser, FormParser
 from django.utils import timezone
 from django.contrib.auth import authenticate
+from django.contrib.auth.models import AnonymousUser
 from django.shortcuts import get_object_or_404
 from rest_framework.views import APIView
+from rest_framework.request import Request
 from rest_framework.response import Response
 from rest_framework import status
-from rest_framework.permissions import IsAuthenticated,AllowAny
+from rest_framework.permissions import IsAuthenticated,AllowAny,IsAdminUser
 from rest_framework_simplejwt.tokens import RefreshToken
+from .authentication import CachedJWTAuthentication, VersionedRefreshToken, staff_user
 from .serializers import UserRegisterSerializer, UserLoginSerializer,WasteSerializer,WasteCreateSerializer,EnergyCreateSerializer,EnergySerializer,WaterCreateSerializer,WaterSerializer,BiodiversityCreateSerializer,BiodiversitySerializer,FacilitySerializer,LogisticesSerializer,OrganizationSerializer
 from .models import CustomUser,Waste,Energy,Water,Biodiversity,Facility,Logistices,Org_registration
 from django.db.models import Q
 from django.db.models import Field
 from .filters import FacilityFilter, WasteFilter, EnergyFilter, WaterFilter, BiodiversityFilter, LogisticesFilter
+from .emissions import FISCAL_MONTH_ORDER, monthly_emissions, monthly_emissions_async
+from .rollups import metric_cells, metric_name, rollup_queryset
+from .aggregates import OVERALL_USAGE_TOTALS, facility_field_totals, ranked_by, usage_total
+from .fiscal import available_fiscal_years, current_fiscal_year, latest_entry_date, latest_fiscal_year
+from .response_cache import cache_response, etag_response
+from .pagination import keyset_page
+from .exports import EXPORT_FORMATS, EXPORT_MODELS, export_columns, export_rows, stream_csv, stream_ndjson
+from .imports import IMPORT_SPECS, ImportConflictError, ImportFileError, import_activity_file
+from .batch_edits import BATCH_MODELS, BatchRequestError, batch_delete, batch_update
+from .concurrency import gather_queries
+from .metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, render_metrics
+from .slow_queries import recent_slow_queries, slow_query_threshold
+from django.core.exceptions import ValidationError
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
+from django.views import View
+from django.conf import settings
+from django.utils.crypto import constant_time_compare
+from asgiref.sync import sync_to_async
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.settings import api_settings
 from django_filters.rest_framework import DjangoFilterBackend
 
 import logging
+import math
+
+logger = logging.getLogger(__name__)
+
 #Version One
 #Register View
 class RegisterView(APIView):
@@ -45,7 +74,7 @@ class LoginView(APIView):
             if user is None:
                 return Response({"error": "Invalid credentials"}, status=status.HTTP_401_UNAUTHORIZED)
 
-            refresh = RefreshToken.for_user(user)
+            refresh = VersionedRefreshToken.for_user(user)
             response = Response({
                 'refresh': str(refresh),
                 'access': str(refresh.access_token),
@@ -113,6 +142,7 @@ class FacilityCreateView(APIView):
 class FacilityView(APIView):
     permission_classes = [IsAuthenticated]
 
+    @etag_response
     def get(self, request):
         user = request.user
         facility_id = request.GET.get('facility_id', 'all')
@@ -212,6 +242,7 @@ class WasteCreateView(APIView):
 class WasteView(APIView):
     permission_classes = [IsAuthenticated]
     
+    @etag_response
     def get(self, request):
         user = request.user
         facility_id = request.GET.get('facility_id', 'all')
@@ -221,13 +252,7 @@ class WasteView(APIView):
             if year:
                 year = int(year)
             else:
-                latest_date = Waste.objects.filter(user=user).aggregate(latest_date=Max('DatePicker'))['latest_date']
-                
-                if latest_date:
-                    year = latest_date.year if latest_date.month >= 4 else latest_date.year - 1
-                else:
-                    current_date = datetime.now()
-                    year = current_date.year - 1 if current_date.month < 4 else current_date.year
+                year = latest_fiscal_year(user, Waste)
             
             start_date = datetime(year, 4, 1)
             end_date = datetime(year + 1, 3, 31)
@@ -237,15 +262,20 @@ class WasteView(APIView):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        waste_data = Waste.objects.filter(user=user, DatePicker__range=(start_date, end_date))
+        waste_data = Waste.objects.filter(user=user, DatePicker__range=(start_date, end_date)).select_related('facility')
 
         if facility_id.lower() != 'all':
             waste_data = waste_data.filter(facility__facility_id=facility_id)
-            print(f"Filtered Waste Data Count by Facility: {waste_data.count()}")
+            logger.debug("Filtering waste data by facility %s", facility_id)
         else:
-            print("Facility ID is 'all'; skipping facility filtering.")
+            logger.debug("Facility ID is 'all'; skipping facility filtering.")
         
-        if not waste_data.exists():
+        try:
+            waste_page, next_cursor = keyset_page(waste_data, request)
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        if not waste_page and not request.GET.get('cursor'):
             empty_fields = {
                 "facility_id":facility_id,
                 "food_waste":0,
@@ -268,17 +298,17 @@ class WasteView(APIView):
                 status=status.HTTP_200_OK
             )
         
-        waste_serializer = WasteSerializer(waste_data, many=True)
-        overall_total = sum(
-            (waste.food_waste or 0) + (waste.solid_Waste or 0) + (waste.E_Waste or 0) + 
-            (waste.Biomedical_waste or 0) + (waste.other_waste or 0)
-            for waste in waste_data
-        )
+        waste_serializer = WasteSerializer(waste_page, many=True)
+        # Total over the whole fiscal year, not just this page
+        overall_total = waste_data.aggregate(
+            total=Coalesce(Sum(F('food_waste') + F('solid_Waste') + F('E_Waste') + F('Biomedical_waste') + F('other_waste')), 0.0)
+        )['total']
         
         user_data = {
             "email": user.email,
             "year": year, 
             "waste_data": waste_serializer.data,
+            "next_cursor": next_cursor,
             "overall_waste_usage_total": overall_total
         }
         
@@ -341,8 +371,8 @@ class EnergyView(APIView):
             if year:
                 year = int(year)
             else:
-                current_date = datetime.now()
-                year = current_date.year - 1 if current_date.month < 4 else current_date.year
+                # Latest fiscal year with data, not yet past the current one
+                year = min(latest_fiscal_year(user, Energy), current_fiscal_year())
 
             start_date = datetime(year, 4, 1)
             end_date = datetime(year + 1, 3, 31)
@@ -353,20 +383,12 @@ class EnergyView(APIView):
             )
         
         energy_data = Energy.objects.filter(user=user, DatePicker__range=(start_date, end_date))
-        if not energy_data.exists() and not request.GET.get('year'):
-            latest_year = year
-            while not energy_data.exists() and latest_year > 2000:  # Arbitrary cutoff year
-                latest_year -= 1
-                start_date = datetime(latest_year, 4, 1)
-                end_date = datetime(latest_year + 1, 3, 31)
-                energy_data = Energy.objects.filter(user=user, DatePicker__range=(start_date, end_date))
-            year = latest_year 
         
         if facility_id.lower() != 'all':
             energy_data = energy_data.filter(facility__facility_id=facility_id)
-            print(f"Filtered Energy Data Count by Facility: {energy_data.count()}")
+            logger.debug("Filtering energy data by facility %s", facility_id)
         else:
-            print("Facility ID is 'all'; skipping facility filtering.")
+            logger.debug("Facility ID is 'all'; skipping facility filtering.")
         
         if not energy_data.exists():
             return Response(
@@ -400,6 +422,7 @@ class EnergyView(APIView):
 class EnergyView(APIView):
     permission_classes = [IsAuthenticated]
     
+    @etag_response
     def get(self, request):
         user = request.user
         facility_id = request.GET.get('facility_id', 'all')
@@ -409,13 +432,7 @@ class EnergyView(APIView):
             if year:
                 year = int(year)
             else:
-                latest_date = Energy.objects.filter(user=user).aggregate(latest_date=Max('DatePicker'))['latest_date']
-                
-                if latest_date:
-                    year = latest_date.year if latest_date.month >= 4 else latest_date.year - 1
-                else:
-                    current_date = datetime.now()
-                    year = current_date.year - 1 if current_date.month < 4 else current_date.year
+                year = latest_fiscal_year(user, Energy)
             
             start_date = datetime(year, 4, 1)
             end_date = datetime(year + 1, 3, 31)
@@ -425,15 +442,20 @@ class EnergyView(APIView):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        energy_data = Energy.objects.filter(user=user, DatePicker__range=(start_date, end_date))
+        energy_data = Energy.objects.filter(user=user, DatePicker__range=(start_date, end_date)).select_related('facility')
 
         if facility_id.lower() != 'all':
             energy_data = energy_data.filter(facility__facility_id=facility_id)
-            print(f"Filtered energy Data Count by Facility: {energy_data.count()}")
+            logger.debug("Filtering energy data by facility %s", facility_id)
         else:
-            print("Facility ID is 'all'; skipping facility filtering.")
+            logger.debug("Facility ID is 'all'; skipping facility filtering.")
         
-        if not energy_data.exists():
+        try:
+            energy_page, next_cursor = keyset_page(energy_data, request)
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        if not energy_page and not request.GET.get('cursor'):
             empty_fields = {
                 "facility_id":"N/A",
                 "hvac":0,
@@ -461,17 +483,18 @@ class EnergyView(APIView):
                 status=status.HTTP_200_OK
             )
         
-        energy_serializer = EnergySerializer(energy_data, many=True)
-        overall_total = sum(
-           ( energy.hvac or 0) + (energy.production or 0) + (energy.stp or 0) + (energy.admin_block or 0) + (energy.utilities or 0) + (energy.others or 0)
-            for energy in energy_data
-        )
+        energy_serializer = EnergySerializer(energy_page, many=True)
+        # Total over the whole fiscal year, not just this page
+        overall_total = energy_data.aggregate(
+            total=Coalesce(Sum(F('hvac') + F('production') + F('stp') + F('admin_block') + F('utilities') + F('others')), 0.0)
+        )['total']
         
         
         user_data = {
             "email": user.email,
             "year": year, 
             "energy_data": energy_serializer.data,
+            "next_cursor": next_cursor,
             "overall_energy_usage_total": overall_total
         }
         
@@ -527,6 +550,7 @@ class WaterCreateView(APIView):
 class WaterView(APIView):
     permission_classes = [IsAuthenticated]
     
+    @etag_response
     def get(self, request):
         user = request.user
         facility_id = request.GET.get('facility_id', 'all')
@@ -536,13 +560,7 @@ class WaterView(APIView):
             if year:
                 year = int(year)
             else:
-                latest_date = Water.objects.filter(user=user).aggregate(latest_date=Max('DatePicker'))['latest_date']
-                
-                if latest_date:
-                    year = latest_date.year if latest_date.month >= 4 else latest_date.year - 1
-                else:
-                    current_date = datetime.now()
-                    year = current_date.year - 1 if current_date.month < 4 else current_date.year
+                year = latest_fiscal_year(user, Water)
             
             start_date = datetime(year, 4, 1)
             end_date = datetime(year + 1, 3, 31)
@@ -552,15 +570,20 @@ class WaterView(APIView):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        water_data = Water.objects.filter(user=user, DatePicker__range=(start_date, end_date))
+        water_data = Water.objects.filter(user=user, DatePicker__range=(start_date, end_date)).select_related('facility')
 
         if facility_id.lower() != 'all':
             water_data = water_data.filter(facility__facility_id=facility_id)
-            print(f"Filtered water Data Count by Facility: {water_data.count()}")
+            logger.debug("Filtering water data by facility %s", facility_id)
         else:
-            print("Facility ID is 'all'; skipping facility filtering.")
+            logger.debug("Facility ID is 'all'; skipping facility filtering.")
         
-        if not water_data.exists():
+        try:
+            water_page, next_cursor = keyset_page(water_data, request)
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        if not water_page and not request.GET.get('cursor'):
             empty_fields = {
                 "facility_id":"N/A",
                 "Generated_Water": 0,
@@ -580,14 +603,16 @@ class WaterView(APIView):
                 status=status.HTTP_200_OK
             )
         
-        water_serializer = WaterSerializer(water_data, many=True)
-        overall_total = sum(water.overall_usage for water in water_data)
+        water_serializer = WaterSerializer(water_page, many=True)
+        # Total over the whole fiscal year, not just this page
+        overall_total = water_data.aggregate(total=Coalesce(Sum('overall_usage'), 0.0))['total']
         
         
         user_data = {
             "email": user.email,
             "year": year, 
             "water_data": water_serializer.data,
+            "next_cursor": next_cursor,
             "overall_water_usage_total": overall_total
         }
         
@@ -645,6 +670,7 @@ class BiodiversityCreateView(APIView):
 class BiodiversityView(APIView):
     permission_classes = [IsAuthenticated]
 
+    @etag_response
     def get(self, request):
         user = request.user
         facility_id = request.GET.get('facility_id', 'all')
@@ -654,13 +680,7 @@ class BiodiversityView(APIView):
             if year:
                 year = int(year)
             else:
-                latest_date = Biodiversity.objects.filter(user=user).aggregate(latest_date=Max('DatePicker'))['latest_date']
-
-                if latest_date:
-                    year = latest_date.year if latest_date.month >= 4 else latest_date.year - 1
-                else:
-                    current_date = datetime.now()
-                    year = current_date.year - 1 if current_date.month < 4 else current_date.year
+                year = latest_fiscal_year(user, Biodiversity)
 
             start_date = datetime(year, 4, 1)
             end_date = datetime(year + 1, 3, 31)
@@ -670,15 +690,20 @@ class BiodiversityView(APIView):
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        biodiversity_data = Biodiversity.objects.filter(user=user, DatePicker__range=(start_date, end_date))
+        biodiversity_data = Biodiversity.objects.filter(user=user, DatePicker__range=(start_date, end_date)).select_related('facility')
 
         if facility_id.lower() != 'all':
             biodiversity_data = biodiversity_data.filter(facility__facility_id=facility_id)
-            print(f"Filtered biodiversity Data Count by Facility: {biodiversity_data.count()}")
+            logger.debug("Filtering biodiversity data by facility %s", facility_id)
         else:
-            print("Facility ID is 'all'; skipping facility filtering.")
+            logger.debug("Facility ID is 'all'; skipping facility filtering.")
 
-        if not biodiversity_data.exists():
+        try:
+            biodiversity_page, next_cursor = keyset_page(biodiversity_data, request)
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        if not biodiversity_page and not request.GET.get('cursor'):
             empty_fields = {
                 "facility_id":"N/A",
                 "no_trees": 0,
@@ -699,17 +724,19 @@ class BiodiversityView(APIView):
                 status=status.HTTP_200_OK
             )
 
-        biodiversity_serializer = BiodiversitySerializer(biodiversity_data, many=True)
+        biodiversity_serializer = BiodiversitySerializer(biodiversity_page, many=True)
         serialized_data = biodiversity_serializer.data
-        for data, biodiversity in zip(serialized_data, biodiversity_data):
-            data['facility_id'] = biodiversity.facility.facility_id
-            
-        overall_total = sum(biodiversity.no_trees for biodiversity in biodiversity_data)
+        for data, biodiversity in zip(serialized_data, biodiversity_page):
+            data['facility_id'] = biodiversity.facility_id
+
+        # Total over the whole fiscal year, not just this page
+        overall_total = biodiversity_data.aggregate(total=Coalesce(Sum('no_trees'), 0))['total']
 
         user_data = {
             "email": user.email,
             "year": year, 
             "biodiversity_data": biodiversity_serializer.data,
+            "next_cursor": next_cursor,
             "overall_biodiversity_usage_total": overall_total
         }
 
@@ -783,6 +810,7 @@ class LogisticesCreateView(APIView):
 class LogisticesView(APIView):
     permission_classes = [IsAuthenticated]
 
+    @etag_response
     def get(self, request):
         user = request.user
         facility_id = request.GET.get('facility_id', 'all')
@@ -792,13 +820,7 @@ class LogisticesView(APIView):
             if year:
                 year = int(year)
             else:
-                latest_date = Logistices.objects.filter(user=user).aggregate(latest_date=Max('DatePicker'))['latest_date']
-
-                if latest_date:
-                    year = latest_date.year if latest_date.month >= 4 else latest_date.year - 1
-                else:
-                    current_date = datetime.now()
-                    year = current_date.year - 1 if current_date.month < 4 else current_date.year
+                year = latest_fiscal_year(user, Logistices)
 
             start_date = datetime(year, 4, 1)
             end_date = datetime(year + 1, 3, 31)
@@ -808,15 +830,20 @@ class LogisticesView(APIView):
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        logistices_data = Logistices.objects.filter(user=user, DatePicker__range=(start_date, end_date))
+        logistices_data = Logistices.objects.filter(user=user, DatePicker__range=(start_date, end_date)).select_related('facility')
 
         if facility_id.lower() != 'all':
             logistices_data = logistices_data.filter(facility__facility_id=facility_id)
-            print(f"Filtered logistices Data Count by Facility: {logistices_data.count()}")
+            logger.debug("Filtering logistices data by facility %s", facility_id)
         else:
-            print("Facility ID is 'all'; skipping facility filtering.")
+            logger.debug("Facility ID is 'all'; skipping facility filtering.")
+
+        try:
+            logistices_page, next_cursor = keyset_page(logistices_data, request)
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
-        if not logistices_data.exists():
+        if not logistices_page and not request.GET.get('cursor'):
             empty_fields = {
                 "facility_id":"N/A",
                 "logistices_types": "N/A",
@@ -839,19 +866,21 @@ class LogisticesView(APIView):
                 status=status.HTTP_200_OK
             )
 
-        logistices_serializer = LogisticesSerializer(logistices_data, many=True)
+        logistices_serializer = LogisticesSerializer(logistices_page, many=True)
         
         serialized_data = logistices_serializer.data
-        for data, logistices in zip(serialized_data, logistices_data):
-            data['facility_id'] = logistices.facility.facility_id
-            
-        overall_fuelconsumption = sum(logistices_fuel.fuel_consumption for logistices_fuel in logistices_data)
+        for data, logistices in zip(serialized_data, logistices_page):
+            data['facility_id'] = logistices.facility_id
+
+        # Total over the whole fiscal year, not just this page
+        overall_fuelconsumption = logistices_data.aggregate(total=Coalesce(Sum('fuel_consumption'), 0.0))['total']
 
         user_data = {
             "email": user.email,
             "year": year, 
             "facility_id": facility_id,
             "logistices_data": logistices_serializer.data,
+            "next_cursor": next_cursor,
             "overall_logistices_usage_total": overall_fuelconsumption
         }
 
@@ -919,6 +948,10 @@ class LogoutView(APIView):
                 status=status.HTTP_400_BAD_REQUEST
             )
 
+        # Revokes the access tokens still in circulation; saving evicts the cached user
+        request.user.token_version = F('token_version') + 1
+        request.user.save(update_fields=['token_version'])
+
         response = Response({"message": "Logout successful"}, status=status.HTTP_205_RESET_CONTENT)
         response.delete_cookie('access_token')
         response.delete_cookie('refresh_token')
@@ -927,134 +960,137 @@ class LogoutView(APIView):
     
     
 '''OverViwe of allTotal_Usages '''
+def overall_usage_filters(user, params):
+    """
+    Resolves the fiscal year and the queryset filters of the overview cards.
+    Raises ValueError for a malformed year.
+    """
+    facility_id = params.get('facility_id', 'all').lower()
+    year = params.get('year')
+    year = int(year) if year else latest_fiscal_year(user, Logistices)
+
+    filters = {'user': user, 'DatePicker__range': (datetime(year, 4, 1), datetime(year + 1, 3, 31))}
+    if facility_id != 'all':
+        filters['facility__facility_id'] = facility_id
+    return year, facility_id, filters
+
+
+def overall_usage_response(user, year, facility_id, overall_data):
+    return {
+        "email": user.email,
+        "year": year,
+        "facility_id": facility_id if facility_id != 'all' else "All facilities",
+        "overall_data": overall_data,
+    }
+
+
 class OverallUsageView(APIView):
     permission_classes = [IsAuthenticated]
 
+    @etag_response
+    @cache_response
     def get(self, request):
         user = request.user
-        facility_id = request.GET.get('facility_id', 'all').lower()
-        year = request.GET.get('year')
-
         try:
-            if year:
-                year = int(year)
-            else:
-                latest_date = Logistices.objects.filter(user=user).aggregate(latest_date=Max('DatePicker'))['latest_date']
-                
-                if latest_date:
-                    year = latest_date.year if latest_date.month >= 4 else latest_date.year - 1
-                else:
-                    current_date = datetime.now()
-                    year = current_date.year - 1 if current_date.month < 4 else current_date.year
-            
-            start_date = datetime(year, 4, 1)
-            end_date = datetime(year + 1, 3, 31)
+            year, facility_id, filters = overall_usage_filters(user, request.GET)
         except ValueError:
             return Response(
                 {"error": "Invalid fiscal year format. Please provide a valid year, e.g., 2023."},
                 status=status.HTTP_400_BAD_REQUEST
             )
 
+        # One aggregate query per category
         overall_data = {
-            "waste_usage": 0,
-            "energy_usage": 0,
-            "water_usage": 0,
-            "biodiversity_usage": 0,
-            "logistices_usage": 0,
+            key: usage_total(model, total, filters)
+            for key, (model, total) in OVERALL_USAGE_TOTALS.items()
         }
 
-        # Filters based on user and date range
-        filters = {'user': user, 'DatePicker__range': (start_date, end_date)}
-        if facility_id != 'all':
-            filters['facility__facility_id'] = facility_id
-
-        # Fetch data for each category and aggregate usage
-        waste_data = Waste.objects.filter(**filters)
-        overall_data["waste_usage"] = waste_data.aggregate(
-            total=Sum('food_waste') + Sum('solid_Waste') + Sum('E_Waste') +
-                  Sum('Biomedical_waste') + Sum('other_waste')
-        )['total'] or 0
-
-        energy_data = Energy.objects.filter(**filters)
-        overall_data["energy_usage"] = energy_data.aggregate(
-            total=Sum('hvac') + Sum('production') + Sum('stp') +
-                  Sum('admin_block') + Sum('utilities') + Sum('others')
-        )['total'] or 0
-
-        water_data = Water.objects.filter(**filters)
-        overall_data["water_usage"] = water_data.aggregate(total=Sum('overall_usage'))['total'] or 0
-
-        biodiversity_data = Biodiversity.objects.filter(**filters)
-        overall_data["biodiversity_usage"] = biodiversity_data.aggregate(total=Sum('overall_Trees'))['total'] or 0
-
-        logistices_data = Logistices.objects.filter(**filters)
-        overall_data["logistices_usage"] = logistices_data.aggregate(total=Sum('total_fuelconsumption'))['total'] or 0
-
-        # If no data is found for the selected filters (year/facility), fetch the latest available data
-        if not waste_data.exists() and facility_id == 'all':
-            # Fetch the most recent data available from any year, including future years
-            waste_data = Waste.objects.filter(user=user).order_by('-DatePicker').first()
-            energy_data = Energy.objects.filter(user=user).order_by('-DatePicker').first()
-            water_data = Water.objects.filter(user=user).order_by('-DatePicker').first()
-            biodiversity_data = Biodiversity.objects.filter(user=user).order_by('-DatePicker').first()
-            logistices_data = Logistices.objects.filter(user=user).order_by('-DatePicker').first()
-
-            # Handle None cases and return zero values when no data is found
-            if not waste_data:
-                waste_data = []
-            else:
-                waste_data = [waste_data]  # Wrap in a list if data is found
-
-            if not energy_data:
-                energy_data = []
-            else:
-                energy_data = [energy_data]
+        return Response(overall_usage_response(user, year, facility_id, overall_data), status=status.HTTP_200_OK)
 
-            if not water_data:
-                water_data = []
-            else:
-                water_data = [water_data]
+'''OverViwe of allTotal_Usages'''
+    
+'''Metric Overviews Starts'''
+def metric_overview(field, year, cells):
+    """
+    The line and donut chart payload of a single-metric overview, from
+    {(month, facility name): value} cells. The empty payload keys the line
+    chart by `field` like the non-empty one.
+    """
+    month_order = [4, 5, 6, 7, 8, 9, 10, 11, 12, 1, 2, 3]
+    if not cells:
+        return {
+            "year": year,
+            "line_chart_data": [{"month": datetime(1900, month, 1).strftime('%b'), field: 0} for month in month_order],
+            "donut_chart_data": [{"facility_name": "No Facility", "percentage": 0}],
+        }
 
-            if not biodiversity_data:
-                biodiversity_data = []
-            else:
-                biodiversity_data = [biodiversity_data]
+    monthly = {month: 0 for month in range(1, 13)}
+    facilities = {}
+    for (month, facility_name), value in cells.items():
+        monthly[month] += value
+        facilities[facility_name] = facilities.get(facility_name, 0) + value
+
+    ranked = sorted(facilities.items(), key=lambda item: item[1], reverse=True)
+    total = sum(value for _, value in ranked)
+    return {
+        "year": year,
+        "line_chart_data": [
+            {"month": datetime(1900, month, 1).strftime('%b'), field: monthly[month]}
+            for month in month_order
+        ],
+        "donut_chart_data": [
+            {"facility_name": facility_name, "percentage": (value / total * 100) if total else 0}
+            for facility_name, value in ranked
+        ],
+    }
+
+
+class MetricOverviewView(APIView):
+    """
+    Line and donut chart of one rollup metric for ?year (default: the latest
+    fiscal year of `model`), facility_id and facility_location. Subclasses
+    name the `model` and `field`; DashboardBatchView builds several of them
+    from one rollup read with the same metric_overview().
+    """
+    permission_classes = [IsAuthenticated]
+    model = None
+    field = None
+
+    @etag_response
+    @cache_response
+    def get(self, request):
+        user = request.user
+        facility_id = request.GET.get('facility_id', None)
+        facility_location = request.GET.get('facility_location', None)
+        year = request.GET.get('year', None)
+        if not year:
+            year = latest_fiscal_year(user, self.model, default=datetime.now().year)
+        try:
+            year = int(year)
+        except ValueError:
+            return Response({'error': 'Invalid year parameter.'}, status=status.HTTP_400_BAD_REQUEST)
 
-            if not logistices_data:
-                logistices_data = []
-            else:
-                logistices_data = [logistices_data]
+        try:
+            metric = metric_name(self.model, self.field)
+            cells = metric_cells(user, year, [metric], facility_id, facility_location)
+            return Response(metric_overview(self.field, year, cells[metric]), status=status.HTTP_200_OK)
 
-        # Serialize the data
-        waste_serializer = WasteSerializer(waste_data, many=True)
-        energy_serializer = EnergySerializer(energy_data, many=True)
-        water_serializer = WaterSerializer(water_data, many=True)
-        biodiversity_serializer = BiodiversitySerializer(biodiversity_data, many=True)
-        logistices_serializer = LogisticesSerializer(logistices_data, many=True)
+        except Exception as e:
+            logger.exception("Error: %s", e)
+            return Response(
+                {'error': f'An error occurred while processing your request: {str(e)}'},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
 
-        # Format the response data
-        response_data = {
-            "email": user.email,
-            "year": year,
-            "facility_id": facility_id if facility_id != 'all' else "All facilities",
-            "overall_data": overall_data,
-            # "details": {
-            #     "waste_data": waste_serializer.data if waste_data else [],
-            #     "energy_data": energy_serializer.data if energy_data else [],
-            #     "water_data": water_serializer.data if water_data else [],
-            #     "biodiversity_data": biodiversity_serializer.data if biodiversity_data else [],
-            #     "logistices_data": logistices_serializer.data if logistices_data else []
-            # }
-        }
+'''Metric Overviews Ends'''
 
-        return Response(response_data, status=status.HTTP_200_OK)
 
-'''OverViwe of allTotal_Usages'''
-    
 '''Waste Overviewgraphs and Individual Line charts and donut charts Starts'''
 class WasteViewCard_Over(APIView):
     permission_classes = [IsAuthenticated]
 
+    @etag_response
+    @cache_response
     def get(self, request):
         user = request.user
         facility_id = request.GET.get('facility_id', 'all')
@@ -1080,13 +1116,7 @@ class WasteViewCard_Over(APIView):
                 # waste_data = Waste.objects.filter(user=user, DatePicker__range=(start_date, end_date))
             else:
                 # Get the latest year with available data
-                latest_entry = Waste.objects.filter(user=user).order_by('-DatePicker').first()
-                if latest_entry:
-                    latest_year = latest_entry.DatePicker.year
-                    year = latest_year if latest_entry.DatePicker.month >= 4 else latest_year - 1
-                else:
-                    today = datetime.now()
-                    year = today.year - 1 if today.month < 4 else today.year
+                year = latest_fiscal_year(user, Waste)
 
                 start_date = datetime(year, 4, 1)
                 end_date = datetime(year + 1, 3, 31)
@@ -1100,9 +1130,8 @@ class WasteViewCard_Over(APIView):
 
             # Apply facility location filter if provided
             if facility_location:
-                waste_data = waste_data.filter(facility__location__icontains=facility_location)
+                waste_data = waste_data.filter(facility__facility_location__icontains=facility_location)
 
-            # If no data is found, create a structure with zeros
             waste_fields = [
                 'food_waste', 'solid_Waste', 'E_Waste', 'Biomedical_waste',
                 'liquid_discharge', 'other_waste', 'Recycle_waste', 'Landfill_waste'
@@ -1114,163 +1143,80 @@ class WasteViewCard_Over(APIView):
                 'facility_waste_data': {}
             }
 
-            if not waste_data.exists():
-                # Populate zero values when no data exists
-                for field in waste_fields:
-                    response_data['overall_waste_totals'][f"overall_{field}"] = 0
-                    response_data['facility_waste_data'][field] = []
-            else:
-                for field in waste_fields:
-                    # Facility-specific totals
-                    facility_waste_data = (
-                        waste_data
-                        .values('facility__facility_name')
-                        .annotate(total=Sum(field))
-                        .order_by('-total')
-                    )
-
-                    response_data['facility_waste_data'][field] = [
-                        {
-                            "facility_name": entry['facility__facility_name'],
-                            f"total_{field}": entry['total']
-                        }
-                        for entry in facility_waste_data
-                    ]
+            # Every field's facility totals in one grouped query; zeros and empty lists when no data exists
+            facility_rows, overall_totals = facility_field_totals(waste_data, waste_fields)
 
-                    # Overall totals
-                    overall_total = waste_data.aggregate(total=Sum(field))['total'] or 0
-                    response_data['overall_waste_totals'][f"overall_{field}"] = overall_total
+            for field in waste_fields:
+                response_data['facility_waste_data'][field] = [
+                    {
+                        "facility_name": entry['facility__facility_name'],
+                        f"total_{field}": entry[f"total_{field}"]
+                    }
+                    for entry in ranked_by(facility_rows, f"total_{field}")
+                ]
+                response_data['overall_waste_totals'][f"overall_{field}"] = overall_totals[field]
 
             return Response(response_data, status=status.HTTP_200_OK)
 
         except Exception as e:
             error_message = f"An error occurred: {str(e)}"
-            print(error_message)
+            logger.exception("An error occurred: %s", e)
             return Response({'error': error_message}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 #FoodWaste
-class FoodWasteOverviewView(APIView):
-    permission_classes = [IsAuthenticated]
-
-    def get(self, request):
-        user = request.user
-        facility_id = request.GET.get('facility_id', None)
-        facility_location = request.GET.get('facility_location', None)
-        year = request.GET.get('year', None)
+class FoodWasteOverviewView(MetricOverviewView):
+    model = Waste
+    field = 'food_waste'
 
-        try:
-            # Determine year
-            if not year:
-                year = self.get_latest_available_fiscal_year(user)
-
-            try:
-                year = int(year)
-            except ValueError:
-                return Response({'error': 'Invalid year parameter.'}, status=status.HTTP_400_BAD_REQUEST)
 
-            # Get fiscal year range
-            start_date, end_date = self.get_fiscal_year_range(year)
+#SolidWaste
+class SolidWasteOverviewView(MetricOverviewView):
+    model = Waste
+    field = 'solid_Waste'
 
-            # Build filters
-            filters = {
-                'user': user,
-                'DatePicker__range': (start_date.date(), end_date.date())
-            }
-            if facility_id and facility_id.lower() != 'all':
-                filters['facility__facility_id'] = facility_id
-            if facility_location:
-                filters['facility__location__icontains'] = facility_location
 
-            # Query filtered data
-            waste_data = Waste.objects.filter(**filters)
-            if not waste_data.exists():
-                return self.get_empty_response(year)
+#e_waste overview view
+class E_WasteOverviewView(MetricOverviewView):
+    model = Waste
+    field = 'E_Waste'
 
-            # Line chart data: monthly food waste
-            monthly_food_waste = (
-                waste_data
-                .values('DatePicker__month')
-                .annotate(total_food_waste=Sum('food_waste'))
-            )
 
-            food_waste = {month: 0 for month in range(1, 13)}
-            for entry in monthly_food_waste:
-                food_waste[entry['DatePicker__month']] = entry['total_food_waste']
+#biomedical_waste Overview
+class Biomedical_WasteOverviewView(MetricOverviewView):
+    model = Waste
+    field = 'Biomedical_waste'
 
-            month_order = [4, 5, 6, 7, 8, 9, 10, 11, 12, 1, 2, 3]
-            line_chart_data = [
-                {
-                    "month": datetime(1900, month, 1).strftime('%b'),
-                    "food_waste": food_waste[month]
-                }
-                for month in month_order
-            ]
 
-            # Donut chart data: facility contribution
-            facility_food_waste = (
-                waste_data
-                .values('facility__facility_name')
-                .annotate(total_food_waste=Sum('food_waste'))
-                .order_by('-total_food_waste')
-            )
+#Liquid_DischargeOverviewView
+class Liquid_DischargeOverviewView(MetricOverviewView):
+    model = Waste
+    field = 'liquid_discharge'
 
-            total_food_waste = sum(entry['total_food_waste'] for entry in facility_food_waste)
-            donut_chart_data = [
-                {
-                    "facility_name": entry['facility__facility_name'],
-                    "percentage": (entry['total_food_waste'] / total_food_waste * 100) if total_food_waste else 0,
-                }
-                for entry in facility_food_waste
-            ]
 
-            # Construct response
-            response_data = {
-                "year": year,
-                "line_chart_data": line_chart_data,
-                "donut_chart_data": donut_chart_data
-            }
+#OtherOverview
+class OthersOverviewView(MetricOverviewView):
+    model = Waste
+    field = 'other_waste'
 
-            return Response(response_data, status=status.HTTP_200_OK)
 
-        except Exception as e:
-            return Response(
-                {'error': f'An error occurred while processing your request: {str(e)}'},
-                status=status.HTTP_500_INTERNAL_SERVER_ERROR
-            )
+#Sent for RecycleOverview
+class Waste_Sent_For_RecycleOverviewView(MetricOverviewView):
+    model = Waste
+    field = 'Recycle_waste'
 
-    def get_latest_available_fiscal_year(self, user):
-        """
-        Adjusted to return the latest fiscal year (April to March) with available data.
-        """
-        latest_waste = Waste.objects.filter(user=user).order_by('-DatePicker').first()
-        if latest_waste:
-            latest_date = latest_waste.DatePicker
-            # Adjust fiscal year if the data is after March
-            if latest_date.month >= 4:
-                return latest_date.year
-            else:
-                return latest_date.year - 1
-        return datetime.now().year  # Default to current fiscal year if no data is available
 
-    def get_fiscal_year_range(self, year):
-        start_date = datetime(year, 4, 1)
-        end_date = datetime(year + 1, 3, 31)
-        return start_date, end_date
+#Sent For LandFill Overview
+class Waste_Sent_For_LandFillOverviewView(MetricOverviewView):
+    model = Waste
+    field = 'Landfill_waste'
 
-    def get_empty_response(self, year):
-        month_order = [4, 5, 6, 7, 8, 9, 10, 11, 12, 1, 2, 3]
-        line_chart_data = [{"month": datetime(1900, month, 1).strftime('%b'), "food_waste": 0} for month in month_order]
-        donut_chart_data = [{"facility_name": "No Facility", "percentage": 0}]
-        return Response({
-            "year": year,
-            "line_chart_data": line_chart_data,
-            "donut_chart_data": donut_chart_data
-        }, status=status.HTTP_200_OK)
 
-#SolidWaste
-class SolidWasteOverviewView(APIView):
+#Stacked Graphs Overview
+class StackedWasteOverviewView(APIView):
     permission_classes = [IsAuthenticated]
 
+    @etag_response
+    @cache_response
     def get(self, request):
         user = request.user
         facility_id = request.GET.get('facility_id', None)
@@ -1278,2401 +1224,387 @@ class SolidWasteOverviewView(APIView):
         year = request.GET.get('year', None)
 
         try:
-            # Determine year
-            if not year:
-                year = self.get_latest_available_fiscal_year(user)
-
-            try:
-                year = int(year)
-            except ValueError:
-                return Response({'error': 'Invalid year parameter.'}, status=status.HTTP_400_BAD_REQUEST)
+            filters = {'user': user}
 
-            # Get fiscal year range
-            start_date, end_date = self.get_fiscal_year_range(year)
+            # Determine the year to use
+            if not year:
+                year = latest_fiscal_year(user, Waste)
 
+            year = int(year)  # Ensure year is an integer
 
+            # Fiscal year and month are stored columns covered by an index
+            filters['fiscal_year'] = year
 
-            filters = {
-                'user': user,
-                'DatePicker__range': (start_date.date(), end_date.date())
-            }
+            # Facility filters if specified
             if facility_id and facility_id.lower() != 'all':
                 filters['facility__facility_id'] = facility_id
-            if facility_location:
+            if facility_location and facility_location.lower() != 'all':
                 filters['facility__location__icontains'] = facility_location
 
-            waste_data = Waste.objects.filter(**filters)
-            if not waste_data.exists():
-                return self.get_empty_response(year)
+            waste_types = [
+                'food_waste', 'solid_Waste', 'E_Waste', 'Biomedical_waste',
+                'liquid_discharge', 'Recycle_waste', 'Landfill_waste', 'other_waste'
+            ]
 
-            monthly_solid_Waste = (
-                waste_data
-                .values('DatePicker__month')
-                .annotate(total_solid_Waste=Sum('solid_Waste'))
-            )
+            # Initialize monthly data dictionary
+            monthly_data = {month: {waste_type: 0 for waste_type in waste_types} for month in range(1, 13)}
 
-            solid_Waste = {month: 0 for month in range(1, 13)}
-            for entry in monthly_solid_Waste:
-                solid_Waste[entry['DatePicker__month']] = entry['total_solid_Waste']
+            # Fetch and aggregate monthly data
+            queryset = Waste.objects.filter(**filters)
+            if queryset.exists():
+                for waste_type in waste_types:
+                    monthly_waste = (
+                        queryset
+                        .values('fiscal_month')
+                        .annotate(total=Coalesce(Sum(waste_type, output_field=FloatField()), Value(0, output_field=FloatField())))
+                        .order_by('fiscal_month')
+                    )
+                    for entry in monthly_waste:
+                        month = entry['fiscal_month']
+                        monthly_data[month][waste_type] = entry['total']
 
+            # Prepare response data in fiscal month order (April to March)
+            stacked_bar_data = []
             month_order = [4, 5, 6, 7, 8, 9, 10, 11, 12, 1, 2, 3]
-            line_chart_data = [
-                {
-                    "month": datetime(1900, month, 1).strftime('%b'),
-                    "solid_Waste": solid_Waste[month]
-                }
-                for month in month_order
-            ]
-
-            # Prepare facility data for donut chart
-            facility_solid_Waste = (
-                waste_data
-                .values('facility__facility_name')
-                .annotate(total_solid_Waste=Sum('solid_Waste'))
-                .order_by('-total_solid_Waste')
-            )
-
-            total_solid_Waste = sum(entry['total_solid_Waste'] for entry in facility_solid_Waste)
-            donut_chart_data = [
-                {
-                    "facility_name": entry['facility__facility_name'],
-                    "percentage": (entry['total_solid_Waste'] / total_solid_Waste * 100) if total_solid_Waste else 0,
-                }
-                for entry in facility_solid_Waste
-            ]
+            for month in month_order:
+                month_name = datetime(1900, month, 1).strftime('%b')
+                stacked_bar_data.append({
+                    "month": month_name,
+                    **monthly_data[month]
+                })
 
             response_data = {
+                "facility_id": facility_id,
                 "year": year,
-                "line_chart_data": line_chart_data,
-                "donut_chart_data": donut_chart_data
+                "facility_location": facility_location,
+                "stacked_bar_data": stacked_bar_data
             }
 
             return Response(response_data, status=status.HTTP_200_OK)
 
         except Exception as e:
-            import traceback
-            print(f"Error: {str(e)}")
-            print("Traceback:", traceback.format_exc())
-            return Response(
-                {'error': f'An error occurred while processing your request: {str(e)}'},
-                status=status.HTTP_500_INTERNAL_SERVER_ERROR
-            )
-
-    def get_latest_available_fiscal_year(self, user):
-        """
-        Adjusted to return the latest fiscal year (April to March) with available data.
-        """
-        latest_waste = Waste.objects.filter(user=user).order_by('-DatePicker').first()
-        if latest_waste:
-            latest_date = latest_waste.DatePicker
-            # Adjust fiscal year if the data is after March
-            if latest_date.month >= 4:
-                return latest_date.year
-            else:
-                return latest_date.year - 1
-        return datetime.now().year  # Default to current fiscal year if no data is available
-
-    def get_fiscal_year_range(self, year):
-        start_date = datetime(year, 4, 1)
-        end_date = datetime(year + 1, 3, 31)
-        return start_date, end_date
+            logger.exception("Error occurred: %s", e)
+            return Response({'error': f'An error occurred: {str(e)}'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
-    def get_empty_response(self, year):
-        month_order = [4, 5, 6, 7, 8, 9, 10, 11, 12, 1, 2, 3]
-        line_chart_data = [{"month": datetime(1900, month, 1).strftime('%b'), "food_waste": 0} for month in month_order]
-        donut_chart_data = [{"facility_name": "No Facility", "percentage": 0}]
-        return Response({
-            "year": year,
-            "line_chart_data": line_chart_data,
-            "donut_chart_data": donut_chart_data
-        }, status=status.HTTP_200_OK)
 
-#e_waste overview view
-class E_WasteOverviewView(APIView):
+#WasteOverview Donut chart
+class WasteOverallDonutChartView(APIView):
     permission_classes = [IsAuthenticated]
 
+    @etag_response
+    @cache_response
     def get(self, request):
         user = request.user
-        facility_id = request.GET.get('facility_id', None)
+        year = request.GET.get('year', None)  # Get the 'year' query parameter
+        facility_id = request.GET.get('facility_id', 'all')
         facility_location = request.GET.get('facility_location', None)
-        year = request.GET.get('year', None)
 
         try:
-            if not year:
-                year = self.get_latest_available_year(user)
-
-            try:
-                year = int(year)
-            except ValueError:
-                return Response({'error': 'Invalid year parameter.'}, status=status.HTTP_400_BAD_REQUEST)
-
-            start_date, end_date = self.get_fiscal_year_range(year)
+            # Initialize filters with the user-specific data
+            filters = {'user': user}
 
-            filters = {
-                'user': user,
-                'DatePicker__range': (start_date.date(), end_date.date())
-            }
-            if facility_id and facility_id.lower() != 'all':
-                filters['facility__facility_id'] = facility_id
-            if facility_location:
-                filters['facility__location__icontains'] = facility_location
+            # Get today's date for fiscal year calculation
+            today = datetime.now()
 
-            waste_data = Waste.objects.filter(**filters)
-            if not waste_data.exists():
-                return self.get_empty_response(year)
+            # Determine the latest available year based on the data in the database
+            # if not year:
+            #     latest_waste = Waste.objects.filter(user=user).aggregate(latest_date=Max('DatePicker'))
+            #     if latest_waste['latest_date']:
+            #         latest_date = latest_waste['latest_date']
+            #         year = latest_date.year  # Use the year from the latest available date
+            #     else:
+            #         year = today.year  # Default to current year if no data exists
+            # else:
+            #     try:
+            #         year = int(year)  # Ensure the 'year' is an integer
+            #     except ValueError:
+            #         return Response({'error': 'Invalid year parameter.'}, status=status.HTTP_400_BAD_REQUEST)
 
-            monthly_E_Waste = (
-                waste_data
-                .values('DatePicker__month')
-                .annotate(total_E_Waste=Sum('E_Waste'))
-            )
+            # # Fiscal year calculation based on the month
+            # if today.month >= 4:  # If today is after March, use the current year for the fiscal year
+            #     start_date = datetime(year, 4, 1)
+            #     end_date = datetime(year + 1, 3, 31)
+            # else:  # If before April, use the previous year for the fiscal year
+            #     start_date = datetime(year - 1, 4, 1)
+            #     end_date = datetime(year, 3, 31)
+            if not year:
+                year = latest_fiscal_year(user, Waste)
 
-            E_Waste = {month: 0 for month in range(1, 13)}
-            for entry in monthly_E_Waste:
-                E_Waste[entry['DatePicker__month']] = entry['total_E_Waste']
+            year = int(year)  # Ensure year is an integer
 
-            month_order = [4, 5, 6, 7, 8, 9, 10, 11, 12, 1, 2, 3]
-            line_chart_data = [
-                {
-                    "month": datetime(1900, month, 1).strftime('%b'),
-                    "E_Waste": E_Waste[month]
-                }
-                for month in month_order
-            ]
-
-            # Prepare facility data for donut chart
-            facility_E_Waste = (
-                waste_data
-                .values('facility__facility_name')
-                .annotate(total_E_Waste=Sum('E_Waste'))
-                .order_by('-total_E_Waste')
-            )
-
-            total_E_Waste = sum(entry['total_E_Waste'] for entry in facility_E_Waste)
-            donut_chart_data = [
-                {
-                    "facility_name": entry['facility__facility_name'],
-                    "percentage": (entry['total_E_Waste'] / total_E_Waste * 100) if total_E_Waste else 0,
-                }
-                for entry in facility_E_Waste
-            ]
-
-            response_data = {
-                "year": year,
-                "line_chart_data": line_chart_data,
-                "donut_chart_data": donut_chart_data
-            }
-
-            return Response(response_data, status=status.HTTP_200_OK)
-
-        except Exception as e:
-            import traceback
-            print(f"Error: {str(e)}")
-            print("Traceback:", traceback.format_exc())
-            return Response(
-                {'error': f'An error occurred while processing your request: {str(e)}'},
-                status=status.HTTP_500_INTERNAL_SERVER_ERROR
-            )
-
-    def get_latest_available_year(self, user):
-        latest_waste = Waste.objects.filter(user=user).order_by('-DatePicker').first()
-        if latest_waste:
-            latest_date = latest_waste.DatePicker
-            # Adjust fiscal year if the data is after March
-            if latest_date.month >= 4:
-                return latest_date.year
-            else:
-                return latest_date.year - 1
-        return datetime.now().year
-
-    def get_fiscal_year_range(self, year):
-        start_date = datetime(year, 4, 1)
-        end_date = datetime(year + 1, 3, 31)
-        return start_date, end_date
-
-    def get_empty_response(self, year):
-        month_order = [4, 5, 6, 7, 8, 9, 10, 11, 12, 1, 2, 3]
-        line_chart_data = [{"month": datetime(1900, month, 1).strftime('%b'), "food_waste": 0} for month in month_order]
-        donut_chart_data = [{"facility_name": "No Facility", "percentage": 0}]
-        return Response({
-            "year": year,
-            "line_chart_data": line_chart_data,
-            "donut_chart_data": donut_chart_data
-        }, status=status.HTTP_200_OK)
-
-#biomedical_waste Overview
-class Biomedical_WasteOverviewView(APIView):
-    permission_classes = [IsAuthenticated]
-
-    def get(self, request):
-        user = request.user
-        facility_id = request.GET.get('facility_id', None)
-        facility_location = request.GET.get('facility_location', None)
-        year = request.GET.get('year', None)
-
-        try:
-            if not year:
-                year = self.get_latest_available_year(user)
-
-            try:
-                year = int(year)
-            except ValueError:
-                return Response({'error': 'Invalid year parameter.'}, status=status.HTTP_400_BAD_REQUEST)
-
-            start_date, end_date = self.get_fiscal_year_range(year)
+            # Determine fiscal year range
+            start_date = datetime(year, 4, 1)
+            end_date = datetime(year + 1, 3, 31)
+            filters['DatePicker__range'] = (start_date, end_date)
 
-            filters = {
-                'user': user,
-                'DatePicker__range': (start_date.date(), end_date.date())
-            }
+            # Facility ID filtering
             if facility_id and facility_id.lower() != 'all':
-                filters['facility__facility_id'] = facility_id
-            if facility_location:
-                filters['facility__location__icontains'] = facility_location
-
-            waste_data = Waste.objects.filter(**filters)
-            if not waste_data.exists():
-                return self.get_empty_response(year)
+                try:
+                    Facility.objects.get(facility_id=facility_id)  # Check if the facility exists
+                    filters['facility__facility_id'] = facility_id
+                except Facility.DoesNotExist:
+                    return Response({'error': f'Facility with ID {facility_id} does not exist.'}, status=status.HTTP_400_BAD_REQUEST)
 
-            monthly_Biomedical_waste = (
-                waste_data
-                .values('DatePicker__month')
-                .annotate(total_Biomedical_waste=Sum('Biomedical_waste'))
-            )
+            # Facility location filtering
+            if facility_location and facility_location.lower() != 'all':
+                if not Facility.objects.filter(facility_location__icontains=facility_location).exists():
+                    return Response({'error': f'No facility found with location {facility_location}.'}, status=status.HTTP_400_BAD_REQUEST)
+                filters['facility__facility_location__icontains'] = facility_location
 
-            Biomedical_waste = {month: 0 for month in range(1, 13)}
-            for entry in monthly_Biomedical_waste:
-                Biomedical_waste[entry['DatePicker__month']] = entry['total_Biomedical_waste']
+            # Query the Waste model with the filters applied
+            queryset = Waste.objects.filter(**filters)
 
-            month_order = [4, 5, 6, 7, 8, 9, 10, 11, 12, 1, 2, 3]
-            line_chart_data = [
-                {
-                    "month": datetime(1900, month, 1).strftime('%b'),
-                    "Biomedical_waste": Biomedical_waste[month]
+            if not queryset.exists():  # If no data is found, return zero values for all waste types
+                waste_totals = {
+                    'food_waste_total': 0.0,
+                    'solid_Waste_total': 0.0,
+                    'E_Waste_total': 0.0,
+                    'Biomedical_waste_total': 0.0,
+                    'other_waste_total': 0.0
                 }
-                for month in month_order
-            ]
+            else:
+                # Aggregate waste totals for each waste type if data is found
+                waste_totals = queryset.aggregate(
+                    food_waste_total=Coalesce(Sum(Cast('food_waste', FloatField())), 0.0),
+                    solid_Waste_total=Coalesce(Sum(Cast('solid_Waste', FloatField())), 0.0),
+                    E_Waste_total=Coalesce(Sum(Cast('E_Waste', FloatField())), 0.0),
+                    Biomedical_waste_total=Coalesce(Sum(Cast('Biomedical_waste', FloatField())), 0.0),
+                    other_waste_total=Coalesce(Sum(Cast('other_waste', FloatField())), 0.0)
+                )
 
-            # Prepare facility data for donut chart
-            facility_Biomedical_waste = (
-                waste_data
-                .values('facility__facility_name')
-                .annotate(total_Biomedical_waste=Sum('Biomedical_waste'))
-                .order_by('-total_Biomedical_waste')
-            )
+            # Calculate the overall total waste
+            overall_total = sum(waste_totals.values())
 
-            total_Biomedical_waste = sum(entry['total_Biomedical_waste'] for entry in facility_Biomedical_waste)
-            donut_chart_data = [
-                {
-                    "facility_name": entry['facility__facility_name'],
-                    "percentage": (entry['total_Biomedical_waste'] / total_Biomedical_waste * 100) if total_Biomedical_waste else 0,
-                }
-                for entry in facility_Biomedical_waste
-            ]
+            # Calculate percentages for each waste type
+            waste_percentages = {}
+            for waste_type, total in waste_totals.items():
+                waste_percentages[waste_type] = (total / overall_total) * 100 if overall_total else 0
 
+            # Format the response data
             response_data = {
                 "year": year,
-                "line_chart_data": line_chart_data,
-                "donut_chart_data": donut_chart_data
+                "facility_id": facility_id,
+                "facility_location": facility_location,
+                "waste_percentages": waste_percentages
             }
 
             return Response(response_data, status=status.HTTP_200_OK)
 
         except Exception as e:
-            import traceback
-            print(f"Error: {str(e)}")
-            print("Traceback:", traceback.format_exc())
-            return Response(
-                {'error': f'An error occurred while processing your request: {str(e)}'},
-                status=status.HTTP_500_INTERNAL_SERVER_ERROR
-            )
+            # Log the error for debugging purposes
+            logger.exception("Error occurred: %s", e)
+            return Response({'error': f'An error occurred: {str(e)}'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
-    def get_latest_available_year(self, user): 
-        latest_waste = Waste.objects.filter(user=user).order_by('-DatePicker').first()
-        if latest_waste:
-            latest_date = latest_waste.DatePicker
-            # Adjust fiscal year if the data is after March
-            if latest_date.month >= 4:
-                return latest_date.year
-            else:
-                return latest_date.year - 1
-        return datetime.now().year
+#SenT to Landfill Overview Piechart
+class SentToLandfillOverviewView(APIView):
+    permission_classes = [IsAuthenticated]
 
-    def get_fiscal_year_range(self, year):
-        start_date = datetime(year, 4, 1)
-        end_date = datetime(year + 1, 3, 31)
+    def get_fiscal_year_dates(self, year):
+        start_date = datetime(year, 4, 1)  # Fiscal year starts on April 1
+        end_date = datetime(year + 1, 3, 31)  # Ends on March 31 of the next year
         return start_date, end_date
 
-    def get_empty_response(self, year):
-        month_order = [4, 5, 6, 7, 8, 9, 10, 11, 12, 1, 2, 3]
-        line_chart_data = [{"month": datetime(1900, month, 1).strftime('%b'), "food_waste": 0} for month in month_order]
-        donut_chart_data = [{"facility_name": "No Facility", "percentage": 0}]
-        return Response({
-            "year": year,
-            "line_chart_data": line_chart_data,
-            "donut_chart_data": donut_chart_data
-        }, status=status.HTTP_200_OK)
-
-#Liquid_DischargeOverviewView
-class Liquid_DischargeOverviewView(APIView):
-    permission_classes = [IsAuthenticated]
-
+    @etag_response
+    @cache_response
     def get(self, request):
         user = request.user
+
+        # Get parameters from the request
+        year = request.GET.get('year', None)
         facility_id = request.GET.get('facility_id', None)
         facility_location = request.GET.get('facility_location', None)
-        year = request.GET.get('year', None)
-
+        
         try:
+            # Default to the current fiscal year if no year is provided
             if not year:
-                year = self.get_latest_available_year(user)
-
-            try:
-                year = int(year)
-            except ValueError:
-                return Response({'error': 'Invalid year parameter.'}, status=status.HTTP_400_BAD_REQUEST)
+                year = latest_fiscal_year(user, Waste)
+            else:
+                year = int(year)  # Ensure the 'year' is an integer
 
-            start_date, end_date = self.get_fiscal_year_range(year)
+            # Get fiscal year start and end dates
+            start_date, end_date = self.get_fiscal_year_dates(year)
 
-            filters = {
-                'user': user,
-                'DatePicker__range': (start_date.date(), end_date.date())
-            }
-            if facility_id and facility_id.lower() != 'all':
-                filters['facility__facility_id'] = facility_id
-            if facility_location:
-                filters['facility__location__icontains'] = facility_location
+            # Initialize filters
+            filters = {'user': user, 'DatePicker__range': (start_date, end_date)}
 
-            waste_data = Waste.objects.filter(**filters)
-            if not waste_data.exists():
-                return self.get_empty_response(year)
+            # Start with the base queryset
+            queryset = Waste.objects.filter(**filters)
 
-            monthly_liquid_discharge = (
-                waste_data
-                .values('DatePicker__month')
-                .annotate(total_liquid_discharge=Sum('liquid_discharge'))
-            )
+            # Apply facility_id filter if provided and not 'all'
+            if facility_id and facility_id.lower() != 'all':
+                queryset = queryset.filter(facility__facility_id=facility_id)
 
-            liquid_discharge = {month: 0 for month in range(1, 13)}
-            for entry in monthly_liquid_discharge:
-                liquid_discharge[entry['DatePicker__month']] = entry['total_liquid_discharge']
+            # Apply facility_location filter if provided and not 'all'
+            if facility_location and facility_location.lower() != 'all':
+                queryset = queryset.filter(facility__facility_location__icontains=facility_location)
 
-            month_order = [4, 5, 6, 7, 8, 9, 10, 11, 12, 1, 2, 3]
-            line_chart_data = [
-                {
-                    "month": datetime(1900, month, 1).strftime('%b'),
-                    "liquid_discharge": liquid_discharge[month]
+            if not queryset.exists():
+                # Return zero data if no matching records
+                response_data = {
+                    "landfill_percentage": 0,
+                    "remaining_percentage": 0
                 }
-                for month in month_order
+                return Response(
+                    {
+                        "fiscal_year": f"{year}-{year + 1}",
+                        "sentToLandFill": response_data
+                    },
+                    status=status.HTTP_200_OK
+                )
+
+            # Define waste fields for calculations
+            overall_total_fields = [
+                'food_waste', 'solid_Waste', 'E_Waste', 'Biomedical_waste', 'other_waste'
             ]
 
-            # Prepare facility data for donut chart
-            facility_liquid_discharge = (
-                waste_data
-                .values('facility__facility_name')
-                .annotate(total_liquid_discharge=Sum('liquid_discharge'))
-                .order_by('-total_liquid_discharge')
+            # Calculate total 'Landfill_waste'
+            Landfill_waste_total = queryset.aggregate(
+                total=Coalesce(Sum(Cast('Landfill_waste', FloatField())), 0.0)
+            )['total']
+
+            # Calculate overall total waste
+            overall_totals = queryset.aggregate(
+                **{f"{waste_type}_total": Coalesce(Sum(Cast(waste_type, FloatField())), 0.0)
+                   for waste_type in overall_total_fields}
             )
+            overall_total = sum(overall_totals.values())
 
-            total_liquid_discharge = sum(entry['total_liquid_discharge'] for entry in facility_liquid_discharge)
-            donut_chart_data = [
-                {
-                    "facility_name": entry['facility__facility_name'],
-                    "percentage": (entry['total_liquid_discharge'] / total_liquid_discharge * 100) if total_liquid_discharge else 0,
-                }
-                for entry in facility_liquid_discharge
-            ]
+            # Calculate remaining waste and percentages
+            remaining_waste_total = overall_total - Landfill_waste_total
+            
+            landfill_percentage = (Landfill_waste_total / overall_total) * 100 if overall_total else 0
+            remaining_percentage = (remaining_waste_total / overall_total) * 100 if overall_total else 0
 
+            # Prepare the response data
             response_data = {
-                "year": year,
-                "line_chart_data": line_chart_data,
-                "donut_chart_data": donut_chart_data
+                "landfill_percentage": round(landfill_percentage, 2),
+                "remaining_percentage": round(remaining_percentage, 2)
             }
 
-            return Response(response_data, status=status.HTTP_200_OK)
-
-        except Exception as e:
-            import traceback
-            print(f"Error: {str(e)}")
-            print("Traceback:", traceback.format_exc())
             return Response(
-                {'error': f'An error occurred while processing your request: {str(e)}'},
-                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+                {
+                    "fiscal_year": f"{year}-{year + 1}",
+                    "sentToLandFill": response_data
+                },
+                status=status.HTTP_200_OK
             )
 
-    def get_latest_available_year(self, user):
-        latest_waste = Waste.objects.filter(user=user).order_by('-DatePicker').first()
-        if latest_waste:
-            latest_date = latest_waste.DatePicker
-            # Adjust fiscal year if the data is after March
-            if latest_date.month >= 4:
-                return latest_date.year
-            else:
-                return latest_date.year - 1
-        return datetime.now().year
-
-    def get_fiscal_year_range(self, year):
-        start_date = datetime(year, 4, 1)
-        end_date = datetime(year + 1, 3, 31)
-        return start_date, end_date
-
-    def get_empty_response(self, year):
-        month_order = [4, 5, 6, 7, 8, 9, 10, 11, 12, 1, 2, 3]
-        line_chart_data = [{"month": datetime(1900, month, 1).strftime('%b'), "food_waste": 0} for month in month_order]
-        donut_chart_data = [{"facility_name": "No Facility", "percentage": 0}]
-        return Response({
-            "year": year,
-            "line_chart_data": line_chart_data,
-            "donut_chart_data": donut_chart_data
-        }, status=status.HTTP_200_OK)
+        except ValueError:
+            return Response({'error': 'Invalid year parameter.'}, status=status.HTTP_400_BAD_REQUEST)
+        except Exception as e:
+            logger.exception("Error occurred: %s", e)
+            return Response({'error': f'An error occurred: {str(e)}'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
-#OtherOverview
-class OthersOverviewView(APIView):
+#Sent to Recycle Overview Piechart
+class SentToRecycledOverviewView(APIView):
     permission_classes = [IsAuthenticated]
 
+    def get_fiscal_year_dates(self, year):
+        start_date = datetime(year, 4, 1)  # Fiscal year starts on April 1
+        end_date = datetime(year + 1, 3, 31)  # Ends on March 31 of the next year
+        return start_date, end_date
+
+    @etag_response
+    @cache_response
     def get(self, request):
         user = request.user
+
+        # Get parameters from the request
+        year = request.GET.get('year', None)
         facility_id = request.GET.get('facility_id', None)
         facility_location = request.GET.get('facility_location', None)
-        year = request.GET.get('year', None)
-
+        
         try:
+            # Default to the current fiscal year if no year is provided
             if not year:
-                year = self.get_latest_available_year(user)
+                year = latest_fiscal_year(user, Waste)
+            else:
+                year = int(year)  # Ensure the 'year' is an integer
 
-            try:
-                year = int(year)
-            except ValueError:
-                return Response({'error': 'Invalid year parameter.'}, status=status.HTTP_400_BAD_REQUEST)
+            # Get fiscal year start and end dates
+            start_date, end_date = self.get_fiscal_year_dates(year)
 
-            start_date, end_date = self.get_fiscal_year_range(year)
+            # Initialize filters
+            filters = {'user': user, 'DatePicker__range': (start_date, end_date)}
 
-            filters = {
-                'user': user,
-                'DatePicker__range': (start_date.date(), end_date.date())
-            }
-            if facility_id and facility_id.lower() != 'all':
-                filters['facility__facility_id'] = facility_id
-            if facility_location:
-                filters['facility__location__icontains'] = facility_location
-
-            waste_data = Waste.objects.filter(**filters)
-            if not waste_data.exists():
-                return self.get_empty_response(year)
-
-            monthly_other_waste = (
-                waste_data
-                .values('DatePicker__month')
-                .annotate(total_other_waste=Sum('other_waste'))
-            )
-
-            other_waste = {month: 0 for month in range(1, 13)}
-            for entry in monthly_other_waste:
-                other_waste[entry['DatePicker__month']] = entry['total_other_waste']
-
-            month_order = [4, 5, 6, 7, 8, 9, 10, 11, 12, 1, 2, 3]
-            line_chart_data = [
-                {
-                    "month": datetime(1900, month, 1).strftime('%b'),
-                    "other_waste": other_waste[month]
-                }
-                for month in month_order
-            ]
-
-            # Prepare facility data for donut chart
-            facility_other_waste = (
-                waste_data
-                .values('facility__facility_name')
-                .annotate(total_other_waste=Sum('other_waste'))
-                .order_by('-total_other_waste')
-            )
-
-            total_other_waste = sum(entry['total_other_waste'] for entry in facility_other_waste)
-            donut_chart_data = [
-                {
-                    "facility_name": entry['facility__facility_name'],
-                    "percentage": (entry['total_other_waste'] / total_other_waste * 100) if total_other_waste else 0,
-                }
-                for entry in facility_other_waste
-            ]
-
-            response_data = {
-                "year": year,
-                "line_chart_data": line_chart_data,
-                "donut_chart_data": donut_chart_data
-            }
-
-            return Response(response_data, status=status.HTTP_200_OK)
-
-        except Exception as e:
-            import traceback
-            print(f"Error: {str(e)}")
-            print("Traceback:", traceback.format_exc())
-            return Response(
-                {'error': f'An error occurred while processing your request: {str(e)}'},
-                status=status.HTTP_500_INTERNAL_SERVER_ERROR
-            )
-
-    def get_latest_available_year(self, user):
-        latest_waste = Waste.objects.filter(user=user).order_by('-DatePicker').first()
-        if latest_waste:
-            latest_date = latest_waste.DatePicker
-            # Adjust fiscal year if the data is after March
-            if latest_date.month >= 4:
-                return latest_date.year
-            else:
-                return latest_date.year - 1
-        return datetime.now().year 
-
-    def get_fiscal_year_range(self, year):
-        start_date = datetime(year, 4, 1)
-        end_date = datetime(year + 1, 3, 31)
-        return start_date, end_date
-
-    def get_empty_response(self, year):
-        month_order = [4, 5, 6, 7, 8, 9, 10, 11, 12, 1, 2, 3]
-        line_chart_data = [{"month": datetime(1900, month, 1).strftime('%b'), "food_waste": 0} for month in month_order]
-        donut_chart_data = [{"facility_name": "No Facility", "percentage": 0}]
-        return Response({
-            "year": year,
-            "line_chart_data": line_chart_data,
-            "donut_chart_data": donut_chart_data
-        }, status=status.HTTP_200_OK)
-
-#Sent for RecycleOverview
-class Waste_Sent_For_RecycleOverviewView(APIView):
-    permission_classes = [IsAuthenticated]
-
-    def get(self, request):
-        user = request.user
-        facility_id = request.GET.get('facility_id', None)
-        facility_location = request.GET.get('facility_location', None)
-        year = request.GET.get('year', None)
-
-        try:
-            if not year:
-                year = self.get_latest_available_year(user)
-
-            try:
-                year = int(year)
-            except ValueError:
-                return Response({'error': 'Invalid year parameter.'}, status=status.HTTP_400_BAD_REQUEST)
-
-            start_date, end_date = self.get_fiscal_year_range(year)
-
-            filters = {
-                'user': user,
-                'DatePicker__range': (start_date.date(), end_date.date())
-            }
-            if facility_id and facility_id.lower() != 'all':
-                filters['facility__facility_id'] = facility_id
-            if facility_location:
-                filters['facility__location__icontains'] = facility_location
-
-            waste_data = Waste.objects.filter(**filters)
-            if not waste_data.exists():
-                return self.get_empty_response(year)
-
-            monthly_Recycle_waste = (
-                waste_data
-                .values('DatePicker__month')
-                .annotate(total_Recycle_waste=Sum('Recycle_waste'))
-            )
-
-            Recycle_waste = {month: 0 for month in range(1, 13)}
-            for entry in monthly_Recycle_waste:
-                Recycle_waste[entry['DatePicker__month']] = entry['total_Recycle_waste']
-
-            month_order = [4, 5, 6, 7, 8, 9, 10, 11, 12, 1, 2, 3]
-            line_chart_data = [
-                {
-                    "month": datetime(1900, month, 1).strftime('%b'),
-                    "Recycle_waste": Recycle_waste[month]
-                }
-                for month in month_order
-            ]
-
-            # Prepare facility data for donut chart
-            facility_Recycle_waste = (
-                waste_data
-                .values('facility__facility_name')
-                .annotate(total_Recycle_waste=Sum('Recycle_waste'))
-                .order_by('-total_Recycle_waste')
-            )
-
-            total_Recycle_waste = sum(entry['total_Recycle_waste'] for entry in facility_Recycle_waste)
-            donut_chart_data = [
-                {
-                    "facility_name": entry['facility__facility_name'],
-                    "percentage": (entry['total_Recycle_waste'] / total_Recycle_waste * 100) if total_Recycle_waste else 0,
-                }
-                for entry in facility_Recycle_waste
-            ]
-
-            response_data = {
-                "year": year,
-                "line_chart_data": line_chart_data,
-                "donut_chart_data": donut_chart_data
-            }
-
-            return Response(response_data, status=status.HTTP_200_OK)
-
-        except Exception as e:
-            import traceback
-            print(f"Error: {str(e)}")
-            print("Traceback:", traceback.format_exc())
-            return Response(
-                {'error': f'An error occurred while processing your request: {str(e)}'},
-                status=status.HTTP_500_INTERNAL_SERVER_ERROR
-            )
-
-    def get_latest_available_year(self, user):
-        latest_waste = Waste.objects.filter(user=user).order_by('-DatePicker').first()
-        if latest_waste:
-            latest_date = latest_waste.DatePicker
-            # Adjust fiscal year if the data is after March
-            if latest_date.month >= 4:
-                return latest_date.year
-            else:
-                return latest_date.year - 1
-        return datetime.now().year 
-
-    def get_fiscal_year_range(self, year):
-        start_date = datetime(year, 4, 1)
-        end_date = datetime(year + 1, 3, 31)
-        return start_date, end_date
-
-    def get_empty_response(self, year):
-        month_order = [4, 5, 6, 7, 8, 9, 10, 11, 12, 1, 2, 3]
-        line_chart_data = [{"month": datetime(1900, month, 1).strftime('%b'), "food_waste": 0} for month in month_order]
-        donut_chart_data = [{"facility_name": "No Facility", "percentage": 0}]
-        return Response({
-            "year": year,
-            "line_chart_data": line_chart_data,
-            "donut_chart_data": donut_chart_data
-        }, status=status.HTTP_200_OK)
-
-#Sent For LandFill Overview
-class Waste_Sent_For_LandFillOverviewView(APIView):
-    permission_classes = [IsAuthenticated]
-
-    def get(self, request):
-        user = request.user
-        facility_id = request.GET.get('facility_id', None)
-        facility_location = request.GET.get('facility_location', None)
-        year = request.GET.get('year', None)
-
-        try:
-            if not year:
-                year = self.get_latest_available_year(user)
-
-            try:
-                year = int(year)
-            except ValueError:
-                return Response({'error': 'Invalid year parameter.'}, status=status.HTTP_400_BAD_REQUEST)
-
-            start_date, end_date = self.get_fiscal_year_range(year)
-
-            filters = {
-                'user': user,
-                'DatePicker__range': (start_date.date(), end_date.date())
-            }
-            if facility_id and facility_id.lower() != 'all':
-                filters['facility__facility_id'] = facility_id
-            if facility_location:
-                filters['facility__location__icontains'] = facility_location
-
-            waste_data = Waste.objects.filter(**filters)
-            if not waste_data.exists():
-                return self.get_empty_response(year)
-
-            monthly_Landfill_waste = (
-                waste_data
-                .values('DatePicker__month')
-                .annotate(total_Landfill_waste=Sum('Landfill_waste'))
-            )
-
-            Landfill_waste = {month: 0 for month in range(1, 13)}
-            for entry in monthly_Landfill_waste:
-                Landfill_waste[entry['DatePicker__month']] = entry['total_Landfill_waste']
-
-            month_order = [4, 5, 6, 7, 8, 9, 10, 11, 12, 1, 2, 3]
-            line_chart_data = [
-                {
-                    "month": datetime(1900, month, 1).strftime('%b'),
-                    "Landfill_waste": Landfill_waste[month]
-                }
-                for month in month_order
-            ]
-
-            # Prepare facility data for donut chart
-            facility_Landfill_waste = (
-                waste_data
-                .values('facility__facility_name')
-                .annotate(total_Landfill_waste=Sum('Landfill_waste'))
-                .order_by('-total_Landfill_waste')
-            )
-
-            total_Landfill_waste = sum(entry['total_Landfill_waste'] for entry in facility_Landfill_waste)
-            donut_chart_data = [
-                {
-                    "facility_name": entry['facility__facility_name'],
-                    "percentage": (entry['total_Landfill_waste'] / total_Landfill_waste * 100) if total_Landfill_waste else 0,
-                }
-                for entry in facility_Landfill_waste
-            ]
-
-            response_data = {
-                "year": year,
-                "line_chart_data": line_chart_data,
-                "donut_chart_data": donut_chart_data
-            }
-
-            return Response(response_data, status=status.HTTP_200_OK)
-
-        except Exception as e:
-            import traceback
-            print(f"Error: {str(e)}")
-            print("Traceback:", traceback.format_exc())
-            return Response(
-                {'error': f'An error occurred while processing your request: {str(e)}'},
-                status=status.HTTP_500_INTERNAL_SERVER_ERROR
-            )
-
-    def get_latest_available_year(self, user):
-        latest_waste = Waste.objects.filter(user=user).order_by('-DatePicker').first()
-        if latest_waste:
-            latest_date = latest_waste.DatePicker
-            # Adjust fiscal year if the data is after March
-            if latest_date.month >= 4:
-                return latest_date.year
-            else:
-                return latest_date.year - 1
-        return datetime.now().year 
-
-    def get_fiscal_year_range(self, year):
-        start_date = datetime(year, 4, 1)
-        end_date = datetime(year + 1, 3, 31)
-        return start_date, end_date
-
-    def get_empty_response(self, year):
-        month_order = [4, 5, 6, 7, 8, 9, 10, 11, 12, 1, 2, 3]
-        line_chart_data = [{"month": datetime(1900, month, 1).strftime('%b'), "food_waste": 0} for month in month_order]
-        donut_chart_data = [{"facility_name": "No Facility", "percentage": 0}]
-        return Response({
-            "year": year,
-            "line_chart_data": line_chart_data,
-            "donut_chart_data": donut_chart_data
-        }, status=status.HTTP_200_OK)
-
-#Stacked Graphs Overview
-class StackedWasteOverviewView(APIView):
-    permission_classes = [IsAuthenticated]
-
-    def get(self, request):
-        user = request.user
-        facility_id = request.GET.get('facility_id', None)
-        facility_location = request.GET.get('facility_location', None)
-        year = request.GET.get('year', None)
-
-        try:
-            filters = {'user': user}
-
-            # Determine the year to use
-            if not year:
-                latest_waste = Waste.objects.filter(user=user).aggregate(latest_date=Max('DatePicker'))
-                if latest_waste['latest_date']:
-                    latest_date = latest_waste['latest_date']
-                    year = latest_date.year if latest_date.month >= 4 else latest_date.year - 1
-                else:
-                    # Default to the current fiscal year if no data exists
-                    today = datetime.now()
-                    year = today.year if today.month >= 4 else today.year - 1
-
-            year = int(year)  # Ensure year is an integer
-
-            # Determine fiscal year range
-            start_date = datetime(year, 4, 1)
-            end_date = datetime(year + 1, 3, 31)
-            filters['DatePicker__range'] = (start_date, end_date)
-
-            # Facility filters if specified
-            if facility_id and facility_id.lower() != 'all':
-                filters['facility__facility_id'] = facility_id
-            if facility_location and facility_location.lower() != 'all':
-                filters['facility__location__icontains'] = facility_location
-
-            waste_types = [
-                'food_waste', 'solid_Waste', 'E_Waste', 'Biomedical_waste',
-                'liquid_discharge', 'Recycle_waste', 'Landfill_waste', 'other_waste'
-            ]
-
-            # Initialize monthly data dictionary
-            monthly_data = {month: {waste_type: 0 for waste_type in waste_types} for month in range(1, 13)}
-
-            # Fetch and aggregate monthly data
-            queryset = Waste.objects.filter(**filters)
-            if queryset.exists():
-                for waste_type in waste_types:
-                    monthly_waste = (
-                        queryset
-                        .values('DatePicker__month')
-                        .annotate(total=Coalesce(Sum(waste_type, output_field=FloatField()), Value(0, output_field=FloatField())))
-                        .order_by('DatePicker__month')
-                    )
-                    for entry in monthly_waste:
-                        month = entry['DatePicker__month']
-                        monthly_data[month][waste_type] = entry['total']
-
-            # Prepare response data in fiscal month order (April to March)
-            stacked_bar_data = []
-            month_order = [4, 5, 6, 7, 8, 9, 10, 11, 12, 1, 2, 3]
-            for month in month_order:
-                month_name = datetime(1900, month, 1).strftime('%b')
-                stacked_bar_data.append({
-                    "month": month_name,
-                    **monthly_data[month]
-                })
-
-            response_data = {
-                "facility_id": facility_id,
-                "year": year,
-                "facility_location": facility_location,
-                "stacked_bar_data": stacked_bar_data
-            }
-
-            return Response(response_data, status=status.HTTP_200_OK)
-
-        except Exception as e:
-            print(f"Error occurred: {e}") 
-            return Response({'error': f'An error occurred: {str(e)}'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
-
-
-#WasteOverview Donut chart
-class WasteOverallDonutChartView(APIView):
-    permission_classes = [IsAuthenticated]
-
-    def get(self, request):
-        user = request.user
-        year = request.GET.get('year', None)  # Get the 'year' query parameter
-        facility_id = request.GET.get('facility_id', 'all')
-        facility_location = request.GET.get('facility_location', None)
-
-        try:
-            # Initialize filters with the user-specific data
-            filters = {'user': user}
-
-            # Get today's date for fiscal year calculation
-            today = datetime.now()
-
-            # Determine the latest available year based on the data in the database
-            # if not year:
-            #     latest_waste = Waste.objects.filter(user=user).aggregate(latest_date=Max('DatePicker'))
-            #     if latest_waste['latest_date']:
-            #         latest_date = latest_waste['latest_date']
-            #         year = latest_date.year  # Use the year from the latest available date
-            #     else:
-            #         year = today.year  # Default to current year if no data exists
-            # else:
-            #     try:
-            #         year = int(year)  # Ensure the 'year' is an integer
-            #     except ValueError:
-            #         return Response({'error': 'Invalid year parameter.'}, status=status.HTTP_400_BAD_REQUEST)
-
-            # # Fiscal year calculation based on the month
-            # if today.month >= 4:  # If today is after March, use the current year for the fiscal year
-            #     start_date = datetime(year, 4, 1)
-            #     end_date = datetime(year + 1, 3, 31)
-            # else:  # If before April, use the previous year for the fiscal year
-            #     start_date = datetime(year - 1, 4, 1)
-            #     end_date = datetime(year, 3, 31)
-            if not year:
-                latest_waste = Waste.objects.filter(user=user).aggregate(latest_date=Max('DatePicker'))
-                if latest_waste['latest_date']:
-                    latest_date = latest_waste['latest_date']
-                    year = latest_date.year if latest_date.month >= 4 else latest_date.year - 1
-                else:
-                    # Default to the current fiscal year if no data exists
-                    today = datetime.now()
-                    year = today.year if today.month >= 4 else today.year - 1
-
-            year = int(year)  # Ensure year is an integer
-
-            # Determine fiscal year range
-            start_date = datetime(year, 4, 1)
-            end_date = datetime(year + 1, 3, 31)
-            filters['DatePicker__range'] = (start_date, end_date)
-
-            # Facility ID filtering
-            if facility_id and facility_id.lower() != 'all':
-                try:
-                    Facility.objects.get(facility_id=facility_id)  # Check if the facility exists
-                    filters['facility__facility_id'] = facility_id
-                except Facility.DoesNotExist:
-                    return Response({'error': f'Facility with ID {facility_id} does not exist.'}, status=status.HTTP_400_BAD_REQUEST)
-
-            # Facility location filtering
-            if facility_location and facility_location.lower() != 'all':
-                if not Facility.objects.filter(facility_location__icontains=facility_location).exists():
-                    return Response({'error': f'No facility found with location {facility_location}.'}, status=status.HTTP_400_BAD_REQUEST)
-                filters['facility__facility_location__icontains'] = facility_location
-
-            # Query the Waste model with the filters applied
-            queryset = Waste.objects.filter(**filters)
-
-            if not queryset.exists():  # If no data is found, return zero values for all waste types
-                waste_totals = {
-                    'food_waste_total': 0.0,
-                    'solid_Waste_total': 0.0,
-                    'E_Waste_total': 0.0,
-                    'Biomedical_waste_total': 0.0,
-                    'other_waste_total': 0.0
-                }
-            else:
-                # Aggregate waste totals for each waste type if data is found
-                waste_totals = queryset.aggregate(
-                    food_waste_total=Coalesce(Sum(Cast('food_waste', FloatField())), 0.0),
-                    solid_Waste_total=Coalesce(Sum(Cast('solid_Waste', FloatField())), 0.0),
-                    E_Waste_total=Coalesce(Sum(Cast('E_Waste', FloatField())), 0.0),
-                    Biomedical_waste_total=Coalesce(Sum(Cast('Biomedical_waste', FloatField())), 0.0),
-                    other_waste_total=Coalesce(Sum(Cast('other_waste', FloatField())), 0.0)
-                )
-
-            # Calculate the overall total waste
-            overall_total = sum(waste_totals.values())
-
-            # Calculate percentages for each waste type
-            waste_percentages = {}
-            for waste_type, total in waste_totals.items():
-                waste_percentages[waste_type] = (total / overall_total) * 100 if overall_total else 0
-
-            # Format the response data
-            response_data = {
-                "year": year,
-                "facility_id": facility_id,
-                "facility_location": facility_location,
-                "waste_percentages": waste_percentages
-            }
-
-            return Response(response_data, status=status.HTTP_200_OK)
-
-        except Exception as e:
-            # Log the error for debugging purposes
-            print(f"Error occurred: {e}")
-            return Response({'error': f'An error occurred: {str(e)}'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
-
-#SenT to Landfill Overview Piechart
-class SentToLandfillOverviewView(APIView):
-    permission_classes = [IsAuthenticated]
-
-    def get_fiscal_year_dates(self, year):
-        start_date = datetime(year, 4, 1)  # Fiscal year starts on April 1
-        end_date = datetime(year + 1, 3, 31)  # Ends on March 31 of the next year
-        return start_date, end_date
-
-    def get(self, request):
-        user = request.user
-
-        # Get parameters from the request
-        year = request.GET.get('year', None)
-        facility_id = request.GET.get('facility_id', None)
-        facility_location = request.GET.get('facility_location', None)
-        
-        try:
-            # Default to the current fiscal year if no year is provided
-            if not year:
-                latest_waste = Waste.objects.filter(user=user).aggregate(latest_date=Max('DatePicker'))
-                if latest_waste['latest_date']:
-                    latest_date = latest_waste['latest_date']
-                    year = latest_date.year if latest_date.month >= 4 else latest_date.year - 1
-                else:
-                    current_date = timezone.now()
-                    year = current_date.year if current_date.month >= 4 else current_date.year - 1
-            else:
-                year = int(year)  # Ensure the 'year' is an integer
-
-            # Get fiscal year start and end dates
-            start_date, end_date = self.get_fiscal_year_dates(year)
-
-            # Initialize filters
-            filters = {'user': user, 'DatePicker__range': (start_date, end_date)}
-
-            # Start with the base queryset
-            queryset = Waste.objects.filter(**filters)
-
-            # Apply facility_id filter if provided and not 'all'
-            if facility_id and facility_id.lower() != 'all':
-                queryset = queryset.filter(facility__facility_id=facility_id)
-
-            # Apply facility_location filter if provided and not 'all'
-            if facility_location and facility_location.lower() != 'all':
-                queryset = queryset.filter(facility__facility_location__icontains=facility_location)
-
-            if not queryset.exists():
-                # Return zero data if no matching records
-                response_data = {
-                    "landfill_percentage": 0,
-                    "remaining_percentage": 0
-                }
-                return Response(
-                    {
-                        "fiscal_year": f"{year}-{year + 1}",
-                        "sentToLandFill": response_data
-                    },
-                    status=status.HTTP_200_OK
-                )
-
-            # Define waste fields for calculations
-            overall_total_fields = [
-                'food_waste', 'solid_Waste', 'E_Waste', 'Biomedical_waste', 'other_waste'
-            ]
-
-            # Calculate total 'Landfill_waste'
-            Landfill_waste_total = queryset.aggregate(
-                total=Coalesce(Sum(Cast('Landfill_waste', FloatField())), 0.0)
-            )['total']
-
-            # Calculate overall total waste
-            overall_totals = queryset.aggregate(
-                **{f"{waste_type}_total": Coalesce(Sum(Cast(waste_type, FloatField())), 0.0)
-                   for waste_type in overall_total_fields}
-            )
-            overall_total = sum(overall_totals.values())
-
-            # Calculate remaining waste and percentages
-            remaining_waste_total = overall_total - Landfill_waste_total
-            
-            landfill_percentage = (Landfill_waste_total / overall_total) * 100 if overall_total else 0
-            remaining_percentage = (remaining_waste_total / overall_total) * 100 if overall_total else 0
-
-            # Prepare the response data
-            response_data = {
-                "landfill_percentage": round(landfill_percentage, 2),
-                "remaining_percentage": round(remaining_percentage, 2)
-            }
-
-            return Response(
-                {
-                    "fiscal_year": f"{year}-{year + 1}",
-                    "sentToLandFill": response_data
-                },
-                status=status.HTTP_200_OK
-            )
-
-        except ValueError:
-            return Response({'error': 'Invalid year parameter.'}, status=status.HTTP_400_BAD_REQUEST)
-        except Exception as e:
-            print(f"Error occurred: {e}")
-            return Response({'error': f'An error occurred: {str(e)}'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
-
-#Sent to Recycle Overview Piechart
-class SentToRecycledOverviewView(APIView):
-    permission_classes = [IsAuthenticated]
-
-    def get_fiscal_year_dates(self, year):
-        start_date = datetime(year, 4, 1)  # Fiscal year starts on April 1
-        end_date = datetime(year + 1, 3, 31)  # Ends on March 31 of the next year
-        return start_date, end_date
-
-    def get(self, request):
-        user = request.user
-
-        # Get parameters from the request
-        year = request.GET.get('year', None)
-        facility_id = request.GET.get('facility_id', None)
-        facility_location = request.GET.get('facility_location', None)
-        
-        try:
-            # Default to the current fiscal year if no year is provided
-            if not year:
-                latest_waste = Waste.objects.filter(user=user).aggregate(latest_date=Max('DatePicker'))
-                if latest_waste['latest_date']:
-                    latest_date = latest_waste['latest_date']
-                    year = latest_date.year if latest_date.month >= 4 else latest_date.year - 1
-                else:
-                    current_date = timezone.now()
-                    year = current_date.year if current_date.month >= 4 else current_date.year - 1
-            else:
-                year = int(year)  # Ensure the 'year' is an integer
-
-            # Get fiscal year start and end dates
-            start_date, end_date = self.get_fiscal_year_dates(year)
-
-            # Initialize filters
-            filters = {'user': user, 'DatePicker__range': (start_date, end_date)}
-
-            # Start with the base queryset
-            queryset = Waste.objects.filter(**filters)
-
-            # Apply facility_id filter if provided and not 'all'
-            if facility_id and facility_id.lower() != 'all':
-                queryset = queryset.filter(facility__facility_id=facility_id)
-
-            # Apply facility_location filter if provided and not 'all'
-            if facility_location and facility_location.lower() != 'all':
-                queryset = queryset.filter(facility__facility_location__icontains=facility_location)
-
-            if not queryset.exists():
-                # Return zero data if no matching records
-                response_data = {
-                    "recycle_percentage": 0,
-                    "remaining_percentage": 0
-                }
-                return Response(
-                    {
-                        "fiscal_year": f"{year}-{year + 1}",
-                        "Senttorecycle": response_data
-                    },
-                    status=status.HTTP_200_OK
-                )
-
-            # Define waste fields for calculations
-            overall_total_fields = [
-                'food_waste', 'solid_Waste', 'E_Waste', 'Biomedical_waste', 'other_waste'
-            ]
-
-            # Calculate total 'Landfill_waste'
-            Recycle_waste_total = queryset.aggregate(
-                total=Coalesce(Sum(Cast('Landfill_waste', FloatField())), 0.0)
-            )['total']
-
-            # Calculate overall total waste
-            overall_totals = queryset.aggregate(
-                **{f"{waste_type}_total": Coalesce(Sum(Cast(waste_type, FloatField())), 0.0)
-                   for waste_type in overall_total_fields}
-            )
-            overall_total = sum(overall_totals.values())
-
-            # Calculate remaining waste and percentages
-            remaining_waste_total = overall_total - Recycle_waste_total
-            
-            recycle_percentage = (Recycle_waste_total / overall_total) * 100 if overall_total else 0
-            remaining_percentage = (remaining_waste_total / overall_total) * 100 if overall_total else 0
-
-            # Prepare the response data
-            response_data = {
-                "recycle_percentage": round(recycle_percentage, 2),
-                "remaining_percentage": round(remaining_percentage, 2)
-            }
-
-            return Response(
-                {
-                    "fiscal_year": f"{year}-{year + 1}",
-                    "sentToLandFill": response_data
-                },
-                status=status.HTTP_200_OK
-            )
-
-        except ValueError:
-            return Response({'error': 'Invalid year parameter.'}, status=status.HTTP_400_BAD_REQUEST)
-        except Exception as e:
-            print(f"Error occurred: {e}")
-            return Response({'error': f'An error occurred: {str(e)}'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
-
-'''Waste Overviewgraphs and Individual Line charts and donut charts Ends'''
-
-
-'''Energy  Overview Cards ,Graphs and Individual line charts and donut charts Starts'''
-#Energy Overview Cards
-class EnergyViewCard_Over(APIView):
-    permission_classes = [IsAuthenticated]
-
-    def get(self, request):
-        user = request.user
-        facility_id = request.GET.get('facility_id', 'all')
-        facility_location = request.GET.get('facility_location')
-        year = request.GET.get('year')
-
-        try:
-            # Validate facility_id
-            if facility_id != 'all' and not Facility.objects.filter(facility_id=facility_id, user=user).exists():
-                return Response({'error': 'Invalid facility ID or not associated with the logged-in user.'}, status=status.HTTP_400_BAD_REQUEST)
-
-            # Validate year
-            if year:
-                try:
-                    year = int(year)
-                    if year < 1900 or year > datetime.now().year + 10:  # Allow future years up to 10 years ahead
-                        return Response({'error': 'Invalid year parameter.'}, status=status.HTTP_400_BAD_REQUEST)
-                except ValueError:
-                    return Response({'error': 'Year must be an integer.'}, status=status.HTTP_400_BAD_REQUEST)
-
-            # Determine start_date and end_date for the fiscal year
-            if year:
-                start_date = datetime(year, 4, 1)
-                end_date = datetime(year + 1, 3, 31)
-            else:
-                latest_entry = Energy.objects.filter(user=user).order_by('-DatePicker').first()
-                if latest_entry:
-                    latest_year = latest_entry.DatePicker.year
-                    year = latest_year if latest_entry.DatePicker.month >= 4 else latest_year - 1
-                else:
-                    today = datetime.now()
-                    year = today.year - 1 if today.month < 4 else today.year
-
-                start_date = datetime(year, 4, 1)
-                end_date = datetime(year + 1, 3, 31)
-
-            # Query energy data
-            energy_data = Energy.objects.filter(user=user, DatePicker__range=(start_date, end_date))
-
-            if facility_id != 'all':
-                energy_data = energy_data.filter(facility__facility_id=facility_id)
-
-            if facility_location:
-                energy_data = energy_data.filter(facility__location__icontains=facility_location)
-
-            energy_fields = [
-                'hvac', 'production', 'stp', 'admin_block',
-                'utilities', 'others', 'renewable_solar', 'renewable_other', 'coking_coal', 
-                'coke_oven_coal', 'natural_gas', 'diesel', 'biomass_wood', 'biomass_other_solid'
-            ]
-
-            response_data = {
-                'year': year,
-                'overall_energy_totals': {}
-            }
-
-            if not energy_data.exists():
-                # Populate only specific fields with zero values when no data exists
-                zero_fields = ['hvac', 'production', 'stp', 'admin_block', 'utilities', 'others']
-                response_data['overall_energy_totals'] = {
-                    f"overall_{field}": 0.0 for field in zero_fields
-                }
-                response_data['overall_energy_totals']['overall_fuel_used_in_operations'] = 0.0
-                response_data['overall_energy_totals']['overall_renewable_energy'] = 0.0
-            else:
-                # Initialize counters for renewable energy and fuel usage totals
-                fuel_used_in_operations_total = 0
-                renewable_energy_total = 0
-
-                for field in energy_fields:
-                    # Aggregate total for each field
-                    overall_total = energy_data.aggregate(total=Sum(field))['total'] or 0
-
-                    # Add renewable energy (sum of renewable_solar and renewable_other)
-                    if field in ['renewable_solar', 'renewable_other']:
-                        renewable_energy_total += overall_total
-
-                    # Add to fuel usage totals
-                    if field in ['coke_oven_coal', 'coking_coal', 'natural_gas', 'diesel', 'biomass_wood', 'biomass_other_solid']:
-                        fuel_used_in_operations_total += overall_total
-
-                    # Include other fields in the response
-                    if field not in ['renewable_solar', 'renewable_other', 'coke_oven_coal', 'coking_coal', 'natural_gas', 'diesel', 'biomass_wood', 'biomass_other_solid']:
-                        response_data['overall_energy_totals'][f"overall_{field}"] = overall_total
-
-                # Set the calculated totals for renewable energy and fuel used in operations
-                response_data['overall_energy_totals']['overall_fuel_used_in_operations'] = fuel_used_in_operations_total
-                response_data['overall_energy_totals']['overall_renewable_energy'] = renewable_energy_total
-
-            return Response(response_data, status=status.HTTP_200_OK)
-
-        except Exception as e:
-            error_message = f"An error occurred: {str(e)}"
-            print(error_message)
-            return Response({'error': error_message}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
-
-#HVAC Line Charts and Donut Chart 
-class HVACOverviewView(APIView):
-    permission_classes = [IsAuthenticated]
-
-    def get(self, request):
-        user = request.user
-        facility_id = request.GET.get('facility_id', None)
-        facility_location = request.GET.get('facility_location', None)
-        year = request.GET.get('year', None)
-
-        try:
-            if not year:
-                year = self.get_latest_available_year(user)
-
-            try:
-                year = int(year)
-            except ValueError:
-                return Response({'error': 'Invalid year parameter.'}, status=status.HTTP_400_BAD_REQUEST)
-
-            start_date, end_date = self.get_fiscal_year_range(year)
-
-            filters = {
-                'user': user,
-                'DatePicker__range': (start_date.date(), end_date.date())
-            }
-            if facility_id and facility_id.lower() != 'all':
-                filters['facility__facility_id'] = facility_id
-            if facility_location:
-                filters['facility__location__icontains'] = facility_location
-
-            energy_data = Energy.objects.filter(**filters)
-            if not energy_data.exists():
-                return self.get_empty_response(year)
-
-            monthly_hvac = (
-                energy_data
-                .values('DatePicker__month')
-                .annotate(total_hvac=Sum('hvac'))
-            )
-
-            hvac = {month: 0 for month in range(1, 13)}
-            for entry in monthly_hvac:
-                hvac[entry['DatePicker__month']] = entry['total_hvac']
-
-            month_order = [4, 5, 6, 7, 8, 9, 10, 11, 12, 1, 2, 3]
-            line_chart_data = [
-                {
-                    "month": datetime(1900, month, 1).strftime('%b'),
-                    "hvac": hvac[month]
-                }
-                for month in month_order
-            ]
-
-            # Prepare facility data for donut chart
-            facility_hvac = (
-                energy_data
-                .values('facility__facility_name')
-                .annotate(total_hvac=Sum('hvac'))
-                .order_by('-total_hvac')
-            )
-
-            total_hvac = sum(entry['total_hvac'] for entry in facility_hvac)
-            donut_chart_data = [
-                {
-                    "facility_name": entry['facility__facility_name'],
-                    "percentage": (entry['total_hvac'] / total_hvac * 100) if total_hvac else 0,
-                }
-                for entry in facility_hvac
-            ]
-
-            response_data = {
-                "year": year,
-                "line_chart_data": line_chart_data,
-                "donut_chart_data": donut_chart_data
-            }
-
-            return Response(response_data, status=status.HTTP_200_OK)
-
-        except Exception as e:
-            import traceback
-            print(f"Error: {str(e)}")
-            print("Traceback:", traceback.format_exc())
-            return Response(
-                {'error': f'An error occurred while processing your request: {str(e)}'},
-                status=status.HTTP_500_INTERNAL_SERVER_ERROR
-            )
-
-    def get_latest_available_year(self, user):
-        latest_energy = Energy.objects.filter(user=user).order_by('-DatePicker').first()
-        if latest_energy:
-            latest_date = latest_energy.DatePicker
-            # Adjust fiscal year if the data is after March
-            if latest_date.month >= 4:
-                return latest_date.year
-            else:
-                return latest_date.year - 1
-        return datetime.now().year  # Default to current year if no data is available
-
-    def get_fiscal_year_range(self, year):
-        start_date = datetime(year, 4, 1)
-        end_date = datetime(year + 1, 3, 31)
-        return start_date, end_date
-
-    def get_empty_response(self, year):
-        month_order = [4, 5, 6, 7, 8, 9, 10, 11, 12, 1, 2, 3]
-        line_chart_data = [{"month": datetime(1900, month, 1).strftime('%b'), "hvac": 0} for month in month_order]
-        donut_chart_data = [{"facility_name": "No Facility", "percentage": 0}]
-        return Response({
-            "year": year,
-            "line_chart_data": line_chart_data,
-            "donut_chart_data": donut_chart_data
-        }, status=status.HTTP_200_OK)
-
-#ProductionLine Charts and Donut charts
-class ProductionOverviewView(APIView):
-    permission_classes = [IsAuthenticated]
-
-    def get(self, request):
-        user = request.user
-        facility_id = request.GET.get('facility_id', None)
-        facility_location = request.GET.get('facility_location', None)
-        year = request.GET.get('year', None)
-
-        try:
-            if not year:
-                year = self.get_latest_available_year(user)
-
-            try:
-                year = int(year)
-            except ValueError:
-                return Response({'error': 'Invalid year parameter.'}, status=status.HTTP_400_BAD_REQUEST)
-
-            start_date, end_date = self.get_fiscal_year_range(year)
-
-            filters = {
-                'user': user,
-                'DatePicker__range': (start_date.date(), end_date.date())
-            }
-            if facility_id and facility_id.lower() != 'all':
-                filters['facility__facility_id'] = facility_id
-            if facility_location:
-                filters['facility__location__icontains'] = facility_location
-
-            energy_data = Energy.objects.filter(**filters)
-            if not energy_data.exists():
-                return self.get_empty_response(year)
-
-            monthly_production = (
-                energy_data
-                .values('DatePicker__month')
-                .annotate(total_production=Sum('production'))
-            )
-
-            production = {month: 0 for month in range(1, 13)}
-            for entry in monthly_production:
-                production[entry['DatePicker__month']] = entry['total_production']
-
-            month_order = [4, 5, 6, 7, 8, 9, 10, 11, 12, 1, 2, 3]
-            line_chart_data = [
-                {
-                    "month": datetime(1900, month, 1).strftime('%b'),
-                    "production": production[month]
-                }
-                for month in month_order
-            ]
-
-            # Prepare facility data for donut chart
-            facility_production = (
-                energy_data
-                .values('facility__facility_name')
-                .annotate(total_production=Sum('production'))
-                .order_by('-total_production')
-            )
-
-            total_production = sum(entry['total_production'] for entry in facility_production)
-            donut_chart_data = [
-                {
-                    "facility_name": entry['facility__facility_name'],
-                    "percentage": (entry['total_production'] / total_production * 100) if total_production else 0,
-                }
-                for entry in facility_production
-            ]
-
-            response_data = {
-                "year": year,
-                "line_chart_data": line_chart_data,
-                "donut_chart_data": donut_chart_data
-            }
-
-            return Response(response_data, status=status.HTTP_200_OK)
-
-        except Exception as e:
-            import traceback
-            print(f"Error: {str(e)}")
-            print("Traceback:", traceback.format_exc())
-            return Response(
-                {'error': f'An error occurred while processing your request: {str(e)}'},
-                status=status.HTTP_500_INTERNAL_SERVER_ERROR
-            )
-
-    def get_latest_available_year(self, user):
-        latest_energy = Energy.objects.filter(user=user).order_by('-DatePicker').first()
-        if latest_energy:
-            latest_date = latest_energy.DatePicker
-            # Adjust fiscal year if the data is after March
-            if latest_date.month >= 4:
-                return latest_date.year
-            else:
-                return latest_date.year - 1
-        return datetime.now().year  # Default to current year if no data is available
-
-    def get_fiscal_year_range(self, year):
-        start_date = datetime(year, 4, 1)
-        end_date = datetime(year + 1, 3, 31)
-        return start_date, end_date
-
-    def get_empty_response(self, year):
-        month_order = [4, 5, 6, 7, 8, 9, 10, 11, 12, 1, 2, 3]
-        line_chart_data = [{"month": datetime(1900, month, 1).strftime('%b'), "production": 0} for month in month_order]
-        donut_chart_data = [{"facility_name": "No Facility", "percentage": 0}]
-        return Response({
-            "year": year,
-            "line_chart_data": line_chart_data,
-            "donut_chart_data": donut_chart_data
-        }, status=status.HTTP_200_OK)
-
-#STP Overview line charts and donut charts
-class StpOverviewView(APIView):
-    permission_classes = [IsAuthenticated]
-
-    def get(self, request):
-        user = request.user
-        facility_id = request.GET.get('facility_id', None)
-        facility_location = request.GET.get('facility_location', None)
-        year = request.GET.get('year', None)
-
-        try:
-            if not year:
-                year = self.get_latest_available_year(user)
-
-            try:
-                year = int(year)
-            except ValueError:
-                return Response({'error': 'Invalid year parameter.'}, status=status.HTTP_400_BAD_REQUEST)
-
-            start_date, end_date = self.get_fiscal_year_range(year)
-
-            filters = {
-                'user': user,
-                'DatePicker__range': (start_date.date(), end_date.date())
-            }
-            if facility_id and facility_id.lower() != 'all':
-                filters['facility__facility_id'] = facility_id
-            if facility_location:
-                filters['facility__location__icontains'] = facility_location
-
-            energy_data = Energy.objects.filter(**filters)
-            if not energy_data.exists():
-                return self.get_empty_response(year)
-
-            monthly_stp = (
-                energy_data
-                .values('DatePicker__month')
-                .annotate(total_stp=Sum('stp'))
-            )
-
-            stp = {month: 0 for month in range(1, 13)}
-            for entry in monthly_stp:
-                stp[entry['DatePicker__month']] = entry['total_stp']
-
-            month_order = [4, 5, 6, 7, 8, 9, 10, 11, 12, 1, 2, 3]
-            line_chart_data = [
-                {
-                    "month": datetime(1900, month, 1).strftime('%b'),
-                    "stp": stp[month]
-                }
-                for month in month_order
-            ]
-
-            # Prepare facility data for donut chart
-            facility_stp = (
-                energy_data
-                .values('facility__facility_name')
-                .annotate(total_stp=Sum('stp'))
-                .order_by('-total_stp')
-            )
-
-            total_stp = sum(entry['total_stp'] for entry in facility_stp)
-            donut_chart_data = [
-                {
-                    "facility_name": entry['facility__facility_name'],
-                    "percentage": (entry['total_stp'] / total_stp * 100) if total_stp else 0,
-                }
-                for entry in facility_stp
-            ]
-
-            response_data = {
-                "year": year,
-                "line_chart_data": line_chart_data,
-                "donut_chart_data": donut_chart_data
-            }
-
-            return Response(response_data, status=status.HTTP_200_OK)
-
-        except Exception as e:
-            import traceback
-            print(f"Error: {str(e)}")
-            print("Traceback:", traceback.format_exc())
-            return Response(
-                {'error': f'An error occurred while processing your request: {str(e)}'},
-                status=status.HTTP_500_INTERNAL_SERVER_ERROR
-            )
-
-    def get_latest_available_year(self, user):
-        latest_energy = Energy.objects.filter(user=user).order_by('-DatePicker').first()
-        if latest_energy:
-            latest_date = latest_energy.DatePicker
-            # Adjust fiscal year if the data is after March
-            if latest_date.month >= 4:
-                return latest_date.year
-            else:
-                return latest_date.year - 1
-        return datetime.now().year  # Default to current year if no data is available
-
-    def get_fiscal_year_range(self, year):
-        start_date = datetime(year, 4, 1)
-        end_date = datetime(year + 1, 3, 31)
-        return start_date, end_date
-
-    def get_empty_response(self, year):
-        month_order = [4, 5, 6, 7, 8, 9, 10, 11, 12, 1, 2, 3]
-        line_chart_data = [{"month": datetime(1900, month, 1).strftime('%b'), "stp": 0} for month in month_order]
-        donut_chart_data = [{"facility_name": "No Facility", "percentage": 0}]
-        return Response({
-            "year": year,
-            "line_chart_data": line_chart_data,
-            "donut_chart_data": donut_chart_data
-        }, status=status.HTTP_200_OK)
-
-#Admin_block Overview Linecharts and donut charts
-class Admin_BlockOverviewView(APIView):
-    permission_classes = [IsAuthenticated]
-
-    def get(self, request):
-        user = request.user
-        facility_id = request.GET.get('facility_id', None)
-        facility_location = request.GET.get('facility_location', None)
-        year = request.GET.get('year', None)
-
-        try:
-            if not year:
-                year = self.get_latest_available_year(user)
-
-            try:
-                year = int(year)
-            except ValueError:
-                return Response({'error': 'Invalid year parameter.'}, status=status.HTTP_400_BAD_REQUEST)
-
-            start_date, end_date = self.get_fiscal_year_range(year)
-
-            filters = {
-                'user': user,
-                'DatePicker__range': (start_date.date(), end_date.date())
-            }
-            if facility_id and facility_id.lower() != 'all':
-                filters['facility__facility_id'] = facility_id
-            if facility_location:
-                filters['facility__location__icontains'] = facility_location
-
-            energy_data = Energy.objects.filter(**filters)
-            if not energy_data.exists():
-                return self.get_empty_response(year)
-
-            monthly_admin_block = (
-                energy_data
-                .values('DatePicker__month')
-                .annotate(total_admin_block=Sum('admin_block'))
-            )
-
-            admin_block = {month: 0 for month in range(1, 13)}
-            for entry in monthly_admin_block:
-                admin_block[entry['DatePicker__month']] = entry['total_admin_block']
-
-            month_order = [4, 5, 6, 7, 8, 9, 10, 11, 12, 1, 2, 3]
-            line_chart_data = [
-                {
-                    "month": datetime(1900, month, 1).strftime('%b'),
-                    "admin_block": admin_block[month]
-                }
-                for month in month_order
-            ]
-
-            # Prepare facility data for donut chart
-            facility_admin_block = (
-                energy_data
-                .values('facility__facility_name')
-                .annotate(total_admin_block=Sum('admin_block'))
-                .order_by('-total_admin_block')
-            )
-
-            total_admin_block = sum(entry['total_admin_block'] for entry in facility_admin_block)
-            donut_chart_data = [
-                {
-                    "facility_name": entry['facility__facility_name'],
-                    "percentage": (entry['total_admin_block'] / total_admin_block * 100) if total_admin_block else 0,
-                }
-                for entry in facility_admin_block
-            ]
-
-            response_data = {
-                "year": year,
-                "line_chart_data": line_chart_data,
-                "donut_chart_data": donut_chart_data
-            }
-
-            return Response(response_data, status=status.HTTP_200_OK)
-
-        except Exception as e:
-            import traceback
-            print(f"Error: {str(e)}")
-            print("Traceback:", traceback.format_exc())
-            return Response(
-                {'error': f'An error occurred while processing your request: {str(e)}'},
-                status=status.HTTP_500_INTERNAL_SERVER_ERROR
-            )
-
-    def get_latest_available_year(self, user):
-        latest_energy = Energy.objects.filter(user=user).order_by('-DatePicker').first()
-        if latest_energy:
-            latest_date = latest_energy.DatePicker
-            # Adjust fiscal year if the data is after March
-            if latest_date.month >= 4:
-                return latest_date.year
-            else:
-                return latest_date.year - 1
-        return datetime.now().year  # Default to current year if no data is available
-
-    def get_fiscal_year_range(self, year):
-        start_date = datetime(year, 4, 1)
-        end_date = datetime(year + 1, 3, 31)
-        return start_date, end_date
-
-    def get_empty_response(self, year):
-        month_order = [4, 5, 6, 7, 8, 9, 10, 11, 12, 1, 2, 3]
-        line_chart_data = [{"month": datetime(1900, month, 1).strftime('%b'), "admin_block": 0} for month in month_order]
-        donut_chart_data = [{"facility_name": "No Facility", "percentage": 0}]
-        return Response({
-            "year": year,
-            "line_chart_data": line_chart_data,
-            "donut_chart_data": donut_chart_data
-        }, status=status.HTTP_200_OK)
-
-#Utilities_OverView Linecharts and Donut Charts
-class Utilities_OverviewView(APIView):
-    permission_classes = [IsAuthenticated]
-
-    def get(self, request):
-        user = request.user
-        facility_id = request.GET.get('facility_id', None)
-        facility_location = request.GET.get('facility_location', None)
-        year = request.GET.get('year', None)
-
-        try:
-            if not year:
-                year = self.get_latest_available_year(user)
-
-            try:
-                year = int(year)
-            except ValueError:
-                return Response({'error': 'Invalid year parameter.'}, status=status.HTTP_400_BAD_REQUEST)
-
-            start_date, end_date = self.get_fiscal_year_range(year)
-
-            filters = {
-                'user': user,
-                'DatePicker__range': (start_date.date(), end_date.date())
-            }
-            if facility_id and facility_id.lower() != 'all':
-                filters['facility__facility_id'] = facility_id
-            if facility_location:
-                filters['facility__location__icontains'] = facility_location
-
-            energy_data = Energy.objects.filter(**filters)
-            if not energy_data.exists():
-                return self.get_empty_response(year)
-
-            monthly_utilities = (
-                energy_data
-                .values('DatePicker__month')
-                .annotate(total_utilities=Sum('utilities'))
-            )
-
-            utilities = {month: 0 for month in range(1, 13)}
-            for entry in monthly_utilities:
-                utilities[entry['DatePicker__month']] = entry['total_utilities']
-
-            month_order = [4, 5, 6, 7, 8, 9, 10, 11, 12, 1, 2, 3]
-            line_chart_data = [
-                {
-                    "month": datetime(1900, month, 1).strftime('%b'),
-                    "utilities": utilities[month]
-                }
-                for month in month_order
-            ]
-
-            # Prepare facility data for donut chart
-            facility_utilities = (
-                energy_data
-                .values('facility__facility_name')
-                .annotate(total_utilities=Sum('utilities'))
-                .order_by('-total_utilities')
-            )
-
-            total_utilities = sum(entry['total_utilities'] for entry in facility_utilities)
-            donut_chart_data = [
-                {
-                    "facility_name": entry['facility__facility_name'],
-                    "percentage": (entry['total_utilities'] / total_utilities * 100) if total_utilities else 0,
-                }
-                for entry in facility_utilities
-            ]
-
-            response_data = {
-                "year": year,
-                "line_chart_data": line_chart_data,
-                "donut_chart_data": donut_chart_data
-            }
-
-            return Response(response_data, status=status.HTTP_200_OK)
-
-        except Exception as e:
-            import traceback
-            print(f"Error: {str(e)}")
-            print("Traceback:", traceback.format_exc())
-            return Response(
-                {'error': f'An error occurred while processing your request: {str(e)}'},
-                status=status.HTTP_500_INTERNAL_SERVER_ERROR
-            )
-
-    def get_latest_available_year(self, user):
-        latest_energy = Energy.objects.filter(user=user).order_by('-DatePicker').first()
-        if latest_energy:
-            latest_date = latest_energy.DatePicker
-            # Adjust fiscal year if the data is after March
-            if latest_date.month >= 4:
-                return latest_date.year
-            else:
-                return latest_date.year - 1
-        return datetime.now().year  # Default to current year if no data is available
-
-    def get_fiscal_year_range(self, year):
-        start_date = datetime(year, 4, 1)
-        end_date = datetime(year + 1, 3, 31)
-        return start_date, end_date
-
-    def get_empty_response(self, year):
-        month_order = [4, 5, 6, 7, 8, 9, 10, 11, 12, 1, 2, 3]
-        line_chart_data = [{"month": datetime(1900, month, 1).strftime('%b'), "utilities": 0} for month in month_order]
-        donut_chart_data = [{"facility_name": "No Facility", "percentage": 0}]
-        return Response({
-            "year": year,
-            "line_chart_data": line_chart_data,
-            "donut_chart_data": donut_chart_data
-        }, status=status.HTTP_200_OK)
-
-# Others Overview Linecharts andDonut charts
-class Others_OverviewView(APIView):
-    permission_classes = [IsAuthenticated]
-
-    def get(self, request):
-        user = request.user
-        facility_id = request.GET.get('facility_id', None)
-        facility_location = request.GET.get('facility_location', None)
-        year = request.GET.get('year', None)
-
-        try:
-            if not year:
-                year = self.get_latest_available_year(user)
-
-            try:
-                year = int(year)
-            except ValueError:
-                return Response({'error': 'Invalid year parameter.'}, status=status.HTTP_400_BAD_REQUEST)
-
-            start_date, end_date = self.get_fiscal_year_range(year)
-
-            filters = {
-                'user': user,
-                'DatePicker__range': (start_date.date(), end_date.date())
-            }
-            if facility_id and facility_id.lower() != 'all':
-                filters['facility__facility_id'] = facility_id
-            if facility_location:
-                filters['facility__location__icontains'] = facility_location
-
-            energy_data = Energy.objects.filter(**filters)
-            if not energy_data.exists():
-                return self.get_empty_response(year)
-
-            monthly_others = (
-                energy_data
-                .values('DatePicker__month')
-                .annotate(total_others=Sum('others'))
-            )
-
-            others = {month: 0 for month in range(1, 13)}
-            for entry in monthly_others:
-                others[entry['DatePicker__month']] = entry['total_others']
-
-            month_order = [4, 5, 6, 7, 8, 9, 10, 11, 12, 1, 2, 3]
-            line_chart_data = [
-                {
-                    "month": datetime(1900, month, 1).strftime('%b'),
-                    "others": others[month]
-                }
-                for month in month_order
-            ]
-
-            # Prepare facility data for donut chart
-            facility_others = (
-                energy_data
-                .values('facility__facility_name')
-                .annotate(total_others=Sum('others'))
-                .order_by('-total_others')
-            )
-
-            total_others = sum(entry['total_others'] for entry in facility_others)
-            donut_chart_data = [
-                {
-                    "facility_name": entry['facility__facility_name'],
-                    "percentage": (entry['total_others'] / total_others * 100) if total_others else 0,
-                }
-                for entry in facility_others
-            ]
-
-            response_data = {
-                "year": year,
-                "line_chart_data": line_chart_data,
-                "donut_chart_data": donut_chart_data
-            }
-
-            return Response(response_data, status=status.HTTP_200_OK)
-
-        except Exception as e:
-            import traceback
-            print(f"Error: {str(e)}")
-            print("Traceback:", traceback.format_exc())
-            return Response(
-                {'error': f'An error occurred while processing your request: {str(e)}'},
-                status=status.HTTP_500_INTERNAL_SERVER_ERROR
-            )
-
-    def get_latest_available_year(self, user):
-        latest_energy = Energy.objects.filter(user=user).order_by('-DatePicker').first()
-        if latest_energy:
-            latest_date = latest_energy.DatePicker
-            # Adjust fiscal year if the data is after March
-            if latest_date.month >= 4:
-                return latest_date.year
-            else:
-                return latest_date.year - 1
-        return datetime.now().year  # Default to current year if no data is available
-
-    def get_fiscal_year_range(self, year):
-        start_date = datetime(year, 4, 1)
-        end_date = datetime(year + 1, 3, 31)
-        return start_date, end_date
-
-    def get_empty_response(self, year):
-        month_order = [4, 5, 6, 7, 8, 9, 10, 11, 12, 1, 2, 3]
-        line_chart_data = [{"month": datetime(1900, month, 1).strftime('%b'), "others": 0} for month in month_order]
-        donut_chart_data = [{"facility_name": "No Facility", "percentage": 0}]
-        return Response({
-            "year": year,
-            "line_chart_data": line_chart_data,
-            "donut_chart_data": donut_chart_data
-        }, status=status.HTTP_200_OK)
-
-#Renewable_EnergyOverview Line Charts And Donut Charts
-class Renewable_EnergyOverView(APIView):
-    permission_classes = [IsAuthenticated]
-
-    def get(self, request):
-        user = request.user
-        facility_id = request.GET.get('facility_id', None)
-        facility_location = request.GET.get('facility_location', None)
-        year = request.GET.get('year', None)
-
-        try:
-            # Initialize filters
-            filters = {'user': user}
-
-            # Determine fiscal year range
-            if not year:
-                latest_energy = Energy.objects.filter(user=user).aggregate(latest_date=Max('DatePicker'))
-                if latest_energy['latest_date']:
-                    latest_date = latest_energy['latest_date']
-                    year = latest_date.year if latest_date.month >= 4 else latest_date.year - 1
-                else:
-                    today = datetime.now()
-                    year = today.year if today.month >= 4 else today.year - 1
-
-            year = int(year)
-            start_date = datetime(year, 4, 1)
-            end_date = datetime(year + 1, 3, 31)
-            filters['DatePicker__range'] = (start_date, end_date)
-
-            # Apply additional filters for facility
-            if facility_id and facility_id.lower() != 'all':
-                filters['facility__facility_id'] = facility_id
-            if facility_location:
-                filters['facility__facility_location__icontains'] = facility_location
-
-            # Query monthly renewable energy data
-            monthly_renewable_energy = (
-                Energy.objects.filter(**filters)
-                .values('DatePicker__month')
-                .annotate(
-                    total_solar=Sum('renewable_solar'),
-                    total_other=Sum('renewable_other')
-                )
-                .order_by('DatePicker__month')
-            )
-
-            # Map data to fiscal year months
-            renewable_energy = defaultdict(float)
-            for entry in monthly_renewable_energy:
-                month = entry['DatePicker__month']
-                total_energy = entry['total_solar'] + entry['total_other']
-                renewable_energy[month] = total_energy
-
-            # Prepare line chart data
-            month_order = [4, 5, 6, 7, 8, 9, 10, 11, 12, 1, 2, 3]
-            line_chart_data = []
-            for month in month_order:
-                month_name = datetime(1900, month, 1).strftime('%b')
-                line_chart_data.append({
-                    "month": month_name,
-                    "renewable_energy": renewable_energy.get(month, 0)
-                })
-
-            # Query facility-wise renewable energy data
-            facility_filters = {
-                'user': user,
-                'DatePicker__range': (start_date, end_date)
-            }
-            if facility_id and facility_id.lower() != 'all':
-                facility_filters['facility__facility_id'] = facility_id
-
-            facility_renewable_energy = (
-                Energy.objects.filter(**facility_filters)
-                .values('facility__facility_name')
-                .annotate(total_renewable_energy=Sum('renewable_solar') + Sum('renewable_other'))
-                .order_by('-total_renewable_energy')
-            )
-
-            # Calculate total renewable energy for percentage calculations
-            total_renewable_energy = sum(entry['total_renewable_energy'] for entry in facility_renewable_energy)
-
-            # Prepare donut chart data
-            donut_chart_data = [
-                {
-                    "facility_name": entry['facility__facility_name'],
-                    "percentage": (entry['total_renewable_energy'] / total_renewable_energy * 100) if total_renewable_energy else 0,
-                }
-                for entry in facility_renewable_energy
-            ]
-
-            # Prepare and return response
-            response_data = {
-                "year": year,
-                "line_chart_data": line_chart_data,
-                "donut_chart_data": donut_chart_data
-            }
-
-            return Response(response_data, status=status.HTTP_200_OK)
-
-        except Exception as e:
-            return Response(
-                {'error': f'An error occurred while processing your request: {str(e)}'},
-                status=status.HTTP_500_INTERNAL_SERVER_ERROR
-            )
-
-#Fuel Used in Opeartions Line Chart and donut chart
-class Fuel_Used_OperationsOverView(APIView):
-    permission_classes = [IsAuthenticated]
-
-    def get(self, request):
-        user = request.user
-        facility_id = request.GET.get('facility_id', None)
-        facility_location = request.GET.get('facility_location', None)
-        year = request.GET.get('year', None)
-
-        try:
-            filters = {'user': user}
-            
-            # If year is not provided, get the latest available year based on the Energy model
-            if not year:
-                latest_energy = Energy.objects.filter(user=user).aggregate(latest_date=Max('DatePicker'))
-                if latest_energy['latest_date']:
-                    latest_date = latest_energy['latest_date']
-                    year = latest_date.year if latest_date.month >= 4 else latest_date.year - 1
-                else:
-                    # Default to the current fiscal year if no data exists
-                    today = datetime.now()
-                    year = today.year if today.month >= 4 else today.year - 1
-
-            year = int(year)
-            start_date = datetime(year, 4, 1)
-            end_date = datetime(year + 1, 3, 31)
-
-            filters['DatePicker__range'] = (start_date, end_date)
-
-            # Apply facility filters if provided
-            if facility_id and facility_id.lower() != 'all':
-                filters['facility__facility_id'] = facility_id
-            if facility_location:
-                filters['facility__facility_location__icontains'] = facility_location
-
-            # Query monthly fuel used in operations data
-            monthly_fuel_used_in_operations = (
-                Energy.objects.filter(**filters)
-                .values('DatePicker__month')
-                .annotate(total_fuel_used_in_operations=Sum('coking_coal') + Sum('coke_oven_coal') + Sum('natural_gas') + Sum('diesel') + Sum('biomass_wood') + Sum('biomass_other_solid'))
-                .order_by('DatePicker__month')
-            )
-
-            # Prepare line chart data with zero defaults
-            line_chart_data = []
-            fuel_used_in_operations = defaultdict(float)
-
-            # Map retrieved data to months
-            for entry in monthly_fuel_used_in_operations:
-                fuel_used_in_operations[entry['DatePicker__month']] = entry['total_fuel_used_in_operations']
-
-            # Define the month order (April to March)
-            month_order = [4, 5, 6, 7, 8, 9, 10, 11, 12, 1, 2, 3]
-            today = datetime.now()
-            for month in month_order:
-                month_name = datetime(1900, month, 1).strftime('%b')
-
-                if year == today.year and month > today.month:
-                    fuel_used_in_operations[month] = 0  # No data yet for future months of the current year
-                else:
-                    
-                    line_chart_data.append({
-                    "month": month_name,
-                    "fuel_used_in_operations": fuel_used_in_operations.get(month, 0)
-                })
-
-
-            # Facility-wise fuel used in operations query for donut chart data
-            facility_filters = {
-                'user': user,
-                'DatePicker__range': (start_date, end_date)
-            }
-            if facility_id and facility_id.lower() != 'all':
-                facility_filters['facility__facility_id'] = facility_id
-            facility_fuel_used_in_operations = (
-                Energy.objects.filter(**facility_filters)
-                .values('facility__facility_name')
-                .annotate(total_fuel_used_in_operations=Sum('coking_coal') + Sum('coke_oven_coal') + Sum('natural_gas') + Sum('diesel') + Sum('biomass_wood') + Sum('biomass_other_solid'))
-                .order_by('-total_fuel_used_in_operations')
-            )
-
-            # Prepare donut chart data
-            total_fuel_used_in_operations = sum(entry['total_fuel_used_in_operations'] for entry in facility_fuel_used_in_operations)
-            donut_chart_data = [
-                {
-                    "facility_name": entry['facility__facility_name'],
-                    "percentage": (entry['total_fuel_used_in_operations'] / total_fuel_used_in_operations * 100) if total_fuel_used_in_operations else 0,
-                }
-                for entry in facility_fuel_used_in_operations
-            ]
-
-            response_data = {
-                "year":year,
-                "line_chart_data": line_chart_data,
-                "donut_chart_data": donut_chart_data
-            }
-
-            return Response(response_data, status=status.HTTP_200_OK)
-
-        except Exception as e:
-            return Response(
-                {'error': f'An error occurred while processing your request: {str(e)}'},
-                status=status.HTTP_500_INTERNAL_SERVER_ERROR
-            )
-
-#StackedEnergyOverview 
-class StackedEnergyOverviewView(APIView):
-    permission_classes = [IsAuthenticated]
-
-    def get(self, request):
-        user = request.user
-        facility_id = request.GET.get('facility_id', None)
-        facility_location = request.GET.get('facility_location', None)
-        year = request.GET.get('year', None)
-
-        try:
-            filters = {'user': user}
-
-            if not year:
-                latest_energy = Energy.objects.filter(user=user).aggregate(latest_date=Max('DatePicker'))
-                if latest_energy['latest_date']:
-                    latest_date = latest_energy['latest_date']
-                    year = latest_date.year if latest_date.month >= 4 else latest_date.year - 1
-                else:
-                    # Default to the current fiscal year if no data exists
-                    today = datetime.now()
-                    year = today.year if today.month >= 4 else today.year - 1
-
-            year = int(year)
-            start_date = datetime(year, 4, 1)
-            end_date = datetime(year + 1, 3, 31)
-
-            filters['DatePicker__range'] = (start_date, end_date)
-
-          
-            if facility_id and facility_id.lower() != 'all':
-                try:
-                    Facility.objects.get(facility_id=facility_id)
-                    filters['facility__facility_id'] = facility_id
-                except Facility.DoesNotExist:
-                    return Response({'error': f'Facility with ID {facility_id} does not exist.'}, status=status.HTTP_400_BAD_REQUEST)
-
-           
-            if facility_location and facility_location.lower() != 'all':
-                if not Facility.objects.filter(facility_location__icontains=facility_location).exists():
-                    return Response({'error': f'No facility found with location {facility_location}.'}, status=status.HTTP_400_BAD_REQUEST)
-                filters['facility__facility_location__icontains'] = facility_location
-
-            energy_types = [
-                'hvac', 'production', 'stp', 'admin_block', 'utilities', 
-                'others', 'renewable_energy'
-            ]
-
-
-            monthly_data = {month: {energy_type: 0 for energy_type in energy_types} for month in range(1, 13)}
-
-            for energy_type in energy_types:
-                queryset = Energy.objects.filter(**filters)
-
-                if energy_type == 'renewable_energy':
-                    monthly_energy = (
-                        queryset
-                        .values('DatePicker__month')
-                        .annotate(
-                            total=Coalesce(
-                                Sum('renewable_solar') + Sum('renewable_other'),
-                                Value(0, output_field=FloatField())
-                            )
-                        )
-                        .order_by('DatePicker__month')
-                    )
-                else:
-                    monthly_energy = (
-                        queryset
-                        .values('DatePicker__month')
-                        .annotate(total=Coalesce(Sum(energy_type, output_field=FloatField()), Value(0, output_field=FloatField())))
-                        .order_by('DatePicker__month')
-                    )
-
-                for entry in monthly_energy:
-                    month = entry['DatePicker__month']
-                    monthly_data[month][energy_type] = entry['total']
-
-            
-            stacked_bar_data = []
-            month_order = [4, 5, 6, 7, 8, 9, 10, 11, 12, 1, 2, 3]
-            for month in month_order:
-                month_name = datetime(1900, month, 1).strftime('%b')
-                stacked_bar_data.append({
-                    "month": month_name,
-                    **monthly_data[month] 
-                })
-
-            response_data = {
-                "facility_id": facility_id,
-                "year": year,
-                "facility_location": facility_location,
-                "stacked_bar_data": stacked_bar_data
-            }
-
-            return Response(response_data, status=status.HTTP_200_OK)
-
-        except Exception as e:
-            print(f"Error occurred: {e}") 
-            return Response({'error': f'An error occurred: {str(e)}'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
-
-#EnergyAnalyticsView With Pie Chart And Donut CHart
-class EnergyAnalyticsView(APIView):
-    permission_classes = [IsAuthenticated]
-
-    def get(self, request):
-        user = request.user
-        year = request.GET.get('year', None)
-        facility_id = request.GET.get('facility_id', 'all')
-        facility_location = request.GET.get('facility_location', None)
-
-        try:
-            filters = {'user': user}
-
-            today = datetime.now()
-            
-            if not year:
-                latest_energy = Energy.objects.filter(user=user).aggregate(latest_date=Max('DatePicker'))
-                if latest_energy['latest_date']:
-                    latest_date = latest_energy['latest_date']
-                    year = latest_date.year if latest_date.month >= 4 else latest_date.year - 1
-                else:
-                    # Default to the current fiscal year if no data exists
-                    today = datetime.now()
-                    year = today.year if today.month >= 4 else today.year - 1
-
-            year = int(year)
-            start_date = datetime(year, 4, 1)
-            end_date = datetime(year + 1, 3, 31)
-
-            filters['DatePicker__range'] = (start_date, end_date)
-
-            if facility_id.lower() != 'all':
-                try:
-                    Facility.objects.get(facility_id=facility_id)
-                    filters['facility__facility_id'] = facility_id
-                except Facility.DoesNotExist:
-                    return Response({'error': f'Facility with ID {facility_id} does not exist.'}, status=status.HTTP_400_BAD_REQUEST)
+            # Start with the base queryset
+            queryset = Waste.objects.filter(**filters)
+
+            # Apply facility_id filter if provided and not 'all'
+            if facility_id and facility_id.lower() != 'all':
+                queryset = queryset.filter(facility__facility_id=facility_id)
 
+            # Apply facility_location filter if provided and not 'all'
             if facility_location and facility_location.lower() != 'all':
-                if not Facility.objects.filter(facility_location__icontains=facility_location).exists():
-                    return Response({'error': f'No facility found with location {facility_location}.'}, status=status.HTTP_400_BAD_REQUEST)
-                filters['facility__facility_location__icontains'] = facility_location
+                queryset = queryset.filter(facility__facility_location__icontains=facility_location)
 
-            energy_aggregate = Energy.objects.filter(**filters).aggregate(
-                total_hvac=Coalesce(Sum('hvac', output_field=FloatField()), 0.0),
-                total_production=Coalesce(Sum('production', output_field=FloatField()), 0.0),
-                total_stp=Coalesce(Sum('stp', output_field=FloatField()), 0.0),
-                total_admin_block=Coalesce(Sum('admin_block', output_field=FloatField()), 0.0),
-                total_utilities=Coalesce(Sum('utilities', output_field=FloatField()), 0.0),
-                total_others=Coalesce(Sum('others', output_field=FloatField()), 0.0),
-                total_renewable_solar=Coalesce(Sum('renewable_solar', output_field=FloatField()), 0.0),
-                total_renewable_other=Coalesce(Sum('renewable_other', output_field=FloatField()), 0.0)
-            )
+            if not queryset.exists():
+                # Return zero data if no matching records
+                response_data = {
+                    "recycle_percentage": 0,
+                    "remaining_percentage": 0
+                }
+                return Response(
+                    {
+                        "fiscal_year": f"{year}-{year + 1}",
+                        "Senttorecycle": response_data
+                    },
+                    status=status.HTTP_200_OK
+                )
 
-            if not energy_aggregate:
-                energy_aggregate = {key: 0.0 for key in energy_aggregate}
+            # Define waste fields for calculations
+            overall_total_fields = [
+                'food_waste', 'solid_Waste', 'E_Waste', 'Biomedical_waste', 'other_waste'
+            ]
 
-            total_renewable_energy = energy_aggregate['total_renewable_solar'] + energy_aggregate['total_renewable_other']
-            total_non_renewable_energy = (
-                energy_aggregate['total_hvac'] +
-                energy_aggregate['total_production'] +
-                energy_aggregate['total_stp'] +
-                energy_aggregate['total_admin_block'] +
-                energy_aggregate['total_utilities'] +
-                energy_aggregate['total_others']
-            )
-            total_energy = total_non_renewable_energy + total_renewable_energy
+            # Calculate total 'Landfill_waste'
+            Recycle_waste_total = queryset.aggregate(
+                total=Coalesce(Sum(Cast('Landfill_waste', FloatField())), 0.0)
+            )['total']
 
-            renewable_energy_percentage = (total_renewable_energy / total_energy * 100) if total_energy > 0 else 0
-            remaining_energy_percentage = (total_non_renewable_energy / total_energy * 100) if total_energy > 0 else 0
-            pie_chart_data = [
-                {"label": "Renewable Energy", "value": renewable_energy_percentage},
-                {"label": "Remaining Energy", "value": remaining_energy_percentage}
-            ]
+            # Calculate overall total waste
+            overall_totals = queryset.aggregate(
+                **{f"{waste_type}_total": Coalesce(Sum(Cast(waste_type, FloatField())), 0.0)
+                   for waste_type in overall_total_fields}
+            )
+            overall_total = sum(overall_totals.values())
 
-            energy_percentages = {}
-            overall_total = total_non_renewable_energy
-            for key, total in {
-                "hvac_total": energy_aggregate['total_hvac'],
-                "production_total": energy_aggregate['total_production'],
-                "stp_total": energy_aggregate['total_stp'],
-                "admin_block_total": energy_aggregate['total_admin_block'],
-                "utilities_total": energy_aggregate['total_utilities'],
-                "others_total": energy_aggregate['total_others']
-            }.items():
-                energy_percentages[key] = (total / overall_total * 100) if overall_total else 0
+            # Calculate remaining waste and percentages
+            remaining_waste_total = overall_total - Recycle_waste_total
+            
+            recycle_percentage = (Recycle_waste_total / overall_total) * 100 if overall_total else 0
+            remaining_percentage = (remaining_waste_total / overall_total) * 100 if overall_total else 0
 
-            # Final response data combining pie and donut chart information
+            # Prepare the response data
             response_data = {
-                "facility_id": facility_id,
-                "year": year,
-                "facility_location": facility_location,
-                "pie_chart_data": pie_chart_data,
-                "energy_percentages": {key: round(value, 2) for key, value in energy_percentages.items()}
-
+                "recycle_percentage": round(recycle_percentage, 2),
+                "remaining_percentage": round(remaining_percentage, 2)
             }
 
-            return Response(response_data, status=status.HTTP_200_OK)
+            return Response(
+                {
+                    "fiscal_year": f"{year}-{year + 1}",
+                    "sentToLandFill": response_data
+                },
+                status=status.HTTP_200_OK
+            )
 
+        except ValueError:
+            return Response({'error': 'Invalid year parameter.'}, status=status.HTTP_400_BAD_REQUEST)
         except Exception as e:
-            print(f"Error occurred: {e}")
+            logger.exception("Error occurred: %s", e)
             return Response({'error': f'An error occurred: {str(e)}'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
-'''Energy  Overview Cards ,Graphs and Individual line charts and donut charts Ends'''
+'''Waste Overviewgraphs and Individual Line charts and donut charts Ends'''
 
-'''Water Overview Cards ,Graphs and Individual Line Charts and donut Charts Starts'''
-#Water Card OverView
-class WaterViewCard_Over(APIView):
+
+'''Energy  Overview Cards ,Graphs and Individual line charts and donut charts Starts'''
+#Energy Overview Cards
+class EnergyViewCard_Over(APIView):
     permission_classes = [IsAuthenticated]
 
+    @etag_response
+    @cache_response
     def get(self, request):
         user = request.user
         facility_id = request.GET.get('facility_id', 'all')
@@ -3680,11 +1612,11 @@ class WaterViewCard_Over(APIView):
         year = request.GET.get('year')
 
         try:
-            # Validate facility ID
+            # Validate facility_id
             if facility_id != 'all' and not Facility.objects.filter(facility_id=facility_id, user=user).exists():
                 return Response({'error': 'Invalid facility ID or not associated with the logged-in user.'}, status=status.HTTP_400_BAD_REQUEST)
 
-            # Validate year parameter
+            # Validate year
             if year:
                 try:
                     year = int(year)
@@ -3693,57 +1625,120 @@ class WaterViewCard_Over(APIView):
                 except ValueError:
                     return Response({'error': 'Year must be an integer.'}, status=status.HTTP_400_BAD_REQUEST)
 
-            # Determine fiscal year range
+            # Determine start_date and end_date for the fiscal year
             if year:
                 start_date = datetime(year, 4, 1)
                 end_date = datetime(year + 1, 3, 31)
             else:
-                latest_entry = Water.objects.filter(user=user).order_by('-DatePicker').first()
-                if latest_entry:
-                    latest_year = latest_entry.DatePicker.year
-                    year = latest_year if latest_entry.DatePicker.month >= 4 else latest_year - 1
-                else:
-                    today = datetime.now()
-                    year = today.year - 1 if today.month < 4 else today.year
+                year = latest_fiscal_year(user, Energy)
 
                 start_date = datetime(year, 4, 1)
                 end_date = datetime(year + 1, 3, 31)
 
-            # Query water data
-            water_data = Water.objects.filter(user=user, DatePicker__range=(start_date, end_date))
+            # Query energy data
+            energy_data = Energy.objects.filter(user=user, DatePicker__range=(start_date, end_date))
 
             if facility_id != 'all':
-                water_data = water_data.filter(facility__facility_id=facility_id)
+                energy_data = energy_data.filter(facility__facility_id=facility_id)
 
             if facility_location:
-                water_data = water_data.filter(facility__location__icontains=facility_location)
+                energy_data = energy_data.filter(facility__facility_location__icontains=facility_location)
 
-            # Water fields for aggregation
-            water_fields = [
-                'Generated_Water', 'Recycled_Water', 'Softener_usage', 'Boiler_usage', 'otherUsage'
+            energy_fields = [
+                'hvac', 'production', 'stp', 'admin_block',
+                'utilities', 'others', 'renewable_solar', 'renewable_other', 'coking_coal', 
+                'coke_oven_coal', 'natural_gas', 'diesel', 'biomass_wood', 'biomass_other_solid'
             ]
 
-            # Calculate overall totals
-            overall_totals = {
-                f"overall_{field}": water_data.aggregate(total=Sum(field))['total'] or 0 for field in water_fields
-            }
-
             response_data = {
                 'year': year,
-                'overall_water_totals': overall_totals
+                'overall_energy_totals': {}
             }
 
+            # Every field's facility totals in one grouped query
+            facility_rows, overall_totals = facility_field_totals(energy_data, energy_fields)
+
+            if not facility_rows:
+                # Populate only specific fields with zero values when no data exists
+                zero_fields = ['hvac', 'production', 'stp', 'admin_block', 'utilities', 'others']
+                response_data['overall_energy_totals'] = {
+                    f"overall_{field}": 0.0 for field in zero_fields
+                }
+                response_data['overall_energy_totals']['overall_fuel_used_in_operations'] = 0.0
+                response_data['overall_energy_totals']['overall_renewable_energy'] = 0.0
+            else:
+                # Initialize counters for renewable energy and fuel usage totals
+                fuel_used_in_operations_total = 0
+                renewable_energy_total = 0
+
+                for field in energy_fields:
+                    overall_total = overall_totals[field]
+
+                    # Add renewable energy (sum of renewable_solar and renewable_other)
+                    if field in ['renewable_solar', 'renewable_other']:
+                        renewable_energy_total += overall_total
+
+                    # Add to fuel usage totals
+                    if field in ['coke_oven_coal', 'coking_coal', 'natural_gas', 'diesel', 'biomass_wood', 'biomass_other_solid']:
+                        fuel_used_in_operations_total += overall_total
+
+                    # Include other fields in the response
+                    if field not in ['renewable_solar', 'renewable_other', 'coke_oven_coal', 'coking_coal', 'natural_gas', 'diesel', 'biomass_wood', 'biomass_other_solid']:
+                        response_data['overall_energy_totals'][f"overall_{field}"] = overall_total
+
+                # Set the calculated totals for renewable energy and fuel used in operations
+                response_data['overall_energy_totals']['overall_fuel_used_in_operations'] = fuel_used_in_operations_total
+                response_data['overall_energy_totals']['overall_renewable_energy'] = renewable_energy_total
+
             return Response(response_data, status=status.HTTP_200_OK)
 
         except Exception as e:
             error_message = f"An error occurred: {str(e)}"
-            print(error_message)
+            logger.exception("An error occurred: %s", e)
             return Response({'error': error_message}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
-#GeneratedWater Overview Line Charts and Donut Chart
-class Generated_WaterOverviewView(APIView):
+#HVAC Line Charts and Donut Chart 
+class HVACOverviewView(MetricOverviewView):
+    model = Energy
+    field = 'hvac'
+
+
+#ProductionLine Charts and Donut charts
+class ProductionOverviewView(MetricOverviewView):
+    model = Energy
+    field = 'production'
+
+
+#STP Overview line charts and donut charts
+class StpOverviewView(MetricOverviewView):
+    model = Energy
+    field = 'stp'
+
+
+#Admin_block Overview Linecharts and donut charts
+class Admin_BlockOverviewView(MetricOverviewView):
+    model = Energy
+    field = 'admin_block'
+
+
+#Utilities_OverView Linecharts and Donut Charts
+class Utilities_OverviewView(MetricOverviewView):
+    model = Energy
+    field = 'utilities'
+
+
+# Others Overview Linecharts andDonut charts
+class Others_OverviewView(MetricOverviewView):
+    model = Energy
+    field = 'others'
+
+
+#Renewable_EnergyOverview Line Charts And Donut Charts
+class Renewable_EnergyOverView(APIView):
     permission_classes = [IsAuthenticated]
 
+    @etag_response
+    @cache_response
     def get(self, request):
         user = request.user
         facility_id = request.GET.get('facility_id', None)
@@ -3751,65 +1746,57 @@ class Generated_WaterOverviewView(APIView):
         year = request.GET.get('year', None)
 
         try:
+            # Determine fiscal year range
             if not year:
-                year = self.get_latest_available_year(user)
-
-            try:
-                year = int(year)
-            except ValueError:
-                return Response({'error': 'Invalid year parameter.'}, status=status.HTTP_400_BAD_REQUEST)
+                year = latest_fiscal_year(user, Energy)
 
-            start_date, end_date = self.get_fiscal_year_range(year)
-
-            filters = {
-                'user': user,
-                'DatePicker__range': (start_date.date(), end_date.date())
-            }
-            if facility_id and facility_id.lower() != 'all':
-                filters['facility__facility_id'] = facility_id
-            if facility_location:
-                filters['facility__location__icontains'] = facility_location
-
-            water_data = Water.objects.filter(**filters)
-            if not water_data.exists():
-                return self.get_empty_response(year)
+            year = int(year)
+            renewable_metrics = ['energy.renewable_solar', 'energy.renewable_other']
 
-            monthly_Generated_Water = (
-                water_data
-                .values('DatePicker__month')
-                .annotate(total_Generated_Water=Sum('Generated_Water'))
+            # Query monthly renewable energy data from the precomputed monthly cells
+            monthly_renewable_energy = (
+                rollup_queryset(user, year, renewable_metrics, facility_id, facility_location)
+                .values('month')
+                .annotate(total_renewable_energy=Sum('value'))
+                .order_by('month')
             )
 
-            Generated_Water = {month: 0 for month in range(1, 13)}
-            for entry in monthly_Generated_Water:
-                Generated_Water[entry['DatePicker__month']] = entry['total_Generated_Water']
+            # Map data to fiscal year months
+            renewable_energy = defaultdict(float)
+            for entry in monthly_renewable_energy:
+                renewable_energy[entry['month']] = entry['total_renewable_energy']
 
+            # Prepare line chart data
             month_order = [4, 5, 6, 7, 8, 9, 10, 11, 12, 1, 2, 3]
-            line_chart_data = [
-                {
-                    "month": datetime(1900, month, 1).strftime('%b'),
-                    "Generated_Water": Generated_Water[month]
-                }
-                for month in month_order
-            ]
+            line_chart_data = []
+            for month in month_order:
+                month_name = datetime(1900, month, 1).strftime('%b')
+                line_chart_data.append({
+                    "month": month_name,
+                    "renewable_energy": renewable_energy.get(month, 0)
+                })
 
-            # Prepare facility data for donut chart
-            facility_Generated_Water = (
-                water_data
+            # Query facility-wise renewable energy data
+            facility_renewable_energy = (
+                rollup_queryset(user, year, renewable_metrics, facility_id)
                 .values('facility__facility_name')
-                .annotate(total_Generated_Water=Sum('Generated_Water'))
-                .order_by('-total_Generated_Water')
+                .annotate(total_renewable_energy=Sum('value'))
+                .order_by('-total_renewable_energy')
             )
 
-            total_Generated_Water = sum(entry['total_Generated_Water'] for entry in facility_Generated_Water)
+            # Calculate total renewable energy for percentage calculations
+            total_renewable_energy = sum(entry['total_renewable_energy'] for entry in facility_renewable_energy)
+
+            # Prepare donut chart data
             donut_chart_data = [
                 {
                     "facility_name": entry['facility__facility_name'],
-                    "percentage": (entry['total_Generated_Water'] / total_Generated_Water * 100) if total_Generated_Water else 0,
+                    "percentage": (entry['total_renewable_energy'] / total_renewable_energy * 100) if total_renewable_energy else 0,
                 }
-                for entry in facility_Generated_Water
+                for entry in facility_renewable_energy
             ]
 
+            # Prepare and return response
             response_data = {
                 "year": year,
                 "line_chart_data": line_chart_data,
@@ -3819,45 +1806,17 @@ class Generated_WaterOverviewView(APIView):
             return Response(response_data, status=status.HTTP_200_OK)
 
         except Exception as e:
-            import traceback
-            print(f"Error: {str(e)}")
-            print("Traceback:", traceback.format_exc())
             return Response(
                 {'error': f'An error occurred while processing your request: {str(e)}'},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
 
-    def get_latest_available_year(self, user):
-        latest_water = Water.objects.filter(user=user).order_by('-DatePicker').first()
-        if latest_water:
-            latest_date = latest_water.DatePicker
-            # Adjust fiscal year if the data is after March
-            if latest_date.month >= 4:
-                return latest_date.year
-            else:
-                return latest_date.year - 1
-        return datetime.now().year  # Default to current year if no data is available
-
-    def get_fiscal_year_range(self, year):
-        start_date = datetime(year, 4, 1)
-        end_date = datetime(year + 1, 3, 31)
-        return start_date, end_date
-
-    def get_empty_response(self, year):
-        month_order = [4, 5, 6, 7, 8, 9, 10, 11, 12, 1, 2, 3]
-        line_chart_data = [{"month": datetime(1900, month, 1).strftime('%b'), "Generated_Water": 0} for month in month_order]
-        donut_chart_data = [{"facility_name": "No Facility", "percentage": 0}]
-        return Response({
-            "year": year,
-            "line_chart_data": line_chart_data,
-            "donut_chart_data": donut_chart_data
-        }, status=status.HTTP_200_OK)
-
-
-#Recycle Water Overview line charts and Donut chart
-class Recycle_WaterOverviewView(APIView):
+#Fuel Used in Opeartions Line Chart and donut chart
+class Fuel_Used_OperationsOverView(APIView):
     permission_classes = [IsAuthenticated]
 
+    @etag_response
+    @cache_response
     def get(self, request):
         user = request.user
         facility_id = request.GET.get('facility_id', None)
@@ -3865,67 +1824,68 @@ class Recycle_WaterOverviewView(APIView):
         year = request.GET.get('year', None)
 
         try:
+            # If year is not provided, get the latest available year based on the Energy model
             if not year:
-                year = self.get_latest_available_year(user)
+                year = latest_fiscal_year(user, Energy)
 
-            try:
-                year = int(year)
-            except ValueError:
-                return Response({'error': 'Invalid year parameter.'}, status=status.HTTP_400_BAD_REQUEST)
+            year = int(year)
+            fuel_metrics = [
+                'energy.coking_coal', 'energy.coke_oven_coal', 'energy.natural_gas',
+                'energy.diesel', 'energy.biomass_wood', 'energy.biomass_other_solid'
+            ]
 
-            start_date, end_date = self.get_fiscal_year_range(year)
+            # Query monthly fuel used in operations data from the precomputed monthly cells
+            monthly_fuel_used_in_operations = (
+                rollup_queryset(user, year, fuel_metrics, facility_id, facility_location)
+                .values('month')
+                .annotate(total_fuel_used_in_operations=Sum('value'))
+                .order_by('month')
+            )
 
-            filters = {
-                'user': user,
-                'DatePicker__range': (start_date.date(), end_date.date())
-            }
-            if facility_id and facility_id.lower() != 'all':
-                filters['facility__facility_id'] = facility_id
-            if facility_location:
-                filters['facility__location__icontains'] = facility_location
+            # Prepare line chart data with zero defaults
+            line_chart_data = []
+            fuel_used_in_operations = defaultdict(float)
 
-            water_data = Water.objects.filter(**filters)
-            if not water_data.exists():
-                return self.get_empty_response(year)
+            # Map retrieved data to months
+            for entry in monthly_fuel_used_in_operations:
+                fuel_used_in_operations[entry['month']] = entry['total_fuel_used_in_operations']
 
-            monthly_Recycled_Water = (
-                water_data
-                .values('DatePicker__month')
-                .annotate(total_Recycled_Water=Sum('Recycled_Water'))
-            )
+            # Define the month order (April to March)
+            month_order = [4, 5, 6, 7, 8, 9, 10, 11, 12, 1, 2, 3]
+            today = datetime.now()
+            for month in month_order:
+                month_name = datetime(1900, month, 1).strftime('%b')
 
-            Recycled_Water = {month: 0 for month in range(1, 13)}
-            for entry in monthly_Recycled_Water:
-                Recycled_Water[entry['DatePicker__month']] = entry['total_Recycled_Water']
+                if year == today.year and month > today.month:
+                    fuel_used_in_operations[month] = 0  # No data yet for future months of the current year
+                else:
+                    
+                    line_chart_data.append({
+                    "month": month_name,
+                    "fuel_used_in_operations": fuel_used_in_operations.get(month, 0)
+                })
 
-            month_order = [4, 5, 6, 7, 8, 9, 10, 11, 12, 1, 2, 3]
-            line_chart_data = [
-                {
-                    "month": datetime(1900, month, 1).strftime('%b'),
-                    "Recycled_Water": Recycled_Water[month]
-                }
-                for month in month_order
-            ]
 
-            # Prepare facility data for donut chart
-            facility_Recycled_Water = (
-                water_data
+            # Facility-wise fuel used in operations query for donut chart data
+            facility_fuel_used_in_operations = (
+                rollup_queryset(user, year, fuel_metrics, facility_id)
                 .values('facility__facility_name')
-                .annotate(total_Recycled_Water=Sum('Recycled_Water'))
-                .order_by('-total_Recycled_Water')
+                .annotate(total_fuel_used_in_operations=Sum('value'))
+                .order_by('-total_fuel_used_in_operations')
             )
 
-            total_Recycled_Water = sum(entry['total_Recycled_Water'] for entry in facility_Recycled_Water)
+            # Prepare donut chart data
+            total_fuel_used_in_operations = sum(entry['total_fuel_used_in_operations'] for entry in facility_fuel_used_in_operations)
             donut_chart_data = [
                 {
                     "facility_name": entry['facility__facility_name'],
-                    "percentage": (entry['total_Recycled_Water'] / total_Recycled_Water * 100) if total_Recycled_Water else 0,
+                    "percentage": (entry['total_fuel_used_in_operations'] / total_fuel_used_in_operations * 100) if total_fuel_used_in_operations else 0,
                 }
-                for entry in facility_Recycled_Water
+                for entry in facility_fuel_used_in_operations
             ]
 
             response_data = {
-                "year": year,
+                "year":year,
                 "line_chart_data": line_chart_data,
                 "donut_chart_data": donut_chart_data
             }
@@ -3933,44 +1893,17 @@ class Recycle_WaterOverviewView(APIView):
             return Response(response_data, status=status.HTTP_200_OK)
 
         except Exception as e:
-            import traceback
-            print(f"Error: {str(e)}")
-            print("Traceback:", traceback.format_exc())
             return Response(
                 {'error': f'An error occurred while processing your request: {str(e)}'},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
 
-    def get_latest_available_year(self, user):
-        latest_water = Water.objects.filter(user=user).order_by('-DatePicker').first()
-        if latest_water:
-            latest_date = latest_water.DatePicker
-            # Adjust fiscal year if the data is after March
-            if latest_date.month >= 4:
-                return latest_date.year
-            else:
-                return latest_date.year - 1
-        return datetime.now().year  # Default to current year if no data is available
-
-    def get_fiscal_year_range(self, year):
-        start_date = datetime(year, 4, 1)
-        end_date = datetime(year + 1, 3, 31)
-        return start_date, end_date
-
-    def get_empty_response(self, year):
-        month_order = [4, 5, 6, 7, 8, 9, 10, 11, 12, 1, 2, 3]
-        line_chart_data = [{"month": datetime(1900, month, 1).strftime('%b'), "Recycled_Water": 0} for month in month_order]
-        donut_chart_data = [{"facility_name": "No Facility", "percentage": 0}]
-        return Response({
-            "year": year,
-            "line_chart_data": line_chart_data,
-            "donut_chart_data": donut_chart_data
-        }, status=status.HTTP_200_OK)
-
-#SoftenSoftener_usage overview line chart and donut chart
-class Softener_usageOverviewView(APIView):
+#StackedEnergyOverview 
+class StackedEnergyOverviewView(APIView):
     permission_classes = [IsAuthenticated]
 
+    @etag_response
+    @cache_response
     def get(self, request):
         user = request.user
         facility_id = request.GET.get('facility_id', None)
@@ -3978,338 +1911,291 @@ class Softener_usageOverviewView(APIView):
         year = request.GET.get('year', None)
 
         try:
-            if not year:
-                year = self.get_latest_available_year(user)
+            filters = {'user': user}
 
-            try:
-                year = int(year)
-            except ValueError:
-                return Response({'error': 'Invalid year parameter.'}, status=status.HTTP_400_BAD_REQUEST)
+            if not year:
+                year = latest_fiscal_year(user, Energy)
 
-            start_date, end_date = self.get_fiscal_year_range(year)
+            year = int(year)
+            # Fiscal year and month are stored columns covered by an index
+            filters['fiscal_year'] = year
 
-            filters = {
-                'user': user,
-                'DatePicker__range': (start_date.date(), end_date.date())
-            }
+          
             if facility_id and facility_id.lower() != 'all':
-                filters['facility__facility_id'] = facility_id
-            if facility_location:
-                filters['facility__location__icontains'] = facility_location
+                try:
+                    Facility.objects.get(facility_id=facility_id)
+                    filters['facility__facility_id'] = facility_id
+                except Facility.DoesNotExist:
+                    return Response({'error': f'Facility with ID {facility_id} does not exist.'}, status=status.HTTP_400_BAD_REQUEST)
 
-            water_data = Water.objects.filter(**filters)
-            if not water_data.exists():
-                return self.get_empty_response(year)
+           
+            if facility_location and facility_location.lower() != 'all':
+                if not Facility.objects.filter(facility_location__icontains=facility_location).exists():
+                    return Response({'error': f'No facility found with location {facility_location}.'}, status=status.HTTP_400_BAD_REQUEST)
+                filters['facility__facility_location__icontains'] = facility_location
 
-            monthly_Softener_usage = (
-                water_data
-                .values('DatePicker__month')
-                .annotate(total_Softener_usage=Sum('Softener_usage'))
-            )
+            energy_types = [
+                'hvac', 'production', 'stp', 'admin_block', 'utilities', 
+                'others', 'renewable_energy'
+            ]
 
-            Softener_usage = {month: 0 for month in range(1, 13)}
-            for entry in monthly_Softener_usage:
-                Softener_usage[entry['DatePicker__month']] = entry['total_Softener_usage']
 
-            month_order = [4, 5, 6, 7, 8, 9, 10, 11, 12, 1, 2, 3]
-            line_chart_data = [
-                {
-                    "month": datetime(1900, month, 1).strftime('%b'),
-                    "Softener_usage": Softener_usage[month]
-                }
-                for month in month_order
-            ]
+            monthly_data = {month: {energy_type: 0 for energy_type in energy_types} for month in range(1, 13)}
 
-            # Prepare facility data for donut chart
-            facility_Softener_usage = (
-                water_data
-                .values('facility__facility_name')
-                .annotate(total_Softener_usage=Sum('Softener_usage'))
-                .order_by('-total_Softener_usage')
-            )
+            for energy_type in energy_types:
+                queryset = Energy.objects.filter(**filters)
 
-            total_Softener_usage = sum(entry['total_Softener_usage'] for entry in facility_Softener_usage)
-            donut_chart_data = [
-                {
-                    "facility_name": entry['facility__facility_name'],
-                    "percentage": (entry['total_Softener_usage'] / total_Softener_usage * 100) if total_Softener_usage else 0,
-                }
-                for entry in facility_Softener_usage
-            ]
+                if energy_type == 'renewable_energy':
+                    monthly_energy = (
+                        queryset
+                        .values('fiscal_month')
+                        .annotate(
+                            total=Coalesce(
+                                Sum('renewable_solar') + Sum('renewable_other'),
+                                Value(0, output_field=FloatField())
+                            )
+                        )
+                        .order_by('fiscal_month')
+                    )
+                else:
+                    monthly_energy = (
+                        queryset
+                        .values('fiscal_month')
+                        .annotate(total=Coalesce(Sum(energy_type, output_field=FloatField()), Value(0, output_field=FloatField())))
+                        .order_by('fiscal_month')
+                    )
+
+                for entry in monthly_energy:
+                    month = entry['fiscal_month']
+                    monthly_data[month][energy_type] = entry['total']
+
+            
+            stacked_bar_data = []
+            month_order = [4, 5, 6, 7, 8, 9, 10, 11, 12, 1, 2, 3]
+            for month in month_order:
+                month_name = datetime(1900, month, 1).strftime('%b')
+                stacked_bar_data.append({
+                    "month": month_name,
+                    **monthly_data[month] 
+                })
 
             response_data = {
+                "facility_id": facility_id,
                 "year": year,
-                "line_chart_data": line_chart_data,
-                "donut_chart_data": donut_chart_data
+                "facility_location": facility_location,
+                "stacked_bar_data": stacked_bar_data
             }
 
             return Response(response_data, status=status.HTTP_200_OK)
 
         except Exception as e:
-            import traceback
-            print(f"Error: {str(e)}")
-            print("Traceback:", traceback.format_exc())
-            return Response(
-                {'error': f'An error occurred while processing your request: {str(e)}'},
-                status=status.HTTP_500_INTERNAL_SERVER_ERROR
-            )
-
-    def get_latest_available_year(self, user):
-        latest_water = Water.objects.filter(user=user).order_by('-DatePicker').first()
-        if latest_water:
-            latest_date = latest_water.DatePicker
-            # Adjust fiscal year if the data is after March
-            if latest_date.month >= 4:
-                return latest_date.year
-            else:
-                return latest_date.year - 1
-        return datetime.now().year  # Default to current year if no data is available
-
-    def get_fiscal_year_range(self, year):
-        start_date = datetime(year, 4, 1)
-        end_date = datetime(year + 1, 3, 31)
-        return start_date, end_date
-
-    def get_empty_response(self, year):
-        month_order = [4, 5, 6, 7, 8, 9, 10, 11, 12, 1, 2, 3]
-        line_chart_data = [{"month": datetime(1900, month, 1).strftime('%b'), "Softener_usage": 0} for month in month_order]
-        donut_chart_data = [{"facility_name": "No Facility", "percentage": 0}]
-        return Response({
-            "year": year,
-            "line_chart_data": line_chart_data,
-            "donut_chart_data": donut_chart_data
-        }, status=status.HTTP_200_OK)
+            logger.exception("Error occurred: %s", e)
+            return Response({'error': f'An error occurred: {str(e)}'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
-#Boiler_usage Overview line chart and Donut Chart
-class Boiler_usageOverviewView(APIView):
+#EnergyAnalyticsView With Pie Chart And Donut CHart
+class EnergyAnalyticsView(APIView):
     permission_classes = [IsAuthenticated]
 
+    @etag_response
+    @cache_response
     def get(self, request):
         user = request.user
-        facility_id = request.GET.get('facility_id', None)
-        facility_location = request.GET.get('facility_location', None)
         year = request.GET.get('year', None)
+        facility_id = request.GET.get('facility_id', 'all')
+        facility_location = request.GET.get('facility_location', None)
 
         try:
+            filters = {'user': user}
+
+            today = datetime.now()
+            
             if not year:
-                year = self.get_latest_available_year(user)
+                year = latest_fiscal_year(user, Energy)
 
-            try:
-                year = int(year)
-            except ValueError:
-                return Response({'error': 'Invalid year parameter.'}, status=status.HTTP_400_BAD_REQUEST)
+            year = int(year)
+            start_date = datetime(year, 4, 1)
+            end_date = datetime(year + 1, 3, 31)
 
-            start_date, end_date = self.get_fiscal_year_range(year)
+            filters['DatePicker__range'] = (start_date, end_date)
 
-            filters = {
-                'user': user,
-                'DatePicker__range': (start_date.date(), end_date.date())
-            }
-            if facility_id and facility_id.lower() != 'all':
-                filters['facility__facility_id'] = facility_id
-            if facility_location:
-                filters['facility__location__icontains'] = facility_location
+            if facility_id.lower() != 'all':
+                try:
+                    Facility.objects.get(facility_id=facility_id)
+                    filters['facility__facility_id'] = facility_id
+                except Facility.DoesNotExist:
+                    return Response({'error': f'Facility with ID {facility_id} does not exist.'}, status=status.HTTP_400_BAD_REQUEST)
 
-            water_data = Water.objects.filter(**filters)
-            if not water_data.exists():
-                return self.get_empty_response(year)
+            if facility_location and facility_location.lower() != 'all':
+                if not Facility.objects.filter(facility_location__icontains=facility_location).exists():
+                    return Response({'error': f'No facility found with location {facility_location}.'}, status=status.HTTP_400_BAD_REQUEST)
+                filters['facility__facility_location__icontains'] = facility_location
 
-            monthly_Boiler_usage = (
-                water_data
-                .values('DatePicker__month')
-                .annotate(total_Boiler_usage=Sum('Boiler_usage'))
+            energy_aggregate = Energy.objects.filter(**filters).aggregate(
+                total_hvac=Coalesce(Sum('hvac', output_field=FloatField()), 0.0),
+                total_production=Coalesce(Sum('production', output_field=FloatField()), 0.0),
+                total_stp=Coalesce(Sum('stp', output_field=FloatField()), 0.0),
+                total_admin_block=Coalesce(Sum('admin_block', output_field=FloatField()), 0.0),
+                total_utilities=Coalesce(Sum('utilities', output_field=FloatField()), 0.0),
+                total_others=Coalesce(Sum('others', output_field=FloatField()), 0.0),
+                total_renewable_solar=Coalesce(Sum('renewable_solar', output_field=FloatField()), 0.0),
+                total_renewable_other=Coalesce(Sum('renewable_other', output_field=FloatField()), 0.0)
             )
 
-            Boiler_usage = {month: 0 for month in range(1, 13)}
-            for entry in monthly_Boiler_usage:
-                Boiler_usage[entry['DatePicker__month']] = entry['total_Boiler_usage']
-
-            month_order = [4, 5, 6, 7, 8, 9, 10, 11, 12, 1, 2, 3]
-            line_chart_data = [
-                {
-                    "month": datetime(1900, month, 1).strftime('%b'),
-                    "Boiler_usage": Boiler_usage[month]
-                }
-                for month in month_order
-            ]
+            if not energy_aggregate:
+                energy_aggregate = {key: 0.0 for key in energy_aggregate}
 
-            # Prepare facility data for donut chart
-            facility_Boiler_usage = (
-                water_data
-                .values('facility__facility_name')
-                .annotate(total_Boiler_usage=Sum('Boiler_usage'))
-                .order_by('-total_Boiler_usage')
+            total_renewable_energy = energy_aggregate['total_renewable_solar'] + energy_aggregate['total_renewable_other']
+            total_non_renewable_energy = (
+                energy_aggregate['total_hvac'] +
+                energy_aggregate['total_production'] +
+                energy_aggregate['total_stp'] +
+                energy_aggregate['total_admin_block'] +
+                energy_aggregate['total_utilities'] +
+                energy_aggregate['total_others']
             )
+            total_energy = total_non_renewable_energy + total_renewable_energy
 
-            total_Boiler_usage = sum(entry['total_Boiler_usage'] for entry in facility_Boiler_usage)
-            donut_chart_data = [
-                {
-                    "facility_name": entry['facility__facility_name'],
-                    "percentage": (entry['total_Boiler_usage'] / total_Boiler_usage * 100) if total_Boiler_usage else 0,
-                }
-                for entry in facility_Boiler_usage
+            renewable_energy_percentage = (total_renewable_energy / total_energy * 100) if total_energy > 0 else 0
+            remaining_energy_percentage = (total_non_renewable_energy / total_energy * 100) if total_energy > 0 else 0
+            pie_chart_data = [
+                {"label": "Renewable Energy", "value": renewable_energy_percentage},
+                {"label": "Remaining Energy", "value": remaining_energy_percentage}
             ]
 
+            energy_percentages = {}
+            overall_total = total_non_renewable_energy
+            for key, total in {
+                "hvac_total": energy_aggregate['total_hvac'],
+                "production_total": energy_aggregate['total_production'],
+                "stp_total": energy_aggregate['total_stp'],
+                "admin_block_total": energy_aggregate['total_admin_block'],
+                "utilities_total": energy_aggregate['total_utilities'],
+                "others_total": energy_aggregate['total_others']
+            }.items():
+                energy_percentages[key] = (total / overall_total * 100) if overall_total else 0
+
+            # Final response data combining pie and donut chart information
             response_data = {
+                "facility_id": facility_id,
                 "year": year,
-                "line_chart_data": line_chart_data,
-                "donut_chart_data": donut_chart_data
+                "facility_location": facility_location,
+                "pie_chart_data": pie_chart_data,
+                "energy_percentages": {key: round(value, 2) for key, value in energy_percentages.items()}
+
             }
 
             return Response(response_data, status=status.HTTP_200_OK)
 
         except Exception as e:
-            import traceback
-            print(f"Error: {str(e)}")
-            print("Traceback:", traceback.format_exc())
-            return Response(
-                {'error': f'An error occurred while processing your request: {str(e)}'},
-                status=status.HTTP_500_INTERNAL_SERVER_ERROR
-            )
+            logger.exception("Error occurred: %s", e)
+            return Response({'error': f'An error occurred: {str(e)}'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
-    def get_latest_available_year(self, user):
-        latest_water = Water.objects.filter(user=user).order_by('-DatePicker').first()
-        if latest_water:
-            latest_date = latest_water.DatePicker
-            # Adjust fiscal year if the data is after March
-            if latest_date.month >= 4:
-                return latest_date.year
-            else:
-                return latest_date.year - 1
-        return datetime.now().year # Default to current year if no data is available
+'''Energy  Overview Cards ,Graphs and Individual line charts and donut charts Ends'''
 
-    def get_fiscal_year_range(self, year):
-        start_date = datetime(year, 4, 1)
-        end_date = datetime(year + 1, 3, 31)
-        return start_date, end_date
+'''Water Overview Cards ,Graphs and Individual Line Charts and donut Charts Starts'''
+#Water Card OverView
+class WaterViewCard_Over(APIView):
+    permission_classes = [IsAuthenticated]
 
-    def get_empty_response(self, year):
-        month_order = [4, 5, 6, 7, 8, 9, 10, 11, 12, 1, 2, 3]
-        line_chart_data = [{"month": datetime(1900, month, 1).strftime('%b'), "Boiler_usage": 0} for month in month_order]
-        donut_chart_data = [{"facility_name": "No Facility", "percentage": 0}]
-        return Response({
-            "year": year,
-            "line_chart_data": line_chart_data,
-            "donut_chart_data": donut_chart_data
-        }, status=status.HTTP_200_OK)
+    @etag_response
+    @cache_response
+    def get(self, request):
+        user = request.user
+        facility_id = request.GET.get('facility_id', 'all')
+        facility_location = request.GET.get('facility_location')
+        year = request.GET.get('year')
+
+        try:
+            # Validate facility ID
+            if facility_id != 'all' and not Facility.objects.filter(facility_id=facility_id, user=user).exists():
+                return Response({'error': 'Invalid facility ID or not associated with the logged-in user.'}, status=status.HTTP_400_BAD_REQUEST)
+
+            # Validate year parameter
+            if year:
+                try:
+                    year = int(year)
+                    if year < 1900 or year > datetime.now().year + 10:  # Allow future years up to 10 years ahead
+                        return Response({'error': 'Invalid year parameter.'}, status=status.HTTP_400_BAD_REQUEST)
+                except ValueError:
+                    return Response({'error': 'Year must be an integer.'}, status=status.HTTP_400_BAD_REQUEST)
+
+            # Determine fiscal year range
+            if year:
+                start_date = datetime(year, 4, 1)
+                end_date = datetime(year + 1, 3, 31)
+            else:
+                year = latest_fiscal_year(user, Water)
 
-#otherUsage overview line chart and Donut chart
-class otherUsage_OverviewView(APIView):
-    permission_classes = [IsAuthenticated]
+                start_date = datetime(year, 4, 1)
+                end_date = datetime(year + 1, 3, 31)
 
-    def get(self, request):
-        user = request.user
-        facility_id = request.GET.get('facility_id', None)
-        facility_location = request.GET.get('facility_location', None)
-        year = request.GET.get('year', None)
+            # Query water data
+            water_data = Water.objects.filter(user=user, DatePicker__range=(start_date, end_date))
 
-        try:
-            if not year:
-                year = self.get_latest_available_year(user)
+            if facility_id != 'all':
+                water_data = water_data.filter(facility__facility_id=facility_id)
 
-            try:
-                year = int(year)
-            except ValueError:
-                return Response({'error': 'Invalid year parameter.'}, status=status.HTTP_400_BAD_REQUEST)
+            if facility_location:
+                water_data = water_data.filter(facility__facility_location__icontains=facility_location)
+
+            # Water fields for aggregation
+            water_fields = [
+                'Generated_Water', 'Recycled_Water', 'Softener_usage', 'Boiler_usage', 'otherUsage'
+            ]
 
-            start_date, end_date = self.get_fiscal_year_range(year)
+            # Calculate overall totals from one grouped query
+            _, field_totals = facility_field_totals(water_data, water_fields)
+            overall_totals = {f"overall_{field}": field_totals[field] for field in water_fields}
 
-            filters = {
-                'user': user,
-                'DatePicker__range': (start_date.date(), end_date.date())
+            response_data = {
+                'year': year,
+                'overall_water_totals': overall_totals
             }
-            if facility_id and facility_id.lower() != 'all':
-                filters['facility__facility_id'] = facility_id
-            if facility_location:
-                filters['facility__location__icontains'] = facility_location
 
-            water_data = Water.objects.filter(**filters)
-            if not water_data.exists():
-                return self.get_empty_response(year)
+            return Response(response_data, status=status.HTTP_200_OK)
 
-            monthly_otherUsage = (
-                water_data
-                .values('DatePicker__month')
-                .annotate(total_otherUsage=Sum('otherUsage'))
-            )
+        except Exception as e:
+            error_message = f"An error occurred: {str(e)}"
+            logger.exception("An error occurred: %s", e)
+            return Response({'error': error_message}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
-            otherUsage = {month: 0 for month in range(1, 13)}
-            for entry in monthly_otherUsage:
-                otherUsage[entry['DatePicker__month']] = entry['total_otherUsage']
+#GeneratedWater Overview Line Charts and Donut Chart
+class Generated_WaterOverviewView(MetricOverviewView):
+    model = Water
+    field = 'Generated_Water'
 
-            month_order = [4, 5, 6, 7, 8, 9, 10, 11, 12, 1, 2, 3]
-            line_chart_data = [
-                {
-                    "month": datetime(1900, month, 1).strftime('%b'),
-                    "otherUsage": otherUsage[month]
-                }
-                for month in month_order
-            ]
 
-            # Prepare facility data for donut chart
-            facility_otherUsage = (
-                water_data
-                .values('facility__facility_name')
-                .annotate(total_otherUsage=Sum('otherUsage'))
-                .order_by('-total_otherUsage')
-            )
 
-            total_otherUsage = sum(entry['total_otherUsage'] for entry in facility_otherUsage)
-            donut_chart_data = [
-                {
-                    "facility_name": entry['facility__facility_name'],
-                    "percentage": (entry['total_otherUsage'] / total_otherUsage * 100) if total_otherUsage else 0,
-                }
-                for entry in facility_otherUsage
-            ]
+#Recycle Water Overview line charts and Donut chart
+class Recycle_WaterOverviewView(MetricOverviewView):
+    model = Water
+    field = 'Recycled_Water'
 
-            response_data = {
-                "year": year,
-                "line_chart_data": line_chart_data,
-                "donut_chart_data": donut_chart_data
-            }
 
-            return Response(response_data, status=status.HTTP_200_OK)
+#SoftenSoftener_usage overview line chart and donut chart
+class Softener_usageOverviewView(MetricOverviewView):
+    model = Water
+    field = 'Softener_usage'
 
-        except Exception as e:
-            import traceback
-            print(f"Error: {str(e)}")
-            print("Traceback:", traceback.format_exc())
-            return Response(
-                {'error': f'An error occurred while processing your request: {str(e)}'},
-                status=status.HTTP_500_INTERNAL_SERVER_ERROR
-            )
 
-    def get_latest_available_year(self, user):
-        latest_water = Water.objects.filter(user=user).order_by('-DatePicker').first()
-        if latest_water:
-            latest_date = latest_water.DatePicker
-            # Adjust fiscal year if the data is after March
-            if latest_date.month >= 4:
-                return latest_date.year
-            else:
-                return latest_date.year - 1
-        return datetime.now().year  # Default to current year if no data is available
+#Boiler_usage Overview line chart and Donut Chart
+class Boiler_usageOverviewView(MetricOverviewView):
+    model = Water
+    field = 'Boiler_usage'
 
-    def get_fiscal_year_range(self, year):
-        start_date = datetime(year, 4, 1)
-        end_date = datetime(year + 1, 3, 31)
-        return start_date, end_date
 
-    def get_empty_response(self, year):
-        month_order = [4, 5, 6, 7, 8, 9, 10, 11, 12, 1, 2, 3]
-        line_chart_data = [{"month": datetime(1900, month, 1).strftime('%b'), "otherUsage": 0} for month in month_order]
-        donut_chart_data = [{"facility_name": "No Facility", "percentage": 0}]
-        return Response({
-            "year": year,
-            "line_chart_data": line_chart_data,
-            "donut_chart_data": donut_chart_data
-        }, status=status.HTTP_200_OK)
+#otherUsage overview line chart and Donut chart
+class otherUsage_OverviewView(MetricOverviewView):
+    model = Water
+    field = 'otherUsage'
+
 
 #Stacked Graph Overview 
 class StackedWaterOverviewView(APIView):
     permission_classes = [IsAuthenticated]
 
+    @etag_response
+    @cache_response
     def get(self, request):
         user = request.user
         facility_id = request.GET.get('facility_id', None)
@@ -4320,21 +2206,12 @@ class StackedWaterOverviewView(APIView):
             filters = {'user': user}
 
             if not year:
-                latest_water = Water.objects.filter(user=user).aggregate(latest_date=Max('DatePicker'))
-                if latest_water['latest_date']:
-                    latest_date = latest_water['latest_date']
-                    year = latest_date.year if latest_date.month >= 4 else latest_date.year - 1
-                else:
-                    # Default to the current fiscal year if no data exists
-                    today = datetime.now()
-                    year = today.year if today.month >= 4 else today.year - 1
+                year = latest_fiscal_year(user, Water)
 
             year = int(year)  # Ensure year is an integer
 
-            # Determine fiscal year range
-            start_date = datetime(year, 4, 1)
-            end_date = datetime(year + 1, 3, 31)
-            filters['DatePicker__range'] = (start_date, end_date)
+            # Fiscal year and month are stored columns covered by an index
+            filters['fiscal_year'] = year
 
           
             if facility_id and facility_id.lower() != 'all':
@@ -4363,25 +2240,25 @@ class StackedWaterOverviewView(APIView):
                 if water_type == 'renewable_water':
                     monthly_water = (
                         queryset
-                        .values('DatePicker__month')
+                        .values('fiscal_month')
                         .annotate(
                             total=Coalesce(
                                 Sum('renewable_solar') + Sum('renewable_other'),
                                 Value(0, output_field=FloatField())
                             )
                         )
-                        .order_by('DatePicker__month')
+                        .order_by('fiscal_month')
                     )
                 else:
                     monthly_water = (
                         queryset
-                        .values('DatePicker__month')
+                        .values('fiscal_month')
                         .annotate(total=Coalesce(Sum(water_type, output_field=FloatField()), Value(0, output_field=FloatField())))
-                        .order_by('DatePicker__month')
+                        .order_by('fiscal_month')
                     )
 
                 for entry in monthly_water:
-                    month = entry['DatePicker__month']
+                    month = entry['fiscal_month']
                     monthly_data[month][water_type] = entry['total']
 
             
@@ -4404,13 +2281,15 @@ class StackedWaterOverviewView(APIView):
             return Response(response_data, status=status.HTTP_200_OK)
 
         except Exception as e:
-            print(f"Error occurred: {e}") 
+            logger.exception("Error occurred: %s", e)
             return Response({'error': f'An error occurred: {str(e)}'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 #Water Anaytics Donut Chart And Line Graph
 class WaterAnalyticsView(APIView):
     permission_classes = [IsAuthenticated]
 
+    @etag_response
+    @cache_response
     def get(self, request):
         user = request.user
         year = request.GET.get('year', None)
@@ -4423,14 +2302,7 @@ class WaterAnalyticsView(APIView):
 
             # Year calculation
             if not year:
-                latest_water = Water.objects.filter(user=user).aggregate(latest_date=Max('DatePicker'))
-                if latest_water['latest_date']:
-                    latest_date = latest_water['latest_date']
-                    year = latest_date.year if latest_date.month >= 4 else latest_date.year - 1
-                else:
-                    # Default to the current fiscal year if no data exists
-                    today = datetime.now()
-                    year = today.year if today.month >= 4 else today.year - 1
+                year = latest_fiscal_year(user, Water)
 
             year = int(year)  # Ensure year is an integer
 
@@ -4520,6 +2392,8 @@ class WaterAnalyticsView(APIView):
 class BiodiversityMetricsGraphsView(APIView):
     permission_classes = [IsAuthenticated]
 
+    @etag_response
+    @cache_response
     def get(self, request):
         user = request.user
         facility_id = request.GET.get('facility_id', 'all')
@@ -4530,10 +2404,9 @@ class BiodiversityMetricsGraphsView(APIView):
             if facility_id != 'all':
                 filters['facility__facility_id'] = facility_id
 
-            # Query all data for the user and facility
-            all_years_data = Biodiversity.objects.filter(**filters)
-
-            if not all_years_data.exists():
+            # Get the latest date if no year is specified
+            latest_date = latest_entry_date(user, Biodiversity, facility_id)
+            if not latest_date:
                 return Response(
                     {
                         "facility_id": facility_id,
@@ -4560,87 +2433,68 @@ class BiodiversityMetricsGraphsView(APIView):
                     status=status.HTTP_200_OK,
                 )
 
-            # Get the latest date if no year is specified
-            latest_date = all_years_data.aggregate(latest_date=Max('DatePicker'))['latest_date']
-            if not latest_date:
-                return Response({'error': 'No data available in the database.'}, status=status.HTTP_404_NOT_FOUND)
-
-            latest_year = latest_date.year
-            year = request.GET.get('year', latest_year)
+            year = request.GET.get('year', latest_date.year)
 
             try:
                 year = int(year)
             except ValueError:
                 return Response({'error': 'Invalid year provided.'}, status=status.HTTP_400_BAD_REQUEST)
 
-            # Define fiscal year ranges for filtering
-            start_date = datetime(year, 4, 1)
-            end_date = datetime(year + 1, 3, 31)
-
-            # Filter data for the current year
-            current_year_data = all_years_data.filter(DatePicker__range=(start_date, end_date))
-
-            # Aggregate yearly metrics
-            yearly_data = {}
-            for entry in all_years_data.values('DatePicker', 'width', 'height', 'no_trees', 'totalArea', 'head_count'):
-                entry_year = entry['DatePicker'].year
-                if entry_year not in yearly_data:
-                    yearly_data[entry_year] = {'no_trees': 0, 'width': 0, 'height': 0, 'totalArea': 0, 'head_count': 0}
-                yearly_data[entry_year]['no_trees'] += entry['no_trees'] or 0
-                yearly_data[entry_year]['width'] += entry['width'] or 0
-                yearly_data[entry_year]['height'] += entry['height'] or 0
-                yearly_data[entry_year]['totalArea'] += entry['totalArea'] or 0
-                yearly_data[entry_year]['head_count'] += entry['head_count'] or 0
-
-            # Compute metrics for each year
-            results = []
-            for entry_year, data in yearly_data.items():
-                total_trees = data['no_trees']
-                carbon_offset = 0.00006 * (data['width'] ** 2) * data['height'] * total_trees
-                green_belt_density = (total_trees / data['totalArea']) * 10000 if data['totalArea'] > 0 else 0
-                trees_per_capita = total_trees / data['head_count'] if data['head_count'] > 0 else 0
-                results.append({
-                    'year': entry_year,
-                    'carbon_offset': carbon_offset,
-                    'green_belt_density': green_belt_density,
-                    'trees_per_capita': trees_per_capita,
-                })
-
-            # Sort results by year
-            results.sort(key=lambda x: x['year'], reverse=True)
-            results = results[:5]
-
-            # Prepare chart data in the requested structure
-            offset_year_data = []
-            green_belt_density_data = []
-            trees_per_capita_data = []
+            # Fiscal year ranges of the requested year and the one before it
+            current = Q(DatePicker__range=(datetime(year, 4, 1), datetime(year + 1, 3, 31)))
+            previous = Q(DatePicker__range=(datetime(year - 1, 4, 1), datetime(year, 3, 31)))
 
-            for entry in results:
-                offset_year_data.append({
-                    'year': entry['year'],
-                    'carbon_offset': entry['carbon_offset'],
-                })
+            # One grouped query: per calendar year totals for the charts, plus the fiscal
+            # year sums that are added up over the groups for the current year cards
+            yearly = list(
+                Biodiversity.objects.filter(DatePicker__isnull=False, **filters)
+                .annotate(entry_year=ExtractYear('DatePicker'))
+                .values('entry_year')
+                .annotate(
+                    trees=Sum('no_trees'),
+                    area=Sum('totalArea'),
+                    heads=Sum('head_count'),
+                    offset=Sum('carbon_offset'),
+                    current_trees=Sum('no_trees', filter=current),
+                    current_area=Sum('totalArea', filter=current),
+                    current_heads=Sum('head_count', filter=current),
+                    current_planted=Sum('new_trees_planted', filter=current),
+                    current_offset=Sum('carbon_offset', filter=current),
+                    current_biomass=Sum('biomass', filter=current),
+                    previous_offset=Sum('carbon_offset', filter=previous),
+                )
+                .order_by('-entry_year')
+            )
 
-                green_belt_density_data.append({
-                    'year': entry['year'],
-                    'green_belt_density': entry['green_belt_density'],
-                })
+            # Latest five years, newest first
+            results = [
+                {
+                    'year': row['entry_year'],
+                    'carbon_offset': row['offset'] or 0,
+                    'green_belt_density': self.green_belt_density(row['trees'], row['area']),
+                    'trees_per_capita': self.trees_per_capita(row['trees'], row['heads']),
+                }
+                for row in yearly[:5]
+            ]
 
-                trees_per_capita_data.append({
-                    'year': entry['year'],
-                    'trees_per_capita': entry['trees_per_capita'],
-                })
+            def fiscal_total(key):
+                return sum(row[key] or 0 for row in yearly)
 
             # Prepare metrics for the current year
-            total_trees = green_belt_density = trees_per_capita = new_trees_planted = biomass = 0
-            carbon_offset = co2_sequestration_rate = 0
-
-            if current_year_data.exists():
-                total_trees, green_belt_density, trees_per_capita, new_trees_planted = self.calculate_metrics(current_year_data)
-                carbon_offset = self.calculate_co2(current_year_data)
-                biomass = self.calculate_biomass(current_year_data)
-                co2_sequestration_rate = self.calculate_co2_sequestration_rate(all_years_data, current_year_data)
-            
+            total_trees = fiscal_total('current_trees')
+            carbon_offset = fiscal_total('current_offset')
+            current_year_metrics = {
+                "total_trees": total_trees,
+                "carbon_offset": carbon_offset,
+                "green_belt_density": self.green_belt_density(total_trees, fiscal_total('current_area')),
+                "trees_per_capita": self.trees_per_capita(total_trees, fiscal_total('current_heads')),
+                "new_trees_planted": fiscal_total('current_planted'),
+                "biomass": fiscal_total('current_biomass'),
+                "co2_sequestration_rate": 0,
+            }
+            if any(row['current_trees'] is not None for row in yearly):
+                current_year_metrics["co2_sequestration_rate"] = carbon_offset - fiscal_total('previous_offset')
+
             offset_year_data = [{"year": r['year'], "carbon_offset": r['carbon_offset']} for r in results]
             green_belt_density_data = [{"year": r['year'], "green_belt_density": r['green_belt_density']} for r in results]
             trees_per_capita_data = [{"year": r['year'], "trees_per_capita": r['trees_per_capita']} for r in results]
@@ -4648,16 +2502,8 @@ class BiodiversityMetricsGraphsView(APIView):
             response_data = {
                 "facility_id": facility_id,
                 "year": year,
-                "current_year_metrics": {
-                    "total_trees": total_trees,
-                    "carbon_offset": carbon_offset,
-                    "green_belt_density": green_belt_density,
-                    "trees_per_capita": trees_per_capita,
-                    "new_trees_planted": new_trees_planted,
-                    "biomass": biomass,
-                    "co2_sequestration_rate": co2_sequestration_rate,
-                },
-                 "Offset_year": offset_year_data,
+                "current_year_metrics": current_year_metrics,
+                "Offset_year": offset_year_data,
                 "Green_Belt_Density": green_belt_density_data,
                 "Trees_Per_Capita": trees_per_capita_data,
             }
@@ -4667,53 +2513,13 @@ class BiodiversityMetricsGraphsView(APIView):
         except Exception as e:
             return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
-    def calculate_co2(self, data):
-        return sum(
-            0.00006 *
-            (entry['width'] or 0) ** 2 *
-            (entry['height'] or 0) *
-            (entry['no_trees'] or 0)
-            for entry in data.values('width', 'height', 'no_trees')
-        )
-
-    def calculate_biomass(self, data):
-        return sum(
-            0.0998 *
-            (entry['width'] or 0) ** 2 *
-            (entry['height'] or 0)
-            for entry in data.values('width', 'height')
-        )
-
-    def calculate_metrics(self, data):
-        aggregated = data.aggregate(
-            total_trees=Sum('no_trees'),
-            total_area=Sum('totalArea'),
-            head_count=Sum('head_count'),
-            new_trees_planted=Sum('new_trees_planted')
-        )
-        total_trees = aggregated.get('total_trees', 0)
-        total_area = aggregated.get('total_area', 0)
-        head_count = aggregated.get('head_count', 0)
-        new_trees_planted = aggregated.get('new_trees_planted', 0)
-
-        green_belt_density = (total_trees / total_area) * 10000 if total_area > 0 else 0
-        trees_per_capita = total_trees / head_count if head_count > 0 else 0
-
-        return total_trees, green_belt_density, trees_per_capita, new_trees_planted
-
-    def calculate_co2_sequestration_rate(self, all_years_data, current_year_data):
-        # Get the current year from the current year's data
-        current_year = current_year_data.first().DatePicker.year
+    @staticmethod
+    def green_belt_density(total_trees, total_area):
+        return (total_trees / total_area) * 10000 if total_area else 0
 
-        # Fetch data for the previous year
-        prev_year_data = all_years_data.filter(DatePicker__year=current_year - 1)
-
-        # Calculate CO2 sequestration rate
-        current_year_co2 = self.calculate_co2(current_year_data)
-        prev_year_co2 = self.calculate_co2(prev_year_data) if prev_year_data.exists() else 0
-
-        # Return the difference, or current_year_co2 if there's no previous year data
-        return current_year_co2 - prev_year_co2
+    @staticmethod
+    def trees_per_capita(total_trees, head_count):
+        return total_trees / head_count if head_count else 0
 
 '''Biodiversity Overview Cards Ends'''
 
@@ -4722,6 +2528,8 @@ class BiodiversityMetricsGraphsView(APIView):
 class LogisticesOverviewAndGraphs(APIView):
     permission_classes = [IsAuthenticated]
 
+    @etag_response
+    @cache_response
     def get(self, request):
         user = request.user
         facility_id = request.GET.get('facility_id', 'all')
@@ -4730,24 +2538,13 @@ class LogisticesOverviewAndGraphs(APIView):
         try:
             # Determine the fiscal year if no year is specified
             if not year:
-                # Get the latest date from the Logistices model for the user
-                latest_date = Logistices.objects.filter(user=user).aggregate(latest_date=Max('DatePicker'))['latest_date']
-                
-                if latest_date:
-                    # Determine the fiscal year for the latest available date
-                    year = latest_date.year if latest_date.month >= 4 else latest_date.year - 1
-                else:
-                    # Default to the current year if no data is available
-                    year = datetime.now().year
+                # Latest fiscal year with Logistices data, the current year if there is none
+                year = latest_fiscal_year(user, Logistices, default=datetime.now().year)
             else:
                 year = int(year)
 
-            # Define fiscal year ranges
-            start_date = datetime(year, 4, 1)
-            end_date = datetime(year + 1, 3, 31)
-
-            # Filters
-            filters = {'user': user, 'DatePicker__range': (start_date, end_date)}
+            # Filters; fiscal_year/fiscal_month are stored columns covered by an index
+            filters = {'user': user, 'fiscal_year': year}
             if facility_id != 'all':
                 filters['facility__facility_id'] = facility_id
 
@@ -4800,7 +2597,7 @@ class LogisticesOverviewAndGraphs(APIView):
             )['total_fuel_consumed']
 
             # Monthly Fuel Consumption
-            monthly_data = current_year_data.annotate(month=ExtractMonth('DatePicker')).values('month').annotate(
+            monthly_data = current_year_data.values(month=F('fiscal_month')).annotate(
                 total_fuel=Coalesce(Sum('fuel_consumption', output_field=FloatField()), Value(0.0, output_field=FloatField()))
             )
             monthly_fuel = {d['month']: d['total_fuel'] for d in monthly_data}
@@ -4820,8 +2617,8 @@ class LogisticesOverviewAndGraphs(APIView):
                 donut_chart_data = [{"facility_name": "No Facility", "percentage": 0}]
 
             # Logistices Types Fuel Consumption
-            type_month_data = current_year_data.annotate(month=ExtractMonth('DatePicker')).values(
-                'month', 'logistices_types'
+            type_month_data = current_year_data.values(
+                'logistices_types', month=F('fiscal_month')
             ).annotate(
                 total_fuel=Coalesce(Sum('fuel_consumption', output_field=FloatField()), Value(0.0, output_field=FloatField()))
             )
@@ -5059,174 +2856,83 @@ class LogisticesOverviewAndGraphs(APIView):
 
 #         except Exception as e:
 #             error_message = f"An error occurred: {str(e)}"
-#             print(error_message)
+#             logger.exception("An error occurred: %s", e)
 #             return Response({'error': error_message}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
-class EmissionCalculations(APIView):
-    permission_classes = [IsAuthenticated]
-
-    def get(self, request):
-        user = request.user
-        year = request.GET.get('year', None)
-        facility_id = request.GET.get('facility_id', 'all')
-        facility_location = request.GET.get('facility_location', None)
-
+def emission_filters(user, params):
+    """
+    Resolves the fiscal year and the queryset filters of the emissions chart.
+    Raises ValueError with the message to return for invalid parameters.
+    """
+    year = params.get('year', None)
+    facility_id = params.get('facility_id', 'all')
+    facility_location = params.get('facility_location', None)
+
+    filters = {'user': user}
+    today = datetime.now()
+
+    # Year calculation
+    if year:
         try:
-            filters = {'user': user}
-            today = datetime.now()
+            year = int(year)
+        except ValueError:
+            raise ValueError('Invalid year parameter.')
+    else:
+        # Get latest dates from all relevant models
+        latest_dates = [latest_entry_date(user, model) for model in (Energy, Water, Waste, Logistices)]
+        latest_date = max(filter(None, latest_dates), default=None)
+
+        if latest_date:
+            # Get the fiscal year from the latest available date
+            year = latest_date.year if latest_date.month >= 4 else latest_date.year - 1
+        else:
+            # If no data exists, default to the current fiscal year
+            year = today.year if today.month >= 4 else today.year - 1
 
-            # Year calculation
-            if year:
-                try:
-                    year = int(year)
-                except ValueError:
-                    return Response({'error': 'Invalid year parameter.'}, status=status.HTTP_400_BAD_REQUEST)
-            else:
-                # Get latest dates from all relevant models
-                latest_energy_date = Energy.objects.filter(user=user).aggregate(latest_date=Max('DatePicker'))['latest_date']
-                latest_water_date = Water.objects.filter(user=user).aggregate(latest_date=Max('DatePicker'))['latest_date']
-                latest_waste_date = Waste.objects.filter(user=user).aggregate(latest_date=Max('DatePicker'))['latest_date']
-                latest_logistices_date = Logistices.objects.filter(user=user).aggregate(latest_date=Max('DatePicker'))['latest_date']
-
-                # If there are no records, default to current year
-                latest_dates = [latest_energy_date, latest_water_date, latest_waste_date, latest_logistices_date]
-                latest_date = max(filter(None, latest_dates), default=None)
-
-                if latest_date:
-                    # Get the fiscal year from the latest available date
-                    year = latest_date.year if latest_date.month >= 4 else latest_date.year - 1
-                else:
-                    # If no data exists, default to the current fiscal year
-                    year = today.year if today.month >= 4 else today.year - 1
-
-            # Fiscal year range
-            start_date, end_date = (
-                (datetime(year, 4, 1), datetime(year + 1, 3, 31))
-                if today.month >= 4
-                else (datetime(year - 1, 4, 1), datetime(year, 3, 31))
-            )
-            filters['DatePicker__range'] = (start_date, end_date)
+    # Fiscal year; before April the previous one is shown
+    filters['fiscal_year'] = year if today.month >= 4 else year - 1
 
-            # Facility ID filtering
-            if facility_id.lower() != 'all':
-                if not Facility.objects.filter(facility_id=facility_id).exists():
-                    return Response({'error': f'Facility with ID {facility_id} does not exist.'}, status=status.HTTP_400_BAD_REQUEST)
-                filters['facility__facility_id'] = facility_id
+    # Facility ID filtering
+    if facility_id.lower() != 'all':
+        if not Facility.objects.filter(facility_id=facility_id).exists():
+            raise ValueError(f'Facility with ID {facility_id} does not exist.')
+        filters['facility__facility_id'] = facility_id
 
-            # Facility location filtering
-            if facility_location and facility_location.lower() != 'all':
-                if not Facility.objects.filter(facility_location__icontains=facility_location).exists():
-                    return Response({'error': f'No facility found with location {facility_location}.'}, status=status.HTTP_400_BAD_REQUEST)
-                filters['facility__facility_location__icontains'] = facility_location
+    # Facility location filtering
+    if facility_location and facility_location.lower() != 'all':
+        if not Facility.objects.filter(facility_location__icontains=facility_location).exists():
+            raise ValueError(f'No facility found with location {facility_location}.')
+        filters['facility__facility_location__icontains'] = facility_location
 
-            # Fetch energy, water, waste, and logistices data
-            energy_data = Energy.objects.filter(**filters)
-            water_data = Water.objects.filter(**filters)
-            waste_data = Waste.objects.filter(**filters)
-            logistices_data = Logistices.objects.filter(**filters)
+    return year, filters
 
-            # Check if data exists, if not set all emissions to zero
-            if not any([energy_data, water_data, waste_data, logistices_data]):
-                return Response({
-                    'year': year,
-                    'line_chart_data': [
-                        {"month": datetime(1900, month, 1).strftime('%b'), "total_emissions": 0}
-                        for month in list(range(4, 13)) + list(range(1, 4))
-                    ]
-                }, status=status.HTTP_200_OK)
 
-            # Energy Emission factors
-            electricity_factor = 0.82
-            fuel_factors = {
-                'coking_coal': 2.66,
-                'coke_oven_coal': 3.1,
-                'natural_gas': 2.7,
-                'diesel': 2.91 * 1000,  # Diesel in liters, convert to kg
-                'biomass_wood': 1.75,
-                'biomass_other_solid': 1.16
+def emission_line_chart(year, monthly_total_emissions, has_data):
+    # Without data every month is reported as zero
+    return {
+        'year': year,
+        'line_chart_data': [
+            {
+                "month": datetime(1900, month, 1).strftime('%b'),
+                "total_emissions": float(total_emissions) if has_data else 0,
             }
-            petrol_factor = 2.29 * 1000
-            diesel_factor = 2.91 * 1000
+            for month, total_emissions in zip(FISCAL_MONTH_ORDER, monthly_total_emissions)
+        ]
+    }
 
-            # Monthly totals (ordered by fiscal year: April - March)
-            month_order = [4, 5, 6, 7, 8, 9, 10, 11, 12, 1, 2, 3]
-            monthly_total_emissions = {}
-
-            for month in month_order:  # Loop over fiscal months
-                # Filter data for the specific month
-                monthly_energy = energy_data.filter(DatePicker__month=month)
-                monthly_water = water_data.filter(DatePicker__month=month)
-                monthly_waste = waste_data.filter(DatePicker__month=month)
-                monthly_logistices = logistices_data.filter(DatePicker__month=month)
-
-                # Calculate electricity emissions
-                hvac_sum = monthly_energy.aggregate(total=Coalesce(Sum('hvac'), 0.0))['total'] or 0
-                production_sum = monthly_energy.aggregate(total=Coalesce(Sum('production'), 0.0))['total'] or 0
-                stp_sum = monthly_energy.aggregate(total=Coalesce(Sum('stp'), 0.0))['total'] or 0
-                admin_block_sum = monthly_energy.aggregate(total=Coalesce(Sum('admin_block'), 0.0))['total'] or 0
-                utilities_sum = monthly_energy.aggregate(total=Coalesce(Sum('utilities'), 0.0))['total'] or 0
-                others_sum = monthly_energy.aggregate(total=Coalesce(Sum('others'), 0.0))['total'] or 0
-
-                electricity_emissions = (
-                    hvac_sum + production_sum + stp_sum + admin_block_sum + utilities_sum + others_sum
-                ) * electricity_factor
-
-                # Calculate fuel emissions
-                fuel_emissions = sum([ 
-                    (monthly_energy.aggregate(total=Coalesce(Sum('coking_coal'), 0.0))['total'] or 0) * fuel_factors['coking_coal'],
-                    (monthly_energy.aggregate(total=Coalesce(Sum('coke_oven_coal'), 0.0))['total'] or 0) * fuel_factors['coke_oven_coal'],
-                    (monthly_energy.aggregate(total=Coalesce(Sum('natural_gas'), 0.0))['total'] or 0) * fuel_factors['natural_gas'],
-                    (monthly_energy.aggregate(total=Coalesce(Sum('diesel'), 0.0))['total'] or 0) * fuel_factors['diesel'],
-                    (monthly_energy.aggregate(total=Coalesce(Sum('biomass_wood'), 0.0))['total'] or 0) * fuel_factors['biomass_wood'],
-                    (monthly_energy.aggregate(total=Coalesce(Sum('biomass_other_solid'), 0.0))['total'] or 0) * fuel_factors['biomass_other_solid']
-                ])
-                total_energy_emissions = electricity_emissions + fuel_emissions
-
-                # Calculate water usage Emissions
-                total_water = monthly_water.aggregate(
-                    total=Coalesce(Sum('Generated_Water'), 0.0)
-                    + Coalesce(Sum('Recycled_Water'), 0.0)
-                    + Coalesce(Sum('Softener_usage'), 0.0)
-                    + Coalesce(Sum('Boiler_usage'), 0.0)
-                    + Coalesce(Sum('otherUsage'), 0.0)
-                )['total']
-                
-                total_water_emissions = total_water * 0.46
-                
-                # Calculate waste emissions
-                total_waste_emissions = sum([
-                    (monthly_waste.aggregate(total=Coalesce(Sum('Landfill_waste'), 0.0))['total'] or 0) * 300,
-                    (monthly_waste.aggregate(total=Coalesce(Sum('Recycle_waste'), 0.0))['total'] or 0) * 10
-                ])
-                
-                # Calculate Logistices emissions
-                total_logistices_emissions = sum([
-                    (monthly_logistices.filter(Typeof_fuel='diesel').aggregate(
-                        total=Coalesce(Sum('fuel_consumption'), 0.0))['total'] or 0) * diesel_factor,
-                    (monthly_logistices.filter(Typeof_fuel='petrol').aggregate(
-                        total=Coalesce(Sum('fuel_consumption'), 0.0))['total'] or 0) * petrol_factor
-                ])
-                
-                # Total emissions (energy + water + waste + logistices)
-                total_emissions = total_energy_emissions + total_water_emissions + total_waste_emissions + total_logistices_emissions
-                
-                # Store monthly emissions data
-                monthly_total_emissions[month] = total_emissions
 
-            # Prepare the response data for line chart
-            line_chart_data = []
-            for month in month_order:
-                month_name = datetime(1900, month, 1).strftime('%b')  # Get month name
-                line_chart_data.append({
-                    "month": month_name,
-                    "total_emissions": monthly_total_emissions.get(month, 0)
-                })
+class EmissionCalculations(APIView):
+    permission_classes = [IsAuthenticated]
 
-            response_data = {
-                'year': year,
-                'line_chart_data': line_chart_data
-            }
+    @etag_response
+    @cache_response
+    def get(self, request):
+        try:
+            year, filters = emission_filters(request.user, request.GET)
 
-            return Response(response_data, status=status.HTTP_200_OK)
+            # One grouped query per model, factors applied as a month x factor matrix product
+            monthly_total_emissions, has_data = monthly_emissions(filters)
+
+            return Response(emission_line_chart(year, monthly_total_emissions, has_data), status=status.HTTP_200_OK)
         except Exception as e:
             return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
@@ -5236,6 +2942,8 @@ class EmissionCalculations(APIView):
 class YearFacilityDataAPIView(APIView):
     permission_classes = [IsAuthenticated]
 
+    @etag_response
+    @cache_response
     def get(self, request):
         try:
             user = request.user
@@ -5248,39 +2956,14 @@ class YearFacilityDataAPIView(APIView):
                     status=status.HTTP_400_BAD_REQUEST
                 )
 
-            # Map categories to models (but we will only be interested in the fiscal years)
-            model_serializer_map = {
-                'waste': Waste,
-                'energy': Energy,
-                'water': Water,
-                'biodiversity': Biodiversity,
-                'logistics': Logistices,
-            }
-
-            # Fetch fiscal years from all categories (models)
-            fiscal_years_set = set()
-            for model in model_serializer_map.values():
-                queryset = model.objects.filter(user=user)
-                if facility_id != 'all':
-                    queryset = queryset.filter(facility__facility_id=facility_id)
-
-                # Map each record's year to the fiscal year
-                for record in queryset.values('DatePicker'):
-                    record_date = record['DatePicker']
-                    if record_date:
-                        record_year = record_date.year
-                        record_month = record_date.month
-                        
-                        # Adjust year based on fiscal year (April to March)
-                        fiscal_year = record_year if record_month >= 4 else record_year - 1
-                        fiscal_years_set.add(fiscal_year)
+            # Distinct fiscal years across all categories (models), read from the indexed column
+            fiscal_years = available_fiscal_years(user, [Waste, Energy, Water, Biodiversity, Logistices], facility_id)
 
             # If no fiscal years found, default to 0
-            if not fiscal_years_set:
+            if not fiscal_years:
                 years_list = [{"year": 0}]
             else:
-                # Convert set to list and sort the fiscal years
-                years_list = [{"year": year} for year in sorted(list(fiscal_years_set), reverse=True)]
+                years_list = [{"year": year} for year in fiscal_years]
 
             return Response({
                 "facility_id": facility_id,
@@ -5289,8 +2972,394 @@ class YearFacilityDataAPIView(APIView):
 
         except Exception as e:
             error_message = f"An error occurred: {str(e)}"
-            print(error_message)  # For debugging purposes, consider using a logger in production
+            logger.exception("An error occurred: %s", e)
             return Response({'error': error_message}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 '''YearFilter Ends'''
 
+
+'''Dashboard Batch Starts'''
+# Overview endpoints that can be computed together, named after their standalone URLs
+DASHBOARD_WIDGETS = {
+    view.__name__: view for view in [
+        OverallUsageView,
+        WasteViewCard_Over, FoodWasteOverviewView, SolidWasteOverviewView, E_WasteOverviewView,
+        Biomedical_WasteOverviewView, Liquid_DischargeOverviewView, OthersOverviewView,
+        Waste_Sent_For_RecycleOverviewView, Waste_Sent_For_LandFillOverviewView,
+        StackedWasteOverviewView, WasteOverallDonutChartView, SentToLandfillOverviewView, SentToRecycledOverviewView,
+        EnergyViewCard_Over, HVACOverviewView, ProductionOverviewView, StpOverviewView, Admin_BlockOverviewView,
+        Utilities_OverviewView, Others_OverviewView, Renewable_EnergyOverView, Fuel_Used_OperationsOverView,
+        StackedEnergyOverviewView, EnergyAnalyticsView,
+        WaterViewCard_Over, Generated_WaterOverviewView, Recycle_WaterOverviewView, Softener_usageOverviewView,
+        Boiler_usageOverviewView, otherUsage_OverviewView, StackedWaterOverviewView, WaterAnalyticsView,
+        BiodiversityMetricsGraphsView, LogisticesOverviewAndGraphs, EmissionCalculations, YearFacilityDataAPIView,
+    ]
+}
+
+def metric_overviews(user, views, year, facility_id, facility_location):
+    """
+    Payloads of the MetricOverviewView widgets {name: view} from one rollup
+    query per fiscal year (one in total when the year is given) and at most
+    one latest-year lookup per model.
+    """
+    latest_years = {}
+    years = {}
+    for name, view in views.items():
+        if year:
+            years[name] = year
+        else:
+            if view.model not in latest_years:
+                latest_years[view.model] = latest_fiscal_year(user, view.model, default=datetime.now().year)
+            years[name] = latest_years[view.model]
+
+    payloads = {}
+    for widget_year in set(years.values()):
+        names = [name for name in views if years[name] == widget_year]
+        cells = metric_cells(
+            user, widget_year, {metric_name(views[name].model, views[name].field) for name in names},
+            facility_id, facility_location,
+        )
+        for name in names:
+            view = views[name]
+            payloads[name] = metric_overview(view.field, widget_year, cells[metric_name(view.model, view.field)])
+    return payloads
+
+
+# Headers answered by the batch's own ETag, not by each widget inside it
+BATCH_CONDITIONAL_HEADERS = ('HTTP_IF_NONE_MATCH', 'HTTP_IF_MATCH', 'HTTP_IF_MODIFIED_SINCE', 'HTTP_IF_UNMODIFIED_SINCE')
+
+
+def widget_request(request):
+    """
+    The batch request as the widget's standalone endpoint would receive it:
+    without the batch-only `widgets` parameter, so the widget's response cache
+    entries and ETags are the standalone ones, and without the conditional
+    headers, so a widget never answers 304 inside the batch.
+    """
+    django_request = copy(request._request)
+    django_request.GET = request._request.GET.copy()
+    django_request.GET.pop('widgets', None)
+    django_request.META = {
+        key: value for key, value in request.META.items() if key not in BATCH_CONDITIONAL_HEADERS
+    }
+    inner = Request(
+        django_request,
+        parsers=request.parsers,
+        authenticators=request.authenticators,
+        negotiator=request.negotiator,
+        parser_context=request.parser_context,
+    )
+    # Already authenticated by the batch
+    inner.user = request.user
+    inner.auth = request.auth
+    return inner
+
+
+class DashboardBatchView(APIView):
+    """
+    Computes several overview widgets for one shared year/facility filter in a single request,
+    e.g. /api/dashboard/batch/?widgets=WasteViewCard_Over,FoodWasteOverviewView&year=2023
+
+    The single-metric charts share one rollup read (see metric_overviews); the
+    other widgets run their own view on widget_request(), so they share cache
+    entries with their standalone endpoints.
+    """
+    permission_classes = [IsAuthenticated]
+
+    @etag_response
+    def get(self, request):
+        user = request.user
+        facility_id = request.GET.get('facility_id', 'all')
+        facility_location = request.GET.get('facility_location')
+        year = request.GET.get('year')
+        widgets = list(dict.fromkeys(
+            name.strip() for name in request.GET.get('widgets', '').split(',') if name.strip()
+        ))
+
+        if not widgets:
+            return Response({'error': 'Provide the widgets to compute, e.g. widgets=WasteViewCard_Over,FoodWasteOverviewView.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        unknown = [name for name in widgets if name not in DASHBOARD_WIDGETS]
+        if unknown:
+            return Response({'error': f"Unknown widgets: {', '.join(unknown)}."}, status=status.HTTP_400_BAD_REQUEST)
+
+        if year:
+            try:
+                year = int(year)
+            except ValueError:
+                return Response({'error': 'Year must be an integer.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        # Validated once for every widget instead of per endpoint call
+        if facility_id.lower() != 'all' and not Facility.objects.filter(facility_id=facility_id, user=user).exists():
+            return Response({'error': 'Invalid facility ID or not associated with the logged-in user.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        computed = metric_overviews(user, {
+            name: DASHBOARD_WIDGETS[name] for name in widgets if issubclass(DASHBOARD_WIDGETS[name], MetricOverviewView)
+        }, year, facility_id, facility_location)
+
+        results = {}
+        errors = {}
+        for name in widgets:
+            if name in computed:
+                results[name] = computed[name]
+                continue
+
+            # Widgets share this request's authentication and filters, minus the batch-only parts
+            inner = widget_request(request)
+            widget = DASHBOARD_WIDGETS[name]()
+            widget.setup(inner._request)
+            widget.request = inner
+            widget.format_kwarg = None
+            response = widget.get(inner)
+
+            if response.status_code >= 400:
+                errors[name] = response.data
+            else:
+                results[name] = response.data
+
+        return Response({
+            'year': year,
+            'facility_id': facility_id,
+            'widgets': results,
+            'errors': errors
+        }, status=status.HTTP_200_OK)
+
+'''Dashboard Batch Ends'''
+
+'''Activity Export Starts'''
+class ActivityExportView(APIView):
+    """
+    Streams raw activity rows across fiscal years as CSV or NDJSON, for one
+    model (/api/export/waste/) or all of them (/api/export/all/). Accepts the
+    FacilityDateFilterBase filters: facility_id, facility_location, start_year, end_year.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, model_name):
+        user = request.user
+        # 'format' is taken by DRF's content negotiation
+        export_format = request.GET.get('export_format', 'csv').lower()
+
+        if export_format not in EXPORT_FORMATS:
+            return Response({'error': f"export_format must be one of: {', '.join(EXPORT_FORMATS)}."}, status=status.HTTP_400_BAD_REQUEST)
+
+        if model_name == 'all':
+            names = list(EXPORT_MODELS)
+        elif model_name in EXPORT_MODELS:
+            names = [model_name]
+        else:
+            return Response({'error': f"Unknown export '{model_name}'."}, status=status.HTTP_404_NOT_FOUND)
+
+        sections = []
+        columns = []
+        for name in names:
+            model, filterset_class = EXPORT_MODELS[name]
+            filterset = filterset_class(data=request.GET, queryset=model.objects.filter(user=user))
+            if not filterset.is_valid():
+                return Response({'error': filterset.errors}, status=status.HTTP_400_BAD_REQUEST)
+            try:
+                queryset = filterset.qs
+            except ValidationError as e:
+                return Response({'error': e.messages}, status=status.HTTP_400_BAD_REQUEST)
+
+            sections.append((name, export_rows(queryset)))
+            columns += [column for column in export_columns(model) if column not in columns]
+
+        if export_format == 'csv':
+            content = stream_csv(sections, columns)
+        else:
+            content = stream_ndjson(sections)
+
+        response = StreamingHttpResponse(content, content_type=EXPORT_FORMATS[export_format])
+        response['Content-Disposition'] = f'attachment; filename="{model_name}_export.{export_format}"'
+        return response
+
+'''Activity Export Ends'''
+
+'''Activity Import Starts'''
+class ActivityImportView(APIView):
+    """
+    Bulk imports a CSV/XLSX upload (multipart field 'file') into /api/import/<waste|energy|water>/.
+    Every row is validated before anything is written; pass partial=true to insert the valid rows anyway
+    and upsert=true to overwrite the entries of months that already have one.
+    """
+    permission_classes = [IsAuthenticated]
+    parser_classes = [MultiPartParser, FormParser]
+
+    def post(self, request, model_name):
+        if model_name not in IMPORT_SPECS:
+            return Response({'error': f"Unknown import '{model_name}'."}, status=status.HTTP_404_NOT_FOUND)
+
+        uploaded_file = request.FILES.get('file')
+        if not uploaded_file:
+            return Response({'error': 'Upload the spreadsheet in the "file" field.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        partial = str(request.data.get('partial', '')).lower() in ('1', 'true', 'yes')
+        upsert = str(request.data.get('upsert', '')).lower() in ('1', 'true', 'yes')
+        try:
+            report = import_activity_file(request.user, model_name, uploaded_file, partial=partial, upsert=upsert)
+        except ImportFileError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        except ImportConflictError as e:
+            return Response({'error': str(e)}, status=status.HTTP_409_CONFLICT)
+
+        if report['errors'] and not (report['created'] or report['updated']):
+            return Response(report, status=status.HTTP_400_BAD_REQUEST)
+        return Response(report, status=status.HTTP_201_CREATED)
+
+'''Activity Import Ends'''
+
+'''Activity Batch Edits Starts'''
+class ActivityBatchView(APIView):
+    """
+    Set-based edits of /api/batch/<waste|energy|water|biodiversity|logistices>/.
+    The body selects rows with {"ids": [...]} or {"filter": {"facility_id", "start_date", "end_date"}};
+    PATCH also takes {"changes": {field: value}}. Both answer with the number of affected rows.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def patch(self, request, model_name):
+        if model_name not in BATCH_MODELS:
+            return Response({'error': f"Unknown batch '{model_name}'."}, status=status.HTTP_404_NOT_FOUND)
+        try:
+            updated = batch_update(request.user, model_name, request.data)
+        except BatchRequestError as e:
+            return Response({'error': e.args[0]}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({'updated': updated}, status=status.HTTP_200_OK)
+
+    def delete(self, request, model_name):
+        if model_name not in BATCH_MODELS:
+            return Response({'error': f"Unknown batch '{model_name}'."}, status=status.HTTP_404_NOT_FOUND)
+        try:
+            deleted = batch_delete(request.user, model_name, request.data)
+        except BatchRequestError as e:
+            return Response({'error': e.args[0]}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({'deleted': deleted}, status=status.HTTP_200_OK)
+
+'''Activity Batch Edits Ends'''
+
+
+'''Async Analytics Starts'''
+class AsyncAPIView(View):
+    """
+    Base of the async analytics views. DRF's APIView cannot serve async
+    handlers, so these are plain Django views; dispatch() applies the API's
+    JWT authentication, permission classes and throttles the way
+    APIView.initial() does before the handler runs.
+    """
+    permission_classes = api_settings.DEFAULT_PERMISSION_CLASSES
+    throttle_classes = api_settings.DEFAULT_THROTTLE_CLASSES
+
+    async def dispatch(self, request, *args, **kwargs):
+        denied = await sync_to_async(self.check_request)(request)
+        if denied is not None:
+            return denied
+        return await super().dispatch(request, *args, **kwargs)
+
+    def check_request(self, request):
+        """Sets request.user from the token; returns the error response when the request may not proceed."""
+        try:
+            result = CachedJWTAuthentication().authenticate(request)
+        except AuthenticationFailed:
+            return not_authenticated()
+        request.user = result[0] if result else AnonymousUser()
+
+        for permission in (permission_class() for permission_class in self.permission_classes):
+            if not permission.has_permission(request, self):
+                if not request.user.is_authenticated:
+                    return not_authenticated()
+                return JsonResponse({"detail": "You do not have permission to perform this action."}, status=403)
+
+        waits = [
+            throttle.wait() for throttle in (throttle_class() for throttle_class in self.throttle_classes)
+            if not throttle.allow_request(request, self)
+        ]
+        if waits:
+            wait = max((wait for wait in waits if wait is not None), default=None)
+            response = JsonResponse({"detail": "Request was throttled."}, status=429)
+            if wait is not None:
+                response['Retry-After'] = str(math.ceil(wait))
+            return response
+        return None
+
+
+def not_authenticated():
+    return JsonResponse({"detail": "Authentication credentials were not provided or are invalid."}, status=401)
+
+
+class OverallUsageAsyncView(AsyncAPIView):
+    """OverallUsageView with the five category totals queried concurrently."""
+
+    async def get(self, request):
+        user = request.user
+        try:
+            year, facility_id, filters = await sync_to_async(overall_usage_filters)(user, request.GET)
+        except ValueError:
+            return JsonResponse(
+                {"error": "Invalid fiscal year format. Please provide a valid year, e.g., 2023."},
+                status=400
+            )
+
+        totals = await gather_queries(*(
+            partial(usage_total, model, total, filters)
+            for model, total in OVERALL_USAGE_TOTALS.values()
+        ))
+        overall_data = dict(zip(OVERALL_USAGE_TOTALS, totals))
+        return JsonResponse(overall_usage_response(user, year, facility_id, overall_data))
+
+
+class EmissionCalculationsAsyncView(AsyncAPIView):
+    """EmissionCalculations with the per-model emission queries run concurrently."""
+
+    async def get(self, request):
+        try:
+            year, filters = await sync_to_async(emission_filters)(request.user, request.GET)
+        except ValueError as e:
+            return JsonResponse({'error': str(e)}, status=400)
+        # Anything else is a server error, logged by Django's request handling
+        monthly_total_emissions, has_data = await monthly_emissions_async(filters)
+        return JsonResponse(emission_line_chart(year, monthly_total_emissions, has_data))
+
+'''Async Analytics Ends'''
+
+
+'''Metrics Starts'''
+class MetricsView(View):
+    """
+    Prometheus scrape endpoint. Scrapers send METRICS_TOKEN as a bearer token;
+    without a token configured only staff users get the metrics, unless
+    METRICS_PUBLIC opts out for a network where the endpoint is not reachable
+    from outside.
+    """
+
+    def get(self, request):
+        token = getattr(settings, 'METRICS_TOKEN', None)
+        if token and constant_time_compare(request.headers.get('Authorization', ''), f'Bearer {token}'):
+            allowed = True
+        else:
+            allowed = getattr(settings, 'METRICS_PUBLIC', False) or staff_user(request) is not None
+        if not allowed:
+            return HttpResponse(status=401)
+        return HttpResponse(render_metrics(), content_type=METRICS_CONTENT_TYPE)
+
+'''Metrics Ends'''
+
+
+'''Slow Queries Starts'''
+class SlowQueryView(APIView):
+    """Recently captured slow queries with their plans, newest first. Staff only."""
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        try:
+            limit = int(request.GET.get('limit', 50))
+        except ValueError:
+            return Response({"error": "limit must be an integer."}, status=status.HTTP_400_BAD_REQUEST)
+
+        threshold = slow_query_threshold()
+        return Response({
+            "threshold_ms": None if threshold is None else threshold * 1000,
+            "queries": recent_slow_queries(max(limit, 1)),
+        }, status=status.HTTP_200_OK)
+
+'''Slow Queries Ends'''